@@ -0,0 +1,67 @@
+import argparse
+import json
+import time
+
+from server.modules.comm.message import Message, MessageType
+from server.modules.comm.message.codec import JSON_CODEC, BINARY_CODEC
+
+# Mensajes representativos del tráfico entre nodos
+SAMPLES = {
+    "heartbeat": lambda: Message(MessageType.DISCOVERY_HEARTBEAT, "172.25.0.12", "172.25.0.3",
+                                 payload={"name": "data1", "ip": "172.25.0.12", "port": 9000, "role": "DATA"}),
+    "replicate_dir": lambda: Message(MessageType.DATA_REPLICATE_DIR_CREATE, "172.25.0.12", "172.25.0.13",
+                                     payload={"path": "/home/user/projects/dftp/docs", "version": 12}),
+    "query_ack": lambda: Message(MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, "172.25.0.3", "172.25.0.20",
+                                 payload={"nodes": [{"name": f"data{i}", "ip": f"172.25.0.{i}", "port": 9000, "role": "DATA"} for i in range(10)]},
+                                 metadata={"status": "OK"}),
+    "merge_state": lambda: Message(MessageType.MERGE_STATE, "172.25.0.12", "172.25.0.13",
+                                   payload={"files": {f"/user/file_{i}.txt": {"version": i, "size": i * 1024, "nodes": ["data1", "data2", "data3"]} for i in range(2000)}}),
+}
+
+
+def bench(codec, message: Message, iterations: int) -> dict:
+    """Mide encode/decode de message con codec y retorna mensajes por segundo y bytes por mensaje."""
+    data = codec.encode(message)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.encode(message)
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        codec.decode(data)
+    decode_s = time.perf_counter() - start
+
+    return {"bytes": len(data), "encode_per_s": iterations / encode_s, "decode_per_s": iterations / decode_s}
+
+
+def run(iterations: int = 20000) -> list[dict]:
+    results = []
+    for name, build in SAMPLES.items():
+        message = build()
+        n = max(1, iterations // 100) if name == "merge_state" else iterations
+
+        for codec in (JSON_CODEC, BINARY_CODEC):
+            results.append({"bench": "codec", "message": name, "codec": codec.name, **bench(codec, message, n)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara JsonCodec y BinaryCodec")
+    parser.add_argument("--iterations", type=int, default=20000, help="Iteraciones por mensaje (merge_state usa 1/100)")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    if args.json:
+        print(json.dumps({"results": results}, indent=2))
+        return
+
+    print(f"{'mensaje':<14} {'codec':<7} {'bytes':>9} {'encode/s':>12} {'decode/s':>12}")
+    for r in results:
+        print(f"{r['message']:<14} {r['codec']:<7} {r['bytes']:>9} {r['encode_per_s']:>12.0f} {r['decode_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
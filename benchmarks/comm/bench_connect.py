@@ -0,0 +1,81 @@
+import argparse
+import json
+import time
+
+from server.modules.comm import Message
+from server.modules.comm.communication_node.tcp_protocol import TCPClient
+from benchmarks.comm.bench_rpc import add_cluster_args, cluster_from_args
+from benchmarks.comm.cluster import BenchCluster, BENCH_ECHO, make_payload, summarize
+
+
+def _new_client(cluster: BenchCluster) -> TCPClient:
+    t = cluster.transport
+    return TCPClient(multiplex=t["multiplex"], framing=t["framing"], codec=t["codec"])
+
+
+def _measure(cluster: BenchCluster, rounds: int, cold: bool, size: int) -> dict:
+    ip = cluster.ips[0]
+    payload = make_payload(size)
+    client = None if cold else _new_client(cluster)
+    if client is not None:
+        client.send_message(ip, cluster.port, Message(BENCH_ECHO, cluster.client.ip, ip, payload=payload), timeout=5.0)
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            c = _new_client(cluster) if cold else client
+            response = c.send_message(ip, cluster.port, Message(BENCH_ECHO, cluster.client.ip, ip, payload=payload), timeout=5.0)
+            if cold:
+                c.close()
+            if response is None:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    finally:
+        if client is not None:
+            client.close()
+
+    return summarize(latencies, time.perf_counter() - started, errors, size)
+
+
+def run(cluster: BenchCluster, rounds: int = 500, size: int = 100) -> list[dict]:
+    """
+    Compara una petición por una conexión nueva (connect + negociación de formato y codec en la
+    primera trama) con la misma petición sobre una conexión ya abierta.
+    """
+    warm = _measure(cluster, rounds, False, size)
+    cold = _measure(cluster, rounds, True, size)
+    return [
+        {"bench": "connect", "case": "warm", "size": size, **warm},
+        {"bench": "connect", "case": "cold", "size": size, **cold, "setup_ms": cold["p50_ms"] - warm["p50_ms"]},
+    ]
+
+
+def print_results(results: list[dict]):
+    print(f"{'case':<6} {'reqs':>6} {'errs':>5} {'p50 ms':>9} {'p99 ms':>9} {'setup ms':>9}")
+    for r in results:
+        print(f"{r['case']:<6} {r['requests']:>6} {r['errors']:>5} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r.get('setup_ms', 0.0):>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de abrir una conexión frente a reutilizarla")
+    add_cluster_args(parser)
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--size", type=int, default=100, help="Tamaño del payload en bytes")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    with cluster_from_args(args) as cluster:
+        results = run(cluster, args.rounds, args.size)
+
+    if args.json:
+        print(json.dumps({"transport": cluster.transport, "results": results}, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import time
+
+from server.modules.comm import Message
+from benchmarks.comm.bench_rpc import add_cluster_args, cluster_from_args
+from benchmarks.comm.cluster import BenchCluster, BENCH_ECHO, make_payload, summarize
+
+
+def bench_fanout(cluster: BenchCluster, targets: int, mode: str, size: int, rounds: int, timeout: float = 10.0) -> dict:
+    """Mide rounds multicasts de un BENCH_ECHO de size bytes a los primeros targets servidores."""
+    ips = cluster.ips[:targets]
+    msg = Message(BENCH_ECHO, cluster.client.ip, None, payload=make_payload(size))
+    cluster.client.multicast(ips, msg, mode=mode, port=cluster.port, timeout=timeout)
+
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = cluster.client.multicast(ips, msg, mode=mode, port=cluster.port, timeout=timeout)
+        if result.satisfied:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, elapsed, errors, size * targets)
+    # Coste por destino respecto a un único envío: cuánto añade cada nodo más al fan-out
+    summary["per_target_ms"] = summary["p50_ms"] / targets
+    return {"bench": "fanout", "targets": targets, "mode": mode, "size": size, **summary}
+
+
+def run(cluster: BenchCluster, modes=("all", "first"), size: int = 100, rounds: int = 500) -> list[dict]:
+    results = []
+    n = len(cluster.servers)
+    counts = sorted({1, *[2 ** i for i in range(1, n.bit_length()) if 2 ** i < n], n})
+    for mode in modes:
+        for targets in counts:
+            results.append(bench_fanout(cluster, targets, mode, size, rounds))
+    return results
+
+
+def print_results(results: list[dict]):
+    print(f"{'mode':<6} {'targets':>7} {'rounds':>6} {'errs':>5} {'p50 ms':>9} {'p99 ms':>9} {'ms/target':>10}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['targets']:>7} {r['requests']:>6} {r['errors']:>5} {r['p50_ms']:>9.3f} "
+              f"{r['p99_ms']:>9.3f} {r['per_target_ms']:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de multicast según el número de destinos")
+    add_cluster_args(parser)
+    parser.add_argument("--modes", nargs="+", default=["all", "first"], choices=("all", "quorum", "first"))
+    parser.add_argument("--size", type=int, default=100, help="Tamaño del payload en bytes")
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    with cluster_from_args(args) as cluster:
+        results = run(cluster, tuple(args.modes), args.size, args.rounds)
+
+    if args.json:
+        print(json.dumps({"transport": cluster.transport, "results": results}, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.comm.cluster import BenchCluster, DEFAULT_SIZES, make_payload, summarize
+
+
+def requests_for(size: int, requests: int, max_bytes: int) -> int:
+    """Peticiones a medir para un tamaño: requests, limitadas a max_bytes enviados (mínimo 5)."""
+    return max(5, min(requests, max_bytes // size))
+
+
+def bench_rpc(cluster: BenchCluster, size: int, requests: int, concurrency: int, compressible: bool = False,
+              timeout: float = 30.0) -> dict:
+    """
+    Envía requests BENCH_ECHO de size bytes desde concurrency hilos, repartidos entre los servidores
+    del cluster, y retorna latencias y throughput.
+    """
+    payload = make_payload(size, compressible)
+    ips = cluster.ips
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    remaining = [requests]
+
+    # Calentamiento: abre conexiones y negocia formato antes de medir
+    for ip in ips:
+        cluster.request(ip, {"data": ""}, timeout)
+
+    def worker(worker_id: int):
+        i = 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+
+            ip = ips[(worker_id + i) % len(ips)]
+            i += 1
+            start = time.perf_counter()
+            response = cluster.request(ip, payload, timeout)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response is None:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    return {"bench": "rpc", "size": size, "concurrency": concurrency, **summarize(latencies, elapsed, errors[0], size)}
+
+
+def run(cluster: BenchCluster, sizes=DEFAULT_SIZES, requests: int = 2000, max_bytes: int = 200 * 1024 * 1024,
+        concurrency: tuple[int, ...] = (1, 8), compressible: bool = False) -> list[dict]:
+    results = []
+    for size in sizes:
+        for c in concurrency:
+            results.append(bench_rpc(cluster, size, requests_for(size, requests, max_bytes), c, compressible))
+    return results
+
+
+def print_results(results: list[dict]):
+    print(f"{'size':>10} {'conc':>5} {'reqs':>6} {'errs':>5} {'req/s':>10} {'MiB/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        print(f"{r['size']:>10} {r['concurrency']:>5} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>10.1f} "
+              f"{r['throughput_mbps']:>9.1f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['max_ms']:>9.3f}")
+
+
+def add_cluster_args(parser: argparse.ArgumentParser):
+    """Opciones comunes de los benchmarks que levantan un BenchCluster."""
+    parser.add_argument("--nodes", type=int, default=4, help="Nodos servidor")
+    parser.add_argument("--port", type=int, default=19000)
+    parser.add_argument("--loopback", action="store_true", help="Usar el atajo loopback en vez de TCP")
+    parser.add_argument("--no-multiplex", action="store_true", help="Pool de conexiones en vez de canales multiplexados")
+    parser.add_argument("--framing", choices=("length", "line"))
+    parser.add_argument("--codec", choices=("binary", "json"))
+    parser.add_argument("--server", choices=("thread", "asyncio"), help="Backend del servidor")
+    parser.add_argument("--echo", action="store_true", help="Los servidores devuelven el payload completo")
+
+
+def cluster_from_args(args) -> BenchCluster:
+    return BenchCluster(nodes=args.nodes, port=args.port, use_loopback=args.loopback, echo=args.echo,
+                        multiplex=not args.no_multiplex, framing=args.framing, codec=args.codec, server_backend=args.server)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y latencia de RPC BENCH_ECHO por tamaño de payload")
+    add_cluster_args(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Tamaños de payload en bytes")
+    parser.add_argument("--requests", type=int, default=2000, help="Peticiones por tamaño (acotadas por --max-mb)")
+    parser.add_argument("--max-mb", type=int, default=200, help="MiB máximos enviados por tamaño")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Hilos cliente")
+    parser.add_argument("--compressible", action="store_true", help="Payload compresible en vez de aleatorio")
+    parser.add_argument("--json", action="store_true", help="Imprime los resultados en JSON")
+    args = parser.parse_args()
+
+    with cluster_from_args(args) as cluster:
+        results = run(cluster, args.sizes, args.requests, args.max_mb * 1024 * 1024, tuple(args.concurrency), args.compressible)
+
+    if args.json:
+        print(json.dumps({"transport": cluster.transport, "results": results}, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import base64
+import os
+import time
+
+from server.modules.comm import CommunicationNode, Message
+from server.modules.comm.communication_node import loopback
+
+# Tipo propio de los benchmarks: no está en MessageType, así que viaja como texto y va al carril "default"
+BENCH_ECHO = "BENCH_ECHO"
+
+# Tamaños de payload medidos por defecto (bytes)
+DEFAULT_SIZES = (100, 1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+
+def make_payload(size: int, compressible: bool = False) -> dict:
+    """
+    Payload de aproximadamente size bytes serializado. Por defecto es base64 de bytes aleatorios
+    (incompresible), para medir el transporte y no la compresión.
+    """
+    if compressible:
+        return {"data": "x" * size}
+    return {"data": base64.b64encode(os.urandom(size * 3 // 4)).decode()}
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(p * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+def summarize(latencies: list[float], elapsed: float, errors: int = 0, bytes_per_request: int = 0) -> dict:
+    """Resumen de una serie de latencias (segundos): percentiles en ms y throughput."""
+    values = sorted(latencies)
+    n = len(values)
+    return {
+        "requests": n,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": n / elapsed if elapsed > 0 else 0.0,
+        "throughput_mbps": n * bytes_per_request / elapsed / (1024 * 1024) if elapsed > 0 else 0.0,
+        "avg_ms": sum(values) / n * 1000 if n else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p90_ms": percentile(values, 0.90) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "max_ms": values[-1] * 1000 if n else 0.0,
+    }
+
+
+class BenchCluster:
+    """
+    N CommunicationNode servidores y un nodo cliente en el mismo host, cada uno en su propia IP de
+    loopback (127.0.0.<base+i>) y el mismo puerto, para que multicast pueda dirigirse a ellos por ip.
+
+    Los servidores responden BENCH_ECHO con un ack pequeño (o con el mismo payload si echo=True).
+    Por defecto el atajo loopback de CommunicationNode está desactivado: los mensajes pasan por TCP.
+
+    Parámetros de transporte (ver CommunicationNode): multiplex, framing, codec, server_backend.
+    """
+
+    def __init__(self, nodes: int = 4, base: int = 100, port: int = 19000, use_loopback: bool = False, echo: bool = False,
+                 multiplex: bool = True, framing: str = None, codec: str = None, server_backend: str = None):
+        self.port = port
+        self.echo = echo
+        self.transport = {"loopback": use_loopback, "multiplex": multiplex, "framing": framing or os.getenv("DFTP_COMM_FRAMING", "length"),
+                          "codec": codec or os.getenv("DFTP_COMM_CODEC", "binary"),
+                          "server_backend": server_backend or os.getenv("DFTP_COMM_SERVER", "thread")}
+
+        self._loopback_enabled = loopback.ENABLED
+        loopback.ENABLED = use_loopback
+        self.servers = [CommunicationNode(f"bench{i}", f"127.0.0.{base + 1 + i}", port, multiplex=multiplex,
+                                          server_backend=server_backend, framing=framing, codec=codec) for i in range(nodes)]
+        for node in self.servers:
+            node.register_handler(BENCH_ECHO, self._handler(node))
+
+        self.client = CommunicationNode("bench-client", f"127.0.0.{base}", port, multiplex=multiplex,
+                                        server_backend=server_backend, framing=framing, codec=codec)
+        time.sleep(0.1)
+
+    @property
+    def ips(self) -> list[str]:
+        return [node.ip for node in self.servers]
+
+    def request(self, ip: str, payload: dict, timeout: float = 30.0) -> Message | None:
+        """Envía un BENCH_ECHO desde el nodo cliente a ip y retorna la respuesta."""
+        msg = Message(BENCH_ECHO, self.client.ip, ip, payload=payload)
+        return self.client.send_message(ip, self.port, msg, await_response=True, timeout=timeout)
+
+    def close(self):
+        for node in [self.client, *self.servers]:
+            node.stop_server()
+        loopback.ENABLED = self._loopback_enabled
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _handler(self, node: CommunicationNode):
+        def handle(message: Message) -> Message:
+            payload = message.payload if self.echo else {"size": len(message.payload.get("data", ""))}
+            return Message(BENCH_ECHO, node.ip, message.header.get("src"), payload=payload, metadata={"status": "OK"})
+        return handle
@@ -0,0 +1,122 @@
+"""
+Suite de benchmarks de la capa de comunicación.
+
+Levanta un BenchCluster en loopback y ejecuta:
+    - codec: encode/decode de Message con cada codec (bench_codec).
+    - rpc: throughput y p50/p99 de BENCH_ECHO de 100 B a 10 MB (bench_rpc).
+    - fanout: multicast a 1..N nodos en modos "all" y "first" (bench_fanout).
+    - connect: petición por conexión nueva frente a conexión reutilizada (bench_connect).
+
+Uso desde la raíz del repositorio:
+    python -m benchmarks.comm.run --output baseline.json
+    python -m benchmarks.comm.run --baseline baseline.json --output new.json
+
+Con --baseline se imprime, para cada resultado presente en ambos archivos, la variación de
+p50/p99 y throughput respecto a la línea base. La configuración del transporte (multiplex,
+framing, codec, backend, loopback) y las variables DFTP_* quedan registradas en "meta".
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.comm import bench_codec, bench_connect, bench_fanout, bench_rpc
+from benchmarks.comm.bench_rpc import add_cluster_args, cluster_from_args
+from benchmarks.comm.cluster import DEFAULT_SIZES
+
+BENCHES = ("codec", "rpc", "fanout", "connect")
+
+# Campos que identifican un resultado para compararlo con la línea base
+KEY_FIELDS = ("bench", "message", "codec", "size", "concurrency", "targets", "mode", "case")
+
+
+def result_key(result: dict) -> tuple:
+    return tuple((f, result[f]) for f in KEY_FIELDS if f in result)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+
+    except Exception:
+        return None
+
+
+def compare(results: list[dict], baseline: list[dict]):
+    """Imprime la variación de cada resultado respecto al mismo resultado de la línea base."""
+    base = {result_key(r): r for r in baseline}
+    print(f"\n{'resultado':<56} {'p50':>9} {'p99':>9} {'throughput':>11}")
+    for r in results:
+        b = base.get(result_key(r))
+        if b is None:
+            continue
+        label = " ".join(f"{v}" for _, v in result_key(r))
+        if r["bench"] == "codec":
+            print(f"{label:<56} {'':>9} {'':>9} {_delta(r['encode_per_s'] + r['decode_per_s'], b['encode_per_s'] + b['decode_per_s']):>11}")
+            continue
+        print(f"{label:<56} {_delta(r['p50_ms'], b['p50_ms']):>9} {_delta(r['p99_ms'], b['p99_ms']):>9} "
+              f"{_delta(r['throughput_rps'], b['throughput_rps']):>11}")
+
+
+def _delta(new: float, old: float) -> str:
+    if not old:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la capa de comunicación (salida JSON)")
+    add_cluster_args(parser)
+    parser.add_argument("--benches", nargs="+", choices=BENCHES, default=list(BENCHES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Tamaños de payload de rpc")
+    parser.add_argument("--requests", type=int, default=2000, help="Peticiones rpc por tamaño (acotadas por --max-mb)")
+    parser.add_argument("--max-mb", type=int, default=200, help="MiB máximos enviados por tamaño en rpc")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8], help="Hilos cliente en rpc")
+    parser.add_argument("--rounds", type=int, default=500, help="Rondas de fanout y connect")
+    parser.add_argument("--iterations", type=int, default=20000, help="Iteraciones de codec")
+    parser.add_argument("--output", help="Archivo donde guardar los resultados (por defecto stdout)")
+    parser.add_argument("--baseline", help="Resultados anteriores con los que comparar")
+    args = parser.parse_args()
+
+    results = []
+    if "codec" in args.benches:
+        results += bench_codec.run(args.iterations)
+
+    with cluster_from_args(args) as cluster:
+        if "rpc" in args.benches:
+            results += bench_rpc.run(cluster, args.sizes, args.requests, args.max_mb * 1024 * 1024, tuple(args.concurrency))
+        if "fanout" in args.benches:
+            results += bench_fanout.run(cluster, rounds=args.rounds)
+        if "connect" in args.benches:
+            results += bench_connect.run(cluster, rounds=args.rounds)
+
+    report = {
+        "meta": {
+            "timestamp": time.time(),
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "nodes": args.nodes,
+            "transport": cluster.transport,
+            "env": {k: v for k, v in os.environ.items() if k.startswith("DFTP_")},
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"# {len(results)} resultados guardados en {args.output}")
+    elif not args.baseline:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
@@ -15,12 +15,12 @@ class AuthNode(GossipNode):
     Nodo de autenticación (AuthNode) con replicación gossip.
     """
 
-    def __init__(self, node_name: str, ip: str, port: int, discovery_timeout: float = 0.8, heartbeat_interval: int = 2, discovery_workers: int = 32):
+    def __init__(self, node_name: str, ip: str, port: int, discovery_timeout: float = 0.8, heartbeat_interval: int = 2):
         
         self._users_lock = threading.Lock()
         self._ensure_users_file()
 
-        super().__init__(node_name=node_name, ip=ip, port=port, discovery_timeout=discovery_timeout, heartbeat_interval=heartbeat_interval, node_role=NodeType.AUTH, discovery_workers=discovery_workers)
+        super().__init__(node_name=node_name, ip=ip, port=port, discovery_timeout=discovery_timeout, heartbeat_interval=heartbeat_interval, node_role=NodeType.AUTH)
 
         # Registrar handlers de autenticación
         self.register_handler(MessageType.AUTH_VALIDATE_USER, self._handle_validate_user)
@@ -1,15 +1,19 @@
 import posixpath
+import shutil
 import socket
 import threading
 import logging
 import os
 import time
 import uuid
+import contextvars
 
 from typing import Dict
 from server.modules.consistency.gossip_node import GossipNode
 from server.modules.discovery import LocationNode, NodeType
 from server.modules.comm import Message, MessageType
+from server.modules.comm.communication_node.deadline import remaining_budget
+from server.modules.comm.communication_node.stream import open_stream, listen_stream, accept_stream, send_stream, recv_stream
 from server.modules.app.data_node.file_system_manager import FileSystemManager, SecurityError
 from server.modules.app.data_node.metadata import FileMetadata, MetadataTable
 
@@ -71,6 +75,24 @@ class DataNode(GossipNode):
         self.register_handler(MessageType.DATA_SYNC_FILE_READY, self._handle_sync_file_ready)
         self.register_handler(MessageType.SEND_STATE, self._handle_send_state)
 
+    # --------------------------------------------------
+    # Load
+    # --------------------------------------------------
+
+    def get_load(self) -> dict:
+        """
+        Carga de LocationNode más los sockets PASV abiertos a la espera de su transferencia
+        (cuentan como transferencias en curso) y los bytes libres del almacenamiento.
+        """
+        load = super().get_load()
+        with self._lock:
+            load["inflight"] += len(self._pasv_sockets)
+        try:
+            load["disk_free"] = shutil.disk_usage(self.fs.root_dir).free
+        except OSError:
+            logger.debug("[%s] No se pudo leer el espacio libre de %s", self.node_name, self.fs.root_dir)
+        return load
+
     def send_state(self, peer_ip):
         # Don't merge until initialization is complete
         logger.info("[DEBUG] Verificando si se paso el peer_ip correctamente desde %s", peer_ip)
@@ -284,25 +306,16 @@ class DataNode(GossipNode):
             logger.info("[%s] Conectando a PASV en %s:%d para descargar %s", 
                        self.node_name, peer_ip, pasv_port, filename)
             
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(300)  # 5 minutos de timeout
-            sock.connect((peer_ip, pasv_port))
+            sock = open_stream(peer_ip, pasv_port, timeout=30)
             
             # Guardar archivo - filename incluye el namespace (ej: "anonymous/beltran.txt")
             local_path = os.path.join(self.fs.root_dir, filename)
             os.makedirs(os.path.dirname(local_path), exist_ok=True)
             
-            file_size = 0
-            with open(local_path, "wb") as f:
-                while True:
-                    data = sock.recv(65536)  # 64KB chunks
-                    if not data:
-                        break
-                    f.write(data)
-                    file_size += len(data)
+            stats = recv_stream(sock, local_path, totals=self.stream_totals)
             
-            logger.info("[%s] Archivo %s descargado desde %s (%d bytes)", 
-                       self.node_name, filename, peer_ip, file_size)
+            logger.info("[%s] Archivo %s descargado desde %s (%r)", 
+                       self.node_name, filename, peer_ip, stats)
             
         except Exception as e:
             logger.exception("[%s] Error descargando archivo %s desde %s:%d: %s", 
@@ -340,10 +353,7 @@ class DataNode(GossipNode):
                 )
             
             # Abrir socket PASV en un puerto disponible
-            pasv_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            pasv_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            pasv_sock.bind((self.ip, 0))  # Puerto automático
-            pasv_sock.listen(1)
+            pasv_sock = listen_stream(self.ip)  # Puerto automático
             pasv_port = pasv_sock.getsockname()[1]
             
             logger.info("[%s] Socket PASV abierto en puerto %d para archivo %s", 
@@ -385,23 +395,14 @@ class DataNode(GossipNode):
         client_sock = None
         try:
             logger.debug("[%s] Esperando conexión PASV para archivo %s", self.node_name, local_path)
-            client_sock, client_addr = pasv_sock.accept()
+            client_sock, client_addr = accept_stream(pasv_sock)
             logger.info("[%s] Cliente %s conectado a PASV para descargar %s", 
                        self.node_name, client_addr, local_path)
             
-            file_size = os.path.getsize(local_path)
-            
-            with open(local_path, "rb") as f:
-                bytes_sent = 0
-                while True:
-                    chunk = f.read(65536)  # 64KB chunks
-                    if not chunk:
-                        break
-                    client_sock.sendall(chunk)
-                    bytes_sent += len(chunk)
+            stats = send_stream(client_sock, local_path, totals=self.stream_totals)
             
-            logger.info("[%s] Archivo %s enviado via PASV (%d bytes)", 
-                       self.node_name, local_path, bytes_sent)
+            logger.info("[%s] Archivo %s enviado via PASV (%r)", 
+                       self.node_name, local_path, stats)
             
         except Exception as e:
             logger.exception("[%s] Error sirviendo archivo %s por PASV: %s", 
@@ -605,11 +606,7 @@ class DataNode(GossipNode):
         return Message(MessageType.DATA_OPEN_PASV_ACK, self.ip, message.header.get("src"), payload={"ip": ip, "port": port}, metadata={"status": "OK"})
 
     def _open_pasv_socket(self) -> tuple[socket.socket, str, int]:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.bind((self.ip, 0))
-        sock.listen(1)
-        sock.settimeout(300)
+        sock = listen_stream(self.ip, timeout=300)
         return sock, sock.getsockname()[0], sock.getsockname()[1]
 
 
@@ -642,7 +639,7 @@ class DataNode(GossipNode):
 
         try:
             # Aceptar conexión de datos
-            data_conn, data_addr = sock.accept()
+            data_conn, data_addr = accept_stream(sock)
 
             # Listar filesystem
             namespace = self.fs.get_namespace(user)
@@ -664,11 +661,10 @@ class DataNode(GossipNode):
 
             logger.info("Sending List DATA to %s", data_addr)
             # 4. Enviar datos
-            for entry in lines:
-                line = f"{entry}\r\n"
-                data_conn.sendall(line.encode())
+            listing = "".join(f"{entry}\r\n" for entry in lines).encode()
+            stats = send_stream(data_conn, listing, totals=self.stream_totals)
 
-            logger.info("[%s] Data sent for LIST session %s", self.node_name, session_id)
+            logger.info("[%s] Data sent for LIST session %s (%r)", self.node_name, session_id, stats)
 
             if data_conn:
                 data_conn.close()
@@ -693,7 +689,6 @@ class DataNode(GossipNode):
         user = message.payload.get("user")
         cwd = message.payload.get("cwd")
         path = message.payload.get("path")
-        chunk_size = message.payload.get("chunk_size", 65536)
 
         if not all([session_id, user, cwd, path]):
             return Message(MessageType.DATA_RETR_FILE_ACK, self.ip, message.header.get("src"), payload={}, metadata={"status": "error", "message": "Missing required arguments"})
@@ -726,19 +721,17 @@ class DataNode(GossipNode):
                          payload={}, metadata={"status": "error", "message": "No passive socket for session"})
 
         try:
-            # Crear generator DESPUÉS de verificar que el archivo existe
-            generator = self.fs.read_stream(namespace, cwd, path, chunk_size=chunk_size)
-
             # Avisamos al routing node que ya puede enviar el 150 al cliente
             logger.info("[%s] Notifying processing node %s DATA_READY for session %s", self.node_name, message.header.get("src"), session_id)
             self.send_message(message.header.get("src"), 9000, Message(MessageType.DATA_READY, self.ip, message.header.get("src"), payload={"session_id": session_id}), await_response=False)
 
-            conn, addr = sock.accept()
+            conn, addr = accept_stream(sock)
             logger.info("[%s] Sending file for session %s...", self.node_name, session_id)
-            with conn:
-                for chunk in generator:
-                    conn.sendall(chunk)
-            logger.info("[%s] File sent for session %s", self.node_name, session_id)
+            with self.tracer.span("stream RETR") as span, conn, self.fs.open_read(namespace, cwd, path) as f:
+                stats = send_stream(conn, f, totals=self.stream_totals)
+                if span is not None:
+                    span.tag(bytes=stats.bytes)
+            logger.info("[%s] File sent for session %s (%r)", self.node_name, session_id, stats)
 
         except Exception as e:
             logger.exception("[%s] RETR transfer error: %s", self.node_name, str(e))
@@ -760,7 +753,6 @@ class DataNode(GossipNode):
         user = message.payload.get("user")
         cwd = message.payload.get("cwd")
         path = message.payload.get("path")
-        chunk_size = message.payload.get("chunk_size", 65536)
         replicate_to = message.payload.get("replicate_to", [])
         version = message.payload.get("version")
         transfer_id = message.payload.get("transfer_id")
@@ -781,17 +773,13 @@ class DataNode(GossipNode):
             self.send_message(message.header.get("src"), 9000, Message(MessageType.DATA_READY, self.ip, message.header.get("src"), payload={"session_id": session_id}), await_response=False)
 
             # Guardar archivo localmente
-            conn, addr = sock.accept()
-            with conn:
-                def data_gen():
-                    while True:
-                        chunk = conn.recv(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
-
-                logger.info("[%s] Receiving and writing file %s for user %s", self.node_name, path, user)
-                self.fs.write_stream(namespace, cwd, path, data_gen(), chunk_size=chunk_size)
+            conn, addr = accept_stream(sock)
+            logger.info("[%s] Receiving and writing file %s for user %s", self.node_name, path, user)
+            with self.tracer.span("stream STOR") as span, conn, self.fs.open_write(namespace, cwd, path) as f:
+                stats = recv_stream(conn, f, totals=self.stream_totals)
+                if span is not None:
+                    span.tag(bytes=stats.bytes)
+            logger.info("[%s] File %s received (%r)", self.node_name, path, stats)
 
             virtual_path = self.fs.normalize_virtual_path(cwd, path)
             
@@ -811,9 +799,10 @@ class DataNode(GossipNode):
             ack_event = threading.Event()
 
             logger.info("[%s] Starting replication to %s peers for %s", self.node_name, len(replicate_to), virtual_path)
+            # Los hilos heredan el contexto (deadline y traza del STOR): si el cliente se rinde, la replicación se abandona
             threads = [
-                threading.Thread(target=self._replicate_to_node,
-                    args=(ip, file_metadata, path, user, cwd, ack_counter, ack_lock, ack_event, len(replicate_to)))
+                threading.Thread(target=contextvars.copy_context().run,
+                    args=(self._replicate_to_node, ip, file_metadata, path, user, cwd, ack_counter, ack_lock, ack_event, len(replicate_to)))
                 for ip in replicate_to]
 
             for t in threads:
@@ -823,11 +812,11 @@ class DataNode(GossipNode):
             if not replicate_to:
                 ack_event.set()
             else:
-                # Timeout: 5 minutos para replicación completa
-                max_wait = 300  # 5 minutos
+                # Timeout: 5 minutos para replicación completa, sin pasar el deadline del STOR
+                max_wait = remaining_budget(300)
                 ack_received = ack_event.wait(timeout=max_wait)
                 if not ack_received:
-                    logger.warning("[%s] Replication timeout after %d seconds, received %d acks out of %d", self.node_name, max_wait, ack_counter[0], len(replicate_to))
+                    logger.warning("[%s] Replication timeout after %.1f seconds, received %d acks out of %d", self.node_name, max_wait, ack_counter[0], len(replicate_to))
 
             # 5️⃣ Retornamos respuesta al cliente
             status = "OK" if ack_counter[0] >= min(K_REPLICAS, len(replicate_to)) else "partial"
@@ -893,7 +882,6 @@ class DataNode(GossipNode):
         metadata_dict = payload.get("metadata")
         user = payload.get("user")
         cwd = payload.get("cwd")
-        chunk_size = payload.get("chunk_size", 65536)
 
         logger.info("[%s] Received DATA_REPLICATE_FILE from %s payload=%s", self.node_name, message.header.get("src"), message.payload)
         
@@ -905,10 +893,8 @@ class DataNode(GossipNode):
         sock = None
         try:
             # Preparar socket temporal para recibir el archivo
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            sock.bind((self.ip, 0))  # puerto aleatorio disponible
-            sock.listen(1)
+            # Timeout del accept: 5 minutos
+            sock = listen_stream(self.ip, timeout=300)  # puerto aleatorio disponible
             listen_ip, listen_port = sock.getsockname()
 
             # Responder inmediatamente con IP/puerto y info del archivo
@@ -916,37 +902,17 @@ class DataNode(GossipNode):
             logger.info("[%s] Sending DATA_REPLICATE_READY to %s -> %s:%s", self.node_name, message.header.get("src"), listen_ip, listen_port)
             self.send_message(message.header.get("src"), 9000, ready_msg, await_response=False)
 
-            # Esperar conexión del nodo que enviará el archivo - timeout de 5 minutos
-            sock.settimeout(300)
+            # Esperar conexión del nodo que enviará el archivo
             logger.debug("[%s] Waiting for connection on %s:%s with timeout 300s", self.node_name, listen_ip, listen_port)
-            conn, addr = sock.accept()
+            conn, addr = accept_stream(sock)
             logger.debug("[%s] Connection accepted from %s", self.node_name, addr)
-            
-            with conn:
-                # Timeout en lectura: 60 segundos de inactividad
-                conn.settimeout(60)
-                bytes_received = 0
-                
-                def chunk_gen():
-                    nonlocal bytes_received
-                    while True:
-                        try:
-                            chunk = conn.recv(chunk_size)
-                            if not chunk:
-                                logger.debug("[%s] No more data, received %d bytes total", self.node_name, bytes_received)
-                                break
-                            bytes_received += len(chunk)
-                            logger.debug("[%s] Received chunk: %d bytes (total: %d bytes)", self.node_name, len(chunk), bytes_received)
-                            yield chunk
-                        except socket.timeout:
-                            logger.error("[%s] Socket timeout while receiving file data (received %d bytes so far)", self.node_name, bytes_received)
-                            raise TimeoutError(f"Socket timeout after receiving {bytes_received} bytes")
-
-                # Guardar archivo en filesystem
-                namespace = self.fs.get_namespace(user)
-                logger.info("[%s] Writing file %s for user %s", self.node_name, filename, user)
-                self.fs.write_stream(namespace, cwd, filename, chunk_gen(), chunk_size=chunk_size)
-                logger.info("[%s] File received and written: %d bytes", self.node_name, bytes_received)
+
+            # Guardar archivo en filesystem (timeout de inactividad en la lectura: stream.DEFAULT_IDLE_TIMEOUT)
+            namespace = self.fs.get_namespace(user)
+            logger.info("[%s] Writing file %s for user %s", self.node_name, filename, user)
+            with conn, self.fs.open_write(namespace, cwd, filename) as f:
+                stats = recv_stream(conn, f, totals=self.stream_totals)
+            logger.info("[%s] File received and written (%r)", self.node_name, stats)
 
             # Actualizar metadata
             self.metadata_table.upsert(file_metadata)
@@ -972,7 +938,8 @@ class DataNode(GossipNode):
         """
         Maneja DATA_REPLICATE_READY:
         - Se conecta al nodo destino usando IP/puerto indicados.
-        - Envía el archivo en stream con timeouts adecuados.
+        - Envía el archivo en stream con timeouts adecuados, en un hilo propio: el handler corre
+          en el carril de control y debe retornar enseguida.
         """
         payload = message.payload or {}
         ip = payload.get("ip")
@@ -987,39 +954,23 @@ class DataNode(GossipNode):
             logger.error("[%s] Missing required fields in DATA_REPLICATE_READY", self.node_name)
             return  # Mensaje de control, no return de respuesta
 
+        # El hilo hereda el contexto (deadline y traza de la replicación)
+        threading.Thread(target=contextvars.copy_context().run, args=(self._send_replica, ip, port, filename, user, cwd), daemon=True).start()
+
+    def _send_replica(self, ip: str, port: int, filename: str, user: str, cwd: str):
+        """Envía filename al socket que el nodo destino abrió para DATA_REPLICATE_FILE."""
         try:
             # Determinar la ruta real y generar stream del archivo
             namespace = self.fs.get_namespace(user)
 
             logger.info("[%s] Connecting to %s:%s to send file %s (user=%s, cwd=%s)", self.node_name, ip, port, filename, user, cwd)
             
-            # Generador de chunks
-            chunk_gen = self.fs.read_stream(namespace, cwd, filename)
-
-            # Conectar al nodo destino con timeout
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(30)  # timeout de conexión: 30 segundos
-                logger.debug("[%s] Connecting with 30s timeout", self.node_name)
-                sock.connect((ip, port))
-                logger.debug("[%s] Connected successfully", self.node_name)
-                
-                # Timeout en envío: 60 segundos de inactividad
-                sock.settimeout(60)
-                bytes_sent = 0
-                chunk_count = 0
-                
+            # Conectar al nodo destino (30 segundos para conectar, luego timeout de inactividad)
+            with open_stream(ip, port, timeout=30) as sock, self.fs.open_read(namespace, cwd, filename) as f:
                 logger.info("[%s] Sending file '%s' to %s:%s", self.node_name, filename, ip, port)
-                for chunk in chunk_gen:
-                    try:
-                        sock.sendall(chunk)
-                        bytes_sent += len(chunk)
-                        chunk_count += 1
-                        logger.debug("[%s] Sent chunk %d: %d bytes (total: %d bytes)", self.node_name, chunk_count, len(chunk), bytes_sent)
-                    except socket.timeout:
-                        logger.error("[%s] Socket timeout while sending to %s:%s (sent %d bytes in %d chunks)", self.node_name, ip, port, bytes_sent, chunk_count)
-                        raise TimeoutError(f"Socket timeout after sending {bytes_sent} bytes")
-
-            logger.info("[%s] File '%s' sent successfully to %s:%s (%d bytes in %d chunks)", self.node_name, filename, ip, port, bytes_sent, chunk_count)
+                stats = send_stream(sock, f, totals=self.stream_totals)
+
+            logger.info("[%s] File '%s' sent successfully to %s:%s (%r)", self.node_name, filename, ip, port, stats)
 
         except socket.timeout as e:
             logger.error("[%s] Connection timeout while replicating file '%s' to %s:%s: %s", self.node_name, filename, ip, port, e)
@@ -1039,8 +990,12 @@ class DataNode(GossipNode):
             try:
                 logger.info("[%s] Sending DATA_REPLICATE_FILE to %s for %s (attempt %d/%d)", self.node_name, target_ip, path, attempt + 1, max_retries)
                 
-                # Aumentar timeout para archivos grandes: 30 segundos + tiempo variable
-                timeout = 30.0 + (attempt * 5)  # aumenta con cada reintento
+                # Con deadline heredado se usa todo el tiempo restante (el ack llega tras transferir el archivo);
+                # sin él, 30 segundos + tiempo variable que aumenta con cada reintento
+                timeout = remaining_budget(30.0 + (attempt * 5))
+                if timeout <= 0:
+                    logger.warning("[%s] Replication to %s abandoned: deadline exceeded", self.node_name, target_ip)
+                    return
                 
                 replicate_msg = Message(type=MessageType.DATA_REPLICATE_FILE, src=self.ip, dst=target_ip, payload={"filename": path, "metadata": file_metadata.to_dict(), "user": user, "cwd": cwd})
                 ack = self.send_message(target_ip, 9000, replicate_msg, await_response=True, timeout=timeout)
@@ -1129,126 +1084,46 @@ class DataNode(GossipNode):
         Replica la creación de un directorio a todos los otros DataNodes.
         Se ejecuta en un hilo separado para no bloquear la operación original.
         """
-        def broadcast():
-            try:
-                peer_nodes = self.query_by_role(NodeType.DATA)
-                for peer in peer_nodes:
-                    if peer["ip"] == self.ip:
-                        continue  # No enviar a uno mismo
-                    
-                    logger.info("[%s] Replicating dir create to %s: %s", self.node_name, peer["ip"], virtual_path)
-                    try:
-                        self.send_message(
-                            peer["ip"], 9000,
-                            Message(
-                                type=MessageType.DATA_REPLICATE_DIR_CREATE,
-                                src=self.ip,
-                                dst=peer["ip"],
-                                payload={"user": user, "virtual_path": virtual_path}
-                            ),
-                            await_response=False
-                        )
-                    except Exception as e:
-                        logger.warning("[%s] Failed to replicate dir create to %s: %s", self.node_name, peer["ip"], e)
-            except Exception as e:
-                logger.warning("[%s] Error broadcasting dir create: %s", self.node_name, e)
-        
-        t = threading.Thread(target=broadcast, daemon=True)
-        t.start()
+        logger.info("[%s] Replicating dir create: %s", self.node_name, virtual_path)
+        self._broadcast_to_data_peers(MessageType.DATA_REPLICATE_DIR_CREATE, {"user": user, "virtual_path": virtual_path})
 
     def _replicate_dir_delete(self, user: str, virtual_path: str):
         """
         Replica la eliminación de un directorio a todos los otros DataNodes.
         Se ejecuta en un hilo separado para no bloquear la operación original.
         """
-        def broadcast():
-            try:
-                peer_nodes = self.query_by_role(NodeType.DATA)
-                for peer in peer_nodes:
-                    if peer["ip"] == self.ip:
-                        continue
-                    
-                    logger.info("[%s] Replicating dir delete to %s: %s", self.node_name, peer["ip"], virtual_path)
-                    try:
-                        self.send_message(
-                            peer["ip"], 9000,
-                            Message(
-                                type=MessageType.DATA_REPLICATE_DIR_DELETE,
-                                src=self.ip,
-                                dst=peer["ip"],
-                                payload={"user": user, "virtual_path": virtual_path}
-                            ),
-                            await_response=False
-                        )
-                    except Exception as e:
-                        logger.warning("[%s] Failed to replicate dir delete to %s: %s", self.node_name, peer["ip"], e)
-            except Exception as e:
-                logger.warning("[%s] Error broadcasting dir delete: %s", self.node_name, e)
-        
-        t = threading.Thread(target=broadcast, daemon=True)
-        t.start()
+        logger.info("[%s] Replicating dir delete: %s", self.node_name, virtual_path)
+        self._broadcast_to_data_peers(MessageType.DATA_REPLICATE_DIR_DELETE, {"user": user, "virtual_path": virtual_path})
 
     def _replicate_file_delete(self, user: str, virtual_path: str):
         """
         Replica la eliminación de un archivo a todos los otros DataNodes.
         Se ejecuta en un hilo separado para no bloquear la operación original.
         """
-        def broadcast():
-            try:
-                peer_nodes = self.query_by_role(NodeType.DATA)
-                for peer in peer_nodes:
-                    if peer["ip"] == self.ip:
-                        continue
-                    
-                    logger.info("[%s] Replicating file delete to %s: %s", self.node_name, peer["ip"], virtual_path)
-                    try:
-                        self.send_message(
-                            peer["ip"], 9000,
-                            Message(
-                                type=MessageType.DATA_REPLICATE_FILE_DELETE,
-                                src=self.ip,
-                                dst=peer["ip"],
-                                payload={"user": user, "virtual_path": virtual_path}
-                            ),
-                            await_response=False
-                        )
-                    except Exception as e:
-                        logger.warning("[%s] Failed to replicate file delete to %s: %s", self.node_name, peer["ip"], e)
-            except Exception as e:
-                logger.warning("[%s] Error broadcasting file delete: %s", self.node_name, e)
-        
-        t = threading.Thread(target=broadcast, daemon=True)
-        t.start()
+        logger.info("[%s] Replicating file delete: %s", self.node_name, virtual_path)
+        self._broadcast_to_data_peers(MessageType.DATA_REPLICATE_FILE_DELETE, {"user": user, "virtual_path": virtual_path})
 
     def _replicate_rename(self, user: str, old_virtual_path: str, new_virtual_path: str):
         """
         Replica el renombrado de archivo/directorio a todos los otros DataNodes.
         Se ejecuta en un hilo separado para no bloquear la operación original.
         """
+        logger.info("[%s] Replicating rename: %s -> %s", self.node_name, old_virtual_path, new_virtual_path)
+        self._broadcast_to_data_peers(MessageType.DATA_REPLICATE_RENAME, {"user": user, "old_virtual_path": old_virtual_path, "new_virtual_path": new_virtual_path})
+
+    def _broadcast_to_data_peers(self, msg_type: str, payload: dict):
+        """
+        Envía (fire-and-forget) un mensaje a todos los demás DataNodes mediante multicast.
+        La consulta a discovery se hace en un hilo separado para no bloquear la operación original.
+        """
         def broadcast():
             try:
-                peer_nodes = self.query_by_role(NodeType.DATA)
-                for peer in peer_nodes:
-                    if peer["ip"] == self.ip:
-                        continue
-                    
-                    logger.info("[%s] Replicating rename to %s: %s -> %s", self.node_name, peer["ip"], old_virtual_path, new_virtual_path)
-                    try:
-                        self.send_message(
-                            peer["ip"], 9000,
-                            Message(
-                                type=MessageType.DATA_REPLICATE_RENAME,
-                                src=self.ip,
-                                dst=peer["ip"],
-                                payload={"user": user, "old_virtual_path": old_virtual_path, "new_virtual_path": new_virtual_path}
-                            ),
-                            await_response=False
-                        )
-                    except Exception as e:
-                        logger.warning("[%s] Failed to replicate rename to %s: %s", self.node_name, peer["ip"], e)
+                peer_ips = [peer["ip"] for peer in self.query_by_role(NodeType.DATA) if peer["ip"] != self.ip]
+                self.multicast(peer_ips, Message(type=msg_type, src=self.ip, dst=None, payload=payload), port=9000, await_response=False)
+
             except Exception as e:
-                logger.warning("[%s] Error broadcasting rename: %s", self.node_name, e)
-        
+                logger.warning("[%s] Error broadcasting %s: %s", self.node_name, msg_type, e)
+
         t = threading.Thread(target=broadcast, daemon=True)
         t.start()
 
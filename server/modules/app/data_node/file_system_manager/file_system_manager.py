@@ -213,8 +213,12 @@ class FileSystemManager:
                 return candidate
         return f"{name}_{uuid.uuid4().hex[:8]}{ext}"
 
-    def write_stream(self, root_dir, cwd, path, data_iterable, chunk_size=65536):
-        """Almacena datos desde un iterable binario en el archivo destino de manera atómica."""
+    @contextmanager
+    def open_write(self, root_dir, cwd, path):
+        """
+        Context manager que entrega un archivo temporal binario junto al destino; al salir sin
+        error lo reemplaza de manera atómica por el destino, si falla lo elimina.
+        """
         _, real = self.resolve_and_secure_path(root_dir, cwd, path)
         parent = os.path.dirname(real)
         os.makedirs(parent, exist_ok=True)
@@ -223,18 +227,38 @@ class FileSystemManager:
             with tempfile.NamedTemporaryFile(dir=parent, delete=False) as tmp:
                 tmp_path = tmp.name
                 try:
-                    for chunk in data_iterable:
-                        if chunk:
-                            tmp.write(chunk)
+                    yield tmp
                     tmp.flush()
                     os.fsync(tmp.fileno())
-                except Exception:
+                except BaseException:
+                    tmp.close()
                     if os.path.exists(tmp_path):
                         os.remove(tmp_path)
                     raise
 
             os.replace(tmp_path, real)
 
+    @contextmanager
+    def open_read(self, root_dir, cwd, path):
+        """Context manager que entrega el archivo abierto en binario, con su lock tomado."""
+        _, real = self.resolve_and_secure_path(root_dir, cwd, path)
+
+        if not os.path.exists(real):
+            raise FileNotFoundError("File not found")
+        if not os.path.isfile(real):
+            raise IsADirectoryError("Not a file")
+
+        with self.lock_mgr.acquire(real):
+            with open(real, "rb") as f:
+                yield f
+
+    def write_stream(self, root_dir, cwd, path, data_iterable, chunk_size=65536):
+        """Almacena datos desde un iterable binario en el archivo destino de manera atómica."""
+        with self.open_write(root_dir, cwd, path) as tmp:
+            for chunk in data_iterable:
+                if chunk:
+                    tmp.write(chunk)
+
     def read_stream(self, root_dir, cwd, path, chunk_size=65536):
         """Retorna un generador que lee un archivo en chunks binarios."""
         _, real = self.resolve_and_secure_path(root_dir, cwd, path)
@@ -245,11 +269,10 @@ class FileSystemManager:
             raise IsADirectoryError("Not a file")
 
         def _gen():
-            with self.lock_mgr.acquire(real):
-                with open(real, "rb") as f:
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        yield chunk
+            with self.open_read(root_dir, cwd, path) as f:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
         return _gen()
@@ -29,7 +29,7 @@ def handle_cdup(cmd: Command, data: dict = None, processing_node = None) -> tupl
 
     response = None
 
-    for data_node in data_nodes:
+    for data_node in processing_node.rank_peers(data_nodes, 9000):
         try:
             msg = Message(MessageType.DATA_CWD, processing_node.ip, data_node["ip"], payload={"user": session.get_username(), "current_path": session.get_cwd(), "new_path": new_path})
 
@@ -24,7 +24,7 @@ def handle_mkd(cmd: Command, data: dict = None, processing_node=None) -> tuple[i
         return 451, "Requested action aborted. File system unavailable.", None
 
     response = None
-    for data_node in data_nodes:
+    for data_node in processing_node.rank_peers(data_nodes, 9000):
         try:
             msg = Message(MessageType.DATA_MKD, processing_node.ip, data_node["ip"], payload={"user": session.get_username(), "cwd": session.get_cwd(), "path": path})
             response = processing_node.send_message(data_node["ip"], 9000, msg, await_response=True)
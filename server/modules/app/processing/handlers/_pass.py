@@ -42,7 +42,7 @@ def handle_pass(cmd: Command, data: dict = None, processing_node = None) -> tupl
     auth_response = None
 
     # 6. Validar password en los AuthNodes
-    for auth_node in auth_nodes:
+    for auth_node in processing_node.rank_peers(auth_nodes, 9000):
         try:
             query_msg = build_auth_password_query_msg(session.get_username(), password, processing_node.ip, auth_node["ip"])
             auth_response = processing_node.send_message(auth_node["ip"], 9000, query_msg, await_response=True)
@@ -1,6 +1,7 @@
 import logging
 from server.modules.app.processing import Command
 from server.modules.discovery import NodeType
+from server.modules.discovery.load import BALANCE
 from server.modules.app.routing import ClientSession
 from server.modules.comm import Message, MessageType
 
@@ -24,7 +25,8 @@ def handle_pasv(cmd: Command, data: dict = None, processing_node=None) -> tuple[
         ip, port = session.get_pasv_mode_info()
         return 227, f"Entering Passive Mode ({ip.replace('.',',')},{port//256},{port%256}).", session.to_json()
 
-    data_nodes = processing_node.query_by_role(NodeType.DATA)
+    # DataNodes según su carga (DFTP_DISCOVERY_BALANCE) para repartir las transferencias
+    data_nodes = processing_node.query_by_role(NodeType.DATA, order=BALANCE)
     if not data_nodes:
         logger.warning("No DataNodes available for PASV command")
         return 451, "Requested action aborted. File system unavailable.", None
@@ -32,7 +34,7 @@ def handle_pasv(cmd: Command, data: dict = None, processing_node=None) -> tuple[
     response = None
     session_id = session.get_session_id()
 
-    for data_node in data_nodes:
+    for data_node in processing_node.rank_peers(data_nodes, 9000, by_latency=False):
         try:
             msg = Message(type=MessageType.DATA_OPEN_PASV, src=processing_node.ip, dst=data_node["ip"], payload={"session_id": session_id})
             response = processing_node.send_message(data_node["ip"], 9000, msg, await_response=True)
@@ -1,4 +1,3 @@
-import threading
 import logging
 from server.modules.app.processing import Command
 from server.modules.discovery import NodeType
@@ -26,19 +25,20 @@ def handle_retr(cmd: Command, data: dict = None, processing_node=None) -> tuple[
 
     file_candidates = []
     logger.info("Finding newest version of file")
-    for node in data_nodes:
-        try:
-            meta_resp = processing_node.send_message(node["ip"], 9000, Message(type=MessageType.DATA_META_REQUEST, src=processing_node.ip, dst=node["ip"], payload={"filename": filename, "cwd": session.get_cwd(), "user": session.get_username()}), await_response=True, timeout=30)
-            
-            logger.info("Response from %s : %s", node['ip'], meta_resp)
-
-            if meta_resp and meta_resp.payload.get("success"):
-                for meta in meta_resp.payload.get("metadata", []):
-                    file_candidates.append({"node": node, "version": meta.get("version", 1), "transfer_id": meta.get("transfer_id", "0")})
-        
-        except Exception as e:
-            logger.warning("Failed to query metadata from DataNode (%s): %s", node["ip"], e)
-            continue
+    nodes_by_ip = {node["ip"]: node for node in data_nodes}
+    meta_req = Message(type=MessageType.DATA_META_REQUEST, src=processing_node.ip, dst=None, payload={"filename": filename, "cwd": session.get_cwd(), "user": session.get_username()})
+
+    # Consultar a todos los DataNodes en paralelo: la espera es la del más lento, no la suma
+    result = processing_node.multicast(nodes_by_ip, meta_req, mode="all", port=9000, timeout=30)
+    for ip in result.failed:
+        logger.warning("Failed to query metadata from DataNode (%s)", ip)
+
+    for ip, meta_resp in result.responses.items():
+        logger.info("Response from %s : %s", ip, meta_resp)
+
+        if meta_resp.payload.get("success"):
+            for meta in meta_resp.payload.get("metadata", []):
+                file_candidates.append({"node": nodes_by_ip[ip], "version": meta.get("version", 1), "transfer_id": meta.get("transfer_id", "0")})
 
     if not file_candidates:
         return 550, f"File '{filename}' not found.", None
@@ -49,19 +49,15 @@ def handle_retr(cmd: Command, data: dict = None, processing_node=None) -> tuple[
     max_transfer_id = file_candidates[0]["transfer_id"]
 
     # Actualizar nodos que tienen versión anterior
-    threads = []
-    for fc in file_candidates[1:]:
-        node = fc["node"]
-        version = fc["version"]
-        transfer_id = fc["transfer_id"]
-        
-        if version < max_version or (version == max_version and transfer_id < max_transfer_id):
-            t = threading.Thread(target=_update_node_from_peer, args=(processing_node, node["ip"], filename, file_candidates[0]["node"]["ip"]))
-            t.start()
-            threads.append(t)
-            
-    for t in threads:
-        t.join()
+    newest_ip = file_candidates[0]["node"]["ip"]
+    stale_ips = [fc["node"]["ip"] for fc in file_candidates[1:]
+                 if fc["version"] < max_version or (fc["version"] == max_version and fc["transfer_id"] < max_transfer_id)]
+
+    if stale_ips:
+        update_msg = Message(type=MessageType.DATA_REPLICATE_FILE, src=processing_node.ip, dst=None, payload={"filename": filename, "update_from": newest_ip})
+        result = processing_node.multicast(stale_ips, update_msg, mode="all", port=9000)
+        for ip in result.failed:
+            logger.warning("Failed to update node %s from %s", ip, newest_ip)
 
     # Usar la IP de la sesión PASV como nodo que se comunica con el cliente
     pasv_info = session.get_pasv_mode_info()
@@ -88,12 +84,3 @@ def handle_retr(cmd: Command, data: dict = None, processing_node=None) -> tuple[
         session.clear_pasv()
         logger.exception("Failed to RETR file: %s", e)
         return 550, "Failed to retrieve file.", session.to_json()
-
-
-def _update_node_from_peer(processing_node, target_ip, filename, src_ip):
-    try:
-        processing_node.send_message(target_ip, 9000,
-            Message(type=MessageType.DATA_REPLICATE_FILE, src=processing_node.ip, dst=target_ip, payload={"filename": filename, "update_from": src_ip}),
-            await_response=True)
-    except Exception as e:
-        logger.warning("Failed to update node %s from %s: %s", target_ip, src_ip, e)
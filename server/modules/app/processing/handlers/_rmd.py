@@ -29,7 +29,7 @@ def handle_rmd(cmd: Command, data: dict = None, processing_node=None) -> tuple[i
 
     response = None
 
-    for data_node in data_nodes:
+    for data_node in processing_node.rank_peers(data_nodes, 9000):
         try:
             msg = Message(MessageType.DATA_REMOVE, processing_node.ip, data_node["ip"], payload={"user": session.get_username(), "cwd": session.get_cwd(), "path": target_path, "type": "dir"})
 
@@ -32,7 +32,7 @@ def handle_rnto(cmd: Command, data: dict = None, processing_node=None) -> tuple[
 
     response = None
 
-    for data_node in data_nodes:
+    for data_node in processing_node.rank_peers(data_nodes, 9000):
         try:
             msg = Message(MessageType.DATA_RENAME, processing_node.ip, data_node["ip"], payload={"user": session.get_username(), "cwd": session.get_cwd(), "old_path": old_path, "new_path": new_path})
 
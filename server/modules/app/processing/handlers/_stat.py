@@ -37,7 +37,7 @@ def handle_stat(cmd: Command, data: dict = None, processing_node=None) -> tuple[
 
         response = None
         
-        for data_node in data_nodes:
+        for data_node in processing_node.rank_peers(data_nodes, 9000):
             try:
                 msg = Message(MessageType.DATA_STAT, src=processing_node.ip, dst=data_node["ip"], payload={"user": session.get_username(), "cwd": session.get_cwd(), "path": path})
                 
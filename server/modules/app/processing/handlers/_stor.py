@@ -26,23 +26,17 @@ def handle_stor(cmd: Command, data: dict = None, processing_node=None) -> tuple[
         logger.warning("No DataNodes available for STOR")
         return 451, "Requested action aborted. File system unavailable.", None
 
-    # Determinar versión consultando todos los metadatos
+    # Determinar versión consultando todos los metadatos (en paralelo)
     max_version = 0
-    for node in data_nodes:
-        try:
-            meta_req = Message(type=MessageType.DATA_META_REQUEST, src=processing_node.ip, dst=node["ip"], payload={"filename": filename})
-            resp = processing_node.send_message(node["ip"], 9000, meta_req, await_response=True)
-            
-            if resp and resp.payload.get("metadata"):
-                
-                for meta in resp.payload["metadata"]:
-                    
-                    ver = meta.get("version", 0)
-                    
-                    if ver > max_version:
-                        max_version = ver
-        except Exception:
-            pass
+    meta_req = Message(type=MessageType.DATA_META_REQUEST, src=processing_node.ip, dst=None, payload={"filename": filename})
+    result = processing_node.multicast([node["ip"] for node in data_nodes], meta_req, mode="all", port=9000)
+
+    for resp in result.responses.values():
+        for meta in resp.payload.get("metadata") or []:
+            ver = meta.get("version", 0)
+
+            if ver > max_version:
+                max_version = ver
 
     version = max_version + 1
     transfer_id = str(uuid.uuid4())
@@ -29,7 +29,7 @@ def handle_user(cmd: Command, data: dict = None, processing_node = None) -> tupl
     auth_response = None
 
     # 5. Intentar validar usuario con cada AuthNode hasta obtener respuesta
-    for auth_node in auth_nodes:
+    for auth_node in processing_node.rank_peers(auth_nodes, 9000):
         try:
             query_msg = build_auth_user_query_msg(username, processing_node.ip, auth_node["ip"])
             auth_response = processing_node.send_message(auth_node["ip"], 9000, query_msg, await_response=True)
@@ -60,7 +60,8 @@ class ProcessingNode(LocationNode):
             return self._build_response(dst, 502, "Command not implemented.", None)
         
         try :
-            code, message, session_data = handler(cmd, session_data, self)
+            with self.tracer.span(f"ftp {cmd.get_name()}"):
+                code, message, session_data = handler(cmd, session_data, self)
         
         except Exception as e:
             logger.warning(f"Error manejando comando: {str(e)}")
@@ -7,6 +7,7 @@ import time
 
 from server.modules.consistency import GossipNode
 from server.modules.discovery import NodeType
+from server.modules.discovery.load import BALANCE
 from server.modules.comm import Message, MessageType
 from server.modules.app.routing.client_session.client_session import ClientSession
 from server.modules.app.routing.client_session.session_table import SessionTable
@@ -26,12 +27,18 @@ class RoutingNode(GossipNode):
     - Escucha conexiones FTP entrantes (canal de control)
     - Por cada cliente aceptado lanza un handler en un hilo separado
     - Mantiene sesiones de clientes en un diccionario _sessions
+    - Reparte los comandos entre processing nodes según su carga (DFTP_DISCOVERY_BALANCE, ver
+      discovery.load) y envía en sus heartbeats las sesiones FTP que atiende
     """
 
     def __init__(self, node_name: str, ip: str, ftp_port: int = 21, internal_port: int = 9000, discovery_timeout: float = 0.8, heartbeat_interval: int = 2):
         # Inicializar GossipNode para permitir replicación de estado entre routing nodes   
         self._session_table = SessionTable()
         self.ftp_port = ftp_port
+
+        # Clientes conectados a este nodo (la tabla de sesiones incluye también las replicadas)
+        self._active_sessions = 0
+        self._active_sessions_lock = threading.Lock()
         
         super().__init__(node_name=node_name, ip=ip, port=internal_port, discovery_timeout=discovery_timeout, heartbeat_interval=heartbeat_interval, node_role=NodeType.ROUTING)
 
@@ -73,6 +80,15 @@ class RoutingNode(GossipNode):
 
 
     def _handle_client(self, client_sock, client_addr) -> None:
+        with self._active_sessions_lock:
+            self._active_sessions += 1
+        try:
+            self._serve_client(client_sock, client_addr)
+        finally:
+            with self._active_sessions_lock:
+                self._active_sessions -= 1
+
+    def _serve_client(self, client_sock, client_addr) -> None:
         client_ip = client_addr[0]
         session, is_new_session = self._get_or_create_session(client_ip, client_sock)
 
@@ -141,23 +157,26 @@ class RoutingNode(GossipNode):
 
         logger.info("Command received: [%s]", line)
 
-        processing_nodes = self.get_processing_nodes()
-        last_error = None
-
-        for processing_node in processing_nodes:
-            try:
-                processing_node_ip = processing_node["ip"]
-                message = self._build_process_command_msg(session, line, processing_node_ip)
-                response = self.send_message(processing_node_ip, 9000, message, timeout=300)
-                return self._handle_processing_response(response, session)
+        # Cada línea de comando abre una traza; solo se registra el verbo para no guardar contraseñas
+        command = line.split(" ", 1)[0].upper()
+        with self.tracer.start_trace(f"FTP {command}", {"command": command, "session_id": session.session_id}):
+            processing_nodes = self.get_processing_nodes()
+            last_error = None
 
-            except Exception as e:
-                logger.warning("[%s][%s] Processing node %s failed: %s", self.node_name, session.session_id, processing_node_ip, e)
-                last_error = e
-                continue
+            for processing_node in processing_nodes:
+                try:
+                    processing_node_ip = processing_node["ip"]
+                    message = self._build_process_command_msg(session, line, processing_node_ip)
+                    response = self.send_message(processing_node_ip, 9000, message, timeout=300)
+                    return self._handle_processing_response(response, session)
+
+                except Exception as e:
+                    logger.warning("[%s][%s] Processing node %s failed: %s", self.node_name, session.session_id, processing_node_ip, e)
+                    last_error = e
+                    continue
 
-        # Si llegamos aquí, ninguno respondió
-        raise NoProcessingNodeException("All processing nodes failed") from last_error
+            # Si llegamos aquí, ninguno respondió
+            raise NoProcessingNodeException("All processing nodes failed") from last_error
     
     def _handle_data_ready(self, message: "Message") -> Message:
         """
@@ -242,9 +261,16 @@ class RoutingNode(GossipNode):
         
         return None
 
+    def get_load(self) -> dict:
+        """Carga de LocationNode más las sesiones FTP que atiende este nodo."""
+        load = super().get_load()
+        with self._active_sessions_lock:
+            load["sessions"] = self._active_sessions
+        return load
+
     def get_processing_nodes(self) -> list:
-        """Obtiene la lista de processing nodes disponibles"""
-        nodes = self.query_by_role(NodeType.PROCESSING)
+        """Obtiene la lista de processing nodes disponibles, ordenada según DFTP_DISCOVERY_BALANCE"""
+        nodes = self.query_by_role(NodeType.PROCESSING, order=BALANCE)
         if not nodes:
             raise NoProcessingNodeException("No processing nodes available")
         return nodes
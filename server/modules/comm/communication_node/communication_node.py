@@ -1,10 +1,32 @@
+import concurrent.futures
+import contextvars
+import copy
 import logging
-import socket
-from server.modules.comm.communication_node.tcp_protocol import TCPServer, TCPClient
-from server.modules.comm.message import Message
+import os
+import threading
+import time
+from server.modules.comm.communication_node.tcp_protocol import TCPServer, AsyncTCPServer, TCPClient
+from server.modules.comm.communication_node.tcp_protocol import compression
+from server.modules.comm.communication_node import loopback
+from server.modules.comm.communication_node.handler_pool import HandlerPool
+from server.modules.comm.communication_node.lanes import LanePools, LANE_CONTROL, LANE_DEFAULT, LANE_DATA, lane_for
+from server.modules.comm.communication_node.node_stats import NodeStats
+from server.modules.comm.communication_node.tracing import Tracer
+from server.modules.comm.communication_node.deadline import current_deadline, deadline_scope, expired
+from server.modules.comm.communication_node.stream import (StreamStats, StreamTotals, open_stream, listen_stream,
+                                                           accept_stream, send_stream, recv_stream)
+from server.modules.comm.communication_node.multicast import (MulticastResult, required_responses, message_for, wait_for,
+                                                              hedge, hedge_delay)
+from server.modules.comm.message import Message, MessageType
 
 logger = logging.getLogger("dftp.comm.communication_node")
 
+
+def _peer_ip(peer) -> str:
+    """ip de un peer dado como ip o como dict con "ip"."""
+    return peer["ip"] if isinstance(peer, dict) else peer
+
+
 class CommunicationNode:
     """
     Nodo base para todos los nodos del sistema, encargado del intercambio de mensajes discretos
@@ -21,8 +43,52 @@ class CommunicationNode:
         - port (int): Puerto donde escucha el nodo.
         - handlers (Dict[str, Callable[[Message], Optional[Message]]]): Diccionario de handlers
           por tipo de mensaje. Cada callback recibe (Message) y retorna un Message o None.
-        - server (TCPServer): Servidor TCP interno que recibe mensajes discretos.
+        - server (TCPServer | AsyncTCPServer): Servidor TCP interno que recibe mensajes discretos.
+          Se elige con server_backend (o la variable de entorno DFTP_COMM_SERVER):
+            . "thread": TCPServer, un hilo por conexión (por defecto).
+            . "asyncio": AsyncTCPServer, un event loop para todas las conexiones.
+        - handler_pool (LanePools): Un HandlerPool por carril (ver communication_node.lanes) donde
+          el servidor ejecuta los handlers:
+            . "control" (heartbeats, discovery, gossip, DATA_READY, métricas):
+              DFTP_CONTROL_WORKERS / DFTP_CONTROL_QUEUE.
+            . "data" (STOR, RETR, LIST, replicación, sincronización): DFTP_DATA_WORKERS / DFTP_DATA_QUEUE.
+            . "default" (el resto): handler_workers hilos con una cola de handler_queue_size
+              mensajes (o DFTP_HANDLER_WORKERS / DFTP_HANDLER_QUEUE).
+          Con la cola de un carril llena el servidor responde NODE_BUSY y send_message lo traduce
+          a None para que el llamador pruebe con otro nodo; los otros carriles no se ven afectados.
         - client (TCPClient): Cliente TCP para enviar mensajes discretos a otros nodos.
+          Con multiplex=True todas las peticiones hacia un peer comparten un socket y las respuestas
+          se emparejan por msg_id (ver MultiplexedChannel); con multiplex=False reutiliza
+          conexiones por destino mediante un pool (ver ConnectionPool).
+          framing (o DFTP_COMM_FRAMING) elige el formato de trama preferido: "length" (por defecto)
+          negocia por conexión tramas con prefijo de longitud y "line" mantiene las líneas JSON.
+          codec (o DFTP_COMM_CODEC) elige el codec preferido sobre tramas "length": "binary"
+          (por defecto, ver message.codec.BinaryCodec) o "json".
+          El servidor acepta todos los formatos y codecs y responde en los de cada petición.
+          Los cuerpos grandes se comprimen con zlib si ambos extremos lo soportan (ver
+          tcp_protocol.compression).
+          client.health lleva la salud de cada peer (ver tcp_protocol.peer_health): tras varios
+          fallos seguidos su circuito se abre y send_message retorna None al instante hacia él.
+        - Loopback (ver communication_node.loopback): si el destino de send_message es otro
+          CommunicationNode del mismo proceso, el mensaje se entrega directamente en su
+          handler_pool, sin socket ni serialización y con la misma semántica (DFTP_LOOPBACK=0
+          lo desactiva).
+        - stats (NodeStats): Peticiones, errores, bytes y latencias por tipo de mensaje, del lado
+          cliente (send_message) y del lado servidor (mensajes recibidos). Se consultan con
+          get_node_stats() o, desde otro nodo, con un mensaje NODE_STATS.
+        - tracer (Tracer): Spans de las trazas distribuidas que pasan por el nodo. send_message
+          abre un span "send <tipo>" y propaga la traza en la metadata del mensaje; al recibir un
+          mensaje con traza el handler se ejecuta dentro de un span "handle <tipo>". Se consultan
+          con un mensaje NODE_TRACES (ver tools/trace_collector.py).
+        - Deadlines (ver communication_node.deadline): send_message fija metadata["deadline"]
+          (segundos UNIX) en ahora + timeout, sin superar el deadline heredado, y acota timeout al
+          tiempo restante. Lo anota en una copia del mensaje por envío: el Message del llamador
+          no se modifica y puede reutilizarse. Un mensaje recibido con el deadline vencido se descarta sin ejecutar su
+          handler; si no, el handler corre con ese deadline en su contexto, de modo que sus
+          envíos, streams y esperas (deadline.remaining_budget()) lo heredan.
+        - stream_totals (StreamTotals): Métricas acumuladas de los streams del nodo. Las
+          transferencias sobre sockets propios (p. ej. PASV) usan las funciones de
+          communication_node.stream pasando totals=stream_totals.
 
     Métodos públicos:
         - stop_server() -> None
@@ -31,28 +97,98 @@ class CommunicationNode:
             Registra un callback para un tipo de mensaje específico.
         - send_message(ip: str, port: int, msg: Message, await_response: bool = True, timeout: float = 1.0) -> Optional[Message]
             Envía un mensaje discreto a un nodo destino.
-            - await_response=True: espera la respuesta y la retorna.
+            - await_response=True: espera la respuesta y la retorna (None si el destino está ocupado).
             - await_response=False: envía el mensaje y retorna None.
-        - send_stream(dst_ip: str, dst_port: int, data_iterable, chunk_size: int = 4096) -> None
-            Envía un stream de bytes a un nodo destino mediante un socket TCP.
-        - recv_stream(listen_ip: str, listen_port: int, chunk_size: int = 4096) -> Iterator[bytes]
-            Escucha en un puerto TCP y devuelve un iterable de chunks de bytes recibidos.
+        - multicast(targets, msg, mode="all", quorum=None, port=None, await_response=True, timeout=1.0, accept=None) -> MulticastResult
+            Envía msg a varios nodos en paralelo (con el executor de envíos del carril del mensaje)
+            y retorna en cuanto se cumple el modo: "all" (espera a todos), "quorum" (quorum
+            respuestas, mayoría por defecto) o "first" (la primera). En "quorum"/"first" no se
+            espera a los destinos lentos (igualmente reciben el mensaje) y se retorna antes si la
+            condición ya no puede cumplirse.
+        - hedged_send(targets, msg, port=None, timeout=1.0, accept=None, delay=None) -> MulticastResult
+            Envía msg al primer destino y, si no responde en un pequeño margen (función de su
+            latencia media) o falla, también al siguiente, y así sucesivamente; retorna con la
+            primera respuesta aceptada.
+        - get_handler_stats() -> dict
+            Por carril, ocupación del pool de handlers y métricas por tipo de mensaje (cola, espera, rechazos).
+        - get_node_stats() -> dict
+            Métricas por tipo de mensaje (stats), del handler_pool, del servidor, de los streams,
+            de compresión y de salud de los peers; es el payload de la respuesta a NODE_STATS.
+        - rank_peers(peers, port, key=None, by_latency=True) -> list
+            Ordena candidatos (ips, o lo que key convierta en ip) de más a menos sano según el
+            circuit breaker y la latencia media observada, dejando al final los de circuito abierto.
+            Con by_latency=False solo cuenta el circuito (el orden recibido se conserva).
+        - send_stream(dst_ip: str, dst_port: int, source, timeout: float = 30.0) -> StreamStats
+            Envía un stream de bytes a un nodo destino mediante un socket TCP dedicado. Los
+            archivos se envían con sendfile (ver stream.send_stream).
+        - recv_stream(listen_ip: str, listen_port: int, sink, chunk_size: int = None, timeout: float = 300.0) -> StreamStats
+            Escucha en un puerto TCP, acepta una conexión y escribe lo recibido en sink con
+            recv_into sobre un buffer reutilizable (ver stream.recv_stream).
+        - get_stream_stats() -> dict
+            Bytes, transferencias y throughput acumulados de los streams enviados y recibidos, y
+            transferencias en curso ("active").
     """
 
-    def __init__(self, node_name: str, ip: str, port: int):
+    def __init__(self, node_name: str, ip: str, port: int, multiplex: bool = True, server_backend: str = None,
+                 handler_workers: int = None, handler_queue_size: int = None, framing: str = None, codec: str = None):
         self.node_name = node_name
         self.ip = ip
         self.port = port
         self.handlers = {} 
 
-        # Instancia TCPServer y TCPClient
-        self.server = TCPServer(ip, port, self._on_message)
-        self.client = TCPClient()
+        # Pools acotados donde se ejecutan los handlers, uno por carril
+        self.handler_pool = LanePools({
+            LANE_CONTROL: HandlerPool(f"{node_name}-{LANE_CONTROL}",
+                                      workers=int(os.getenv("DFTP_CONTROL_WORKERS", "8")),
+                                      queue_size=int(os.getenv("DFTP_CONTROL_QUEUE", "512"))),
+            LANE_DEFAULT: HandlerPool(node_name,
+                                      workers=handler_workers or int(os.getenv("DFTP_HANDLER_WORKERS", "64")),
+                                      queue_size=handler_queue_size or int(os.getenv("DFTP_HANDLER_QUEUE", "256"))),
+            LANE_DATA: HandlerPool(f"{node_name}-{LANE_DATA}",
+                                   workers=int(os.getenv("DFTP_DATA_WORKERS", "16")),
+                                   queue_size=int(os.getenv("DFTP_DATA_QUEUE", "64"))),
+        })
+
+        # Executors de los envíos en paralelo de multicast y hedged_send, uno por carril: un fan-out
+        # de datos lento no deja en cola los heartbeats, consultas y gossip
+        self._fanout_executors = {
+            lane: concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"dftp-{node_name}-mcast-{lane}")
+            for lane, workers in (
+                (LANE_CONTROL, int(os.getenv("DFTP_CONTROL_MULTICAST_WORKERS", "16"))),
+                (LANE_DEFAULT, int(os.getenv("DFTP_MULTICAST_WORKERS", "32"))),
+                (LANE_DATA, int(os.getenv("DFTP_DATA_MULTICAST_WORKERS", "16"))),
+            )
+        }
+
+        # Métricas por tipo de mensaje y del plano de datos (streams)
+        self.stats = NodeStats()
+        self.tracer = Tracer(node_name)
+        self.stream_totals = StreamTotals()
 
-        # Iniciar el servidor TCP
+        # Instancia el servidor TCP y TCPClient
+        self.server = self._create_server(server_backend or os.getenv("DFTP_COMM_SERVER", "thread"))
+        self.client = TCPClient(multiplex=multiplex,
+                                framing=framing or os.getenv("DFTP_COMM_FRAMING", "length"),
+                                codec=codec or os.getenv("DFTP_COMM_CODEC", "binary"))
+
+        self.register_handler(MessageType.NODE_STATS, self._handle_node_stats)
+        self.register_handler(MessageType.NODE_TRACES, self._handle_node_traces)
+
+        # Iniciar el servidor TCP y anunciarse a los nodos del mismo proceso
         self._start_server()
+        loopback.register(self)
 
     # ---------------- Métodos Internos ----------------
+    def _create_server(self, backend: str):
+        """Crea el servidor TCP según el backend elegido ("thread" o "asyncio")."""
+        if backend == "asyncio":
+            return AsyncTCPServer(self.ip, self.port, self._on_message, handler_pool=self.handler_pool, node_stats=self.stats)
+
+        if backend != "thread":
+            raise ValueError(f"Invalid server backend '{backend}'. Expected 'thread' or 'asyncio'")
+
+        return TCPServer(self.ip, self.port, self._on_message, handler_pool=self.handler_pool, node_stats=self.stats)
+
     def _start_server(self):
         """Inicia el servidor TCP para recibir mensajes."""
         self.server.start()
@@ -65,16 +201,107 @@ class CommunicationNode:
         """
         handler = self.handlers.get(message.header['type'])
         if handler:
-            response = handler(message)
-            return response
+            # El llamador ya dejó de esperar: no se hace ningún trabajo
+            deadline = message.metadata.get("deadline")
+            if expired(deadline):
+                logger.warning("Descartado %s de %s: deadline vencido", message.header['type'], message.header.get("src"))
+                self.stats.expired("server", message.header['type'])
+                return None
+
+            with deadline_scope(deadline):
+                parent = self.tracer.extract(message.metadata)
+                if parent is None:
+                    return handler(message)
+
+                with self.tracer.span(f"handle {message.header['type']}", {"src": message.header.get("src")}, parent):
+                    return handler(message)
         else:
             logger.debug("No hay handler para tipo '%s'", message.header['type'])
             return None
+
+    def _receive_local(self, message: Message, await_response: bool, timeout: float):
+        """
+        Recibe message de un nodo del mismo proceso (ver loopback), sin pasar por el socket: lo
+        encola en el handler_pool como haría el servidor TCP y espera la respuesta hasta timeout.
+        Retorna una copia de la respuesta, o None si no hay respuesta, venció el timeout o el
+        carril está lleno (el equivalente a NODE_BUSY).
+        """
+        request = loopback.copy_message(message)
+        msg_type = request.header.get("type")
+        received = time.monotonic()
+        done = threading.Event()
+        result = []
+
+        def task():
+            error = True
+            try:
+                response = self._on_message(request)
+                error = response is not None and response.metadata.get("status") == "error"
+                result.append(response)
+
+            except Exception:
+                logger.exception("Error procesando mensaje local %s", msg_type)
+
+            finally:
+                self.stats.record("server", msg_type, time.monotonic() - received, error=error)
+                done.set()
+
+        if not self.handler_pool.submit(msg_type, task):
+            self.stats.record("server", msg_type, 0.0, error=True)
+            logger.warning("Nodo %s ocupado, rechazó %s local", self.node_name, msg_type)
+            return None
+
+        if not await_response or not done.wait(timeout) or not result or result[0] is None:
+            return None
+
+        return loopback.copy_message(result[0])
+
+    def _handle_node_stats(self, message: Message) -> Message:
+        """Responde NODE_STATS con las métricas del nodo (ver get_node_stats)."""
+        payload = self.get_node_stats()
+        if message.payload.get("reset"):
+            self.stats.reset()
+            compression.STATS.reset()
+        return Message(MessageType.NODE_STATS_ACK, self.ip, message.header.get("src"), payload=payload, metadata={"status": "OK"})
+
+    def _handle_node_traces(self, message: Message) -> Message:
+        """Responde NODE_TRACES con los spans registrados (filtrables por trace_id, since y limit)."""
+        payload = message.payload or {}
+        spans = self.tracer.get_spans(payload.get("trace_id"), payload.get("since"), payload.get("limit"))
+        return Message(MessageType.NODE_TRACES_ACK, self.ip, message.header.get("src"),
+                       payload={"node": self.node_name, "ip": self.ip, "spans": spans}, metadata={"status": "OK"})
         
+    def _submit_send(self, ip: str, port: int, message: Message, await_response: bool, timeout: float):
+        """
+        Encola send_message en el executor de envíos del carril del mensaje y retorna su future.
+        Si se espera respuesta, timeout cuenta desde ahora: un envío que esperó en cola solo dispone
+        del resto y, si ya no queda nada, no se envía. Lanza RuntimeError si el nodo está detenido.
+        """
+        executor = self._fanout_executors[lane_for(message.header.get("type"))]
+        # Cada envío corre con una copia del contexto para heredar la traza en curso
+        return executor.submit(contextvars.copy_context().run, self._send_queued, time.monotonic(),
+                               ip, port, message, await_response, timeout)
+
+    def _send_queued(self, submitted: float, ip: str, port: int, message: Message, await_response: bool, timeout: float):
+        """send_message para un envío encolado en submitted (monotonic) por _submit_send."""
+        if await_response:
+            remaining = timeout - (time.monotonic() - submitted)
+            if remaining <= 0:
+                logger.debug("No se envía %s a %s:%s: venció su timeout esperando en cola", message.header.get("type"), ip, port)
+                self.stats.expired("client", message.header.get("type"))
+                return None
+            timeout = remaining
+        return self.send_message(ip, port, message, await_response, timeout)
+
     # --------------- Métodos Públicos --------------------------
     def stop_server(self):
-        """Detiene el servidor TCP."""
+        """Detiene el servidor TCP y cierra las conexiones salientes reutilizables."""
+        loopback.unregister(self)
         self.server.stop()
+        self.handler_pool.shutdown()
+        for executor in self._fanout_executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
         logger.info("Server stopped on %s:%s", self.ip, self.port)
 
     def register_handler(self, msg_type: str, callback):
@@ -94,55 +321,184 @@ class CommunicationNode:
             - ip: dirección del nodo destino
             - msg: instancia de Message a enviar
             - await_response: si es True, espera y retorna la respuesta del nodo destino
-            - timeout: tiempo máximo para conectar y recibir respuesta
+            - timeout: tiempo máximo para conectar y recibir respuesta (acotado por el deadline heredado)
         """
         
         logger.debug("Enviando mensaje a %s:%s tipo=%s src=%s dst=%s", ip, port, msg.header.get("type"), msg.header.get("src"), msg.header.get("dst"))
         
-        response = self.client.send_message(ip, port, msg, await_response, timeout=timeout)
+        # Copia por envío: el deadline y la traza se anotan en ella, no en el mensaje del llamador
+        # (que puede reutilizarlo). Un deadline que traiga msg de un envío anterior se descarta
+        out = copy.copy(msg)
+        out.metadata = {k: v for k, v in msg.metadata.items() if k != "deadline"}
+
+        # Deadline del envío: el más cercano entre el heredado y el de su timeout
+        now = time.time()
+        candidates = [d for d in (current_deadline(), now + timeout if await_response else None) if d is not None]
+        if candidates:
+            deadline = min(candidates)
+            out.metadata["deadline"] = deadline
+            if expired(deadline):
+                logger.debug("No se envía %s a %s:%s: deadline vencido", msg.header.get("type"), ip, port)
+                self.stats.expired("client", msg.header.get("type"))
+                return None
+            timeout = min(timeout, max(0.001, deadline - now))
+
+        started = time.monotonic()
+        response = None
+        try:
+            with self.tracer.span(f"send {msg.header.get('type')}", {"dst": ip}) as span:
+                if span is not None:
+                    self.tracer.inject(out.metadata)
+
+                local = loopback.lookup(ip, port)
+                if local is not None:
+                    if span is not None:
+                        span.tag(loopback=True)
+                    response = local._receive_local(out, await_response, timeout)
+                else:
+                    response = self.client.send_message(ip, port, out, await_response, timeout=timeout)
+                if span is not None and await_response and response is None:
+                    span.error = True
+
+        finally:
+            # Sin respuesta esperada, ocupado o con status "error" cuenta como error
+            error = (await_response and response is None) or (response is not None and (
+                response.header.get("type") == MessageType.NODE_BUSY or response.metadata.get("status") == "error"))
+            self.stats.record("client", msg.header.get("type"), time.monotonic() - started, error=error,
+                              bytes_in=response.wire_size if response is not None else 0, bytes_out=out.wire_size)
         
         logger.debug("Respuesta recibida de %s:%s -> %s", ip, port, getattr(response, "header", None))
+
+        # El destino rechazó el mensaje por sobrecarga: se trata como sin respuesta
+        if response and response.header.get("type") == MessageType.NODE_BUSY:
+            logger.warning("Nodo %s:%s ocupado, rechazó %s", ip, port, msg.header.get("type"))
+            return None
         
         return response
+
+    def multicast(self, targets, msg, mode: str = "all", quorum: int = None, port: int = None,
+                  await_response: bool = True, timeout: float = 1.0, accept=None) -> MulticastResult:
+        """
+        Envía un mensaje a varios nodos en paralelo.
+          Params:
+            - targets: iterable de ips destino
+            - msg: Message (se copia por destino) o callable(ip) -> Message
+            - mode: "all", "quorum" o "first"
+            - quorum: respuestas necesarias en modo "quorum" (por defecto mayoría de targets)
+            - port: puerto destino (por defecto el de este nodo)
+            - await_response: si es False solo encola los envíos y retorna sin esperar
+            - timeout: timeout de cada envío, contado desde que se encola (también acota la espera total)
+            - accept: callable(Message) -> bool que decide si una respuesta cuenta (por defecto toda respuesta)
+          Retorna MulticastResult; es verdadero si se alcanzaron las respuestas requeridas.
+        """
+        targets = list(dict.fromkeys(targets))
+        port = port or self.port
+        result = MulticastResult(required_responses(mode, quorum, len(targets)))
+        started = time.monotonic()
+
+        futures = {}
+        for ip in targets:
+            try:
+                futures[self._submit_send(ip, port, message_for(msg, ip), await_response, timeout)] = ip
+
+            except RuntimeError:
+                # Nodo detenido: el executor ya no acepta envíos
+                result.failed.append(ip)
+
+        if not await_response:
+            result.pending = list(futures.values())
+            result.satisfied = True
+            return result
+
+        # En modo "all" se espera a todos aunque alguno falle, para devolver todas las respuestas disponibles
+        return wait_for(futures, result, accept or (lambda response: True), started, give_up_early=mode != "all", timeout=timeout)
+
+    def hedged_send(self, targets, msg, port: int = None, timeout: float = 1.0, accept=None,
+                    delay: float = None) -> MulticastResult:
+        """
+        Envía un mensaje a varios nodos de forma escalonada y retorna con la primera respuesta aceptada.
+          Params:
+            - targets: ips destino en orden de preferencia (p. ej. el de rank_peers)
+            - msg: Message (se copia por destino) o callable(ip) -> Message
+            - port: puerto destino (por defecto el de este nodo)
+            - timeout: timeout de cada envío, contado desde que se encola
+            - accept: callable(Message) -> bool que decide si una respuesta vale (por defecto toda respuesta)
+            - delay: segundos a esperar a cada destino antes de enviar también al siguiente; por
+              defecto se calcula con la latencia media observada del destino (ver multicast.hedge_delay).
+              Con 0 se envía a todos a la vez.
+          Un destino que falla o responde algo no aceptado da paso al siguiente sin esperar. Las
+          respuestas que llegan después de la ganadora se ignoran (también actualizan la latencia
+          media de su destino). Retorna MulticastResult: responses tiene a lo sumo la ganadora.
+        """
+        targets = list(dict.fromkeys(targets))
+        port = port or self.port
+        started = time.monotonic()
+
+        def submit(ip):
+            try:
+                return self._submit_send(ip, port, message_for(msg, ip), True, timeout)
+            except RuntimeError:
+                # Nodo detenido: el executor ya no acepta envíos
+                return None
+
+        def delay_for(ip):
+            return delay if delay is not None else hedge_delay(self.client.peer_latency(ip, port), timeout)
+
+        return hedge(submit, targets, delay_for, accept or (lambda response: True), started, timeout=timeout)
+
+    def get_handler_stats(self) -> dict:
+        """Retorna, por carril, la ocupación del pool de handlers y sus métricas por tipo de mensaje."""
+        return self.handler_pool.get_stats()
     
-    def send_stream(dst_ip: str, dst_port: int, data_iterable, chunk_size=4096):
+    def get_node_stats(self) -> dict:
+        """Retorna las métricas por tipo de mensaje, del handler_pool, del servidor, de los streams, de compresión y de los peers."""
+        return {
+            "node": self.node_name,
+            "ip": self.ip,
+            "messages": self.stats.get_stats(),
+            "handlers": self.handler_pool.get_stats(),
+            "server": self.server.get_stats(),
+            "streams": self.stream_totals.get_stats(),
+            "compression": compression.STATS.get_stats(),
+            "peers": self.client.get_health_stats(),
+        }
+
+    def rank_peers(self, peers: list, port: int, key=None, by_latency: bool = True) -> list:
         """
-        Envía un stream de bytes a un nodo destino.
+        Ordena peers de más a menos sano para probarlos en ese orden. key extrae la ip de cada
+        elemento; por defecto los elementos son ips o dicts con "ip" (como los nodos de
+        query_by_role). Los de circuito abierto quedan al final. Con by_latency=False se conserva
+        el orden recibido salvo por el estado del circuito.
+        """
+        key = key or _peer_ip
+        ranked = self.client.rank_peers([(key(peer), port) for peer in peers], by_latency)
+        order = {addr: i for i, addr in enumerate(ranked)}
+        return sorted(peers, key=lambda peer: order[(key(peer), port)])
+
+    def get_stream_stats(self) -> dict:
+        """Retorna los bytes, transferencias y throughput acumulados de los streams del nodo."""
+        return self.stream_totals.get_stats()
+
+    def send_stream(self, dst_ip: str, dst_port: int, source, timeout: float = 30.0) -> StreamStats:
+        """
+        Envía un stream de bytes a un nodo destino por una conexión TCP dedicada.
 
         Params:
             dst_ip: IP del destino
             dst_port: puerto TCP del canal de datos
-            data_iterable: iterable de bytes o un objeto file-like
-            chunk_size: tamaño de cada bloque enviado
+            source: ruta o archivo abierto (se envía con sendfile), bytes o iterable de bytes
+            timeout: segundos para conectar
         """
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-
-            sock.connect((dst_ip, dst_port))
-            for chunk in data_iterable:
-                sock.sendall(chunk)
+        with open_stream(dst_ip, dst_port, timeout=timeout) as sock:
+            return send_stream(sock, source, totals=self.stream_totals)
 
-        finally:
-            if sock:
-                sock.close()
-
-    def recv_stream(listen_ip: str, listen_port: int, chunk_size=4096):
-        """Recibe un stream de bytes y lo devuelve como iterable de chunks."""
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.bind((listen_ip, listen_port))
-        sock.listen(1)
-        conn, _ = sock.accept()
-        
-        try:
-            while True:
-                chunk = conn.recv(chunk_size)
-                if not chunk:
-                    break
-                yield chunk
-
-        finally:
-            if conn:
-                conn.close()
-
-            if sock:
-                sock.close()  
+    def recv_stream(self, listen_ip: str, listen_port: int, sink, chunk_size: int = None, timeout: float = 300.0) -> StreamStats:
+        """
+        Escucha en listen_ip:listen_port, acepta una conexión y escribe lo recibido en sink
+        (ruta, archivo abierto o callable(memoryview)) hasta que el emisor cierra.
+        timeout acota la espera de la conexión.
+        """
+        with listen_stream(listen_ip, listen_port, timeout=timeout) as sock:
+            conn, _ = accept_stream(sock)
+            with conn:
+                return recv_stream(conn, sink, chunk_size, totals=self.stream_totals)
@@ -0,0 +1,89 @@
+"""
+Deadlines absolutos de las peticiones entre nodos.
+
+send_message fija en la metadata de la copia que envía un "deadline" (segundos UNIX) a partir
+de su timeout, acotado por el deadline heredado. El nodo que recibe el mensaje lo descarta sin
+ejecutar el handler si ya venció (más GRACE) y, si no, ejecuta el handler dentro de deadline_scope, de modo
+que los mensajes que el handler envíe, los streams y las esperas (remaining_budget) heredan el
+mismo límite. Así, cuando el llamador original se rinde, el trabajo que dependía de él se
+abandona en lugar de seguir consumiendo handlers y ancho de banda.
+
+El deadline lo calcula el reloj del emisor y lo compara el del receptor, así que un desfase
+entre ambos relojes lo adelanta o lo atrasa. GRACE (DFTP_DEADLINE_GRACE, 0.5 s por defecto) es
+el desfase que se tolera: el receptor solo descarta mensajes vencidos hace más de GRACE. Debe
+ser pequeño frente a los timeouts (~1 s) para no ejecutar trabajo que ya nadie espera; con los
+relojes sincronizados (NTP) puede bajarse a 0.
+
+Como en las trazas, el deadline vive en un ContextVar: los hilos nuevos no lo heredan salvo que
+se lancen con contextvars.copy_context().
+"""
+
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+# Desfase de reloj (s) entre nodos que se tolera tras el deadline (ver docstring del módulo)
+GRACE = float(os.getenv("DFTP_DEADLINE_GRACE", "0.5"))
+
+_deadline: contextvars.ContextVar = contextvars.ContextVar("dftp_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """El deadline de la petición en curso venció."""
+    pass
+
+
+def current_deadline() -> float | None:
+    """Deadline (segundos UNIX) heredado en el contexto actual, o None si no hay."""
+    return _deadline.get()
+
+
+def remaining_budget(default: float = None) -> float | None:
+    """
+    Segundos que quedan hasta el deadline del contexto actual (0 si ya venció).
+    Sin deadline retorna default.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return default
+    return max(0.0, deadline - time.time())
+
+
+def clamp_timeout(timeout: float | None) -> float | None:
+    """timeout acotado por el tiempo restante del deadline actual."""
+    remaining = remaining_budget()
+    if remaining is None:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def expired(deadline: float | None) -> bool:
+    """Si deadline ya venció, con GRACE de margen; None nunca vence."""
+    return deadline is not None and time.time() > deadline + GRACE
+
+
+def check_deadline():
+    """Lanza DeadlineExceeded si el deadline del contexto actual ya venció."""
+    deadline = _deadline.get()
+    if expired(deadline):
+        raise DeadlineExceeded(f"Deadline vencido hace {time.time() - deadline:.3f}s")
+
+
+@contextmanager
+def deadline_scope(deadline: float | None):
+    """
+    Ejecuta el bloque con deadline como límite del contexto. Nunca lo extiende: si ya hay un
+    deadline más cercano, se mantiene ese.
+    """
+    current = _deadline.get()
+    if deadline is None or (current is not None and current <= deadline):
+        yield current
+        return
+
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+
+    finally:
+        _deadline.reset(token)
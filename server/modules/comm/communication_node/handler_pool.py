@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger("dftp.comm.handler_pool")
+
+class HandlerPool:
+    """
+    Pool fijo de hilos con cola acotada para ejecutar los handlers de un nodo.
+
+    Los servidores TCP encolan aquí cada mensaje recibido en lugar de lanzar un hilo por mensaje.
+    Si la cola está llena submit() retorna False y el servidor responde al remitente con
+    NODE_BUSY, de modo que la carga que el nodo no puede absorber se rechaza de inmediato
+    en vez de acumular hilos.
+
+    Parámetros:
+        - name: nombre del pool (para logs y métricas).
+        - workers: número de hilos que ejecutan handlers.
+        - queue_size: máximo de mensajes esperando un hilo libre.
+
+    Métricas por tipo de mensaje (get_stats()["by_type"]):
+        - submitted / rejected / completed / failed: mensajes encolados, rechazados por cola llena,
+          terminados y terminados con excepción.
+        - queued: mensajes de ese tipo esperando en la cola ahora mismo.
+        - wait_avg_ms / wait_max_ms: tiempo de espera en cola hasta que un hilo los toma.
+    """
+
+    def __init__(self, name: str = "default", workers: int = 64, queue_size: int = 256):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._metrics: dict[str, dict] = {}
+        self._busy_workers = 0
+        self._running = True
+
+        self._threads = [threading.Thread(target=self._worker_loop, name=f"dftp-{name}-{i}", daemon=True) for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    # ---------------- Métodos públicos ----------------
+    def submit(self, msg_type: str, task) -> bool:
+        """Encola task (callable sin argumentos). Retorna False si la cola está llena."""
+        if not self._running:
+            return False
+
+        try:
+            self._queue.put_nowait((msg_type, task, time.monotonic()))
+
+        except queue.Full:
+            with self._lock:
+                self._type_metrics(msg_type)["rejected"] += 1
+            logger.warning("HandlerPool '%s' lleno (%d en cola): rechazando %s", self.name, self.queue_size, msg_type)
+            return False
+
+        with self._lock:
+            m = self._type_metrics(msg_type)
+            m["submitted"] += 1
+            m["queued"] += 1
+        return True
+
+    def queue_depth(self) -> int:
+        """Mensajes esperando un hilo libre."""
+        return self._queue.qsize()
+
+    def pending(self) -> int:
+        """Mensajes en el pool: esperando en la cola o ejecutándose."""
+        with self._lock:
+            busy = self._busy_workers
+        return self._queue.qsize() + busy
+
+    def get_stats(self) -> dict:
+        """Retorna la configuración, ocupación y métricas por tipo de mensaje del pool."""
+        with self._lock:
+            by_type = {}
+            for msg_type, m in self._metrics.items():
+                taken = m["completed"] + m["failed"]
+                by_type[msg_type] = {
+                    "submitted": m["submitted"],
+                    "rejected": m["rejected"],
+                    "completed": m["completed"],
+                    "failed": m["failed"],
+                    "queued": m["queued"],
+                    "wait_avg_ms": round(m["wait_total"] * 1000 / taken, 3) if taken else 0.0,
+                    "wait_max_ms": round(m["wait_max"] * 1000, 3),
+                }
+            busy = self._busy_workers
+
+        return {"name": self.name, "workers": self.workers, "busy_workers": busy, "queue_size": self.queue_size,
+                "queue_depth": self.queue_depth(), "by_type": by_type}
+
+    def shutdown(self):
+        """Deja de aceptar mensajes y detiene los hilos cuando terminen su tarea actual."""
+        self._running = False
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+
+    # ---------------- Métodos internos ----------------
+    def _type_metrics(self, msg_type: str) -> dict:
+        """Retorna (creando si hace falta) las métricas de un tipo de mensaje (requiere self._lock)."""
+        m = self._metrics.get(msg_type)
+        if m is None:
+            m = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "queued": 0, "wait_total": 0.0, "wait_max": 0.0}
+            self._metrics[msg_type] = m
+        return m
+
+    def _worker_loop(self):
+        """Hilo que toma mensajes de la cola y ejecuta su handler."""
+        while self._running:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            msg_type, task, enqueued_at = item
+            waited = time.monotonic() - enqueued_at
+
+            with self._lock:
+                m = self._type_metrics(msg_type)
+                m["queued"] -= 1
+                m["wait_total"] += waited
+                m["wait_max"] = max(m["wait_max"], waited)
+                self._busy_workers += 1
+
+            failed = False
+            try:
+                task()
+
+            except Exception:
+                failed = True
+                logger.exception("Error ejecutando handler de %s en pool '%s'", msg_type, self.name)
+
+            finally:
+                with self._lock:
+                    self._type_metrics(msg_type)["failed" if failed else "completed"] += 1
+                    self._busy_workers -= 1
@@ -0,0 +1,105 @@
+"""
+Carriles (lanes) de mensajes con prioridad.
+
+Cada tipo de mensaje pertenece a un carril:
+    - "control": liveness y coordinación (heartbeats, consultas de discovery, gossip, DATA_READY,
+      métricas). Handlers cortos que deben responder rápido aunque el nodo esté saturado.
+    - "data": handlers que duran lo que una transferencia (STOR, RETR, LIST, replicación,
+      sincronización de estado).
+    - "default": el resto.
+
+En el servidor cada carril tiene su propio HandlerPool (LanePools), de modo que una ráfaga de
+transferencias no deja sin hilos a los heartbeats ni encola DATA_READY detrás de los STOR que lo
+esperan. En el cliente multiplexado los mensajes de control usan su propio canal hacia cada peer
+para no quedar detrás de tramas grandes de los otros carriles.
+"""
+
+from server.modules.comm.message import MessageType
+from server.modules.comm.communication_node.handler_pool import HandlerPool
+
+LANE_CONTROL = "control"
+LANE_DEFAULT = "default"
+LANE_DATA = "data"
+
+LANES = (LANE_CONTROL, LANE_DEFAULT, LANE_DATA)
+
+CONTROL_TYPES = frozenset({
+    MessageType.DISCOVERY_HEARTBEAT,
+    MessageType.DISCOVERY_QUERY_BY_NAME,
+    MessageType.DISCOVERY_QUERY_BY_ROLE,
+    MessageType.DISCOVERY_QUERY_ALL,
+    MessageType.DISCOVERY_WATCH,
+    MessageType.DISCOVERY_EVENT,
+    MessageType.DISCOVERY_SYNC,
+    MessageType.DISCOVERY_SYNC_PUSH,
+    MessageType.GOSSIP_UPDATE,
+    MessageType.DATA_READY,
+    MessageType.DATA_OPEN_PASV,
+    # Su handler solo lanza el envío del archivo; es lo que esperan los DATA_REPLICATE_FILE
+    MessageType.DATA_REPLICATE_READY,
+    MessageType.NODE_STATS,
+    MessageType.NODE_TRACES,
+})
+
+DATA_TYPES = frozenset({
+    MessageType.DATA_LIST,
+    MessageType.DATA_RETR_FILE,
+    MessageType.DATA_STORE_FILE,
+    MessageType.DATA_SYNC_FILE_REQUEST,
+    MessageType.DATA_PUSH,
+    MessageType.UPDATE_FROM_NODE,
+    MessageType.CLUSTER_STATE_REQUEST,
+    MessageType.MERGE_STATE,
+    MessageType.SEND_STATE,
+})
+
+
+# DATA_REPLICATE_FILE va en "default": lo esperan los DATA_STORE_FILE ("data") y él espera a
+# DATA_REPLICATE_READY ("control"). Que ninguna petición espere a otra de su mismo carril evita
+# que un carril lleno de STOR se bloquee esperando replicaciones que no consiguen hilo.
+
+
+def lane_for(msg_type: str) -> str:
+    """Carril al que pertenece un tipo de mensaje."""
+    if msg_type in CONTROL_TYPES:
+        return LANE_CONTROL
+    if msg_type in DATA_TYPES:
+        return LANE_DATA
+    return LANE_DEFAULT
+
+
+class LanePools:
+    """
+    Un HandlerPool por carril con la misma interfaz que HandlerPool (submit, queue_depth,
+    pending, get_stats, shutdown), para que los servidores TCP lo usen como handler_pool.
+
+    Parámetros:
+        - pools: dict carril -> HandlerPool (deben estar los tres carriles).
+    """
+
+    def __init__(self, pools: dict[str, HandlerPool]):
+        missing = [lane for lane in LANES if lane not in pools]
+        if missing:
+            raise ValueError(f"Missing handler pools for lanes {missing}")
+        self.pools = pools
+
+    # ---------------- Métodos públicos ----------------
+    def submit(self, msg_type: str, task) -> bool:
+        """Encola task en el pool del carril de msg_type. Retorna False si esa cola está llena."""
+        return self.pools[lane_for(msg_type)].submit(msg_type, task)
+
+    def queue_depth(self) -> int:
+        """Mensajes esperando un hilo libre, sumando todos los carriles."""
+        return sum(pool.queue_depth() for pool in self.pools.values())
+
+    def pending(self) -> int:
+        """Mensajes en cola o ejecutándose, sumando todos los carriles."""
+        return sum(pool.pending() for pool in self.pools.values())
+
+    def get_stats(self) -> dict:
+        """Retorna las métricas de cada carril (ver HandlerPool.get_stats)."""
+        return {lane: pool.get_stats() for lane, pool in self.pools.items()}
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown()
@@ -0,0 +1,58 @@
+"""
+Registro de los CommunicationNode del proceso, por (ip, port).
+
+Cuando varios nodos corren en el mismo proceso (despliegue embebido en un solo host, ver
+tests/run_embedded.py), send_message consulta este registro y, si el destino está aquí, le entrega
+el mensaje directamente en su handler_pool: sin socket ni serialización, pero con la misma
+semántica (carriles, NODE_BUSY, timeouts, deadlines, trazas y métricas).
+
+DFTP_LOOPBACK=0 desactiva el atajo y todos los mensajes pasan por TCP.
+"""
+import copy
+import os
+import threading
+from server.modules.comm.message import Message
+
+ENABLED = os.getenv("DFTP_LOOPBACK", "1").lower() not in ("0", "off", "false")
+
+_lock = threading.Lock()
+_nodes: dict[tuple[str, int], object] = {}
+
+
+def register(node):
+    """Registra node en (node.ip, node.port)."""
+    if not ENABLED:
+        return
+    with _lock:
+        _nodes[(node.ip, node.port)] = node
+
+
+def unregister(node):
+    """Quita node del registro si sigue siendo el registrado en su dirección."""
+    with _lock:
+        if _nodes.get((node.ip, node.port)) is node:
+            del _nodes[(node.ip, node.port)]
+
+
+def lookup(ip: str, port: int):
+    """Nodo del proceso que escucha en (ip, port), o None."""
+    if not _nodes:
+        return None
+    with _lock:
+        return _nodes.get((ip, port))
+
+
+def registered() -> list[tuple[str, int]]:
+    """Direcciones de los nodos registrados en el proceso."""
+    with _lock:
+        return list(_nodes)
+
+
+def copy_message(message: Message) -> Message:
+    """
+    Copia de message para entregarla a otro nodo del proceso. El payload se copia en profundidad,
+    como si hubiera pasado por el socket: ninguno de los dos lados ve los cambios del otro, ni en
+    los valores anidados.
+    """
+    return Message.from_dict({"header": dict(message.header), "payload": copy.deepcopy(message.payload),
+                              "metadata": copy.deepcopy(message.metadata)})
@@ -0,0 +1,200 @@
+import concurrent.futures
+import os
+import time
+import logging
+from server.modules.comm.message import Message
+
+logger = logging.getLogger("dftp.comm.multicast")
+
+MULTICAST_MODES = ("all", "quorum", "first")
+
+# Envíos escalonados (CommunicationNode.hedged_send): cuánto esperar la respuesta de un destino
+# antes de enviar también al siguiente, en función de su latencia media observada
+HEDGE_DELAY = float(os.getenv("DFTP_HEDGE_DELAY", "0.1"))
+HEDGE_MIN_DELAY = float(os.getenv("DFTP_HEDGE_MIN_DELAY", "0.02"))
+HEDGE_FACTOR = float(os.getenv("DFTP_HEDGE_FACTOR", "3"))
+
+# Margen sobre el timeout de los envíos para recoger las respuestas que llegan justo al límite
+WAIT_SLACK = 0.05
+
+class MulticastResult:
+    """
+    Resultado de CommunicationNode.multicast y CommunicationNode.hedged_send.
+
+    Campos:
+        - responses (dict[str, Message]): respuestas aceptadas, por ip destino.
+        - failed (list[str]): destinos que no respondieron o cuya respuesta no fue aceptada.
+        - pending (list[str]): destinos que aún no habían respondido al retornar (el envío sigue su
+          curso, pero su respuesta se ignora).
+        - required (int): respuestas aceptadas necesarias según el modo.
+        - satisfied (bool): True si se alcanzaron las respuestas requeridas.
+        - elapsed (float): segundos hasta que se cumplió (o se descartó) la condición.
+    """
+
+    def __init__(self, required: int):
+        self.responses: dict[str, Message] = {}
+        self.failed: list[str] = []
+        self.pending: list[str] = []
+        self.required = required
+        self.satisfied = False
+        self.elapsed = 0.0
+
+    def __bool__(self):
+        return self.satisfied
+
+    def __repr__(self):
+        return (f"MulticastResult(satisfied={self.satisfied}, ok={len(self.responses)}/{self.required}, "
+                f"failed={len(self.failed)}, pending={len(self.pending)}, elapsed={self.elapsed:.3f})")
+
+
+def required_responses(mode: str, quorum: int | None, total: int) -> int:
+    """Respuestas aceptadas necesarias para un modo sobre total destinos."""
+    if mode == "all":
+        return total
+    if mode == "first":
+        return min(1, total)
+    if mode == "quorum":
+        k = quorum if quorum is not None else total // 2 + 1
+        return max(0, min(k, total))
+    raise ValueError(f"Invalid multicast mode '{mode}'. Expected one of {MULTICAST_MODES}")
+
+
+def message_for(msg, ip: str) -> Message:
+    """
+    Mensaje a enviar a ip. msg puede ser un callable(ip) -> Message o un Message, que se copia por
+    destino (con dst propio y msg_id nuevo). La copia no lleva el deadline que msg pudiera traer:
+    send_message fija el de cada envío.
+    """
+    if callable(msg):
+        return msg(ip)
+
+    metadata = {k: v for k, v in msg.metadata.items() if k not in ("msg_id", "timestamp", "deadline")}
+    return Message(msg.header["type"], msg.header.get("src"), ip, payload=msg.payload, metadata=metadata)
+
+
+def wait_for(futures: dict, result: MulticastResult, accept, started: float, give_up_early: bool = True,
+             timeout: float = None) -> MulticastResult:
+    """
+    Espera las respuestas de futures (future -> ip) hasta que se cumple result.required, hasta que
+    pasa timeout desde started o, con give_up_early, hasta que ya no puede cumplirse. Los envíos
+    pendientes no se cancelan: siguen en segundo plano (todos los destinos reciben el mensaje) y
+    solo se deja de esperar su respuesta.
+    """
+    remaining = set(futures)
+    limit = None if timeout is None else started + timeout + WAIT_SLACK
+
+    while remaining and len(result.responses) < result.required:
+        # Si ni respondiendo todos los pendientes se alcanza el mínimo, no seguir esperando
+        if give_up_early and len(result.responses) + len(remaining) < result.required:
+            break
+
+        wait_timeout = None if limit is None else limit - time.monotonic()
+        if wait_timeout is not None and wait_timeout <= 0:
+            break
+
+        done, remaining = concurrent.futures.wait(remaining, timeout=wait_timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+        for fut in done:
+            ip = futures[fut]
+            try:
+                response = fut.result()
+
+            except Exception as e:
+                logger.debug("Error en multicast a %s: %s", ip, e)
+                response = None
+
+            if response is not None and accept(response):
+                result.responses[ip] = response
+            else:
+                result.failed.append(ip)
+
+    for fut in remaining:
+        result.pending.append(futures[fut])
+
+    result.satisfied = len(result.responses) >= result.required
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def hedge_delay(latency: float | None, timeout: float) -> float:
+    """
+    Segundos a esperar la respuesta de un destino antes de enviar al siguiente: HEDGE_FACTOR
+    veces su latencia media (HEDGE_DELAY si no hay muestras), entre HEDGE_MIN_DELAY y timeout.
+    """
+    if latency is None:
+        return min(HEDGE_DELAY, timeout)
+    return min(max(HEDGE_MIN_DELAY, HEDGE_FACTOR * latency), timeout)
+
+
+def hedge(submit, targets: list[str], delay_for, accept, started: float, timeout: float = None) -> MulticastResult:
+    """
+    Envía a targets en orden, uno más cada vez que pasan delay_for(ip) segundos sin respuesta
+    aceptada del último lanzado o en cuanto un envío falla, y retorna con la primera respuesta
+    aceptada. submit(ip) lanza el envío y retorna su future (o None si no pudo lanzarse); los
+    envíos que siguen en curso al retornar quedan en result.pending y se ignoran. Un envío sin
+    respuesta timeout segundos después de lanzarse cuenta como fallido.
+    """
+    result = MulticastResult(min(1, len(targets)))
+    queue = list(targets)
+    futures = {}
+    launched = {}
+    last = None
+
+    def launch() -> bool:
+        nonlocal last
+        while queue:
+            ip = queue.pop(0)
+            fut = submit(ip)
+            if fut is None:
+                result.failed.append(ip)
+                continue
+            futures[fut] = ip
+            launched[fut] = time.monotonic()
+            last = ip
+            return True
+        return False
+
+    def overdue(fut) -> bool:
+        return timeout is not None and time.monotonic() >= launched[fut] + timeout + WAIT_SLACK
+
+    launch()
+    while futures and not result.responses:
+        wait_timeout = delay_for(last) if queue else None
+        if timeout is not None:
+            left = max(0.0, min(launched.values()) + timeout + WAIT_SLACK - time.monotonic())
+            wait_timeout = left if wait_timeout is None else min(wait_timeout, left)
+        done, _ = concurrent.futures.wait(futures, timeout=wait_timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+
+        if not done:
+            # Envíos sin respuesta en su timeout (p. ej. aún en cola): fallidos
+            for fut in [f for f in futures if overdue(f)]:
+                fut.cancel()
+                launched.pop(fut)
+                result.failed.append(futures.pop(fut))
+            # Sin respuesta a tiempo: se envía también al siguiente destino sin cancelar los anteriores
+            launch()
+            continue
+
+        for fut in done:
+            launched.pop(fut)
+            ip = futures.pop(fut)
+            try:
+                response = fut.result()
+
+            except Exception as e:
+                logger.debug("Error en envío escalonado a %s: %s", ip, e)
+                response = None
+
+            if response is not None and accept(response):
+                result.responses[ip] = response
+            else:
+                result.failed.append(ip)
+                if not result.responses:
+                    launch()
+
+    for fut in futures:
+        fut.cancel()
+        result.pending.append(futures[fut])
+
+    result.satisfied = len(result.responses) >= result.required
+    result.elapsed = time.monotonic() - started
+    return result
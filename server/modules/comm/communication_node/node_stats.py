@@ -0,0 +1,133 @@
+import threading
+
+# Peso de cada muestra nueva en la latencia reciente del lado servidor (media exponencial)
+RECENT_ALPHA = 0.2
+
+# Límites superiores (ms) de los buckets de latencia; el último recoge todo lo demás
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, float("inf"))
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con buckets fijos en escala aproximadamente logarítmica.
+
+    No es thread-safe por sí mismo: NodeStats lo protege con su lock.
+    Los percentiles se estiman con el límite superior del bucket (acotado por el máximo observado).
+    """
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float):
+        ms = seconds * 1000.0
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """Latencia estimada (ms) por debajo de la cual está la fracción p (0-1) de las muestras."""
+        if not self.count:
+            return 0.0
+        target = p * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {f"le_{bound:g}": n for bound, n in zip(LATENCY_BUCKETS_MS, self.counts) if n},
+        }
+
+
+class _TypeStats:
+    __slots__ = ("requests", "errors", "expired", "bytes_in", "bytes_out", "latency")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.expired = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> dict:
+        return {"requests": self.requests, "errors": self.errors, "expired": self.expired, "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out, "latency": self.latency.to_dict()}
+
+
+class NodeStats:
+    """
+    Contadores e histogramas de latencia por tipo de mensaje, separados por lado:
+        - "client": mensajes enviados con CommunicationNode.send_message (latencia hasta la respuesta).
+        - "server": mensajes recibidos (latencia desde que llega la trama hasta que la respuesta
+          está serializada, incluyendo la espera en el handler_pool).
+
+    bytes_in / bytes_out son los bytes de las tramas recibidas / enviadas (0 si no se conocen).
+    expired cuenta los mensajes no enviados (client) o descartados sin ejecutar (server) porque su
+    deadline ya había vencido.
+
+    recent_latency() es la media exponencial (RECENT_ALPHA) de la latencia del lado servidor de
+    todos los tipos: una de las señales de carga que el nodo envía en sus heartbeats.
+    """
+
+    SIDES = ("client", "server")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_side = {side: {} for side in self.SIDES}
+        self._recent = None
+
+    def record(self, side: str, msg_type: str, seconds: float, error: bool = False, bytes_in: int = 0, bytes_out: int = 0):
+        with self._lock:
+            stats = self._get(side, msg_type)
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.bytes_in += bytes_in or 0
+            stats.bytes_out += bytes_out or 0
+            stats.latency.record(seconds)
+            if side == "server":
+                self._recent = seconds if self._recent is None else self._recent + RECENT_ALPHA * (seconds - self._recent)
+
+    def expired(self, side: str, msg_type: str):
+        with self._lock:
+            self._get(side, msg_type).expired += 1
+
+    def recent_latency(self) -> float | None:
+        """Latencia reciente (ms) de los mensajes atendidos, o None si aún no se atendió ninguno."""
+        with self._lock:
+            return self._recent * 1000.0 if self._recent is not None else None
+
+    def get_stats(self) -> dict:
+        """Retorna {"client": {tipo: métricas}, "server": {tipo: métricas}}."""
+        with self._lock:
+            return {side: {t: s.to_dict() for t, s in by_type.items()} for side, by_type in self._by_side.items()}
+
+    def reset(self):
+        with self._lock:
+            self._by_side = {side: {} for side in self.SIDES}
+            self._recent = None
+
+    def _get(self, side: str, msg_type: str) -> _TypeStats:
+        stats = self._by_side[side].get(msg_type)
+        if stats is None:
+            stats = self._by_side[side][msg_type] = _TypeStats()
+        return stats
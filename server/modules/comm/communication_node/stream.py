@@ -0,0 +1,296 @@
+"""
+Plano de datos: transferencia de streams de bytes sobre sockets TCP dedicados (RETR, STOR, LIST,
+replicación y sincronización de archivos entre DataNodes).
+
+    - send_stream envía un archivo con socket.sendfile (sin copiar los datos a espacio de usuario);
+      bytes y otros iterables se envían con sendall.
+    - recv_stream recibe con recv_into sobre un buffer reutilizable (uno por hilo) y escribe
+      directamente en el destino, sin crear un objeto bytes por chunk.
+    - open_stream / listen_stream / accept_stream crean los sockets con los tamaños de buffer de
+      DFTP_STREAM_SNDBUF / DFTP_STREAM_RCVBUF (0 mantiene el autoajuste del sistema) y un timeout
+      de inactividad común.
+    - Cada transferencia retorna un StreamStats (bytes, duración, throughput) y puede acumularse
+      en un StreamTotals.
+    - Si hay un deadline en el contexto (ver deadline), accept, envío y recepción se abortan con
+      DeadlineExceeded al vencer: los sendfile se hacen por tramos de DEADLINE_SLICE bytes y los
+      timeouts del socket se acotan al tiempo restante.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from server.modules.comm.communication_node.deadline import current_deadline, clamp_timeout, check_deadline
+
+logger = logging.getLogger("dftp.comm.stream")
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("DFTP_STREAM_CHUNK", str(256 * 1024)))
+DEFAULT_SNDBUF = int(os.getenv("DFTP_STREAM_SNDBUF", "0"))
+DEFAULT_RCVBUF = int(os.getenv("DFTP_STREAM_RCVBUF", "0"))
+
+# Segundos sin progreso tras los que se aborta una transferencia
+DEFAULT_IDLE_TIMEOUT = float(os.getenv("DFTP_STREAM_IDLE_TIMEOUT", "60"))
+
+# Bytes por llamada a sendfile cuando hay deadline (entre tramos se comprueba el deadline)
+DEADLINE_SLICE = 8 * 1024 * 1024
+
+_buffers = threading.local()
+
+
+class StreamStats:
+    """
+    Métricas de una transferencia.
+
+    Campos:
+        - direction (str): "sent" o "received".
+        - bytes (int): bytes transferidos.
+        - elapsed (float): segundos desde el inicio hasta el fin de la transferencia.
+        - throughput (float): bytes por segundo (0 si no hubo tiempo medible).
+    """
+
+    __slots__ = ("direction", "bytes", "elapsed", "_started")
+
+    def __init__(self, direction: str):
+        self.direction = direction
+        self.bytes = 0
+        self.elapsed = 0.0
+        self._started = time.monotonic()
+
+    @property
+    def throughput(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def finish(self) -> "StreamStats":
+        self.elapsed = time.monotonic() - self._started
+        return self
+
+    def to_dict(self) -> dict:
+        return {"direction": self.direction, "bytes": self.bytes, "elapsed": self.elapsed, "throughput": self.throughput}
+
+    def __repr__(self):
+        return (f"StreamStats({self.direction}, bytes={self.bytes}, elapsed={self.elapsed:.3f}s, "
+                f"throughput={self.throughput / (1024 * 1024):.1f} MiB/s)")
+
+
+class StreamTotals:
+    """
+    Acumulado thread-safe de las transferencias de un nodo, por dirección, y de las que están en
+    curso (begin() al empezar, record() al terminar).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = {d: {"transfers": 0, "failed": 0, "bytes": 0, "seconds": 0.0} for d in ("sent", "received")}
+        self._active = 0
+
+    def begin(self):
+        with self._lock:
+            self._active += 1
+
+    def active(self) -> int:
+        """Transferencias en curso."""
+        with self._lock:
+            return self._active
+
+    def record(self, stats: StreamStats, failed: bool = False):
+        with self._lock:
+            self._active = max(0, self._active - 1)
+            total = self._totals[stats.direction]
+            total["transfers"] += 1
+            total["failed"] += int(failed)
+            total["bytes"] += stats.bytes
+            total["seconds"] += stats.elapsed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {d: dict(t, throughput=t["bytes"] / t["seconds"] if t["seconds"] > 0 else 0.0)
+                     for d, t in self._totals.items()}
+            stats["active"] = self._active
+            return stats
+
+
+# ---------------- Sockets ----------------
+def configure_socket(sock: socket.socket, sndbuf: int = None, rcvbuf: int = None):
+    """Aplica los tamaños de buffer de envío/recepción (0 deja el valor del sistema)."""
+    sndbuf = DEFAULT_SNDBUF if sndbuf is None else sndbuf
+    rcvbuf = DEFAULT_RCVBUF if rcvbuf is None else rcvbuf
+
+    if sndbuf > 0:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+    if rcvbuf > 0:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+
+
+def open_stream(ip: str, port: int, timeout: float = 30.0, idle_timeout: float = None,
+                sndbuf: int = None, rcvbuf: int = None) -> socket.socket:
+    """
+    Conecta un socket de datos a ip:port. Los buffers se configuran antes de conectar para que
+    el tamaño de ventana se negocie con ellos.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        configure_socket(sock, sndbuf, rcvbuf)
+        check_deadline()
+        sock.settimeout(clamp_timeout(timeout))
+        sock.connect((ip, port))
+        sock.settimeout(DEFAULT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout)
+        return sock
+
+    except Exception:
+        sock.close()
+        raise
+
+
+def listen_stream(ip: str, port: int = 0, timeout: float = 300.0, sndbuf: int = None, rcvbuf: int = None) -> socket.socket:
+    """Socket de escucha para un canal de datos (port=0 elige un puerto libre). timeout acota el accept."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        configure_socket(sock, sndbuf, rcvbuf)
+        sock.bind((ip, port))
+        sock.listen(1)
+        sock.settimeout(timeout)
+        return sock
+
+    except Exception:
+        sock.close()
+        raise
+
+
+def accept_stream(listen_sock: socket.socket, idle_timeout: float = None,
+                  sndbuf: int = None, rcvbuf: int = None) -> tuple[socket.socket, tuple]:
+    """Acepta la conexión de datos de listen_sock y le aplica buffers y timeout de inactividad."""
+    check_deadline()
+    listen_sock.settimeout(clamp_timeout(listen_sock.gettimeout()))
+    try:
+        conn, addr = listen_sock.accept()
+
+    except socket.timeout:
+        check_deadline()
+        raise
+
+    configure_socket(conn, sndbuf, rcvbuf)
+    conn.settimeout(DEFAULT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout)
+    return conn, addr
+
+
+# ---------------- Transferencia ----------------
+def send_stream(sock: socket.socket, source, totals: StreamTotals = None) -> StreamStats:
+    """
+    Envía source por sock y retorna las métricas de la transferencia.
+
+    source puede ser:
+        - str / os.PathLike: ruta de un archivo, enviado con socket.sendfile.
+        - archivo binario abierto: enviado con socket.sendfile desde su posición actual.
+        - bytes / bytearray / memoryview: enviado con sendall.
+        - iterable de bytes: cada chunk enviado con sendall.
+    """
+    stats = StreamStats("sent")
+    failed = True
+    if totals is not None:
+        totals.begin()
+    try:
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                stats.bytes = _sendfile(sock, f)
+
+        elif hasattr(source, "fileno") and hasattr(source, "read"):
+            stats.bytes = _sendfile(sock, source)
+
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            _bound_timeout(sock)
+            sock.sendall(source)
+            stats.bytes = len(source)
+
+        else:
+            for chunk in source:
+                _bound_timeout(sock)
+                sock.sendall(chunk)
+                stats.bytes += len(chunk)
+
+        failed = False
+        return stats
+
+    finally:
+        stats.finish()
+        if totals is not None:
+            totals.record(stats, failed)
+        logger.debug("send_stream %r%s", stats, " (failed)" if failed else "")
+
+
+def recv_stream(sock: socket.socket, sink, chunk_size: int = None, totals: StreamTotals = None) -> StreamStats:
+    """
+    Recibe de sock hasta que el emisor cierra la conexión y escribe los datos en sink.
+
+    sink puede ser:
+        - str / os.PathLike: ruta de un archivo que se crea (o trunca).
+        - objeto con write (archivo binario abierto, BytesIO...).
+        - callable(memoryview): recibe cada chunk; la vista solo es válida durante la llamada.
+
+    Los datos se leen con recv_into sobre un buffer de chunk_size bytes reutilizado por el hilo.
+    """
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, "wb") as f:
+            return recv_stream(sock, f, chunk_size, totals)
+
+    write = sink.write if hasattr(sink, "write") else sink
+    view = _buffer(chunk_size or DEFAULT_CHUNK_SIZE)
+
+    stats = StreamStats("received")
+    failed = True
+    deadline = current_deadline()
+    if totals is not None:
+        totals.begin()
+    try:
+        while True:
+            if deadline is not None:
+                _bound_timeout(sock)
+            n = sock.recv_into(view)
+            if not n:
+                break
+            write(view[:n])
+            stats.bytes += n
+
+        failed = False
+        return stats
+
+    finally:
+        stats.finish()
+        if totals is not None:
+            totals.record(stats, failed)
+        logger.debug("recv_stream %r%s", stats, " (failed)" if failed else "")
+
+
+def _buffer(size: int) -> memoryview:
+    """Buffer de recepción del hilo actual; se reutiliza entre transferencias del mismo tamaño."""
+    view = getattr(_buffers, "view", None)
+    if view is None or len(view) != size:
+        view = memoryview(bytearray(size))
+        _buffers.view = view
+    return view
+
+
+def _sendfile(sock: socket.socket, f) -> int:
+    """
+    socket.sendfile de f desde su posición actual hasta el final; con deadline, por tramos para
+    poder abortar entre ellos (sendfile empieza en offset, no en la posición de f).
+    """
+    start = f.tell()
+    if current_deadline() is None:
+        return sock.sendfile(f, start)
+
+    total = 0
+    while True:
+        _bound_timeout(sock)
+        sent = sock.sendfile(f, start + total, DEADLINE_SLICE)
+        if not sent:
+            return total
+        total += sent
+
+
+def _bound_timeout(sock: socket.socket):
+    """Comprueba el deadline del contexto y acota a él el timeout de sock."""
+    check_deadline()
+    if current_deadline() is not None:
+        sock.settimeout(clamp_timeout(sock.gettimeout()))
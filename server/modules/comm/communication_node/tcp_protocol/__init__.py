@@ -1,4 +1,4 @@
-__all__ = ["TCPClient", "TCPServer"]
+__all__ = ["TCPClient", "TCPServer", "AsyncTCPServer"]
 
 def __getattr__(name: str):
 	if name == "TCPClient":
@@ -7,6 +7,9 @@ def __getattr__(name: str):
 	if name == "TCPServer":
 		from .tcp_server import TCPServer
 		return TCPServer
+	if name == "AsyncTCPServer":
+		from .async_tcp_server import AsyncTCPServer
+		return AsyncTCPServer
 	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def __dir__():
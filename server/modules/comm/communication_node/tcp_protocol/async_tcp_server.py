@@ -0,0 +1,201 @@
+import asyncio
+import concurrent.futures
+import threading
+import logging
+from server.modules.comm.communication_node.tcp_protocol.base_tcp_server import BaseTCPServer
+from server.modules.comm.communication_node.tcp_protocol.framing import (
+    Frame, FrameError, FRAMING_LINE, FRAMING_LENGTH, MAGIC, HEADER_SIZE, MAX_FRAME_SIZE, decode_header)
+
+logger = logging.getLogger("dftp.comm.async_tcp_server")
+
+class AsyncTCPServer(BaseTCPServer):
+    """
+    Servidor TCP basado en un event loop de asyncio.
+
+    Todas las conexiones se atienden desde un único hilo con el event loop, por lo que una conexión
+    inactiva no consume un hilo ni despierta periódicamente. Los handlers (bloqueantes) se ejecutan
+    en el handler_pool si se indica; si no, en un ThreadPoolExecutor acotado a max_workers hilos
+    donde los mensajes que llegan con todos los hilos ocupados esperan en la cola del executor.
+
+    Mantiene la misma interfaz y semántica que TCPServer (start, stop, on_message, reply_to),
+    de modo que CommunicationNode puede usar uno u otro indistintamente.
+    """
+
+    def __init__(self, ip: str, port: int, on_message, max_workers: int = 32, handler_pool=None, node_stats=None):
+        """
+        Params:
+            - ip: dirección del servidor
+            - port: puerto del servidor
+            - on_message: callback que recibe un Message y
+                debe devolver un objeto Message como respuesta, o None
+            - max_workers: hilos máximos para ejecutar handlers (sin handler_pool)
+            - handler_pool: HandlerPool opcional donde se ejecutan los handlers
+            - node_stats: NodeStats opcional donde se registran las métricas del lado servidor
+        """
+        super().__init__(ip, port, on_message, handler_pool, node_stats)
+        self.max_workers = max_workers
+        self.loop = None
+        self.server_thread = None
+
+        self._server = None
+        self._executor = None
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    # ---------------- Métodos públicos ----------------
+    def start(self):
+        """Inicia el event loop en un hilo independiente y espera a que el socket esté escuchando."""
+        if self.handler_pool is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dftp-handler")
+        self.loop = asyncio.new_event_loop()
+
+        ready = threading.Event()
+        startup_error = []
+        self.running = True
+
+        self.server_thread = threading.Thread(target=self._run_loop, args=(ready, startup_error), daemon=True)
+        self.server_thread.start()
+        ready.wait()
+
+        if startup_error:
+            self.running = False
+            raise startup_error[0]
+
+    def stop(self):
+        """Detiene el servidor, cierra las conexiones abiertas y el event loop."""
+        self.running = False
+        if self.loop and self.loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+            try:
+                future.result(timeout=2)
+
+            except Exception:
+                logger.exception("Error deteniendo AsyncTCPServer")
+
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        logger.info("AsyncTCPServer detenido")
+
+    def get_stats(self) -> dict:
+        stats = super().get_stats()
+        if self.handler_pool is None:
+            stats["max_workers"] = self.max_workers
+        return stats
+
+    # ---------------- Métodos internos ----------------
+    def _run_loop(self, ready: threading.Event, startup_error: list):
+        """Hilo del event loop."""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.ip, self.port, reuse_address=True, limit=MAX_FRAME_SIZE))
+
+        except Exception as e:
+            startup_error.append(e)
+            ready.set()
+            self.loop.close()
+            return
+
+        ready.set()
+        try:
+            self.loop.run_forever()
+
+        finally:
+            self.loop.close()
+
+    async def _shutdown(self):
+        """Cierra el socket de escucha y todas las conexiones de clientes."""
+        if self._server:
+            self._server.close()
+
+        for writer in list(self._writers):
+            writer.close()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Corrutina que atiende una conexión: lee tramas y lanza su procesamiento."""
+        addr = writer.get_extra_info("peername")
+        logger.debug("Conexión aceptada: %s", addr)
+
+        write_lock = asyncio.Lock()
+        self._writers.add(writer)
+
+        def reply(data: bytes):
+            # Puede llamarse desde un hilo del pool o desde el propio event loop
+            try:
+                self.loop.call_soon_threadsafe(self._schedule_write, writer, write_lock, data, addr)
+
+            except RuntimeError:
+                logger.debug("Servidor detenido, descartando respuesta a %s", addr)
+
+        self._track_connection(1)
+
+        try:
+            while self.running:
+                try:
+                    frame = await self._read_frame(reader)
+
+                except (asyncio.LimitOverrunError, FrameError, ValueError):
+                    logger.error("Mensaje de %s supera el tamaño máximo o es inválido, desconectando", addr)
+                    break
+
+                except (asyncio.IncompleteReadError, ConnectionError, OSError):
+                    break
+
+                # Si no se reciben más datos cerrar la conexión.
+                if frame is None:
+                    logger.debug("Conexión cerrada por %s", addr)
+                    break
+
+                # Cada mensaje se procesa por separado para que varias peticiones
+                # multiplexadas sobre la misma conexión no se bloqueen entre sí
+                self._dispatch_frame(frame, addr, reply)
+
+        finally:
+            self._track_connection(-1)
+            self._writers.discard(writer)
+            writer.close()
+            logger.debug("Cliente %s desconectado", addr)
+
+    async def _read_frame(self, reader: asyncio.StreamReader) -> Frame | None:
+        """Lee la siguiente trama (línea JSON o length-prefixed); None si el cliente cerró."""
+        first = await reader.read(1)
+        if not first:
+            return None
+
+        if first[0] == MAGIC:
+            flags, length = decode_header(first + await reader.readexactly(HEADER_SIZE - 1))
+            return Frame(FRAMING_LENGTH, flags, await reader.readexactly(length))
+
+        line = await reader.readuntil(b"\n")
+        return Frame(FRAMING_LINE, 0, first + line[:-1])
+
+    def _run_task(self, task):
+        """Sin handler_pool los handlers se ejecutan en el executor propio."""
+        self._executor.submit(task)
+
+    def _schedule_write(self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, data: bytes, addr):
+        """Programa en el event loop el envío de una respuesta."""
+        if writer.is_closing():
+            return
+
+        task = asyncio.ensure_future(self._write(writer, write_lock, data, addr))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write(self, writer: asyncio.StreamWriter, write_lock: asyncio.Lock, data: bytes, addr):
+        """Envía una respuesta por la misma conexión en la que llegó la petición."""
+        try:
+            async with write_lock:
+                writer.write(data)
+                await writer.drain()
+
+        except (ConnectionError, OSError) as e:
+            # El cliente ya cerró la conexión (p.ej. tras un envío fire-and-forget)
+            logger.debug("No se pudo enviar respuesta a %s: %s", addr, e)
@@ -0,0 +1,157 @@
+import threading
+import logging
+import time
+from server.modules.comm.message import Message, MessageType
+from server.modules.comm.communication_node.tcp_protocol.framing import Frame, decode_message, encode_reply
+
+logger = logging.getLogger("dftp.comm.base_tcp_server")
+
+class BaseTCPServer:
+    """
+    Lógica común a los servidores TCP de mensajes (TCPServer y AsyncTCPServer).
+
+    Cada servidor se encarga de aceptar conexiones y leer tramas (ver framing); la conversión de
+    una trama recibida en la respuesta a enviar (parseo, on_message, reply_to y serialización en
+    el mismo formato de trama y codec) vive aquí para que ambos transportes tengan exactamente la misma
+    semántica.
+
+    Si se indica un handler_pool, los mensajes se ejecutan en él y, cuando su cola está llena,
+    se responde inmediatamente con NODE_BUSY. Sin pool, cada servidor usa su propio mecanismo
+    (_run_task).
+
+    Si se indica node_stats, cada mensaje recibido se registra en él (lado "server") con su
+    latencia desde la llegada de la trama, bytes de petición y respuesta, y como error si el
+    handler falla, responde con status "error" o el mensaje se rechaza con NODE_BUSY.
+    """
+
+    def __init__(self, ip: str, port: int, on_message, handler_pool=None, node_stats=None):
+        """
+        Params:
+            - ip: dirección del servidor
+            - port: puerto del servidor
+            - on_message: callback que recibe un Message y
+                debe devolver un objeto Message como respuesta, o None
+            - handler_pool: HandlerPool opcional donde se ejecutan los handlers
+            - node_stats: NodeStats opcional donde se registran las métricas del lado servidor
+        """
+        self.ip = ip
+        self.port = port
+        self.on_message = on_message
+        self.handler_pool = handler_pool
+        self.node_stats = node_stats
+        self.running = False
+
+        self._counters_lock = threading.Lock()
+        self._open_connections = 0
+        self._pending_dispatches = 0
+
+    # ---------------- Métodos públicos ----------------
+    def start(self):
+        raise NotImplementedError("start must be implemented by subclass")
+
+    def stop(self):
+        raise NotImplementedError("stop must be implemented by subclass")
+
+    def get_stats(self) -> dict:
+        """Retorna conexiones abiertas y mensajes recibidos pendientes de respuesta."""
+        with self._counters_lock:
+            return {"open_connections": self._open_connections, "pending_dispatches": self._pending_dispatches}
+
+    # ---------------- Métodos internos ----------------
+    def _run_task(self, task):
+        """Ejecuta task (callable sin argumentos) cuando no hay handler_pool."""
+        raise NotImplementedError("_run_task must be implemented by subclass")
+
+    def _dispatch_frame(self, frame: Frame, addr, reply):
+        """
+        Parsea una trama recibida y programa su procesamiento.
+        reply(data: bytes) envía la respuesta por la conexión de origen y debe poder llamarse
+        desde cualquier hilo.
+        """
+        received = time.monotonic()
+        msg = self._parse_frame(frame, addr)
+        if msg is None:
+            return
+
+        def task():
+            try:
+                data = self._process_message(msg, frame, addr, received)
+
+            finally:
+                self._track_dispatch(-1)
+
+            if data:
+                reply(data)
+
+        self._track_dispatch(1)
+        if self.handler_pool is None:
+            self._run_task(task)
+            return
+
+        if not self.handler_pool.submit(msg.header.get("type"), task):
+            self._track_dispatch(-1)
+            data = self._busy_response(msg, frame)
+            self._record(msg, received, True, len(data))
+            reply(data)
+
+    def _parse_frame(self, frame: Frame, addr) -> Message | None:
+        """Deserializa el mensaje de una trama recibida; None si no es un mensaje válido."""
+        try:
+            return decode_message(frame)
+
+        except Exception:
+            logger.exception("Error parseando mensaje de %s", addr)
+            return None
+
+    def _busy_response(self, msg: Message, frame: Frame) -> bytes:
+        """Respuesta NODE_BUSY serializada para un mensaje rechazado por el handler_pool."""
+        response = Message(MessageType.NODE_BUSY, self.ip, msg.header.get("src"),
+                           payload={"type": msg.header.get("type")},
+                           metadata={"status": "BUSY"})
+        return self._encode_response(response, msg, frame)
+
+    def _process_message(self, msg: Message, frame: Frame, addr, received: float = None) -> bytes | None:
+        """
+        Ejecuta on_message y retorna la respuesta serializada, o None si no hay respuesta.
+        La respuesta lleva en metadata["reply_to"] el msg_id de la petición para que el cliente
+        pueda emparejarla aunque haya otras peticiones en vuelo en la conexión.
+        """
+        data, error = None, True
+        try:
+            response = self.on_message(msg)
+
+            if not response:
+                error = False
+                return None
+
+            logger.debug("Enviando respuesta a %s: %s", addr, response.header.get("type"))
+            data = self._encode_response(response, msg, frame)
+            error = response.metadata.get("status") == "error"
+            return data
+
+        except Exception:
+            logger.exception("Error procesando mensaje de %s", addr)
+            return None
+
+        finally:
+            self._record(msg, received, error, len(data) if data else 0)
+
+    def _record(self, msg: Message, received: float, error: bool, bytes_out: int):
+        """Registra en node_stats (lado "server") un mensaje recibido ya respondido o descartado."""
+        if self.node_stats is None or received is None:
+            return
+        self.node_stats.record("server", msg.header.get("type"), time.monotonic() - received,
+                               error=error, bytes_in=msg.wire_size, bytes_out=bytes_out)
+
+    def _encode_response(self, response: Message, msg: Message, frame: Frame) -> bytes:
+        """Serializa response en el formato de trama y codec de la petición (ver framing.encode_reply)."""
+        response.metadata["reply_to"] = msg.metadata.get("msg_id")
+        return encode_reply(response, msg, frame)
+
+    def _track_connection(self, delta: int):
+        with self._counters_lock:
+            self._open_connections += delta
+
+    def _track_dispatch(self, delta: int):
+        with self._counters_lock:
+            self._pending_dispatches += delta
@@ -0,0 +1,116 @@
+"""
+Compresión zlib opcional del cuerpo de las tramas "length".
+
+Solo se comprimen cuerpos de al menos DFTP_COMPRESS_THRESHOLD bytes (MERGE_STATE, SEND_STATE,
+DATA_META_REQUEST sin filename... transportan tablas JSON completas muy repetitivas) y solo si se
+reducen al menos DFTP_COMPRESS_MIN_RATIO veces: en datos de alta entropía (p. ej. base64) zlib
+ahorra poco y cuesta más CPU de lo que ahorra en red. En cuerpos grandes la decisión se toma
+comprimiendo primero una muestra del inicio. DFTP_COMPRESSION=off la desactiva y
+DFTP_COMPRESS_LEVEL elige el nivel de zlib (1 por defecto: la mayor parte del ahorro con poco
+coste de CPU).
+
+Las métricas (ratio y tiempo de CPU al comprimir y descomprimir) son del proceso: cada nodo
+corre en su propio proceso.
+"""
+import os
+import threading
+import time
+import zlib
+
+COMPRESSION_ZLIB = "zlib"
+
+ENABLED = os.getenv("DFTP_COMPRESSION", COMPRESSION_ZLIB).lower() not in ("off", "0", "none", "false")
+THRESHOLD = int(os.getenv("DFTP_COMPRESS_THRESHOLD", str(16 * 1024)))
+LEVEL = int(os.getenv("DFTP_COMPRESS_LEVEL", "1"))
+MIN_RATIO = float(os.getenv("DFTP_COMPRESS_MIN_RATIO", "1.5"))
+
+# Bytes comprimidos de prueba antes de comprimir un cuerpo de más de SAMPLE_SIZE * 4 bytes, con
+# ventana y memoria mínimas para que la prueba no reserve el estado completo de zlib
+SAMPLE_SIZE = 2 * 1024
+_SAMPLE_WBITS = 11
+_SAMPLE_MEMLEVEL = 1
+
+
+class CompressionError(Exception):
+    """Cuerpo comprimido inválido o que excede el tamaño máximo al descomprimirse."""
+
+
+class CompressionStats:
+    """Contadores thread-safe de compresión y descompresión."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset_locked()
+
+    def record_compress(self, raw: int, compressed: int, seconds: float, kept: bool):
+        with self._lock:
+            self._compress["attempts"] += 1
+            self._compress["seconds"] += seconds
+            if kept:
+                self._compress["frames"] += 1
+                self._compress["bytes_in"] += raw
+                self._compress["bytes_out"] += compressed
+            else:
+                self._compress["skipped"] += 1
+
+    def record_decompress(self, compressed: int, raw: int, seconds: float):
+        with self._lock:
+            self._decompress["frames"] += 1
+            self._decompress["bytes_in"] += compressed
+            self._decompress["bytes_out"] += raw
+            self._decompress["seconds"] += seconds
+
+    def get_stats(self) -> dict:
+        """ratio = bytes sin comprimir / bytes comprimidos de las tramas que se enviaron comprimidas."""
+        with self._lock:
+            c, d = dict(self._compress), dict(self._decompress)
+        c["ratio"] = c["bytes_in"] / c["bytes_out"] if c["bytes_out"] else 0.0
+        d["ratio"] = d["bytes_out"] / d["bytes_in"] if d["bytes_in"] else 0.0
+        return {"enabled": ENABLED, "threshold": THRESHOLD, "level": LEVEL, "min_ratio": MIN_RATIO, "compress": c, "decompress": d}
+
+    def reset(self):
+        with self._lock:
+            self._reset_locked()
+
+    def _reset_locked(self):
+        self._compress = {"attempts": 0, "frames": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+        self._decompress = {"frames": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0}
+
+
+STATS = CompressionStats()
+
+
+def maybe_compress(body: bytes) -> bytes | None:
+    """Cuerpo comprimido si body supera el umbral y se reduce al menos MIN_RATIO veces; None si no conviene."""
+    if not ENABLED or len(body) < THRESHOLD:
+        return None
+
+    started = time.thread_time()
+    if len(body) > SAMPLE_SIZE * 4:
+        sampler = zlib.compressobj(LEVEL, zlib.DEFLATED, _SAMPLE_WBITS, _SAMPLE_MEMLEVEL)
+        sample = sampler.compress(body[:SAMPLE_SIZE]) + sampler.flush()
+        if SAMPLE_SIZE < len(sample) * MIN_RATIO:
+            STATS.record_compress(len(body), 0, time.thread_time() - started, False)
+            return None
+
+    compressed = zlib.compress(body, LEVEL)
+    kept = len(body) >= len(compressed) * MIN_RATIO
+    STATS.record_compress(len(body), len(compressed), time.thread_time() - started, kept)
+    return compressed if kept else None
+
+
+def decompress(payload: bytes, max_size: int) -> bytes:
+    """Descomprime payload; lanza CompressionError si es inválido o supera max_size bytes."""
+    started = time.thread_time()
+    d = zlib.decompressobj()
+    try:
+        raw = d.decompress(payload, max_size)
+
+    except zlib.error as e:
+        raise CompressionError(f"Cuerpo comprimido inválido: {e}") from None
+
+    if d.unconsumed_tail:
+        raise CompressionError("Cuerpo descomprimido supera el tamaño máximo")
+
+    STATS.record_decompress(len(payload), len(raw), time.thread_time() - started)
+    return raw
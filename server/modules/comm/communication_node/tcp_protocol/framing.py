@@ -0,0 +1,322 @@
+"""
+Formatos de trama de los mensajes sobre TCP.
+
+    - "line": JSON terminado en '\\n' (formato original). Es toda trama cuyo primer byte no es
+      MAGIC (un JSON empieza por '{'): al separarla no se comprueba nada más, así que una línea que
+      no sea JSON válido solo falla al decodificarse y el servidor la descarta.
+    - "length": cabecera de HEADER_SIZE bytes (MAGIC, flags, longitud big-endian de 4 bytes)
+      seguida del cuerpo. El receptor conoce el tamaño antes de leerlo, así que un mensaje grande
+      se recibe en un único buffer y se parsea de una vez.
+
+Ambos formatos pueden mezclarse en una misma conexión: cada trama se identifica por su primer byte.
+El servidor responde en el mismo formato en que llegó la petición.
+
+En tramas "length" los 4 bits bajos de flags indican el codec del cuerpo (ver message.codec);
+las líneas siempre son JSON.
+
+Negociación (WireFormat): un cliente que prefiere "length" envía sus primeras peticiones como
+línea con metadata["framing"] = "length" (y metadata["codec"] con el codec preferido). Un servidor
+que entiende el formato lo confirma con el mismo campo en la respuesta y a partir de ahí el cliente
+lo usa en esa conexión. Un servidor antiguo ignora los campos y la conexión sigue con líneas JSON.
+
+Compresión (ver compression): sobre "length" el cuerpo puede ir comprimido con zlib (FLAG_COMPRESSED).
+El cliente la anuncia con metadata["compression"] = "zlib" y solo comprime sus peticiones cuando el
+servidor la confirma; además marca todas sus tramas "length" con FLAG_ACCEPTS_COMPRESSED para que el
+servidor sepa que puede comprimir las respuestas. Un nodo antiguo solo mira los bits del codec, así
+que ignora la marca y nunca recibe tramas comprimidas.
+"""
+import struct
+import socket
+from server.modules.comm.message.codec import JSON_CODEC, CODECS, CODECS_BY_ID, TYPE_TABLE_DIGEST, get_codec
+from server.modules.comm.communication_node.tcp_protocol import compression
+from server.modules.comm.communication_node.tcp_protocol.compression import COMPRESSION_ZLIB, CompressionError
+
+FRAMING_LINE = "line"
+FRAMING_LENGTH = "length"
+FRAMINGS = (FRAMING_LINE, FRAMING_LENGTH)
+
+MAGIC = 0xD7
+_HEADER = struct.Struct("!BBI")
+HEADER_SIZE = _HEADER.size
+
+# Tamaño máximo de una trama aceptada; MERGE_STATE puede transportar tablas completas
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Bits de flags con el id del codec del cuerpo
+FLAG_CODEC_MASK = 0x0F
+# Cuerpo comprimido con zlib
+FLAG_COMPRESSED = 0x10
+# El emisor acepta respuestas comprimidas
+FLAG_ACCEPTS_COMPRESSED = 0x20
+
+
+class FrameError(Exception):
+    """Trama inválida o mayor que MAX_FRAME_SIZE; la conexión debe cerrarse."""
+
+
+class Frame:
+    """Trama recibida: formato, flags de la cabecera y cuerpo."""
+
+    __slots__ = ("framing", "flags", "payload")
+
+    def __init__(self, framing: str, flags: int, payload: bytes):
+        self.framing = framing
+        self.flags = flags
+        self.payload = payload
+
+
+def encode_frame(body: bytes, framing: str, flags: int = 0, compress: bool = False) -> bytes:
+    """
+    Construye la trama a enviar para body (JSON con o sin '\\n' final).
+    En formato "line" el cuerpo se envía tal cual terminado en '\\n'.
+    Con compress, un cuerpo "length" que supere el umbral se envía comprimido (FLAG_COMPRESSED).
+    """
+    if framing == FRAMING_LINE:
+        return body if body.endswith(b"\n") else body + b"\n"
+
+    if body.endswith(b"\n"):
+        body = memoryview(body)[:-1]
+
+    if compress:
+        compressed = compression.maybe_compress(body)
+        if compressed is not None:
+            body, flags = compressed, flags | FLAG_COMPRESSED
+
+    return b"".join((_HEADER.pack(MAGIC, flags, len(body)), body))
+
+
+def frame_codec(frame: Frame):
+    """Codec con el que viene codificado el cuerpo de una trama."""
+    if frame.framing == FRAMING_LINE:
+        return JSON_CODEC
+
+    codec = CODECS_BY_ID.get(frame.flags & FLAG_CODEC_MASK)
+    if codec is None:
+        raise FrameError(f"Codec desconocido: {frame.flags & FLAG_CODEC_MASK}")
+    return codec
+
+
+def decode_message(frame: Frame):
+    """Deserializa el Message contenido en una trama, descomprimiendo el cuerpo si hace falta."""
+    codec = frame_codec(frame)
+    if frame.framing == FRAMING_LINE or not frame.flags & FLAG_COMPRESSED:
+        return codec.decode(frame.payload)
+
+    try:
+        body = compression.decompress(frame.payload, MAX_FRAME_SIZE)
+
+    except CompressionError as e:
+        raise FrameError(str(e)) from None
+
+    message = codec.decode(body)
+    message.wire_size = len(frame.payload)
+    return message
+
+
+def encode_reply(response, request, frame: Frame) -> bytes:
+    """
+    Serializa la respuesta a request en el mismo formato de trama y codec en que llegó.
+    Si request anunciaba un formato o codec preferido que este nodo soporta, se confirma en la
+    metadata de la respuesta para que el cliente pase a usarlo (ver WireFormat).
+    """
+    codec = frame_codec(frame)
+    offered = request.metadata
+
+    if frame.framing == FRAMING_LINE and offered.get("framing") == FRAMING_LENGTH:
+        response.metadata["framing"] = FRAMING_LENGTH
+
+    offered_codec = offered.get("codec")
+    if offered_codec in CODECS and offered_codec != codec.name and offered.get("codec_table") == TYPE_TABLE_DIGEST:
+        response.metadata["codec"] = offered_codec
+
+    if offered.get("compression") == COMPRESSION_ZLIB and compression.ENABLED:
+        response.metadata["compression"] = COMPRESSION_ZLIB
+
+    compress = frame.framing == FRAMING_LENGTH and bool(frame.flags & FLAG_ACCEPTS_COMPRESSED)
+    return encode_frame(codec.encode(response), frame.framing, codec.id, compress)
+
+
+class WireFormat:
+    """
+    Formato de trama y codec de una conexión de cliente.
+
+    Empieza con líneas JSON (lo que entiende cualquier servidor) y anuncia en la metadata de cada
+    mensaje el formato y codec preferidos hasta que una respuesta los confirma (accept).
+    El codec binario y la compresión solo se usan sobre tramas "length".
+    """
+
+    def __init__(self, framing: str = FRAMING_LENGTH, codec: str = "binary", compress: bool = None):
+        self.preferred_framing = framing
+        self.preferred_codec = codec if framing == FRAMING_LENGTH else JSON_CODEC.name
+        self.offer_compression = framing == FRAMING_LENGTH and (compression.ENABLED if compress is None else compress)
+        self.framing = FRAMING_LINE
+        self.codec = JSON_CODEC
+        self.compress = False
+
+    def encode(self, message) -> bytes:
+        """Serializa message en el formato actual, anunciando el preferido si aún no se usa."""
+        if self.framing != self.preferred_framing:
+            message.metadata["framing"] = self.preferred_framing
+
+        if self.codec.name != self.preferred_codec:
+            message.metadata["codec"] = self.preferred_codec
+            message.metadata["codec_table"] = TYPE_TABLE_DIGEST
+
+        flags = self.codec.id
+        if self.offer_compression:
+            flags |= FLAG_ACCEPTS_COMPRESSED
+            if not self.compress:
+                message.metadata["compression"] = COMPRESSION_ZLIB
+
+        data = encode_frame(self.codec.encode(message), self.framing, flags, self.compress)
+        message.wire_size = len(data) - HEADER_SIZE if self.framing == FRAMING_LENGTH else len(data)
+        return data
+
+    def accept(self, response):
+        """Adopta el formato, codec y compresión que el servidor confirmó en response."""
+        if response.metadata.get("framing") == self.preferred_framing:
+            self.framing = self.preferred_framing
+
+        if self.framing == FRAMING_LENGTH and response.metadata.get("codec") == self.preferred_codec:
+            self.codec = get_codec(self.preferred_codec)
+
+        if self.framing == FRAMING_LENGTH and self.offer_compression and response.metadata.get("compression") == COMPRESSION_ZLIB:
+            self.compress = True
+
+
+def decode_header(header, offset: int = 0) -> tuple[int, int]:
+    """Valida la cabecera "length" que empieza en header[offset] y retorna (flags, longitud del cuerpo)."""
+    magic, flags, length = _HEADER.unpack_from(header, offset)
+    if magic != MAGIC:
+        raise FrameError(f"Magic inválido: {magic:#x}")
+    if length > MAX_FRAME_SIZE:
+        raise FrameError(f"Trama de {length} bytes supera el máximo")
+    return flags, length
+
+
+class FrameReader:
+    """
+    Lee tramas de un socket bloqueante con recv_into sobre un bytearray preasignado.
+
+    Los datos se acumulan en un único buffer que solo se compacta o amplía cuando hace falta;
+    para tramas "length" el buffer se dimensiona al tamaño anunciado en la cabecera y para
+    líneas la búsqueda de '\\n' continúa donde se quedó. Así el coste de recibir un mensaje es
+    lineal en su tamaño.
+
+    El estado se conserva entre llamadas, por lo que read_frame() puede reintentarse tras un
+    socket.timeout sin perder datos.
+    """
+
+    # Lectura mínima por recv_into y tamaño a partir del cual un buffer vacío se reduce
+    MIN_READ = 64 * 1024
+    SHRINK_SIZE = 1024 * 1024
+
+    def __init__(self, sock: socket.socket, initial_size: int = 64 * 1024):
+        self.sock = sock
+        self._initial_size = initial_size
+        self._buf = bytearray(initial_size)
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+        self._need = 0
+
+    # ---------------- Métodos públicos ----------------
+    def read_frame(self) -> Frame | None:
+        """
+        Retorna la siguiente trama completa, o None si el peer cerró la conexión.
+        Propaga socket.timeout / OSError del socket y lanza FrameError si los datos son inválidos.
+        """
+        while True:
+            frame = self._parse()
+            if frame is not None:
+                return frame
+
+            if not self._fill():
+                return None
+
+    def has_buffered(self) -> bool:
+        """True si hay bytes recibidos que aún no forman parte de ninguna trama devuelta."""
+        return self._end > self._start
+
+    # ---------------- Métodos internos ----------------
+    def _parse(self) -> Frame | None:
+        """Extrae una trama completa del buffer, o None si faltan datos (self._need indica cuántos)."""
+        available = self._end - self._start
+        self._need = available + self.MIN_READ
+        if available == 0:
+            return None
+
+        if self._buf[self._start] == MAGIC:
+            return self._parse_length(available)
+        return self._parse_line(available)
+
+    def _parse_length(self, available: int) -> Frame | None:
+        if available < HEADER_SIZE:
+            return None
+
+        flags, length = decode_header(self._buf, self._start)
+        total = HEADER_SIZE + length
+        if available < total:
+            self._need = total
+            return None
+
+        payload = self._copy(self._start + HEADER_SIZE, self._start + total)
+        self._consume(self._start + total)
+        return Frame(FRAMING_LENGTH, flags, payload)
+
+    def _parse_line(self, available: int) -> Frame | None:
+        idx = self._buf.find(b"\n", max(self._scan, self._start), self._end)
+        if idx < 0:
+            if available > MAX_FRAME_SIZE:
+                raise FrameError("Línea supera el tamaño máximo")
+            self._scan = self._end
+            return None
+
+        payload = self._copy(self._start, idx)
+        self._consume(idx + 1)
+        return Frame(FRAMING_LINE, 0, payload)
+
+    def _copy(self, start: int, end: int) -> bytes:
+        """Copia (una sola vez) un rango del buffer."""
+        with memoryview(self._buf) as view:
+            return bytes(view[start:end])
+
+    def _consume(self, offset: int):
+        """Marca como leídos los bytes hasta offset; reinicia el buffer si queda vacío."""
+        self._start = offset
+        self._scan = offset
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+            if len(self._buf) > self.SHRINK_SIZE:
+                self._buf = bytearray(self._initial_size)
+
+    def _fill(self) -> bool:
+        """Recibe más datos en el buffer. Retorna False si el peer cerró la conexión."""
+        self._reserve(self._need)
+
+        with memoryview(self._buf) as view:
+            n = self.sock.recv_into(view[self._end:])
+
+        if n == 0:
+            return False
+
+        self._end += n
+        return True
+
+    def _reserve(self, size: int):
+        """Garantiza espacio para size bytes desde el inicio de los datos pendientes."""
+        if self._start + size <= len(self._buf):
+            return
+
+        pending = self._end - self._start
+        if size <= len(self._buf):
+            # Compactar: mover los datos pendientes al principio del buffer
+            self._buf[:pending] = self._buf[self._start:self._end]
+        else:
+            buf = bytearray(max(size, 2 * len(self._buf)))
+            buf[:pending] = self._buf[self._start:self._end]
+            self._buf = buf
+
+        self._scan -= self._start
+        self._start = 0
+        self._end = pending
@@ -0,0 +1,167 @@
+import socket
+import threading
+import time
+import logging
+from server.modules.comm.message import Message
+from server.modules.comm.communication_node.tcp_protocol.framing import Frame, FrameReader, FrameError, WireFormat, decode_message
+
+logger = logging.getLogger("dftp.comm.multiplexed_channel")
+
+class _Waiter:
+    """Petición en vuelo a la espera de su respuesta."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+
+
+class MultiplexedChannel:
+    """
+    Canal RPC sobre un único socket TCP compartido por muchos llamadores concurrentes.
+
+    Cada petición se identifica por metadata["msg_id"]; TCPServer copia ese valor en
+    metadata["reply_to"] de la respuesta. Un hilo lector recibe todas las respuestas del socket
+    y despierta al llamador correspondiente, de modo que varias peticiones pueden estar en vuelo
+    a la vez sin abrir más conexiones y sin que una respuesta lenta bloquee a las demás.
+
+    Las respuestas que no corresponden a ninguna petición en espera (fire-and-forget o
+    peticiones que ya vencieron su timeout) se descartan.
+
+    El canal empieza enviando líneas JSON y pasa al formato de trama y codec preferidos (wire)
+    en cuanto el servidor los confirma (ver framing.WireFormat).
+    """
+
+    def __init__(self, sock: socket.socket, peer: tuple[str, int], io_timeout: float = 30.0, wire: WireFormat = None):
+        self.sock = sock
+        self.peer = peer
+        self.last_used = time.monotonic()
+        self.closed = False
+        self.wire = wire or WireFormat()
+
+        self._waiters: dict[str, _Waiter] = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+
+        # El timeout del socket acota los envíos; en el lector un timeout solo indica inactividad.
+        self.sock.settimeout(io_timeout)
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    # ---------------- Métodos públicos ----------------
+    def request(self, message: Message, timeout: float) -> Message | None:
+        """Envía message y espera su respuesta hasta timeout. Lanza OSError si el canal está roto."""
+        msg_id = message.metadata["msg_id"]
+        waiter = _Waiter()
+
+        with self._lock:
+            if self.closed:
+                raise ConnectionError("Canal cerrado")
+            self._waiters[msg_id] = waiter
+
+        try:
+            self.send(message)
+
+            if not waiter.event.wait(timeout):
+                logger.debug("Timeout esperando respuesta de %s:%s", *self.peer)
+
+            return waiter.response
+
+        finally:
+            with self._lock:
+                self._waiters.pop(msg_id, None)
+
+    def send(self, message: Message):
+        """Envía message sin esperar respuesta. Lanza OSError si el canal está roto."""
+        data = self.wire.encode(message)
+        self.last_used = time.monotonic()
+
+        with self._send_lock:
+            if self.closed:
+                raise ConnectionError("Canal cerrado")
+            try:
+                self.sock.sendall(data)
+
+            except Exception:
+                self.close()
+                raise
+
+    def pending(self) -> int:
+        """Número de peticiones en vuelo."""
+        with self._lock:
+            return len(self._waiters)
+
+    def close(self):
+        """Cierra el socket y libera a todos los llamadores en espera (reciben None)."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            waiters = list(self._waiters.values())
+            self._waiters.clear()
+
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+
+        except Exception:
+            pass
+
+        try:
+            self.sock.close()
+
+        except Exception:
+            logger.exception("Error cerrando socket")
+
+        for waiter in waiters:
+            waiter.event.set()
+
+    # ---------------- Métodos internos ----------------
+    def _read_loop(self):
+        """Hilo que recibe respuestas y las entrega al llamador que espera cada reply_to."""
+        reader = FrameReader(self.sock)
+
+        try:
+            while not self.closed:
+                try:
+                    frame = reader.read_frame()
+
+                except socket.timeout:
+                    continue
+
+                except FrameError as e:
+                    logger.error("Trama inválida de %s:%s: %s", self.peer[0], self.peer[1], e)
+                    break
+
+                except Exception:
+                    if not self.closed:
+                        logger.debug("Canal con %s:%s roto", *self.peer)
+                    break
+
+                if frame is None:
+                    logger.debug("Canal con %s:%s cerrado por el peer", *self.peer)
+                    break
+
+                self._deliver(frame)
+        finally:
+            self.close()
+
+    def _deliver(self, frame: Frame):
+        """Parsea una respuesta y despierta a su llamador."""
+        try:
+            response = decode_message(frame)
+
+        except Exception:
+            logger.exception("Error parseando respuesta de %s:%s", *self.peer)
+            return
+
+        self.wire.accept(response)
+
+        reply_to = response.metadata.get("reply_to")
+        with self._lock:
+            waiter = self._waiters.pop(reply_to, None)
+
+        if waiter is None:
+            logger.debug("Respuesta sin petición en espera de %s:%s: %s", self.peer[0], self.peer[1], response.header.get("type"))
+            return
+
+        waiter.response = response
+        waiter.event.set()
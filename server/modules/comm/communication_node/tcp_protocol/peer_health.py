@@ -0,0 +1,168 @@
+"""
+Salud de los peers vista por un TCPClient: fallos consecutivos, circuit breaker y EWMA de latencia.
+
+Un fallo es un envío que no alcanza al peer: no se pudo conectar o la conexión se rompió. Un peer
+que acepta el mensaje pero no responde a tiempo (p. ej. un heartbeat a un nodo sin handler para
+él) sigue vivo: no suma fallos, aunque la espera sube su latencia media.
+
+Cuando un peer acumula DFTP_BREAKER_FAILURES fallos seguidos su circuito se abre y durante
+DFTP_BREAKER_COOLDOWN segundos los envíos hacia él fallan al instante, sin pagar el timeout de
+conexión. Pasado ese tiempo el circuito queda medio abierto: se deja pasar un único envío de
+prueba; si alcanza al peer el circuito se cierra y si falla vuelve a abrirse con el doble de
+espera (hasta DFTP_BREAKER_MAX_COOLDOWN).
+
+Un NODE_BUSY también cuenta como éxito: el peer está vivo, solo saturado.
+"""
+import os
+import threading
+import time
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = int(os.getenv("DFTP_BREAKER_FAILURES", "3"))
+COOLDOWN = float(os.getenv("DFTP_BREAKER_COOLDOWN", "5.0"))
+MAX_COOLDOWN = float(os.getenv("DFTP_BREAKER_MAX_COOLDOWN", "60.0"))
+# Peso de la última muestra en la media móvil exponencial de latencia
+EWMA_ALPHA = float(os.getenv("DFTP_PEER_EWMA_ALPHA", "0.3"))
+
+
+class PeerHealth:
+    """Estado de un peer. No es thread-safe por sí mismo: PeerHealthTable lo protege con su lock."""
+
+    __slots__ = ("state", "consecutive_failures", "successes", "failures", "rejected", "ewma",
+                 "cooldown", "open_until", "probing")
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.ewma = None
+        self.cooldown = COOLDOWN
+        self.open_until = 0.0
+        self.probing = False
+
+    def observe(self, seconds: float):
+        self.ewma = seconds if self.ewma is None else EWMA_ALPHA * seconds + (1 - EWMA_ALPHA) * self.ewma
+
+    def rank(self, now: float) -> int:
+        """0 = sano, 1 = admite una petición de prueba, 2 = circuito abierto."""
+        if self.state == STATE_CLOSED:
+            return 0
+        if self.state == STATE_OPEN and now < self.open_until:
+            return 2
+        return 1
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "successes": self.successes,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "ewma_ms": self.ewma * 1000 if self.ewma is not None else None,
+            "open_for": max(0.0, self.open_until - now) if self.state == STATE_OPEN else 0.0,
+        }
+
+
+class PeerHealthTable:
+    """Salud de cada peer (ip, port) con el que habla un cliente."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._peers: dict[tuple[str, int], PeerHealth] = {}
+
+    # ---------------- Métodos públicos ----------------
+    def allow(self, peer: tuple[str, int]) -> bool:
+        """
+        Indica si se puede enviar a peer. Con el circuito abierto retorna False; al vencer la espera
+        deja pasar una sola petición de prueba, que debe cerrarse con record_success/record_failure.
+        """
+        with self._lock:
+            health = self._peers.get(peer)
+            if health is None or health.state == STATE_CLOSED:
+                return True
+
+            now = time.monotonic()
+            if health.state == STATE_OPEN and now >= health.open_until:
+                health.state = STATE_HALF_OPEN
+                health.probing = False
+
+            if health.state == STATE_HALF_OPEN and not health.probing:
+                health.probing = True
+                return True
+
+            health.rejected += 1
+            return False
+
+    def record_success(self, peer: tuple[str, int], seconds: float = None):
+        """Registra un envío que alcanzó al peer; seconds (hasta la respuesta) actualiza su latencia media."""
+        with self._lock:
+            health = self._get(peer)
+            health.successes += 1
+            health.consecutive_failures = 0
+            if seconds is not None:
+                health.observe(seconds)
+            health.state = STATE_CLOSED
+            health.cooldown = COOLDOWN
+            health.probing = False
+
+    def record_failure(self, peer: tuple[str, int], seconds: float = None):
+        """Registra un fallo; seconds (lo que se esperó) penaliza la latencia media del peer."""
+        with self._lock:
+            health = self._get(peer)
+            health.failures += 1
+            health.consecutive_failures += 1
+            if seconds is not None:
+                health.observe(seconds)
+
+            if health.state == STATE_HALF_OPEN:
+                health.cooldown = min(health.cooldown * 2, MAX_COOLDOWN)
+                self._open_locked(health)
+            elif health.state == STATE_CLOSED and health.consecutive_failures >= FAILURE_THRESHOLD:
+                self._open_locked(health)
+
+    def rank(self, peers: list[tuple[str, int]], by_latency: bool = True) -> list[tuple[str, int]]:
+        """
+        Ordena peers de mejor a peor: primero los sanos por latencia media (los que aún no tienen
+        muestras primero, para medirlos), luego los que admiten prueba y al final los de circuito
+        abierto. A igualdad se conserva el orden recibido. Con by_latency=False solo se aplica el
+        estado del circuito (para conservar un orden ya decidido, p. ej. por carga).
+        """
+        now = time.monotonic()
+        with self._lock:
+            keys = {}
+            for peer in peers:
+                health = self._peers.get(peer)
+                if health is None:
+                    keys[peer] = (0, 0.0)
+                else:
+                    keys[peer] = (health.rank(now), (health.ewma or 0.0) if by_latency else 0.0)
+        return sorted(peers, key=keys.__getitem__)
+
+    def latency(self, peer: tuple[str, int]) -> float | None:
+        """Latencia media observada del peer en segundos, o None si aún no hay muestras."""
+        with self._lock:
+            health = self._peers.get(peer)
+            return health.ewma if health is not None else None
+
+    def get_stats(self) -> dict:
+        """Retorna el estado de cada peer conocido, con clave "ip:port"."""
+        now = time.monotonic()
+        with self._lock:
+            return {f"{ip}:{port}": h.to_dict(now) for (ip, port), h in self._peers.items()}
+
+    # ---------------- Métodos internos ----------------
+    def _get(self, peer: tuple[str, int]) -> PeerHealth:
+        health = self._peers.get(peer)
+        if health is None:
+            health = self._peers[peer] = PeerHealth()
+        return health
+
+    def _open_locked(self, health: PeerHealth):
+        health.state = STATE_OPEN
+        health.probing = False
+        health.open_until = time.monotonic() + health.cooldown
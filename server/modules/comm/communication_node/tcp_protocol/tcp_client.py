@@ -1,10 +1,251 @@
+import select
 import socket
+import threading
+import time
 import logging
-from server.modules.comm.message import Message
+from server.modules.comm.message import Message, MessageType
+from server.modules.comm.communication_node.tcp_protocol.multiplexed_channel import MultiplexedChannel
+from server.modules.comm.communication_node.tcp_protocol.framing import FrameReader, WireFormat, FRAMINGS, FRAMING_LINE, FRAMING_LENGTH, decode_message
+from server.modules.comm.message.codec import get_codec
+from server.modules.comm.communication_node.tcp_protocol.peer_health import PeerHealthTable
+from server.modules.comm.communication_node.lanes import lane_for, LANE_CONTROL
 
 logger = logging.getLogger("dftp.comm.tcp_client")
 
+# Canales multiplexados por peer: uno para el carril de control y otro para el resto
+CHANNEL_CONTROL = "control"
+CHANNEL_BULK = "bulk"
+
+# Peticiones que pueden repetirse sin efectos duplicados (consultas, o un estado que se reemplaza).
+# Solo estas se reenvían si la conexión reutilizada se cierra tras enviarlas: el peer pudo
+# ejecutarlas y perderse solo la respuesta
+IDEMPOTENT_TYPES = frozenset({
+    MessageType.DISCOVERY_HEARTBEAT,
+    MessageType.DISCOVERY_QUERY_BY_NAME,
+    MessageType.DISCOVERY_QUERY_BY_ROLE,
+    MessageType.DISCOVERY_QUERY_ALL,
+    MessageType.DISCOVERY_WATCH,
+    MessageType.DISCOVERY_SYNC,
+    MessageType.AUTH_VALIDATE_USER,
+    MessageType.AUTH_VALIDATE_PASSWORD,
+    MessageType.DATA_LIST,
+    MessageType.DATA_STAT,
+    MessageType.DATA_CWD,
+    MessageType.DATA_META_REQUEST,
+    MessageType.CLUSTER_STATE_REQUEST,
+    MessageType.NODE_TRACES,
+})
+
+def _connect(ip: str, port: int, timeout: float):
+    """Crea y conecta un socket TCP al destino con timeout."""
+    sock = None
+
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.settimeout(timeout)
+        sock.connect((ip, port))
+
+    except Exception:
+        if sock:
+            try:
+                sock.close()
+
+            except Exception:
+                pass
+
+        return None
+
+    return sock
+
+
+class PooledConnection:
+    """Socket TCP abierto hacia un peer que puede reutilizarse entre RPCs."""
+
+    def __init__(self, sock: socket.socket, peer: tuple[str, int], wire: WireFormat = None):
+        self.sock = sock
+        self.peer = peer
+        self.reader = FrameReader(sock)
+        self.wire = wire or WireFormat()
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.sock.close()
+
+        except Exception:
+            logger.exception("Error cerrando socket")
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones TCP por destino (ip, port).
+
+    TCPServer mantiene abierta cada conexión aceptada mientras el cliente no la cierre, por lo que
+    un mismo socket puede transportar varias peticiones consecutivas. El pool guarda los sockets
+    libres de cada peer y los entrega al siguiente send_message hacia ese peer.
+
+    Parámetros:
+        - max_connections_per_peer: máximo de conexiones libres que se conservan por peer.
+          Las que sobran al devolverse se cierran.
+        - idle_timeout: segundos que una conexión puede estar libre antes de ser descartada.
+
+    Contadores (get_stats):
+        - hits / misses: conexiones reutilizadas / creadas.
+        - evicted_idle: conexiones cerradas por superar idle_timeout.
+        - broken: conexiones descartadas por estar cerradas o desincronizadas.
+        - overflow_closed: conexiones cerradas por superar max_connections_per_peer.
+    """
+
+    def __init__(self, max_connections_per_peer: int = 4, idle_timeout: float = 30.0):
+        self.max_connections_per_peer = max_connections_per_peer
+        self.idle_timeout = idle_timeout
+        self._idle: dict[tuple[str, int], list[PooledConnection]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evicted_idle": 0, "broken": 0, "overflow_closed": 0}
+
+    # ---------------- Métodos públicos ----------------
+    def acquire(self, ip: str, port: int, timeout: float, wire_factory=WireFormat) -> tuple[PooledConnection | None, bool]:
+        """
+        Obtiene una conexión hacia (ip, port); wire_factory crea el WireFormat de las conexiones nuevas.
+        Retorna (conexión, reutilizada) o (None, False) si no se pudo conectar.
+        """
+        peer = (ip, port)
+        while True:
+            with self._lock:
+                idle = self._idle.get(peer)
+                conn = idle.pop() if idle else None
+
+            if conn is None:
+                break
+
+            if time.monotonic() - conn.last_used > self.idle_timeout:
+                self._count("evicted_idle")
+                conn.close()
+                continue
+
+            if not self._is_alive(conn):
+                self._count("broken")
+                conn.close()
+                continue
+
+            self._count("hits")
+            return conn, True
+
+        sock = _connect(ip, port, timeout)
+        if sock is None:
+            return None, False
+
+        self._count("misses")
+        return PooledConnection(sock, peer, wire_factory()), False
+
+    def release(self, conn: PooledConnection):
+        """Devuelve una conexión sana al pool."""
+        conn.last_used = time.monotonic()
+        with self._lock:
+            idle = self._idle.setdefault(conn.peer, [])
+            self._evict_idle_locked(idle)
+
+            if len(idle) < self.max_connections_per_peer:
+                idle.append(conn)
+                return
+
+            self._stats["overflow_closed"] += 1
+        conn.close()
+
+    def discard(self, conn: PooledConnection):
+        """Cierra una conexión que no debe volver al pool."""
+        self._count("broken")
+        conn.close()
+
+    def close_all(self):
+        """Cierra todas las conexiones libres."""
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+
+        for conn in conns:
+            conn.close()
+
+    def get_stats(self) -> dict:
+        """Retorna los contadores del pool y las conexiones libres por peer."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["idle"] = {f"{ip}:{port}": len(c) for (ip, port), c in self._idle.items() if c}
+        return stats
+
+    # ---------------- Métodos internos ----------------
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _evict_idle_locked(self, idle: list[PooledConnection]):
+        """Cierra las conexiones que superaron idle_timeout (requiere self._lock)."""
+        now = time.monotonic()
+        expired = [c for c in idle if now - c.last_used > self.idle_timeout]
+        for conn in expired:
+            idle.remove(conn)
+            self._stats["evicted_idle"] += 1
+            conn.close()
+
+    def _is_alive(self, conn: PooledConnection) -> bool:
+        """
+        Comprueba que el peer no haya cerrado la conexión mientras estaba libre.
+        Un socket libre no debería tener nada que leer: si es legible, o bien el peer lo cerró
+        (recv devuelve b"") o bien hay datos inesperados y la conexión está desincronizada.
+        """
+        try:
+            readable, _, _ = select.select([conn.sock], [], [], 0)
+
+        except Exception:
+            return False
+
+        return not readable
+
+
 class TCPClient:
+    """
+    Cliente TCP para enviar Messages a otros nodos.
+
+    Modos de transporte:
+        - multiplex=True: un MultiplexedChannel por peer. Todas las peticiones hacia ese peer
+          (con o sin respuesta) comparten un socket y las respuestas se emparejan por msg_id.
+          Los mensajes del carril "control" (ver communication_node.lanes) usan un segundo canal
+          hacia el mismo peer para no quedar detrás de tramas grandes.
+        - multiplex=False: las peticiones que esperan respuesta reutilizan conexiones del
+          ConnectionPool, una petición en vuelo por conexión. Los envíos sin respuesta usan una
+          conexión propia que se cierra al terminar: el servidor puede contestar igualmente y esa
+          respuesta no debe quedar pendiente en un socket reutilizable. Si un socket reutilizado
+          se cierra después de enviar la petición, solo se reenvía por una conexión nueva si es
+          de IDEMPOTENT_TYPES.
+
+    framing es el formato de trama preferido ("length" o "line") y codec el codec preferido
+    ("binary" o "json"; binary requiere "length"). Cada conexión empieza con líneas JSON y pasa
+    a los preferidos cuando el servidor los confirma (ver framing.WireFormat), de modo que los
+    nodos que solo entienden líneas JSON siguen funcionando.
+
+    health (PeerHealthTable) registra si cada envío alcanzó al peer: un peer con el circuito
+    abierto se rechaza sin conectar (send_message retorna None al instante) y rank_peers ordena
+    candidatos por salud y latencia.
+    """
+
+    def __init__(self, max_connections_per_peer: int = 4, idle_timeout: float = 30.0, multiplex: bool = True,
+                 framing: str = FRAMING_LENGTH, codec: str = "binary"):
+        if framing not in FRAMINGS:
+            raise ValueError(f"Invalid framing '{framing}'. Expected one of {FRAMINGS}")
+        get_codec(codec)
+
+        self.pool = ConnectionPool(max_connections_per_peer=max_connections_per_peer, idle_timeout=idle_timeout)
+        self.multiplex = multiplex
+        self.framing = framing
+        self.codec = codec
+        self.idle_timeout = idle_timeout
+
+        self.health = PeerHealthTable()
+
+        self._channels: dict[tuple[str, int, str], MultiplexedChannel] = {}
+        self._channel_locks: dict[tuple[str, int, str], threading.Lock] = {}
+        self._channels_lock = threading.Lock()
 
     def send_message(self, dst_ip: str, dst_port: int, message: Message, await_response: bool = True, timeout: float = 1.0):
         """
@@ -15,90 +256,243 @@ class TCPClient:
             - message: instancia de Message a enviar
             - await_response: si es True, espera y retorna la respuesta del nodo destino
             - timeout: tiempo máximo para conectar y recibir respuesta
+        Retorna None sin intentar el envío si el circuito del destino está abierto.
         """
-        sock = None
+        peer = (dst_ip, dst_port)
+        if not self.health.allow(peer):
+            logger.debug("Circuito abierto hacia %s:%s, mensaje %s descartado", dst_ip, dst_port, message.header.get("type"))
+            return None
+
+        started = time.monotonic()
+        reached = False
         try:
-            sock = self._connect(dst_ip, dst_port, timeout)
+            response, reached = self._send(dst_ip, dst_port, message, await_response, timeout)
+            return response
 
+        finally:
+            # Sin respuesta esperada no hay latencia que medir
+            elapsed = time.monotonic() - started if await_response else None
+            if reached:
+                self.health.record_success(peer, elapsed)
+            else:
+                self.health.record_failure(peer, elapsed)
+
+    def rank_peers(self, peers: list[tuple[str, int]], by_latency: bool = True) -> list[tuple[str, int]]:
+        """Ordena peers (ip, port) de más a menos sano (ver PeerHealthTable.rank)."""
+        return self.health.rank(peers, by_latency)
+
+    def peer_latency(self, ip: str, port: int) -> float | None:
+        """Latencia media observada hacia (ip, port), o None si aún no hay muestras."""
+        return self.health.latency((ip, port))
+
+    def get_health_stats(self) -> dict:
+        """Retorna el estado del circuit breaker y la latencia media de cada peer."""
+        return self.health.get_stats()
+
+    def get_pool_stats(self) -> dict:
+        """Retorna los contadores del pool de conexiones y los canales multiplexados abiertos."""
+        stats = self.pool.get_stats()
+        with self._channels_lock:
+            channels = list(self._channels.items())
+        stats["channels"] = {f"{ip}:{port}/{kind}": c.pending() for (ip, port, kind), c in channels if not c.closed}
+        return stats
+
+    def close(self):
+        """Cierra todas las conexiones libres del pool y los canales multiplexados."""
+        self.pool.close_all()
+        with self._channels_lock:
+            channels = list(self._channels.values())
+            self._channels.clear()
+
+        for channel in channels:
+            channel.close()
+
+    # ---------------- Métodos internos ----------------
+    def _new_wire(self) -> WireFormat:
+        """Formato inicial de una conexión nueva con las preferencias del cliente."""
+        return WireFormat(self.framing, self.codec)
+
+    def _send(self, dst_ip: str, dst_port: int, message: Message, await_response: bool, timeout: float):
+        """
+        Envía message por el transporte configurado (ver send_message).
+        Retorna (respuesta, alcanzado): alcanzado es False si no se pudo conectar con el peer o
+        la conexión se rompió al enviar; un peer que recibe el mensaje pero no responde a tiempo
+        cuenta como alcanzado.
+        """
+        if self.multiplex:
+            return self._send_multiplexed(dst_ip, dst_port, message, await_response, timeout)
+
+        if not await_response:
+            return None, self._send_one_shot(dst_ip, dst_port, message, timeout)
+
+        conn, reused = self.pool.acquire(dst_ip, dst_port, timeout, self._new_wire)
+        if conn is None:
+            return None, False
+
+        response, healthy, retry = self._request(conn, message, timeout, reused)
+
+        # Un socket reutilizado pudo cerrarse en el peer sin que lo detectáramos: reintentar una vez
+        # con una conexión nueva si la petición no llegó o si puede repetirse (ver _request).
+        if retry:
+            self.pool.discard(conn)
+            conn, _ = self.pool.acquire(dst_ip, dst_port, timeout, self._new_wire)
+            if conn is None:
+                return None, False
+            response, healthy, _ = self._request(conn, message, timeout, False)
+
+        if healthy:
+            self.pool.release(conn)
+        else:
+            self.pool.discard(conn)
+
+        return response, True
+
+    def _send_multiplexed(self, ip: str, port: int, message: Message, await_response: bool, timeout: float):
+        """
+        Envía message por el canal multiplexado del peer, reabriéndolo una vez si estaba roto.
+        Retorna (respuesta, alcanzado) como _send.
+        """
+        kind = CHANNEL_CONTROL if lane_for(message.header.get("type")) == LANE_CONTROL else CHANNEL_BULK
+        for attempt in range(2):
+            channel = self._get_channel(ip, port, timeout, kind)
+            if channel is None:
+                return None, False
+
+            try:
+                if await_response:
+                    return channel.request(message, timeout), True
+
+                channel.send(message)
+                return None, True
+
+            except OSError:
+                logger.debug("Canal con %s:%s roto (intento %d)", ip, port, attempt + 1)
+                channel.close()
+
+        return None, False
+
+    def _get_channel(self, ip: str, port: int, timeout: float, kind: str = CHANNEL_BULK) -> MultiplexedChannel | None:
+        """Retorna el canal abierto de tipo kind hacia (ip, port), creándolo si no existe."""
+        peer = (ip, port)
+        key = (ip, port, kind)
+        with self._channels_lock:
+            channel = self._channels.get(key)
+            if channel is not None and not channel.closed:
+                return channel
+            self._evict_idle_channels_locked()
+            peer_lock = self._channel_locks.setdefault(key, threading.Lock())
+
+        # Un lock por peer evita que varios hilos abran a la vez conexiones al mismo destino
+        # sin que un peer lento bloquee la creación de canales hacia los demás.
+        with peer_lock:
+            with self._channels_lock:
+                channel = self._channels.get(key)
+                if channel is not None and not channel.closed:
+                    return channel
+
+            sock = _connect(ip, port, timeout)
             if sock is None:
                 return None
-            
-            self._send_raw(sock, message)
 
-            if await_response:
-                response = self._recv_response(sock, timeout)
-                return response
-            
-            return None
-        
+            channel = MultiplexedChannel(sock, peer, wire=self._new_wire())
+            with self._channels_lock:
+                self._channels[key] = channel
+            return channel
+
+    def _evict_idle_channels_locked(self):
+        """Cierra canales sin peticiones en vuelo que superaron idle_timeout (requiere self._channels_lock)."""
+        now = time.monotonic()
+        for key, channel in list(self._channels.items()):
+            if channel.closed or (now - channel.last_used > self.idle_timeout and channel.pending() == 0):
+                self._channels.pop(key, None)
+                channel.close()
+
+    def _send_one_shot(self, ip: str, port: int, message: Message, timeout: float) -> bool:
+        """
+        Envía un mensaje sin esperar respuesta por una conexión que se cierra al terminar.
+        Retorna False si no se pudo conectar o enviar.
+        """
+        sock = _connect(ip, port, timeout)
+        if sock is None:
+            return False
+
+        try:
+            return self._send_raw(sock, message, WireFormat(FRAMING_LINE, "json"))
+
         finally:
-            if sock is not None:
+            try:
+                sock.close()
+
+            except Exception:
+                logger.exception("Error cerrando socket")
 
-                try:
-                    sock.close()
+    def _request(self, conn: PooledConnection, message: Message, timeout: float, reused: bool):
+        """
+        Envía message por conn y espera la respuesta.
+        Retorna (respuesta, conexión_sana, reintentar). Con conn reutilizada se reintenta si falla
+        el envío (el peer no ejecuta una trama incompleta) o si se cierra sin responder y message
+        es de IDEMPOTENT_TYPES; si no lo es, el peer pudo ejecutarla y no se repite.
+        """
+        conn.sock.settimeout(timeout)
 
-                except Exception:
-                    logger.exception("Error cerrando socket")
+        if not self._send_raw(conn.sock, message, conn.wire):
+            return None, False, reused
 
-    # ---------------- Métodos internos ----------------
-    def _connect(self, ip: str, port: int, timeout: float):
-        """Crea y conecta un socket TCP al destino con timeout."""
-        sock = None
+        response, status = self._recv_response(conn, timeout)
 
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(timeout)
-            sock.connect((ip, port))
+        # Descartar respuestas atrasadas de peticiones anteriores que vencieron su timeout
+        while status == "ok" and response.metadata.get("reply_to") not in (None, message.metadata.get("msg_id")):
+            logger.debug("Descartando respuesta atrasada de %s", response.header.get("src"))
+            response, status = self._recv_response(conn, timeout)
 
-        except Exception:
-            if sock:
-                try:
-                    sock.close()
+        if status == "closed" and reused:
+            retry = message.header.get("type") in IDEMPOTENT_TYPES
+            if not retry:
+                logger.debug("Conexión con %s:%s cerrada tras enviar %s; no se reenvía", *conn.peer, message.header.get("type"))
+            return None, False, retry
 
-                except Exception:
-                    pass
+        if status == "ok":
+            conn.wire.accept(response)
 
-            return None
-        
-        return sock
+        # Si quedaron bytes tras la respuesta la conexión está desincronizada y no se reutiliza
+        return response, status == "ok" and not conn.reader.has_buffered(), False
 
-    def _send_raw(self, sock: socket.socket, message: Message):
-        """Envía el mensaje serializado por TCP."""
-        data = message.to_json().encode()
+    def _send_raw(self, sock: socket.socket, message: Message, wire: WireFormat) -> bool:
+        """Envía el mensaje serializado por TCP en el formato de wire. Retorna False si falló el envío."""
+        data = wire.encode(message)
         try:
             sock.sendall(data)
+            return True
 
         except Exception:
             logger.exception("Error enviando mensaje a %s", message.header.get("dst"))
+            return False
 
-    def _recv_response(self, sock, timeout: float) -> Message:
-        """Recibe un Message de respuesta del servidor con timeout."""
-        sock.settimeout(timeout)
-        buffer = ""
-        while True:
-            try:
-                data = sock.recv(1024).decode()
+    def _recv_response(self, conn: PooledConnection, timeout: float) -> tuple[Message | None, str]:
+        """
+        Recibe un Message de respuesta del servidor con timeout.
+        Retorna (respuesta, estado) con estado en "ok", "timeout", "closed" o "error".
+        """
+        conn.sock.settimeout(timeout)
+        try:
+            frame = conn.reader.read_frame()
 
-            except socket.timeout:
-                logger.debug("Timeout esperando respuesta")
-                return None
-            
-            except Exception:
-                logger.exception("Error recibiendo respuesta")
-                return None
-            
-            if not data:
-                break
+        except socket.timeout:
+            logger.debug("Timeout esperando respuesta")
+            return None, "timeout"
+
+        except Exception:
+            logger.exception("Error recibiendo respuesta")
+            return None, "error"
+
+        if frame is None:
+            return None, "closed" if not conn.reader.has_buffered() else "error"
 
-            buffer += data
-            if "\n" in buffer:
-                line, _ = buffer.split("\n", 1)
-                try:
-                    response = Message.from_json(line)
-                    logger.debug("Respuesta recibida de %s: %s", response.header.get("src"), response.header.get("type"))
-                    return response
-                
-                except Exception:
-                    logger.exception("Error parseando respuesta")
-                    return None
-        return None
\ No newline at end of file
+        try:
+            response = decode_message(frame)
+            logger.debug("Respuesta recibida de %s: %s", response.header.get("src"), response.header.get("type"))
+            return response, "ok"
+
+        except Exception:
+            logger.exception("Error parseando respuesta")
+            return None, "error"
@@ -1,23 +1,28 @@
 import socket
 import threading
 import logging
-from server.modules.comm.message import Message
+from server.modules.comm.communication_node.tcp_protocol.base_tcp_server import BaseTCPServer
+from server.modules.comm.communication_node.tcp_protocol.framing import FrameReader, FrameError
 
 logger = logging.getLogger("dftp.comm.tcp_server")
 
-class TCPServer:
-    def __init__(self, ip: str, port: int, on_message):
+class TCPServer(BaseTCPServer):
+    """
+    Servidor TCP con un hilo por conexión. Los mensajes recibidos se ejecutan en el handler_pool
+    si se indica; si no, en un hilo por mensaje.
+    """
+
+    def __init__(self, ip: str, port: int, on_message, handler_pool=None, node_stats=None):
         """
         Params:
             - ip: dirección del servidor
             - port: puerto del servidor
             - on_message: callback que recibe Message y socket cliente
                 debe devolver un objeto Message como respuesta, o None
+            - handler_pool: HandlerPool opcional donde se ejecutan los handlers
+            - node_stats: NodeStats opcional donde se registran las métricas del lado servidor
         """
-        self.ip = ip
-        self.port = port
-        self.on_message = on_message
-        self.running = False
+        super().__init__(ip, port, on_message, handler_pool, node_stats)
         self.server_thread = None
         self.listen_socket = None
 
@@ -46,7 +51,7 @@ class TCPServer:
         self.listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.listen_socket.bind((self.ip, self.port))
         self.listen_socket.listen(5)
-        self.listen_socket.settimeout(0.5) 
+        self.listen_socket.settimeout(0.5)
 
     def _server_loop(self):
         """ Bucle que se mantiene a la espera de nuevas conexiones """
@@ -61,7 +66,7 @@ class TCPServer:
             except Exception:
                 logger.exception("Error en accept()")
                 continue
-            
+
             logger.debug("Conexión aceptada: %s", addr)
             t = threading.Thread(target=self._handle_client, args=(client_sock, addr), daemon=True)
 
@@ -73,48 +78,44 @@ class TCPServer:
 
         logger.debug("Hilo de cliente iniciado: %s", addr)
 
-        buffer = b""
+        reader = FrameReader(client_sock)
+        send_lock = threading.Lock()
         client_sock.settimeout(0.5)
 
+        def reply(data: bytes):
+            self._send_reply(client_sock, send_lock, data, addr)
+
+        self._track_connection(1)
+
         try:
             while self.running:
                 try:
-                    # Recibir datos por parte del cliente
-                    data = client_sock.recv(1024)
+                    # Recibir la siguiente trama (línea JSON o length-prefixed) del cliente
+                    frame = reader.read_frame()
 
                 except socket.timeout:
                     continue
 
+                except FrameError as e:
+                    logger.error("Trama inválida de %s, desconectando: %s", addr, e)
+                    break
+
                 except Exception:
                     logger.exception("Error en recv()")
                     break
-                
+
                 # Si no se reciben más datos cerrar la conexión.
-                if not data:
+                if frame is None:
                     logger.debug("recv() devolvió 0 bytes, desconectando %s", addr)
                     break
 
-                logger.debug("Datos recibidos de %s: %d bytes", addr, len(data))
-                buffer += data
-
-                # Procesar todas las líneas completas en el buffer 
-                while b"\n" in buffer:
-                    line, buffer = buffer.split(b"\n", 1)
-                    try:
-                        # Parsear mensaje
-                        msg = Message.from_json(line.decode())
-                        
-                        # Procesar mensaje usando on_message
-                        response = self.on_message(msg)
-
-                        # Enviar respuesta si existe
-                        if response:
-                            logger.debug("Enviando respuesta a %s: %s", addr, response.header.get("type"))
-                            client_sock.sendall(response.to_json().encode())
-
-                    except Exception:
-                        logger.exception("Error procesando mensaje de %s", addr)
+                logger.debug("Trama recibida de %s: %d bytes", addr, len(frame.payload))
+
+                # Cada mensaje se procesa por separado para que varias peticiones
+                # multiplexadas sobre la misma conexión no se bloqueen entre sí
+                self._dispatch_frame(frame, addr, reply)
         finally:
+            self._track_connection(-1)
             try:
                 client_sock.close()
 
@@ -122,3 +123,17 @@ class TCPServer:
                 logger.exception("Error cerrando socket cliente %s", addr)
 
             logger.debug("Cliente %s desconectado", addr)
+
+    def _run_task(self, task):
+        """Sin handler_pool cada mensaje se procesa en su propio hilo."""
+        threading.Thread(target=task, daemon=True).start()
+
+    def _send_reply(self, client_sock, send_lock: threading.Lock, data: bytes, addr):
+        """Envía una respuesta por la conexión del cliente."""
+        try:
+            with send_lock:
+                client_sock.sendall(data)
+
+        except OSError as e:
+            # El cliente ya cerró la conexión (p.ej. tras un envío fire-and-forget)
+            logger.debug("No se pudo enviar respuesta a %s: %s", addr, e)
@@ -0,0 +1,155 @@
+"""
+Trazas distribuidas entre nodos.
+
+Una traza empieza en el RoutingNode por cada línea de comando FTP (Tracer.start_trace) y se
+propaga en la metadata de los mensajes ("trace_id" y "parent_span"). Cada nodo registra sus spans
+en un buffer circular en memoria (DFTP_TRACE_BUFFER spans, 0 desactiva el tracing) que se consulta
+con NODE_TRACES; tools/trace_collector.py junta los spans de varios nodos y muestra el camino
+crítico de cada comando.
+
+El span activo se guarda en un ContextVar, de modo que los mensajes enviados desde un handler
+quedan como hijos del span de ese handler. Los hilos y executors no heredan el contexto: quien
+reparte trabajo debe hacerlo con contextvars.copy_context() (ver CommunicationNode.multicast).
+"""
+
+import collections
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger("dftp.comm.tracing")
+
+DEFAULT_BUFFER = int(os.getenv("DFTP_TRACE_BUFFER", "4096"))
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("dftp_current_span", default=None)
+
+
+class Span:
+    """
+    Tramo de trabajo de una traza en un nodo.
+
+    Campos:
+        - trace_id (str): id de la traza (común a todos los nodos).
+        - span_id (str): id de este span.
+        - parent_id (str | None): span padre, posiblemente en otro nodo; None en la raíz.
+        - name (str): descripción, p. ej. "send DATA_META_REQUEST" o "handle DATA_RETR_FILE".
+        - node (str): nodo que lo registró.
+        - start (float): inicio en segundos UNIX.
+        - duration (float): duración en segundos.
+        - tags (dict): datos adicionales (destino, comando, bytes...).
+        - error (bool): True si el bloque terminó con una excepción.
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "node", "start", "duration", "tags", "error", "_t0")
+
+    def __init__(self, trace_id: str, parent_id: str | None, name: str, node: str, tags: dict = None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.node = node
+        self.tags = dict(tags) if tags else {}
+        self.error = False
+        self.start = time.time()
+        self.duration = 0.0
+        self._t0 = time.monotonic()
+
+    def tag(self, **tags):
+        self.tags.update(tags)
+
+    def to_dict(self) -> dict:
+        return {"trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id, "name": self.name,
+                "node": self.node, "start": self.start, "duration": self.duration, "tags": self.tags, "error": self.error}
+
+
+class Tracer:
+    """
+    Crea y registra los spans de un nodo.
+
+    Métodos públicos:
+        - start_trace(name, tags=None): context manager que abre una traza nueva (span raíz).
+        - span(name, tags=None, parent=None): context manager que abre un span hijo del span
+          activo (o de parent, un (trace_id, span_id) recibido de otro nodo). Sin traza en curso
+          no registra nada y entrega None.
+        - inject(metadata): agrega el span activo a la metadata de un mensaje saliente.
+        - extract(metadata) -> (trace_id, span_id) | None: contexto de traza de un mensaje recibido.
+        - get_spans(trace_id=None, since=None, limit=None) -> list[dict]: spans registrados.
+    """
+
+    def __init__(self, node_name: str, capacity: int = None):
+        self.node_name = node_name
+        self.capacity = DEFAULT_BUFFER if capacity is None else capacity
+        self._spans = collections.deque(maxlen=max(1, self.capacity))
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.capacity > 0
+
+    @contextmanager
+    def start_trace(self, name: str, tags: dict = None):
+        if not self.enabled:
+            yield None
+            return
+        with self._open(Span(uuid.uuid4().hex, None, name, self.node_name, tags)) as span:
+            yield span
+
+    @contextmanager
+    def span(self, name: str, tags: dict = None, parent: tuple = None):
+        if parent is None:
+            current = _current_span.get()
+            parent = (current.trace_id, current.span_id) if current is not None else None
+
+        if parent is None or not self.enabled:
+            yield None
+            return
+
+        with self._open(Span(parent[0], parent[1], name, self.node_name, tags)) as span:
+            yield span
+
+    def inject(self, metadata: dict):
+        current = _current_span.get()
+        if current is not None:
+            metadata["trace_id"] = current.trace_id
+            metadata["parent_span"] = current.span_id
+
+    def extract(self, metadata: dict) -> tuple | None:
+        trace_id = metadata.get("trace_id")
+        return (trace_id, metadata.get("parent_span")) if trace_id else None
+
+    def get_spans(self, trace_id: str = None, since: float = None, limit: int = None) -> list[dict]:
+        with self._lock:
+            spans = list(self._spans)
+        if trace_id:
+            spans = [s for s in spans if s.trace_id == trace_id]
+        if since is not None:
+            spans = [s for s in spans if s.start >= since]
+        if limit:
+            spans = spans[-limit:]
+        return [s.to_dict() for s in spans]
+
+    # ---------------- Métodos internos ----------------
+    @contextmanager
+    def _open(self, span: Span):
+        token = _current_span.set(span)
+        try:
+            yield span
+
+        except BaseException:
+            span.error = True
+            raise
+
+        finally:
+            _current_span.reset(token)
+            span.duration = time.monotonic() - span._t0
+            with self._lock:
+                self._spans.append(span)
+
+
+def current_span() -> Span | None:
+    """Span activo en el contexto actual (None fuera de una traza)."""
+    return _current_span.get()
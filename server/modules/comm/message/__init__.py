@@ -1,4 +1,4 @@
-__all__ = ["Message", "MessageType"]
+__all__ = ["Message", "MessageType", "JsonCodec", "BinaryCodec", "EncodedPayload", "CodecError", "get_codec"]
 
 def __getattr__(name: str):
 	if name == "Message":
@@ -7,6 +7,21 @@ def __getattr__(name: str):
 	if name == "MessageType":
 		from .message_type import MessageType
 		return MessageType
+	if name == "JsonCodec":
+		from .codec import JsonCodec
+		return JsonCodec
+	if name == "BinaryCodec":
+		from .codec import BinaryCodec
+		return BinaryCodec
+	if name == "EncodedPayload":
+		from .codec import EncodedPayload
+		return EncodedPayload
+	if name == "CodecError":
+		from .codec import CodecError
+		return CodecError
+	if name == "get_codec":
+		from .codec import get_codec
+		return get_codec
 	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def __dir__():
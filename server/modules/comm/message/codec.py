@@ -0,0 +1,274 @@
+import json
+import struct
+import zlib
+from server.modules.comm.message.message import Message
+from server.modules.comm.message.message_type import MessageType
+
+# Ids de tipo de mensaje en BinaryCodec: posición (desde 1) en esta tabla, fija e independiente del
+# orden de MessageType. Solo se añaden tipos al final: cambiar o reordenar una entrada cambia el id
+# con que se decodifican los mensajes de otros nodos. 0 indica que el tipo no está en la tabla y
+# viaja como texto (así se envían los tipos nuevos hasta que se añaden aquí).
+MESSAGE_TYPES = (
+    MessageType.DISCOVERY_HEARTBEAT,                 # 1
+    MessageType.DISCOVERY_QUERY_BY_NAME,             # 2
+    MessageType.DISCOVERY_QUERY_BY_ROLE,             # 3
+    MessageType.DISCOVERY_QUERY_ALL,                 # 4
+    MessageType.DISCOVERY_HEARTBEAT_ACK,             # 5
+    MessageType.DISCOVERY_QUERY_BY_NAME_ACK,         # 6
+    MessageType.DISCOVERY_QUERY_BY_ROLE_ACK,         # 7
+    MessageType.DISCOVERY_QUERY_ALL_ACK,             # 8
+    MessageType.PROCESS_FTP_COMMAND,                 # 9
+    MessageType.PROCESS_FTP_COMMAND_ACK,             # 10
+    MessageType.AUTH_VALIDATE_USER,                  # 11
+    MessageType.AUTH_VALIDATE_PASSWORD,              # 12
+    MessageType.AUTH_VALIDATE_USER_ACK,              # 13
+    MessageType.AUTH_VALIDATE_PASSWORD_ACK,          # 14
+    MessageType.DATA_LIST,                           # 15
+    MessageType.DATA_STAT,                           # 16
+    MessageType.DATA_MKD,                            # 17
+    MessageType.DATA_REMOVE,                         # 18
+    MessageType.DATA_RENAME,                         # 19
+    MessageType.DATA_CWD,                            # 20
+    MessageType.DATA_OPEN_PASV,                      # 21
+    MessageType.DATA_RETR_FILE,                      # 22
+    MessageType.DATA_STORE_FILE,                     # 23
+    MessageType.DATA_READY,                          # 24
+    MessageType.DATA_LIST_ACK,                       # 25
+    MessageType.DATA_STAT_ACK,                       # 26
+    MessageType.DATA_MKD_ACK,                        # 27
+    MessageType.DATA_REMOVE_ACK,                     # 28
+    MessageType.DATA_RENAME_ACK,                     # 29
+    MessageType.DATA_CWD_ACK,                        # 30
+    MessageType.DATA_OPEN_PASV_ACK,                  # 31
+    MessageType.DATA_RETR_FILE_ACK,                  # 32
+    MessageType.DATA_STORE_FILE_ACK,                 # 33
+    MessageType.DATA_READY_ACK,                      # 34
+    MessageType.DATA_REPLICATE_FILE,                 # 35
+    MessageType.DATA_REPLICATE_FILE_ACK,             # 36
+    MessageType.DATA_REPLICATE_READY,                # 37
+    MessageType.DATA_REPLICATE_DIR_CREATE,           # 38
+    MessageType.DATA_REPLICATE_DIR_DELETE,           # 39
+    MessageType.DATA_REPLICATE_FILE_DELETE,          # 40
+    MessageType.DATA_REPLICATE_RENAME,               # 41
+    MessageType.DATA_META_REQUEST,                   # 42
+    MessageType.DATA_META_REQUEST_ACK,               # 43
+    MessageType.UPDATE_FROM_NODE,                    # 44
+    MessageType.UPDATE_FROM_NODE_ACK,                # 45
+    MessageType.RENAME_FILE,                         # 46
+    MessageType.RENAME_FILE_ACK,                     # 47
+    MessageType.CLUSTER_STATE_REQUEST,               # 48
+    MessageType.CLUSTER_STATE_ACK,                   # 49
+    MessageType.DATA_PUSH,                           # 50
+    MessageType.DATA_PUSH_ACK,                       # 51
+    MessageType.DATA_SYNC_FILE_REQUEST,              # 52
+    MessageType.DATA_SYNC_FILE_READY,                # 53
+    MessageType.GOSSIP_UPDATE,                       # 54
+    MessageType.MERGE_STATE,                         # 55
+    MessageType.MERGE_STATE_ACK,                     # 56
+    MessageType.SEND_STATE,                          # 57
+    MessageType.NODE_BUSY,                           # 58
+    MessageType.NODE_STATS,                          # 59
+    MessageType.NODE_STATS_ACK,                      # 60
+    MessageType.NODE_TRACES,                         # 61
+    MessageType.NODE_TRACES_ACK,                     # 62
+    MessageType.DISCOVERY_WATCH,                     # 63
+    MessageType.DISCOVERY_EVENT,                     # 64
+    MessageType.DISCOVERY_WATCH_ACK,                 # 65
+    MessageType.DISCOVERY_SYNC,                      # 66
+    MessageType.DISCOVERY_SYNC_PUSH,                 # 67
+    MessageType.DISCOVERY_SYNC_ACK,                  # 68
+)
+TYPE_IDS = {t: i for i, t in enumerate(MESSAGE_TYPES, start=1)}
+
+# Huella de la tabla de tipos: dos nodos solo usan BinaryCodec si comparten la misma tabla
+TYPE_TABLE_DIGEST = format(zlib.crc32("\n".join(MESSAGE_TYPES).encode()), "08x")
+
+
+class EncodedPayload(dict):
+    """
+    Payload cuyo JSON compacto se calcula una sola vez y BinaryCodec reutiliza en cada envío. Para
+    respuestas que se repiten idénticas muchas veces (p. ej. DISCOVERY_QUERY_BY_ROLE_ACK mientras no
+    cambia la membresía). No debe modificarse después del primer envío.
+    """
+    __slots__ = ("_json",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._json = None
+
+    @property
+    def json(self) -> bytes:
+        if self._json is None:
+            self._json = json.dumps(self, separators=(",", ":")).encode()
+        return self._json
+
+
+class CodecError(ValueError):
+    """Cuerpo que el codec no puede decodificar (p. ej. un id de tipo fuera de la tabla)."""
+
+
+class JsonCodec:
+    """Codec original: el mensaje completo como JSON (Message.to_json)."""
+
+    id = 0
+    name = "json"
+
+    def encode(self, message: Message) -> bytes:
+        return message.to_json().encode()
+
+    def decode(self, data: bytes) -> Message:
+        return Message.from_json(data)
+
+
+class BinaryCodec:
+    """
+    Codificación compacta de un Message.
+
+    Estructura:
+        - cabecera fija (_FIXED): flags, id de tipo (H), timestamp (q) y msg_id como 16 bytes de uuid.
+        - src, dst y, si no caben en la cabecera, tipo y msg_id como textos con prefijo de longitud (H).
+        - resto de metadata como JSON compacto con prefijo de longitud (I), vacío si no hay.
+        - payload como JSON compacto hasta el final (el ya calculado si es un EncodedPayload).
+
+    Los tipos que no están en MessageType, los msg_id que no son uuid y los timestamp no enteros
+    se codifican igualmente (como texto o dentro de la metadata JSON).
+    """
+
+    id = 1
+    name = "binary"
+
+    _FIXED = struct.Struct("!BHq16s")
+    _STR = struct.Struct("!H")
+    _LEN = struct.Struct("!I")
+
+    _INLINE_TYPE = 0x01
+    _INLINE_MSG_ID = 0x02
+    _HAS_TIMESTAMP = 0x04
+    _NO_DST = 0x08
+
+    _NULL_UUID = bytes(16)
+
+    def encode(self, message: Message) -> bytes:
+        header, metadata = message.header, message.metadata
+        msg_type = header["type"]
+        flags = 0
+        parts = []
+
+        type_id = TYPE_IDS.get(msg_type, 0)
+        if not type_id:
+            flags |= self._INLINE_TYPE
+
+        extra = {k: v for k, v in metadata.items() if k not in ("msg_id", "timestamp")}
+
+        timestamp = metadata.get("timestamp")
+        if isinstance(timestamp, int):
+            flags |= self._HAS_TIMESTAMP
+        else:
+            if timestamp is not None:
+                extra["timestamp"] = timestamp
+            timestamp = 0
+
+        msg_id = metadata.get("msg_id")
+        raw_id = self._uuid_bytes(msg_id)
+        if raw_id is None:
+            flags |= self._INLINE_MSG_ID
+            raw_id = self._NULL_UUID
+
+        dst = header.get("dst")
+        if dst is None:
+            flags |= self._NO_DST
+
+        parts.append(self._FIXED.pack(flags, type_id, timestamp, raw_id))
+        if flags & self._INLINE_TYPE:
+            self._pack_str(parts, msg_type)
+        self._pack_str(parts, header.get("src") or "")
+        if dst is not None:
+            self._pack_str(parts, dst)
+        if flags & self._INLINE_MSG_ID:
+            self._pack_str(parts, json.dumps(msg_id))
+
+        extra_json = json.dumps(extra, separators=(",", ":")).encode() if extra else b""
+        parts.append(self._LEN.pack(len(extra_json)))
+        parts.append(extra_json)
+        payload = message.payload
+        parts.append(payload.json if isinstance(payload, EncodedPayload) else json.dumps(payload, separators=(",", ":")).encode())
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> Message:
+        view = memoryview(data)
+        flags, type_id, timestamp, raw_id = self._FIXED.unpack_from(view, 0)
+        offset = self._FIXED.size
+
+        if flags & self._INLINE_TYPE:
+            msg_type, offset = self._unpack_str(view, offset)
+        elif 1 <= type_id <= len(MESSAGE_TYPES):
+            msg_type = MESSAGE_TYPES[type_id - 1]
+        else:
+            raise CodecError(f"Id de tipo de mensaje desconocido: {type_id}")
+
+        src, offset = self._unpack_str(view, offset)
+        dst = None
+        if not flags & self._NO_DST:
+            dst, offset = self._unpack_str(view, offset)
+
+        if flags & self._INLINE_MSG_ID:
+            raw, offset = self._unpack_str(view, offset)
+            msg_id = json.loads(raw)
+        else:
+            msg_id = self._format_uuid(raw_id)
+
+        (extra_len,) = self._LEN.unpack_from(view, offset)
+        offset += self._LEN.size
+        metadata = {"msg_id": msg_id}
+        if flags & self._HAS_TIMESTAMP:
+            metadata["timestamp"] = timestamp
+        if extra_len:
+            metadata.update(json.loads(bytes(view[offset:offset + extra_len])))
+        offset += extra_len
+
+        payload = json.loads(bytes(view[offset:]))
+        return Message.from_dict({"header": {"type": msg_type, "src": src, "dst": dst}, "payload": payload, "metadata": metadata}, len(data))
+
+    # ---------------- Métodos internos ----------------
+    def _pack_str(self, parts: list, value: str):
+        raw = value.encode()
+        parts.append(self._STR.pack(len(raw)))
+        parts.append(raw)
+
+    def _unpack_str(self, view: memoryview, offset: int) -> tuple[str, int]:
+        (length,) = self._STR.unpack_from(view, offset)
+        offset += self._STR.size
+        return str(view[offset:offset + length], "utf-8"), offset + length
+
+    def _uuid_bytes(self, msg_id) -> bytes | None:
+        """Bytes del uuid si msg_id es un uuid en su forma canónica (como str(uuid4())); None si no."""
+        if not isinstance(msg_id, str) or len(msg_id) != 36:
+            return None
+        try:
+            raw = bytes.fromhex(msg_id.replace("-", ""))
+
+        except ValueError:
+            return None
+
+        return raw if len(raw) == 16 and self._format_uuid(raw) == msg_id else None
+
+    def _format_uuid(self, raw: bytes) -> str:
+        """Forma canónica de un uuid (equivale a str(uuid.UUID(bytes=raw)) sin construir el objeto)."""
+        h = raw.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+JSON_CODEC = JsonCodec()
+BINARY_CODEC = BinaryCodec()
+
+CODECS = {codec.name: codec for codec in (JSON_CODEC, BINARY_CODEC)}
+CODECS_BY_ID = {codec.id: codec for codec in (JSON_CODEC, BINARY_CODEC)}
+
+
+def get_codec(name: str):
+    """Retorna el codec con ese nombre ("json" o "binary")."""
+    try:
+        return CODECS[name]
+
+    except KeyError:
+        raise ValueError(f"Invalid codec '{name}'. Expected one of {tuple(CODECS)}") from None
@@ -22,25 +22,48 @@ class Message:
                 * msg_id (str): Identificador único del mensaje.
                 * timestamp (int): Marca de tiempo UNIX al momento de creación.
             Puede contener otros campos opcionales.
+            msg_id y timestamp se generan la primera vez que se accede a metadata, de modo que
+            un mensaje que nunca llega a enviarse no paga uuid4() ni time().
+        - wire_size: int | None
+            Bytes que ocupaba el mensaje en la trama de la que se decodificó, o en la última trama
+            en que se serializó para enviarlo (None si nunca pasó por el cable).
 
     Interfaz pública:
         - to_json() -> str
             Serializa el mensaje a JSON terminado en '\n', listo para enviar por TCP.
-        - from_json(raw: str) -> Message
+        - from_json(raw: str | bytes) -> Message
             Deserializa un JSON recibido y devuelve un objeto Message.
+        - from_dict(data: dict, wire_size: int = None) -> Message
+            Construye un Message reutilizando los dicts ya decodificados, sin copiarlos.
         - __repr__() -> str
             Representación legible para debug."""
-    
+
+    __slots__ = ("header", "payload", "_metadata", "_metadata_ready", "wire_size")
+
     def __init__(self, type: str, src: str, dst: str, payload: dict = None, metadata: dict = None):
         
         self.header = {"type": type, "src": src, "dst": dst }
         self.payload = payload or {}
-        default_metadata = {"msg_id": str(uuid.uuid4()), "timestamp": int(time.time())}
+        # Se copia porque los llamadores a veces reutilizan el mismo dict para varios mensajes
+        self._metadata = dict(metadata) if metadata else {}
+        self._metadata_ready = False
+        self.wire_size = None
 
-        if metadata:
-            default_metadata.update(metadata) 
+    @property
+    def metadata(self) -> dict:
+        if not self._metadata_ready:
+            md = self._metadata
+            if "msg_id" not in md:
+                md["msg_id"] = str(uuid.uuid4())
+            if "timestamp" not in md:
+                md["timestamp"] = int(time.time())
+            self._metadata_ready = True
+        return self._metadata
 
-        self.metadata = default_metadata
+    @metadata.setter
+    def metadata(self, value: dict):
+        self._metadata = value
+        self._metadata_ready = False
 
     def to_json(self) -> str:
         """
@@ -53,18 +76,25 @@ class Message:
         }) + "\n"
 
     @staticmethod
-    def from_json(raw: str) -> "Message":
+    def from_json(raw: str | bytes) -> "Message":
         """
         Deserializa un JSON recibido y devuelve un objeto Mensaje.
         """
-        data = json.loads(raw)
-        return Message(
-            type=data["header"]["type"],
-            src=data["header"]["src"],
-            dst=data["header"].get("dst"),
-            payload=data.get("payload"),
-            metadata=data.get("metadata")
-        )
+        return Message.from_dict(json.loads(raw), len(raw))
+
+    @staticmethod
+    def from_dict(data: dict, wire_size: int = None) -> "Message":
+        """
+        Construye un Message a partir de un dict con header/payload/metadata ya decodificado.
+        Los dicts se usan tal cual (sin copiarlos ni pasar por __init__).
+        """
+        msg = Message.__new__(Message)
+        msg.header = data["header"]
+        msg.payload = data.get("payload") or {}
+        msg._metadata = data.get("metadata") or {}
+        msg._metadata_ready = False
+        msg.wire_size = wire_size
+        return msg
 
     def __repr__(self):
         return f"Mensaje(type={self.header['type']}, src={self.header['src']}, dst={self.header.get('dst')}, payload={self.payload})"
@@ -1,5 +1,10 @@
 class MessageType:
-    """Clase estática que contiene constantes para los diferentes tipos de mensajes"""
+    """
+    Clase estática que contiene constantes para los diferentes tipos de mensajes.
+
+    Un tipo nuevo debe añadirse también al final de message.codec.MESSAGE_TYPES (tabla de ids de
+    BinaryCodec); mientras no esté allí viaja con su nombre como texto.
+    """
 
     # =========================
     # Discovery messages
@@ -9,10 +14,21 @@ class MessageType:
     DISCOVERY_QUERY_BY_ROLE = "DISCOVERY_QUERY_BY_ROLE"
     DISCOVERY_QUERY_ALL = "DISCOVERY_QUERY_ALL"
 
+    # Suscripción a los cambios de membresía de unos roles y cada cambio enviado a los suscriptores
+    DISCOVERY_WATCH = "DISCOVERY_WATCH"
+    DISCOVERY_EVENT = "DISCOVERY_EVENT"
+
+    # Anti-entropía entre discovery nodes: digest de la tabla, entradas más recientes y envío de
+    # las que pidió el otro lado
+    DISCOVERY_SYNC = "DISCOVERY_SYNC"
+    DISCOVERY_SYNC_PUSH = "DISCOVERY_SYNC_PUSH"
+
     DISCOVERY_HEARTBEAT_ACK = "DISCOVERY_HEARTBEAT_ACK"
     DISCOVERY_QUERY_BY_NAME_ACK = "DISCOVERY_QUERY_BY_NAME_ACK"
     DISCOVERY_QUERY_BY_ROLE_ACK = "DISCOVERY_QUERY_BY_ROLE_ACK"
     DISCOVERY_QUERY_ALL_ACK = "DISCOVERY_QUERY_ALL_ACK"
+    DISCOVERY_WATCH_ACK = "DISCOVERY_WATCH_ACK"
+    DISCOVERY_SYNC_ACK = "DISCOVERY_SYNC_ACK"
 
     # =========================
     # FTP processing
@@ -98,4 +114,23 @@ class MessageType:
     GOSSIP_UPDATE = "GOSSIP_UPDATE"
     MERGE_STATE = "MERGE_STATE"
     MERGE_STATE_ACK = "MERGE_STATE_ACK"
-    SEND_STATE = "SEND_STATE"
\ No newline at end of file
+    SEND_STATE = "SEND_STATE"
+
+    # =========================
+    # Control de carga
+    # =========================
+
+    # Respuesta del servidor cuando su pool de handlers está lleno; el llamador debe reintentar en otro nodo
+    NODE_BUSY = "NODE_BUSY"
+
+    # =========================
+    # Observabilidad
+    # =========================
+
+    # Métricas del nodo: contadores y latencias por tipo de mensaje, handler_pool y streams
+    NODE_STATS = "NODE_STATS"
+    NODE_STATS_ACK = "NODE_STATS_ACK"
+
+    # Spans de trazas distribuidas registrados por el nodo
+    NODE_TRACES = "NODE_TRACES"
+    NODE_TRACES_ACK = "NODE_TRACES_ACK"
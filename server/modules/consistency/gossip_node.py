@@ -11,8 +11,8 @@ logger = logging.getLogger("dftp.gossip.gossip_node")
 class GossipNode(LocationNode):
     """Nodo que permite replicación gossip."""
 
-    def __init__(self, node_name: str, ip: str, port: int,discovery_timeout: float = 0.8, heartbeat_interval: int = 5, node_role: NodeType = None, discovery_workers: int = 32):
-        super().__init__(node_name, ip, port, node_role=node_role, discovery_timeout=discovery_timeout, heartbeat_interval=heartbeat_interval, discovery_workers=discovery_workers)
+    def __init__(self, node_name: str, ip: str, port: int,discovery_timeout: float = 0.8, heartbeat_interval: int = 5, node_role: NodeType = None):
+        super().__init__(node_name, ip, port, node_role=node_role, discovery_timeout=discovery_timeout, heartbeat_interval=heartbeat_interval)
 
         # ---------------- Gossip state ----------------
         self.peers: dict[str, str] = {}
@@ -22,6 +22,11 @@ class GossipNode(LocationNode):
         # Control de parada para hilos
         self._stop = threading.Event()
 
+        # Cambios de membresía del rol (DISCOVERY_WATCH): despiertan a _update_peers sin esperar al siguiente ciclo
+        self._peers_changed = threading.Event()
+        if self.node_role:
+            self.watch_role(self.node_role, lambda event, node: self._peers_changed.set())
+
         # Handlers
         self.register_handler(MessageType.GOSSIP_UPDATE, self._handle_gossip_update)
         self.register_handler(MessageType.MERGE_STATE, self._handle_merge_state)
@@ -130,7 +135,8 @@ class GossipNode(LocationNode):
             except Exception:
                 logger.exception("[%s] Error en _update_peers", self.node_name)
 
-            time.sleep(self.heartbeat_interval)
+            self._peers_changed.wait(self.heartbeat_interval)
+            self._peers_changed.clear()
 
     # ----------------- Notificación de cambios locales -----------------
     def notify_local_change(self, change: dict, sync: bool = False, required_acks: int = None) -> bool:
@@ -152,15 +158,13 @@ class GossipNode(LocationNode):
         with self.peers_lock:
             peers_snapshot = list(self.peers.values())
 
+        def build(peer_ip):
+            return Message(type=MessageType.GOSSIP_UPDATE, src=self.ip, dst=peer_ip, payload=change)
+
         # Si no es sincrónico, solo enviar sin esperar
         if not sync:
-            for peer_ip in peers_snapshot:
-                try:
-                    logger.info(f"[{self.node_name}] Notificando cambio a {peer_ip} : {change}")
-                    msg = Message(type=MessageType.GOSSIP_UPDATE, src=self.ip, dst=peer_ip, payload=change)
-                    self.send_message(peer_ip, 9000, msg, await_response=False)
-                except Exception:
-                    logger.info("[%s] Error enviando gossip update a %s", self.node_name, peer_ip)
+            logger.info(f"[{self.node_name}] Notificando cambio a {len(peers_snapshot)} peers : {change}")
+            self.multicast(peers_snapshot, build, port=9000, await_response=False)
             return True
 
         # Modo sincrónico: enviar en paralelo y contar confirmaciones
@@ -176,40 +180,15 @@ class GossipNode(LocationNode):
         
         logger.info(f"[{self.node_name}] Enviando GOSSIP_UPDATE sync a {len(peers_snapshot)} peers, requiriendo {required_acks} ACKs")
 
-        # Enviar mensajes en paralelo y recopilar resultados
-        results = {}
-        threads = []
+        # Retorna en cuanto llegan required_acks ACKs; los envíos a los peers lentos siguen en segundo plano
+        result = self.multicast(peers_snapshot, build, mode="quorum", quorum=required_acks, port=9000, timeout=1.0)
 
-        def send_and_collect(peer_ip):
-            try:
-                logger.info(f"[{self.node_name}] Enviando GOSSIP_UPDATE sync a {peer_ip}")
-                msg = Message(type=MessageType.GOSSIP_UPDATE, src=self.ip, dst=peer_ip, payload=change)
-                response = self.send_message(peer_ip, 9000, msg, await_response=True)
-                results[peer_ip] = response is not None
-                if response:
-                    logger.info(f"[{self.node_name}] ACK recibido de {peer_ip}")
-                else:
-                    logger.warning(f"[{self.node_name}] No se recibió respuesta de {peer_ip} (timeout)")
-            except Exception as e:
-                logger.warning(f"[{self.node_name}] Error enviando a {peer_ip}: {e}")
-                results[peer_ip] = False
-
-        # Lanzar threads para enviar en paralelo
-        for peer_ip in peers_snapshot:
-            t = threading.Thread(target=send_and_collect, args=(peer_ip,), daemon=False)
-            t.start()
-            threads.append(t)
-
-        # Esperar a que terminen todos los threads
-        for t in threads:
-            t.join()
-
-        # Contar confirmaciones
-        confirmed_count = sum(1 for response in results.values() if response)
-        
-        logger.info(f"[{self.node_name}] notify_local_change sync: {confirmed_count}/{len(peers_snapshot)} ACKs recibidos (requería {required_acks})")
+        for peer_ip in result.failed:
+            logger.warning(f"[{self.node_name}] No se recibió respuesta de {peer_ip} (timeout)")
+
+        logger.info(f"[{self.node_name}] notify_local_change sync: {len(result.responses)}/{len(peers_snapshot)} ACKs recibidos (requería {required_acks})")
 
-        return confirmed_count >= required_acks
+        return result.satisfied
 
     # ----------------- Handler de gossip -----------------
     def _handle_gossip_update(self, message: Message):
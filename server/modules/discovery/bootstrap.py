@@ -0,0 +1,405 @@
+"""
+Arranque del descubrimiento: a qué IPs enviar DISCOVERY_HEARTBEAT sin barrer toda la subred.
+
+Antes cada nodo probaba todas las IPs de DFTP_SUBNET (254 conexiones en una /24) en cada ciclo de
+heartbeat. Ahora cada ciclo solo prueba:
+    . los discovery nodes conocidos (los que respondieron; se olvidan tras DROP_AFTER ciclos sin
+      respuesta),
+    . las semillas de DFTP_DISCOVERY_SEEDS: IPs o nombres DNS separados por comas (un nombre
+      puede resolver a varias IPs, p. ej. "tasks.discovery" en Docker Swarm),
+    . los candidatos aprendidos por anuncios UDP multicast (ver AnnounceChannel) o por la lista
+      "peers" que los discovery nodes incluyen en DISCOVERY_HEARTBEAT_ACK.
+
+El barrido completo de la subred queda como respaldo según DFTP_DISCOVERY_SCAN:
+    . "auto" (por defecto): barridos espaciados con backoff exponencial entre
+      DFTP_DISCOVERY_RESCAN_MIN y DFTP_DISCOVERY_RESCAN_MAX segundos; el intervalo vuelve al
+      mínimo cuando el nodo deja de conocer algún discovery node. Sin semillas ni multicast el
+      primer barrido es inmediato; si no, se da un intervalo mínimo a que lleguen anuncios.
+    . "always": barre la subred en cada ciclo (comportamiento anterior).
+    . "off": nunca barre.
+
+Con DFTP_DISCOVERY_HEARTBEAT="one" (por defecto), en cuanto un discovery node conocido indica en su
+DISCOVERY_HEARTBEAT_ACK que replica su tabla con los demás ("replicated"), los servicios envían el
+heartbeat solo a uno (el mismo mientras responda; si no, al siguiente de rank_peers, con
+hedged_send) y dan por vivos los peers que este lista. "all" envía el heartbeat a todos los
+conocidos en cada ciclo, como hacen entre sí los discovery nodes.
+
+Los discovery nodes se anuncian en el grupo DFTP_DISCOVERY_MCAST ("ip:puerto", por defecto
+239.255.42.99:9099; "off" lo desactiva) en cada ciclo y al recibir una solicitud, que los nodos
+envían al arrancar. Las redes overlay de Docker no transportan multicast: ahí usar semillas.
+"""
+import ipaddress
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger("dftp.discovery.bootstrap")
+
+SCAN_MODES = ("auto", "always", "off")
+HEARTBEAT_MODES = ("one", "all")
+
+SEEDS = os.getenv("DFTP_DISCOVERY_SEEDS", "")
+SCAN_MODE = os.getenv("DFTP_DISCOVERY_SCAN", "auto").lower()
+RESCAN_MIN = float(os.getenv("DFTP_DISCOVERY_RESCAN_MIN", "5"))
+RESCAN_MAX = float(os.getenv("DFTP_DISCOVERY_RESCAN_MAX", "300"))
+MULTICAST = os.getenv("DFTP_DISCOVERY_MCAST", "239.255.42.99:9099")
+HEARTBEAT_MODE = os.getenv("DFTP_DISCOVERY_HEARTBEAT", "one").lower()
+
+# Ciclos seguidos sin respuesta tras los que un discovery node conocido deja de probarse
+DROP_AFTER = 3
+
+# Marca de los datagramas de descubrimiento, para ignorar tráfico ajeno en el grupo
+_MAGIC = "dftp-discovery"
+
+
+def parse_seeds(value: str) -> list[str]:
+    """Lista de semillas (IPs o nombres DNS) de una cadena separada por comas."""
+    return [s.strip() for s in (value or "").split(",") if s.strip()]
+
+
+def resolve_seeds(seeds: list[str]) -> set[str]:
+    """IPs de las semillas; los nombres que no resuelven se ignoran hasta el siguiente ciclo."""
+    ips = set()
+    for seed in seeds:
+        try:
+            ipaddress.ip_address(seed)
+            ips.add(seed)
+            continue
+        except ValueError:
+            pass
+
+        try:
+            ips.update(socket.gethostbyname_ex(seed)[2])
+        except OSError as e:
+            logger.debug("Semilla %s no resuelve: %s", seed, e)
+    return ips
+
+
+def parse_group(value: str) -> tuple[str, int] | None:
+    """(grupo, puerto) de DFTP_DISCOVERY_MCAST o None si está desactivado o es inválido."""
+    if not value or value.lower() in ("off", "0", "none", "false"):
+        return None
+    try:
+        group, port = value.rsplit(":", 1)
+        if not ipaddress.ip_address(group).is_multicast:
+            raise ValueError(f"{group} no es una dirección multicast")
+        return group, int(port)
+    except ValueError as e:
+        logger.warning("DFTP_DISCOVERY_MCAST inválido (%s): %s", value, e)
+        return None
+
+
+class AnnounceChannel:
+    """
+    Socket UDP unido al grupo multicast de descubrimiento.
+
+    Cada datagrama es un JSON {"magic", "kind", "name", "ip", "port"} con kind "announce" (un
+    discovery node se anuncia) o "solicit" (un nodo que arranca pide anuncios). Un hilo recibe los
+    datagramas y llama a on_datagram(kind, payload). Si el socket no puede abrirse (sin soporte
+    multicast en la interfaz) el canal queda inactivo y el descubrimiento sigue por semillas y
+    barridos.
+    """
+
+    def __init__(self, group: str, port: int, interface: str, on_datagram, name: str = "dftp-announce"):
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.on_datagram = on_datagram
+        self.sock = None
+        self._stop = threading.Event()
+
+        try:
+            self.sock = self._open_socket()
+        except OSError as e:
+            logger.warning("Multicast %s:%s no disponible en %s: %s", group, port, interface, e)
+            return
+
+        threading.Thread(target=self._recv_loop, name=name, daemon=True).start()
+
+    @property
+    def active(self) -> bool:
+        return self.sock is not None
+
+    def send(self, kind: str, **fields):
+        """Envía un datagrama kind al grupo; los errores se registran y se ignoran."""
+        if self.sock is None:
+            return
+        data = json.dumps({"magic": _MAGIC, "kind": kind, **fields}).encode()
+        try:
+            self.sock.sendto(data, (self.group, self.port))
+        except OSError as e:
+            logger.debug("Error enviando %s al grupo %s:%s: %s", kind, self.group, self.port, e)
+
+    def close(self):
+        self._stop.set()
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            # Varios nodos del mismo host (o proceso) escuchan el mismo puerto y reciben cada datagrama
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(("", self.port))
+            iface = socket.inet_aton(self.interface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, socket.inet_aton(self.group) + iface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, iface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+            sock.settimeout(1.0)
+            return sock
+        except OSError:
+            sock.close()
+            raise
+
+    def _recv_loop(self):
+        while not self._stop.is_set():
+            try:
+                data, _ = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            try:
+                payload = json.loads(data)
+                if not isinstance(payload, dict) or payload.get("magic") != _MAGIC:
+                    continue
+                self.on_datagram(payload.get("kind"), payload)
+            except Exception as e:
+                logger.debug("Datagrama de descubrimiento inválido: %s", e)
+
+
+class DiscoveryBootstrap:
+    """
+    Decide a qué IPs envía heartbeats un nodo en cada ciclo y lleva los discovery nodes conocidos.
+
+    Campos:
+        . node: CommunicationNode que envía los heartbeats (usa su executor de multicast).
+        . port: puerto de los discovery nodes.
+        . possible_ips: IPs de la subred, para los barridos completos.
+        . seeds: semillas de DFTP_DISCOVERY_SEEDS.
+        . channel: AnnounceChannel o None si el multicast está desactivado o no disponible.
+        . announcer: si es True (discovery nodes) responde a las solicitudes con un anuncio.
+        . heartbeat_mode: "one" o "all" (ver DFTP_DISCOVERY_HEARTBEAT).
+
+    Métodos públicos:
+        . heartbeat_round(build_message) -> dict{name: ip} de los discovery nodes que respondieron OK.
+        . add_candidate(ip) -> añade una IP a probar en el siguiente ciclo.
+        . known_ips() -> IPs de los discovery nodes que respondieron recientemente.
+        . announce() -> anuncia este nodo en el grupo multicast.
+        . get_stats() -> conocidos, semillas, candidatos, barridos, sondeos realizados y discovery
+          node principal si el heartbeat va a uno solo.
+        . close() -> cierra el canal multicast.
+    """
+
+    def __init__(self, node, port: int, possible_ips: list[str], timeout: float, announcer: bool = False,
+                 seeds: list[str] = None, scan_mode: str = None, rescan_min: float = None, rescan_max: float = None,
+                 group: str = None, heartbeat_mode: str = None):
+        self.node = node
+        self.port = port
+        self.possible_ips = possible_ips
+        self.timeout = timeout
+        self.announcer = announcer
+        self.seeds = parse_seeds(SEEDS) if seeds is None else seeds
+
+        self.scan_mode = (scan_mode or SCAN_MODE).lower()
+        if self.scan_mode not in SCAN_MODES:
+            raise ValueError(f"Invalid discovery scan mode '{self.scan_mode}'. Expected one of {SCAN_MODES}")
+        self.rescan_min = RESCAN_MIN if rescan_min is None else rescan_min
+        self.rescan_max = max(self.rescan_min, RESCAN_MAX if rescan_max is None else rescan_max)
+
+        self.heartbeat_mode = (heartbeat_mode or HEARTBEAT_MODE).lower()
+        if self.heartbeat_mode not in HEARTBEAT_MODES:
+            raise ValueError(f"Invalid discovery heartbeat mode '{self.heartbeat_mode}'. Expected one of {HEARTBEAT_MODES}")
+
+        self._lock = threading.Lock()
+        self._known: dict[str, int] = {}  # ip -> ciclos seguidos sin respuesta
+        self._candidates: set[str] = set()
+        self._primary: str | None = None  # discovery node que recibe el heartbeat en modo "one"
+        self._replicated = False
+        self._last_solicit_reply = 0.0
+        self._scans = 0
+        self._probes = 0
+
+        mcast = parse_group(MULTICAST if group is None else group)
+        self.channel = None
+        if mcast:
+            self.channel = AnnounceChannel(*mcast, node.ip, self._on_datagram, name=f"dftp-{node.node_name}-announce")
+            if not self.channel.active:
+                self.channel = None
+
+        # Sin semillas ni multicast no hay otra fuente: barrer ya. Si no, dar tiempo a los anuncios
+        self._rescan_delay = self.rescan_min
+        now = time.monotonic()
+        self._next_scan = now if not self.seeds and self.channel is None else now + self.rescan_min
+
+        if self.channel is not None:
+            self.channel.send("solicit", name=node.node_name, ip=node.ip, port=node.port)
+
+    # ---------------- Métodos públicos ----------------
+    def heartbeat_round(self, build_message) -> dict:
+        """
+        Envía en paralelo el heartbeat build_message(ip) -> Message a los destinos del ciclo y
+        retorna {name: ip} de los discovery nodes que respondieron OK. En modo "one", con discovery
+        nodes replicados conocidos, lo envía solo al principal y retorna además sus peers.
+        """
+        now = time.monotonic()
+        if self._single_target():
+            return self._heartbeat_one(build_message, now)
+
+        targets, full_scan = self._targets(now)
+        if not targets:
+            return {}
+
+        result = self.node.multicast(targets, build_message, mode="all", port=self.port, timeout=self.timeout,
+                                     accept=lambda r: r.metadata.get("status") == "OK")
+
+        found = {}
+        for response in result.responses.values():
+            payload = response.payload or {}
+            name, ip = payload.get("name"), payload.get("ip")
+            if name and ip:
+                found[name] = ip
+            for peer in payload.get("peers") or []:
+                self.add_candidate(peer.get("ip"))
+
+        with self._lock:
+            self._replicated = bool(found) and all((r.payload or {}).get("replicated") for r in result.responses.values())
+        self._observe(targets, set(found.values()), full_scan, now)
+        return found
+
+    def add_candidate(self, ip: str):
+        """Añade ip a los destinos del siguiente ciclo si aún no es un discovery node conocido."""
+        if not ip or ip == self.node.ip:
+            return
+        with self._lock:
+            if ip not in self._known:
+                self._candidates.add(ip)
+
+    def known_ips(self) -> set[str]:
+        with self._lock:
+            return set(self._known)
+
+    def announce(self):
+        """Anuncia este nodo en el grupo multicast (no hace nada sin canal)."""
+        if self.channel is not None:
+            self.channel.send("announce", name=self.node.node_name, ip=self.node.ip, port=self.node.port)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "known": sorted(self._known),
+                "candidates": sorted(self._candidates),
+                "seeds": list(self.seeds),
+                "multicast": f"{self.channel.group}:{self.channel.port}" if self.channel else None,
+                "scan_mode": self.scan_mode,
+                "heartbeat_mode": self.heartbeat_mode,
+                "primary": self._primary if self._single_target_locked() else None,
+                "scans": self._scans,
+                "probes": self._probes,
+                "next_scan_in": max(0.0, self._next_scan - time.monotonic()) if self.scan_mode == "auto" else None,
+            }
+
+    def close(self):
+        if self.channel is not None:
+            self.channel.close()
+
+    # ---------------- Métodos internos ----------------
+    def _single_target(self) -> bool:
+        with self._lock:
+            return self._single_target_locked()
+
+    def _single_target_locked(self) -> bool:
+        return self.heartbeat_mode == "one" and self._replicated and bool(self._known)
+
+    def _heartbeat_one(self, build_message, now: float) -> dict:
+        """
+        Heartbeat al discovery node principal (o, si no responde, al siguiente de rank_peers). Los
+        peers que lista su respuesta se dan por vivos sin enviarles nada: la tabla les llega por
+        anti-entropía. Si la respuesta indica que ya no replica se vuelve a enviar a todos.
+        """
+        with self._lock:
+            primary = self._primary if self._primary in self._known else None
+            others = [ip for ip in self._known if ip != primary]
+        order = ([primary] if primary else []) + self.node.rank_peers(others, self.port)
+
+        result = self.node.hedged_send(order, build_message, port=self.port, timeout=self.timeout,
+                                       accept=lambda r: r.metadata.get("status") == "OK")
+
+        found = {}
+        for ip, response in result.responses.items():
+            payload = response.payload or {}
+            name = payload.get("name")
+            if name:
+                found[name] = payload.get("ip") or ip
+            for peer in payload.get("peers") or []:
+                if peer.get("name") and peer.get("ip") and peer["ip"] != self.node.ip:
+                    found[peer["name"]] = peer["ip"]
+            with self._lock:
+                self._primary = ip
+                self._replicated = bool(payload.get("replicated"))
+
+        with self._lock:
+            self._probes += len(result.responses) + len(result.failed)
+        self._observe(result.failed, set(found.values()), False, now)
+        return found
+
+    def _targets(self, now: float) -> tuple[list[str], bool]:
+        """IPs a probar en este ciclo y si el ciclo es un barrido completo de la subred."""
+        seeds = resolve_seeds(self.seeds) - {self.node.ip}
+
+        with self._lock:
+            full_scan = self.scan_mode == "always" or (self.scan_mode == "auto" and now >= self._next_scan)
+            targets = set(self._known) | self._candidates | seeds
+            self._candidates.clear()
+            if full_scan:
+                targets.update(self.possible_ips)
+                self._scans += 1
+                if self.scan_mode == "auto":
+                    self._next_scan = now + self._rescan_delay
+                    self._rescan_delay = min(self._rescan_delay * 2, self.rescan_max)
+            self._probes += len(targets)
+
+        if full_scan:
+            logger.debug("[%s] Barrido completo de la subred (%d IPs)", self.node.node_name, len(targets))
+        return list(targets), full_scan
+
+    def _observe(self, targets: list[str], responded: set[str], full_scan: bool, now: float):
+        """Actualiza los conocidos con las respuestas del ciclo."""
+        with self._lock:
+            had_known = bool(self._known)
+            for ip in responded:
+                self._known[ip] = 0
+
+            for ip in targets:
+                if ip in responded or ip not in self._known:
+                    continue
+                self._known[ip] += 1
+                if self._known[ip] >= DROP_AFTER:
+                    del self._known[ip]
+                    logger.info("[%s] Discovery node %s sin respuesta, se deja de probar", self.node.node_name, ip)
+
+            # Sin ningún discovery node conocido se vuelve a barrer pronto, con el backoff reiniciado
+            if had_known and not self._known and self.scan_mode == "auto":
+                self._rescan_delay = self.rescan_min
+                self._next_scan = min(self._next_scan, now + self.rescan_min)
+
+    def _on_datagram(self, kind: str, payload: dict):
+        if kind == "announce":
+            self.add_candidate(payload.get("ip"))
+
+        elif kind == "solicit" and self.announcer:
+            # Varias solicitudes seguidas (arranque de muchos nodos) se responden con un anuncio
+            now = time.monotonic()
+            with self._lock:
+                if now - self._last_solicit_reply < 1.0:
+                    return
+                self._last_solicit_reply = now
+            self.announce()
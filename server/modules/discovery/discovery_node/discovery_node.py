@@ -1,47 +1,101 @@
 import ipaddress
+import random
 import threading
 import time
-import concurrent.futures
 import os
 import logging
 
-from server.modules.discovery.discovery_node.entities import ServiceRegister, NodeType, RegisterTable
+from server.modules.discovery.bootstrap import DiscoveryBootstrap
+from server.modules.discovery.load import ORDERS, rank_nodes
+from server.modules.discovery.discovery_node.entities import ServiceRegister, NodeType, RegisterTable, MembershipLog, TimerWheel
+from server.modules.discovery.discovery_node.entities.failure_detector import PHI_SUSPECT, PHI_EVICT
+from server.modules.discovery.discovery_node.entities.membership_log import JOIN, LEAVE, UPDATE
 from server.modules.comm import Message, MessageType, CommunicationNode
 logger = logging.getLogger("dftp.app.discovery_node")
 
+# Segundos que dura una suscripción DISCOVERY_WATCH sin renovarse
+WATCH_LEASE = float(os.getenv("DFTP_DISCOVERY_WATCH_LEASE", "30"))
+
+# Segundos entre rondas de anti-entropía con otro discovery node (0 desactiva la replicación)
+SYNC_INTERVAL = float(os.getenv("DFTP_DISCOVERY_SYNC_INTERVAL", "1"))
+
+# Segundos por tick de la rueda de expiración de registros
+EXPIRY_TICK = float(os.getenv("DFTP_DISCOVERY_EXPIRY_TICK", "0.5"))
+
+# Segundos sin heartbeat tras los que un nodo se elimina aunque su phi no llegue a PHI_EVICT
+MAX_SILENCE = float(os.getenv("DFTP_DISCOVERY_MAX_SILENCE", "30"))
+
+
+class Watcher:
+    """Suscriptor de DISCOVERY_WATCH: roles que le interesan y expiración de su suscripción."""
+    __slots__ = ("roles", "expires")
+
+    def __init__(self, roles: set[str], expires: float):
+        self.roles = roles
+        self.expires = expires
+
+
 class DiscoveryNode(CommunicationNode):
     """Discovery Node
     Nodo que gestiona una tabla de registros de servicios para que otros nodos puedan encontrarse entre ellos.
     La tabla contiene registros de los nodos del sistema incluyendo: Nombre, Ip, Rol, Last_Heartbeat
     
     - Campos:
-        . register_table: tabla de registros de servicios.
+        . register_table: tabla de registros de servicios (copy-on-write: las consultas leen su
+          snapshot sin lock y QUERY_BY_ROLE reutiliza la respuesta precalculada del snapshot).
         . peers: diccionario {name: ip} de otros discovery nodes detectados.
         . subnet: subred en la que buscar otros discovery nodes.
         . possible_ips: lista de ips posibles en la subred (excepto la propia ip).
+        . membership_log: MembershipLog con los últimos cambios de membresía (join, leave, update)
+          numerados con una revisión creciente.
+        . watchers: {(ip, port): Watcher} de los suscriptores de DISCOVERY_WATCH. Cada cambio de
+          membresía se les envía como DISCOVERY_EVENT si les interesa su rol; la suscripción
+          caduca si no se renueva en WATCH_LEASE segundos.
+        . bootstrap: DiscoveryBootstrap que decide a qué IPs se envían heartbeats a otros discovery
+          nodes (peers conocidos, semillas DFTP_DISCOVERY_SEEDS y anuncios multicast; la subred
+          completa solo en barridos de respaldo espaciados). El nodo se anuncia en el grupo
+          multicast en cada ciclo.
+        . sync_interval: segundos entre rondas de anti-entropía (DFTP_DISCOVERY_SYNC_INTERVAL; 0
+          la desactiva). En cada ronda se compara la tabla con la de un peer al azar por digest
+          {name: last_heartbeat} y cada lado recibe las entradas en las que el otro va por delante.
+          Así basta con que cada servicio envíe heartbeats a un solo discovery node: los
+          DISCOVERY_HEARTBEAT_ACK llevan "replicated" para que el servicio lo sepa (ver
+          DiscoveryBootstrap).
+        . expiry_wheel: TimerWheel con el próximo instante en que revisar cada nodo registrado (ver
+          clean_inactive_register_loop). Cada nodo tiene un detector phi-accrual (ver
+          ServiceRegister.detector): con phi >= PHI_SUSPECT se marca suspect en las respuestas de
+          consultas y en un evento update, y con phi >= PHI_EVICT (pasado heartbeat_timeout) o
+          max_silence segundos sin heartbeat se elimina.
 
     - Parámetros de configuración:
-        . heartbeat_timeout: tiempo máximo sin recibir heartbeat antes de considerar un nodo inactivo.
-        . clean_interval: frecuencia con la que se limpian los nodos inactivos de la tabla.
-        . discovery_interval: frecuencia con la que se escanea la subred en busca de otros discovery nodes.
+        . heartbeat_timeout: tiempo mínimo sin recibir heartbeat antes de eliminar un nodo; a partir de
+          ahí decide su phi (un nodo con heartbeats irregulares se conserva más tiempo).
+        . max_silence: tiempo sin heartbeat tras el que se elimina un nodo en cualquier caso
+          (DFTP_DISCOVERY_MAX_SILENCE, al menos heartbeat_timeout).
+        . discovery_interval: frecuencia con la que se envían heartbeats a otros discovery nodes.
         . discovery_timeout: tiempo máximo para esperar respuesta de un discovery node.
-        . discovery_workers: número de hilos para enviar señales de descubrimiento en paralelo.
 
     - Consultas Disponibles:
         . DISCOVERY_HEARTBEAT: para registrar/actualizar nodos en la tabla.
         . DISCOVERY_QUERY_BY_NAME: para obtener la ip de un nodo dado su nombre.
-        . DISCOVERY_QUERY_BY_ROLE: para obtener la lista de ips de nodos con un rol específico.
+        . DISCOVERY_QUERY_BY_ROLE: para obtener la lista de ips de nodos con un rol específico,
+          opcionalmente con su carga y ordenada por ella (ver discovery.load).
         . DISCOVERY_QUERY_ALL: para obtener todos los nodos registrados en la tabla.
+        . DISCOVERY_WATCH: suscribe a quien envía a los cambios de membresía de unos roles (ver
+          _handle_watch); los recibe como DISCOVERY_EVENT.
+        . DISCOVERY_SYNC / DISCOVERY_SYNC_PUSH: anti-entropía entre discovery nodes (ver _handle_sync).
 
     - Hilos Internos:
-        . _update_peers: escanea la subred en busca de otros discovery nodes y actualiza self.peers.
-        . clean_inactive_register_loop: limpia periódicamente los nodos inactivos de la tabla de registros.
+        . _update_peers: envía heartbeats a los destinos de bootstrap y actualiza self.peers.
+        . clean_inactive_register_loop: revisa los nodos que vencen en expiry_wheel; marca los sospechosos
+          y elimina los inactivos.
+        . _sync_loop: rondas de anti-entropía con los peers cada sync_interval.
 
     Para realizar una consulta a un Discovery Node enviar el Message correspondiente.
     """
 
-    def __init__(self, node_name: str, ip: str, port: int, heartbeat_timeout: int = 6, clean_interval: int = 3,
-        discovery_interval: int = 2, discovery_timeout: float = 0.8, discovery_workers: int = 32):
+    def __init__(self, node_name: str, ip: str, port: int, heartbeat_timeout: int = 6,
+        discovery_interval: int = 2, discovery_timeout: float = 0.8, sync_interval: float = None):
         super().__init__(node_name, ip, port)
 
         # Tabla de servicios registrados
@@ -62,13 +116,26 @@ class DiscoveryNode(CommunicationNode):
         # Parámetros de configuración
         self.discovery_interval = discovery_interval
         self.discovery_timeout = discovery_timeout
-        self.discovery_workers = discovery_workers
         self.heartbeat_timeout = heartbeat_timeout
-        self.clean_interval = clean_interval
+        self.max_silence = max(heartbeat_timeout, MAX_SILENCE)
+        self.sync_interval = SYNC_INTERVAL if sync_interval is None else sync_interval
 
         self.node_role = NodeType.DISCOVERY
 
-    # (no replication locks needed: DiscoveryNodes don't replicate state entre sí)
+        # Cambios de membresía y suscriptores de DISCOVERY_WATCH
+        self.membership_log = MembershipLog()
+        self.watchers: dict[tuple[str, int], Watcher] = {}
+        self.watchers_lock = threading.Lock()
+
+        # Próxima revisión de cada nodo registrado
+        self.expiry_wheel = TimerWheel(EXPIRY_TICK, now=time.time())
+
+        self.bootstrap = DiscoveryBootstrap(self, self.port, self.possible_ips, discovery_timeout, announcer=True,
+                                            heartbeat_mode="all")
+
+        # Métricas de la anti-entropía
+        self._sync_stats = {"rounds": 0, "failed": 0, "entries_in": 0, "entries_out": 0}
+        self._sync_lock = threading.Lock()
 
         # Registar funciones para manejar distintos tipos de mensajes recibidos.
         self.register_handlers()
@@ -84,6 +151,11 @@ class DiscoveryNode(CommunicationNode):
         t2 = threading.Thread(target=self.clean_inactive_register_loop, daemon=True)
         t2.start()
 
+        # Hilo de anti-entropía con los demás discovery nodes
+        if self.sync_interval > 0:
+            t3 = threading.Thread(target=self._sync_loop, daemon=True)
+            t3.start()
+
         logger.info("DiscoveryNode %s iniciado en %s:%s (subnet=%s)", self.node_name, self.ip, self.port, self.subnet)
 
     # ---------------- Helpers publicos ----------------
@@ -95,6 +167,9 @@ class DiscoveryNode(CommunicationNode):
         self.register_handler(MessageType.DISCOVERY_QUERY_BY_NAME, self._handle_query_by_name)
         self.register_handler(MessageType.DISCOVERY_QUERY_BY_ROLE, self._handle_query_by_role)
         self.register_handler(MessageType.DISCOVERY_QUERY_ALL, self._handle_query_all)
+        self.register_handler(MessageType.DISCOVERY_WATCH, self._handle_watch)
+        self.register_handler(MessageType.DISCOVERY_SYNC, self._handle_sync)
+        self.register_handler(MessageType.DISCOVERY_SYNC_PUSH, self._handle_sync_push)
 
     def get_possible_ips(self) -> list[str]:
         """Obtiene todas las posibles ips de hosts de la red exceptuando la ip propia para 
@@ -102,6 +177,21 @@ class DiscoveryNode(CommunicationNode):
         net = ipaddress.ip_network(self.subnet, strict=False)
         return [str(ip) for ip in net.hosts() if str(ip) != self.ip]
 
+    def get_node_stats(self) -> dict:
+        """Métricas de CommunicationNode más el estado del descubrimiento (ver DiscoveryBootstrap) y de la anti-entropía."""
+        stats = super().get_node_stats()
+        stats["discovery"] = self.bootstrap.get_stats()
+        with self._sync_lock:
+            stats["replication"] = {"interval": self.sync_interval, **self._sync_stats}
+        stats["expiry"] = {"scheduled": len(self.expiry_wheel),
+                           "suspects": sorted(n.name for n in self.register_table.get_all_nodes() if n.suspect)}
+        return stats
+
+    def stop_server(self):
+        self._stop.set()
+        self.bootstrap.close()
+        super().stop_server()
+
     # ---------------- Handlers obligatorios ----------------
     def _handle_heartbeat(self, message: Message):
         """Maneja DISCOVERY_HEARTBEAT:
@@ -109,8 +199,9 @@ class DiscoveryNode(CommunicationNode):
             . Retorna información de contacto del nodo actual para que otros nodos puedan intercambiar mensajes
             . Usado para descubrimiento por parte de otros nodos(incluidos otros Discovery Nodes)
 
-        Recibe Message(... payload: { name, ip, role })
-        Retorna Message(.. payload: { ip, name}) -> del nodo actual
+        Recibe Message(... payload: { name, ip, role, load? }) -> load: señales de carga del nodo (ver discovery.load)
+        Retorna Message(.. payload: { ip, name, peers }) -> del nodo actual, con los discovery nodes
+        que conoce (peers: [{name, ip}]) para que quien envía los pruebe sin barrer la subred
         """
         try:
             payload = message.payload or {}
@@ -119,6 +210,7 @@ class DiscoveryNode(CommunicationNode):
             name = payload.get("name")
             ip = payload.get("ip")
             role = payload.get("role")
+            load = payload.get("load") if isinstance(payload.get("load"), dict) else None
 
             # Manejar mensaje incorrecto
             if not name or not ip or not role:
@@ -133,28 +225,31 @@ class DiscoveryNode(CommunicationNode):
 
             # Si quien envía es un discovery node (role == 'DISCOVERY') lo tratamos como peer
             if node_role == NodeType.DISCOVERY:
-                return Message(type=MessageType.DISCOVERY_HEARTBEAT_ACK, src=self.ip, dst=message.header.get("src"), payload={"ip": self.ip, "name": self.node_name}, metadata = {"status": "OK"})
+                self._update_peers_list({name: ip})
+                self.bootstrap.add_candidate(ip)
+                return Message(type=MessageType.DISCOVERY_HEARTBEAT_ACK, src=self.ip, dst=message.header.get("src"), payload=self._heartbeat_ack_payload(), metadata = {"status": "OK"})
 
-            # Sino buscar nodo en la tabla
-            existing = self.register_table.get_node(name)
-            
-            # Si el nodo ya estaba registrado, actualizar ip y heartbeat
+            # Si el nodo ya estaba registrado, actualizar ip y heartbeat (cambió si se movió o era sospechoso)
+            existing, changed = self.register_table.heartbeat(name, ip, load)
             if existing:
-                existing.heartbeat(ip)
+                if changed:
+                    self._notify_membership_change(existing, UPDATE)
 
             # Si no, registrarlo
             else:
                 try:
-                    sr = ServiceRegister(name, ip, node_role)
+                    sr = ServiceRegister(name, ip, node_role, load=load)
                     self.register_table.add_node(sr)
+                    self._track(sr)
                     logger.info(f"New node registered: {name}, {str(node_role)} : ({ip})")
+                    self._notify_membership_change(sr, JOIN)
 
                 except Exception as e:
                     logger.exception("Error registrando nodo %s: %s", name, e)
                     return Message(type=MessageType.DISCOVERY_HEARTBEAT_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata = {"status": "ERROR", "error_msg": str(e)})
             
             # Retornar mensaje de éxito
-            return Message(type=MessageType.DISCOVERY_HEARTBEAT_ACK, src=self.ip, dst=message.header.get("src"), payload={"ip": self.ip, "name": self.node_name}, metadata = {"status": "OK"})
+            return Message(type=MessageType.DISCOVERY_HEARTBEAT_ACK, src=self.ip, dst=message.header.get("src"), payload=self._heartbeat_ack_payload(), metadata = {"status": "OK"})
 
         except Exception as e:
             logger.exception("Error en _handle_heartbeat: %s", e)
@@ -189,16 +284,19 @@ class DiscoveryNode(CommunicationNode):
     def _handle_query_by_role(self, message: Message):
         """ Maneja DISCOVERY_QUERY_BY_ROLE
         Recibe:
-            Message = ( ... payload : { "role": "<NODE_ROLE>" } ... )
+            Message = ( ... payload : { "role": "<NODE_ROLE>", "order"?: "table" | "least_loaded" | "weighted_random" } ... )
         Retorna:
-            Message = ( ... payload : { "nodes": [{"name": name1, "ip": ip1}, {"name": name2, "ip": ip2}, ...] } ... )"""
+            Message = ( ... payload : { "nodes": [{"name": name1, "ip": ip1}, {"name": name2, "ip": ip2}, ...] } ... )
+            Con order distinto de "table" cada nodo trae además su "load" y la lista va ordenada
+            según ella (ver discovery.load.rank_nodes)."""
         
         try:
             # Payload del mensaje recibido
             payload = message.payload or {}
             role = payload.get("role")
+            order = payload.get("order") or "table"
 
-            logger.debug(f"[{self.node_name}] : QUERY_BY_ROLE received from ({message.header.get('src')}) for {role}")
+            logger.debug("[%s] : QUERY_BY_ROLE received from (%s) for %s", self.node_name, message.header.get("src"), role)
 
             if not role:
                 return Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": "Missing role"})
@@ -210,15 +308,20 @@ class DiscoveryNode(CommunicationNode):
             except Exception:
                 return Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": "Invalid role"})
 
-            # Obtener nodos registrados con ese rol
-            nodes = self.register_table.get_nodes_by_role(node_role)
+            if order not in ORDERS:
+                return Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": "Invalid order"})
 
-            # Preparar respuesta
-            nodes_response = [ {"name": n.name, "ip": n.ip} for n in nodes ]
+            if order == "table":
+                # Respuesta precalculada del snapshot actual de la tabla (se reutiliza hasta el siguiente cambio)
+                nodes_response = self.register_table.snapshot().role_payload(node_role)
+            else:
+                # La carga cambia con cada heartbeat: esta respuesta se construye en cada consulta
+                nodes = [dict(n.brief(), load=n.load) for n in self.register_table.get_nodes_by_role(node_role)]
+                nodes_response = {"nodes": rank_nodes(nodes, order)}
 
-            logger.debug(f"[{self.node_name}] : QUERY_BY_ROLE returning : {nodes_response}")
+            logger.debug("[%s] : QUERY_BY_ROLE returning : %s", self.node_name, nodes_response)
 
-            return Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, src=self.ip, dst=message.header.get("src"), payload={"nodes": nodes_response}, metadata={"status": "OK"})
+            return Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE_ACK, src=self.ip, dst=message.header.get("src"), payload=nodes_response, metadata={"status": "OK"})
 
         except Exception as e:
             logger.info("Error en query_by_role: %s", e)            
@@ -239,30 +342,123 @@ class DiscoveryNode(CommunicationNode):
             logger.exception("Error en query_all: %s", e)
             return Message(type=MessageType.DISCOVERY_QUERY_ALL_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": str(e)})
 
-    # (replication/gossip removed) No handler for GOSSIP_UPDATE
+    def _handle_sync(self, message: Message):
+        """ Maneja DISCOVERY_SYNC (anti-entropía)
+        Compara el digest de quien envía con la tabla local.
+        Recibe:
+            Message = ( ... payload : { "digest": {name: last_heartbeat} } ... )
+        Retorna:
+            Message = ( ... payload : { "entries": [nodos en los que este nodo va por delante],
+                                        "want": [nombres en los que va por detrás o no tiene] } ... )"""
+
+        try:
+            digest = (message.payload or {}).get("digest") or {}
+            entries, want = self._diff_digest(digest)
+            with self._sync_lock:
+                self._sync_stats["entries_out"] += len(entries)
+
+            return Message(type=MessageType.DISCOVERY_SYNC_ACK, src=self.ip, dst=message.header.get("src"), payload={"entries": entries, "want": want}, metadata={"status": "OK"})
+
+        except Exception as e:
+            logger.exception("Error en _handle_sync: %s", e)
+            return Message(type=MessageType.DISCOVERY_SYNC_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": str(e)})
+
+    def _handle_sync_push(self, message: Message):
+        """ Maneja DISCOVERY_SYNC_PUSH: entradas pedidas en el "want" de un DISCOVERY_SYNC_ACK. No responde.
+        Recibe:
+            Message = ( ... payload : { "entries": [{name, ip, role, last_heartbeat}, ...] } ... )"""
+        try:
+            self._merge_entries((message.payload or {}).get("entries") or [])
+        except Exception as e:
+            logger.exception("Error en _handle_sync_push: %s", e)
+
+    def _heartbeat_ack_payload(self) -> dict:
+        """
+        Información de contacto del nodo actual y de los peers que respondieron recientemente.
+        replicated indica si este nodo replica su tabla con los peers, es decir, si al servicio le
+        basta con enviarle heartbeats solo a él.
+        """
+        known = self.bootstrap.known_ips()
+        with self.peers_lock:
+            peers = [{"name": n, "ip": ip} for n, ip in self.peers.items() if ip in known]
+        return {"ip": self.ip, "name": self.node_name, "peers": peers, "replicated": self.sync_interval > 0}
+
+    def _handle_watch(self, message: Message):
+        """ Maneja DISCOVERY_WATCH
+        Suscribe (o renueva la suscripción de) quien envía a los cambios de membresía de roles
+        durante WATCH_LEASE segundos. Cada cambio posterior le llega como DISCOVERY_EVENT
+        { epoch, revision, event: join|leave|update, node: {name, ip, role} } en el puerto indicado.
+        Con epoch y revision (los del último evento aplicado) retoma desde ahí: la respuesta trae
+        los eventos posteriores. Sin ellos, o si ya no están en el registro, trae un snapshot.
+        Recibe:
+            Message = ( ... payload : { "roles": [...], "port": p, "epoch"?: e, "revision"?: r } ... )
+        Retorna:
+            Message = ( ... payload : { "epoch", "revision", "lease", "events": [...] | "snapshot": {role: [nodes]} } ... )"""
+
+        try:
+            payload = message.payload or {}
+            src = message.header.get("src")
+            roles = {NodeType(r).value for r in payload.get("roles") or []}
+            port = payload.get("port")
+
+            if not src or not port or not roles:
+                return Message(type=MessageType.DISCOVERY_WATCH_ACK, src=self.ip, dst=src, payload={}, metadata={"status": "ERROR", "error_msg": "Missing roles or port"})
+
+            with self.watchers_lock:
+                self.watchers[(src, int(port))] = Watcher(roles, time.monotonic() + WATCH_LEASE)
+
+            # La revisión se lee antes que la tabla: un evento concurrente puede llegar también
+            # como DISCOVERY_EVENT, y aplicar dos veces un join/leave/update no cambia el resultado
+            log = self.membership_log
+            revision = log.revision
+            response = {"epoch": log.epoch, "revision": revision, "lease": WATCH_LEASE}
+
+            events = None
+            if payload.get("epoch") is not None and payload.get("revision") is not None:
+                events = log.since(payload["epoch"], int(payload["revision"]), roles)
+
+            if events is not None:
+                response["events"] = events
+                response["revision"] = max([revision] + [e["revision"] for e in events])
+            else:
+                response["snapshot"] = {role: [n.brief(role=True) for n in self.register_table.get_nodes_by_role(NodeType(role))]
+                                        for role in roles}
+
+            return Message(type=MessageType.DISCOVERY_WATCH_ACK, src=self.ip, dst=src, payload=response, metadata={"status": "OK"})
+
+        except Exception as e:
+            logger.exception("Error en _handle_watch: %s", e)
+            return Message(type=MessageType.DISCOVERY_WATCH_ACK, src=self.ip, dst=message.header.get("src"), payload={}, metadata={"status": "ERROR", "error_msg": str(e)})
+
+    def _notify_membership_change(self, node: ServiceRegister, event: str):
+        """Registra el cambio en membership_log y lo envía (sin esperar respuesta) a los watchers de su rol."""
+        entry = self.membership_log.append(event, node.brief(role=True))
+
+        now = time.monotonic()
+        by_port: dict[int, list[str]] = {}
+        with self.watchers_lock:
+            for key in [k for k, w in self.watchers.items() if w.expires < now]:
+                del self.watchers[key]
+            for (ip, port), watcher in self.watchers.items():
+                if node.node_role.value in watcher.roles:
+                    by_port.setdefault(port, []).append(ip)
+
+        msg = Message(type=MessageType.DISCOVERY_EVENT, src=self.ip, dst=None, payload=entry)
+        for port, ips in by_port.items():
+            self.multicast(ips, msg, port=port, await_response=False, timeout=self.discovery_timeout)
 
     # ---------------- Background loops ----------------
     def _update_peers(self):
-        """ Hilo que periódicamente envía señales a toda la subred buscando otros discovery nodes 
+        """ Hilo que periódicamente envía señales a los discovery nodes conocidos y a los destinos de
+           bootstrap, y anuncia este nodo en el grupo multicast
            . Actualiza lista de peers con los Discovery Nodes que respondan"""
 
         logger.info("%s: iniciando _update_peers", self.node_name)
         while not self._stop.is_set():
             try:
-                found = {}
-                # Envía señales a todas las ips de la red en paralelo
-                results = self._find_peers_in_parallel()
-
-                for _ , response in results:
-                    if not response:
-                        continue
-                    try:
-                        # Procesa la respuesta para convertirla en name , ip
-                        peer_name, peer_ip = self._process_peer_discovery_response(response)
-                        found[peer_name] = peer_ip
-
-                    except Exception:
-                        continue
+                found = self.bootstrap.heartbeat_round(self._build_peer_heartbeat)
+                self.bootstrap.announce()
+
                 # Actualiza peers si hubo cambios
                 self._update_peers_list(found)
 
@@ -273,67 +469,149 @@ class DiscoveryNode(CommunicationNode):
                 logger.exception(f"Error en _update_peers: {str(e)}")
                 time.sleep(self.discovery_interval)
 
+    def _sync_loop(self):
+        """ Hilo que cada sync_interval compara la tabla de registros con la de un peer al azar:
+            . Envía DISCOVERY_SYNC con el digest local y aplica las entradas más recientes de la respuesta
+            . Envía en DISCOVERY_SYNC_PUSH las entradas que el peer pidió
+           Con un peer por ronda un cambio llega a todos los discovery nodes en O(log n) rondas."""
+
+        logger.info("%s: iniciando _sync_loop", self.node_name)
+        while not self._stop.wait(self.sync_interval):
+            try:
+                peers = list(self.bootstrap.known_ips())
+                if peers:
+                    self._sync_with(random.choice(peers))
+
+            except Exception:
+                logger.exception("Error en _sync_loop")
+
     def clean_inactive_register_loop(self):
-        """ Hilo para limpiar nodos inactivos de la tabla de registros cada cierto tiempo."""
+        """ Hilo que cada EXPIRY_TICK segundos revisa solo los nodos que vencen en expiry_wheel (ver _check_expiry)."""
 
         logger.info("%s: iniciando clean_inactive_register_loop", self.node_name)
 
-        while not self._stop.is_set():
+        while not self._stop.wait(EXPIRY_TICK):
             try:
-                time.sleep(self.clean_interval)
-
-                # Determinar nodos inactivos
                 now = time.time()
-                dead = [n.name for n in self.register_table.get_all_nodes() if now - n.last_heartbeat > self.heartbeat_timeout]
-                
-                # Eliminarlos de la tabla
-                for name in dead:
-                    logger.info("%s: eliminando nodo inactivo %s", self.node_name, name)
-                    n = self.register_table.remove_node(name)
-            
+                for name in self.expiry_wheel.advance(now):
+                    self._check_expiry(name, now)
+
             except Exception:
                 logger.exception("Error en clean_inactive_register_loop")
-                time.sleep(self.clean_interval)
 
-    def _find_peers_in_parallel(self):
-        """ Envía señales en paralelo a toda la red para encontrar otros Discovery Nodes"""
-        max_workers = min(self.discovery_workers, max(1, len(self.possible_ips)))
-        results = []
+    def _track(self, node: ServiceRegister):
+        """Programa la primera revisión de un nodo recién registrado."""
+        self.expiry_wheel.schedule(node.name, node.last_heartbeat + node.detector.elapsed_for(PHI_SUSPECT))
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = [ex.submit(self._probe_send_heartbeat, ip) for ip in self.possible_ips]
-            for fut in concurrent.futures.as_completed(futures):
-                try:
-                    res = fut.result(timeout=self.discovery_timeout + 0.5)
-                except Exception:
-                        res = (None, None)
-                results.append(res)
+    def _check_expiry(self, name: str, now: float):
+        """
+        Revisa un nodo vencido en expiry_wheel: lo elimina si está inactivo, actualiza su marca de
+        sospecha y lo vuelve a programar para el siguiente umbral que puede cruzar (sospecha,
+        eliminación o max_silence) contando desde su último heartbeat.
+        """
+        node = self.register_table.get_node(name)
+        if node is None:
+            return
+
+        last = node.last_heartbeat
+        elapsed = now - last
+        phi = node.detector.phi(elapsed)
+
+        if elapsed >= self.max_silence or (elapsed >= self.heartbeat_timeout and phi >= PHI_EVICT):
+            logger.info("%s: eliminando nodo inactivo %s (%.1fs sin heartbeat, phi=%.1f)", self.node_name, name, elapsed, phi)
+            removed = self.register_table.remove_node(name)
+            if removed:
+                self._notify_membership_change(removed, LEAVE)
+            return
+
+        suspect = phi >= PHI_SUSPECT
+        if suspect != node.suspect:
+            updated = self.register_table.set_suspect(name, suspect)
+            if updated:
+                logger.info("%s: nodo %s %s (phi=%.1f)", self.node_name, name, "sospechoso" if suspect else "ya no es sospechoso", phi)
+                self._notify_membership_change(updated, UPDATE)
+
+        thresholds = [last + self.max_silence, last + max(self.heartbeat_timeout, node.detector.elapsed_for(PHI_EVICT))]
+        if not suspect:
+            thresholds.append(last + node.detector.elapsed_for(PHI_SUSPECT))
+        upcoming = [t for t in thresholds if t > now]
+        self.expiry_wheel.schedule(name, min(upcoming) if upcoming else now + EXPIRY_TICK)
+
+    def _build_peer_heartbeat(self, ip_addr: str) -> Message:
+        """ DISCOVERY_HEARTBEAT de este discovery node para ip_addr"""
+        return Message(type=MessageType.DISCOVERY_HEARTBEAT, src=self.ip, dst=ip_addr, payload={"name": self.node_name, "ip": self.ip, "role": "DISCOVERY"})
+
+    def _sync_with(self, peer_ip: str):
+        """Ronda de anti-entropía con peer_ip (ver _sync_loop)."""
+        msg = Message(type=MessageType.DISCOVERY_SYNC, src=self.ip, dst=peer_ip, payload={"digest": self.register_table.digest()})
+        response = self.send_message(peer_ip, self.port, msg, await_response=True, timeout=self.discovery_timeout)
+
+        with self._sync_lock:
+            self._sync_stats["rounds"] += 1
+            if not response or response.metadata.get("status") != "OK":
+                self._sync_stats["failed"] += 1
+                return
+
+        payload = response.payload or {}
+        self._merge_entries(payload.get("entries") or [])
+
+        want = set(payload.get("want") or [])
+        if want:
+            entries = [n.to_dict() for n in self.register_table.get_all_nodes() if n.name in want]
+            with self._sync_lock:
+                self._sync_stats["entries_out"] += len(entries)
+            push = Message(type=MessageType.DISCOVERY_SYNC_PUSH, src=self.ip, dst=peer_ip, payload={"entries": entries})
+            self.send_message(peer_ip, self.port, push, await_response=False, timeout=self.discovery_timeout)
+
+    def _diff_digest(self, digest: dict) -> tuple[list[dict], list[str]]:
+        """Entradas locales más recientes que las de digest y nombres de digest más recientes que los locales."""
+        local = {n.name: n for n in self.register_table.get_all_nodes()}
+        entries = [n.to_dict() for name, n in local.items() if n.last_heartbeat > digest.get(name, float("-inf"))]
+        want = [name for name, version in digest.items() if name not in local or local[name].last_heartbeat < version]
+        return entries, want
+
+    def _merge_entries(self, entries: list[dict]) -> int:
+        """
+        Aplica entradas replicadas de otro discovery node y notifica los joins, cambios de IP y
+        cambios de rol (leave del rol anterior y join del nuevo).
+        Las de nodos que no están en la tabla se descartan si ya pasó heartbeat_timeout desde su
+        último heartbeat: de lo contrario un nodo que este discovery ya eliminó volvería desde un
+        peer que aún no lo hizo. Retorna cuántas se aplicaron.
+        """
+        now = time.time()
+        applied = 0
+        for data in entries:
+            try:
+                node = ServiceRegister.from_dict(data)
+                if node.node_role == NodeType.DISCOVERY:
+                    continue
+                if now - node.last_heartbeat > self.heartbeat_timeout and self.register_table.get_node(node.name) is None:
+                    continue
 
-        return results
+                changed, events = self.register_table.merge(node)
+
+            except Exception as e:
+                logger.debug("%s: entrada replicada descartada %s: %s", self.node_name, data, e)
+                continue
+
+            if changed:
+                applied += 1
+            for event, current in events:
+                if event == LEAVE:
+                    logger.info("%s: nodo %s cambió de rol %s -> %s en un peer", self.node_name, node.name,
+                                current.node_role.value, node.node_role.value)
+                elif event == JOIN and len(events) == 1:
+                    logger.info("%s: nodo %s (%s) replicado desde un peer", self.node_name, node.name, node.ip)
+                    self._track(current)
+                self._notify_membership_change(current, event)
+
+        with self._sync_lock:
+            self._sync_stats["entries_in"] += applied
+        return applied
 
-    def _probe_send_heartbeat(self, ip_addr: str):
-        """ Envía un DISCOVERY_HEARTBEAT a ip_addr; devuelve (ip, response)"""
-        try:
-            msg = Message(type=MessageType.DISCOVERY_HEARTBEAT, src=self.ip, dst=ip_addr, payload={"name": self.node_name, "ip": self.ip, "role": "DISCOVERY"})
-            resp = self.send_message(ip_addr, self.port, msg, await_response=True, timeout=self.discovery_timeout)
-            return ip_addr, resp
-        except Exception:
-            return ip_addr, None
-
-    def _process_peer_discovery_response(self, response: Message): 
-        """ Obtiene el nombre y direccion ip de un peer de una respuesta de heartbeat"""
-        if response.header.get("type") == MessageType.DISCOVERY_HEARTBEAT_ACK and response.metadata.get("status") == "OK":
-            peer_name = response.payload.get("name")
-            peer_ip = response.payload.get("ip")
-
-            if peer_name and peer_ip:
-                return peer_name, peer_ip
-            
-        raise Exception("Invalid heartbeat response")
-    
     def _update_peers_list(self, discovered_peers: dict):
-        """ Actualiza la lista de peers si hay cambios. No se realizan merges/replicaciones,
-            cada nodo se registra en todos los DiscoveryNodes así que el estado converge por inscripción directa."""
+        """ Actualiza la lista de peers si hay cambios. Las tablas de registros convergen por
+            anti-entropía entre peers (ver _sync_loop)."""
         new_peers = {}
         with self.peers_lock:
             for peer_name, peer_ip in discovered_peers.items():
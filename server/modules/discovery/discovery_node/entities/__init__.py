@@ -1,12 +1,24 @@
-__all__ = ["RegisterTable", "ServiceRegister", "NodeType"]
+__all__ = ["RegisterTable", "TableSnapshot", "ServiceRegister", "NodeType", "MembershipLog", "PhiAccrualDetector", "TimerWheel"]
 
 def __getattr__(name: str):
 	if name == "RegisterTable":
 		from .register_table import RegisterTable
 		return RegisterTable
+	if name == "TableSnapshot":
+		from .register_table import TableSnapshot
+		return TableSnapshot
 	if name == "ServiceRegister":
 		from .register_table import ServiceRegister
 		return ServiceRegister
+	if name == "MembershipLog":
+		from .membership_log import MembershipLog
+		return MembershipLog
+	if name == "PhiAccrualDetector":
+		from .failure_detector import PhiAccrualDetector
+		return PhiAccrualDetector
+	if name == "TimerWheel":
+		from .timer_wheel import TimerWheel
+		return TimerWheel
 	if name == "NodeType":
 		from .service_register import NodeType
 		return NodeType
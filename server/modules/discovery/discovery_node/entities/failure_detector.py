@@ -0,0 +1,120 @@
+import math
+import os
+import threading
+from collections import deque
+from functools import lru_cache
+
+# Intervalos entre heartbeats que se recuerdan por nodo
+WINDOW = int(os.getenv("DFTP_DISCOVERY_PHI_WINDOW", "100"))
+
+# Desviación mínima (s): con heartbeats muy regulares evita que un retraso pequeño dispare phi
+MIN_STD = float(os.getenv("DFTP_DISCOVERY_PHI_MIN_STD", "0.5"))
+
+# Pausa aceptable (s) que se suma a la media: cubre el retraso con que llegan los heartbeats
+# replicados desde otro discovery node
+PAUSE = float(os.getenv("DFTP_DISCOVERY_PHI_PAUSE", "1"))
+
+# Intervalo supuesto (s) mientras un nodo aún no tiene historial
+FIRST_INTERVAL = float(os.getenv("DFTP_DISCOVERY_PHI_FIRST", "2"))
+
+# Niveles de sospecha: a partir de PHI_SUSPECT el nodo se marca sospechoso en las consultas y a
+# partir de PHI_EVICT se elimina de la tabla
+PHI_SUSPECT = float(os.getenv("DFTP_DISCOVERY_PHI_SUSPECT", "3"))
+PHI_EVICT = float(os.getenv("DFTP_DISCOVERY_PHI_EVICT", "8"))
+
+# Intervalos menores se ignoran (heartbeats duplicados o replicados casi a la vez)
+_MIN_INTERVAL = 0.01
+
+# phi se acota para que siga siendo serializable aunque el nodo lleve mucho tiempo callado
+_PHI_MAX = 100.0
+
+
+def phi_of(y: float) -> float:
+    """phi para un retraso de y desviaciones sobre la media (aproximación logística de la normal)."""
+    z = -y * (1.5976 + 0.070566 * y * y)
+    if z > 700:
+        return 0.0
+    if z < -700:
+        return _PHI_MAX
+    e = math.exp(z)
+    if y > 0:
+        return min(_PHI_MAX, -math.log10(e / (1.0 + e)))
+    return -math.log10(1.0 - 1.0 / (1.0 + e))
+
+
+@lru_cache(maxsize=16)
+def deviations_for(threshold: float) -> float:
+    """Desviaciones sobre la media a partir de las cuales phi alcanza threshold (phi es creciente)."""
+    low, high = -10.0, 40.0
+    for _ in range(60):
+        mid = (low + high) / 2
+        if phi_of(mid) < threshold:
+            low = mid
+        else:
+            high = mid
+    return high
+
+
+class PhiAccrualDetector:
+    """
+    Detector de fallos phi-accrual de un nodo registrado.
+
+    Guarda los últimos WINDOW intervalos entre heartbeats (según last_heartbeat, así que sirven
+    igual los recibidos directamente que los replicados) y convierte el tiempo sin heartbeat en
+    un nivel de sospecha phi: phi = k significa que la probabilidad de que el heartbeat aún llegue
+    es 10^-k. Un nodo con heartbeats irregulares (p. ej. cargado) tarda más en ser sospechoso que
+    uno regular.
+
+    Métodos públicos:
+        . record(timestamp) -> registra un heartbeat con ese last_heartbeat.
+        . phi(elapsed) -> nivel de sospecha tras elapsed segundos sin heartbeat.
+        . elapsed_for(threshold) -> segundos sin heartbeat a partir de los cuales phi >= threshold.
+        . get_stats() -> media, desviación y muestras.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self._intervals: deque[float] = deque()
+        self._window = window
+        self._sum = 0.0
+        self._squares = 0.0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def record(self, timestamp: float):
+        with self._lock:
+            if self._last is not None and timestamp - self._last >= _MIN_INTERVAL:
+                interval = timestamp - self._last
+                if len(self._intervals) >= self._window:
+                    old = self._intervals.popleft()
+                    self._sum -= old
+                    self._squares -= old * old
+                self._intervals.append(interval)
+                self._sum += interval
+                self._squares += interval * interval
+
+            if self._last is None or timestamp > self._last:
+                self._last = timestamp
+
+    def phi(self, elapsed: float) -> float:
+        mean, std = self._distribution()
+        return phi_of((elapsed - mean) / std)
+
+    def elapsed_for(self, threshold: float) -> float:
+        mean, std = self._distribution()
+        return mean + deviations_for(threshold) * std
+
+    def get_stats(self) -> dict:
+        mean, std = self._distribution()
+        return {"mean": mean - PAUSE, "std": std, "samples": len(self._intervals)}
+
+    # ---------------- Métodos internos ----------------
+    def _distribution(self) -> tuple[float, float]:
+        """Media (con PAUSE) y desviación (al menos MIN_STD) de los intervalos."""
+        with self._lock:
+            n = len(self._intervals)
+            if n == 0:
+                mean, std = FIRST_INTERVAL, FIRST_INTERVAL / 4
+            else:
+                mean = self._sum / n
+                std = math.sqrt(max(0.0, self._squares / n - mean * mean))
+        return mean + PAUSE, max(std, MIN_STD)
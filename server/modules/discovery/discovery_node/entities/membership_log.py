@@ -0,0 +1,51 @@
+import os
+import threading
+import uuid
+from collections import deque
+
+DEFAULT_CAPACITY = int(os.getenv("DFTP_DISCOVERY_EVENT_LOG", "1024"))
+
+JOIN = "join"
+LEAVE = "leave"
+UPDATE = "update"
+
+
+class MembershipLog:
+    """
+    Registro en memoria de los cambios de membresía de un DiscoveryNode.
+
+    Cada cambio (join, leave, update) recibe una revisión creciente. Los suscriptores de
+    DISCOVERY_WATCH reciben los eventos según ocurren y, al reconectar, piden los posteriores a la
+    última revisión que aplicaron. Solo se guardan los últimos capacity eventos: quien pide una
+    revisión más antigua (o de otra epoch, p. ej. tras reiniciar el nodo) necesita un snapshot.
+
+    .Campos:
+        . epoch : identificador de esta instancia del registro; cambia en cada arranque.
+        . revision : revisión del último evento registrado (0 si no hubo ninguno).
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.epoch = uuid.uuid4().hex[:12]
+        self.revision = 0
+        self._events: deque[dict] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def append(self, event: str, node: dict) -> dict:
+        """Registra un evento sobre node (dict con name, ip, role) y lo retorna con su revisión."""
+        with self._lock:
+            self.revision += 1
+            entry = {"epoch": self.epoch, "revision": self.revision, "event": event, "node": node}
+            self._events.append(entry)
+            return entry
+
+    def since(self, epoch: str, revision: int, roles: set[str]) -> list[dict] | None:
+        """
+        Eventos de roles posteriores a revision, o None si no pueden reconstruirse (otra epoch o
+        eventos ya descartados) y el suscriptor necesita un snapshot.
+        """
+        with self._lock:
+            if epoch != self.epoch or revision > self.revision:
+                return None
+            oldest = self._events[0]["revision"] if self._events else self.revision + 1
+            if revision + 1 < oldest:
+                return None
+            return [e for e in self._events if e["revision"] > revision and e["node"].get("role") in roles]
@@ -1,16 +1,60 @@
 import threading
-import time
-from server.modules.discovery.discovery_node.entities.service_register import ServiceRegister, NodeType  
+from types import MappingProxyType
+from server.modules.comm.message.codec import EncodedPayload
+from server.modules.discovery.discovery_node.entities.service_register import ServiceRegister, NodeType
+from server.modules.discovery.discovery_node.entities.membership_log import JOIN, LEAVE, UPDATE
+
+
+class TableSnapshot:
+    """
+    Estado de la tabla en una revisión. No se modifica nunca: cada cambio de membresía (alta, baja,
+    cambio de IP, de rol o de sospecha) publica un snapshot nuevo, así que los lectores lo usan sin
+    lock. Los heartbeats que no cambian la IP solo actualizan last_heartbeat en su ServiceRegister.
+
+    .Campos:
+        . revision : número de cambios de membresía aplicados a la tabla.
+        . nodes : {name: ServiceRegister} de solo lectura.
+        . by_role : {NodeType: tuple[ServiceRegister]} índice por rol.
+    """
+    __slots__ = ("revision", "nodes", "by_role", "_role_payloads")
+
+    def __init__(self, revision: int, nodes: dict, by_role: dict):
+        self.revision = revision
+        self.nodes = MappingProxyType(nodes)
+        self.by_role = MappingProxyType(by_role)
+        self._role_payloads: dict[NodeType, EncodedPayload] = {}
+
+    def role_payload(self, node_role: NodeType) -> EncodedPayload:
+        """
+        Payload de DISCOVERY_QUERY_BY_ROLE_ACK ({"nodes": [{name, ip, suspect?}, ...]}) para node_role. Se
+        calcula la primera vez y se reutiliza (también su JSON) hasta el siguiente snapshot.
+        """
+        payload = self._role_payloads.get(node_role)
+        if payload is None:
+            payload = EncodedPayload(nodes=[n.brief() for n in self.by_role.get(node_role, ())])
+            self._role_payloads[node_role] = payload
+        return payload
+
 
 class RegisterTable:
     """
     Tabla de nodos registrados en memoria.
     Garantiza thread-safety y evita duplicados por nombre o IP.
+
+    Las escrituras se serializan con un lock y publican un TableSnapshot nuevo (copy-on-write); las
+    lecturas (get_node, get_nodes_by_role, snapshot) no toman el lock y cuestan O(resultado).
+    Los ServiceRegister publicados no cambian de nombre, IP, rol ni sospecha: un cambio los
+    reemplaza por uno nuevo que conserva su detector de fallos y su carga. La carga sí cambia en
+    sitio con cada heartbeat, por eso no entra en las respuestas precalculadas del snapshot.
+
+    Entre discovery nodes la tabla se replica por anti-entropía: last_heartbeat hace de versión de
+    cada entrada, digest() resume la tabla como {name: versión} y merge() aplica una entrada de
+    otro discovery node solo si es más reciente que la local.
     """
     def __init__(self):
-        self._nodes: dict[str, ServiceRegister] = {}  
-        self._ips: set[str] = set()                  
-        self._lock = threading.Lock()                 # Lock para concurrencia
+        self._snapshot = TableSnapshot(0, {}, {})
+        self._ips: set[str] = set()
+        self._lock = threading.Lock()                 # Lock para escrituras
 
     def _validate_node_role(self, node: ServiceRegister):
         """Valida que el tipo del nodo sea un NodeType válido."""
@@ -20,57 +64,165 @@ class RegisterTable:
                 f"Expected one of: {[t.value for t in NodeType]}"
             )
 
+    @property
+    def revision(self) -> int:
+        return self._snapshot.revision
+
+    def snapshot(self) -> TableSnapshot:
+        """Snapshot actual de la tabla (inmutable)."""
+        return self._snapshot
+
     def add_node(self, node: ServiceRegister):
         """Agrega o actualiza un nodo en el registro, evitando duplicados por IP."""
         with self._lock:
             self._validate_node_role(node)
 
-            existing_node = self._nodes.get(node.name)
+            existing_node = self._snapshot.nodes.get(node.name)
 
             # Nodo ya existe, actualizamos su IP y tipo si cambió
             if existing_node:
+                if existing_node.ip == node.ip and existing_node.node_role == node.node_role and not existing_node.suspect:
+                    existing_node.heartbeat()
+                    return
 
-                if existing_node.ip != node.ip:
-                    
-                    if node.ip in self._ips:
-                        raise ValueError(f"Node IP '{node.ip}' already exists")
-                    
-                    self._ips.discard(existing_node.ip)
-                    self._ips.add(node.ip)
-
-                existing_node.ip = node.ip
-                existing_node.node_role = node.node_role
-                existing_node.last_heartbeat = time.time()
+                replacement = self._derive(existing_node, ip=node.ip, node_role=node.node_role)
+                replacement.heartbeat()
+                self._replace(existing_node, replacement)
 
             # Nodo nuevo, registralo
             else:
                 if node.ip in self._ips:
                     raise ValueError(f"Node IP '{node.ip}' already exists")
-                
-                self._nodes[node.name] = node
+
+                self._publish(upsert=node)
                 self._ips.add(node.ip)
 
+    def heartbeat(self, name: str, ip: str, load: dict = None) -> tuple[ServiceRegister | None, bool]:
+        """
+        Registra un heartbeat de name desde ip con sus señales de carga (si las trae). Retorna (nodo, cambiado): nodo es None si name no
+        está registrado y cambiado indica si cambió su IP o dejó de ser sospechoso (el nodo
+        retornado es entonces el reemplazo).
+        """
+        node = self._snapshot.nodes.get(name)
+        if node is None:
+            return None, False
+        if node.ip == ip and not node.suspect:
+            node.heartbeat(load=load)
+            return node, False
+
+        with self._lock:
+            existing = self._snapshot.nodes.get(name)
+            if existing is None:
+                return None, False
+            replacement = self._derive(existing, ip=ip)
+            replacement.heartbeat(load=load)
+            self._replace(existing, replacement)
+            return replacement, True
+
+    def set_suspect(self, name: str, suspect: bool) -> ServiceRegister | None:
+        """Marca (o desmarca) name como sospechoso. Retorna el reemplazo publicado, o None si no hubo cambio."""
+        with self._lock:
+            existing = self._snapshot.nodes.get(name)
+            if existing is None or existing.suspect == suspect:
+                return None
+            replacement = self._derive(existing, suspect=suspect)
+            self._replace(existing, replacement)
+            return replacement
 
     def remove_node(self, name: str) -> ServiceRegister:
         """Elimina un nodo del registro por su nombre."""
         with self._lock:
-            node = self._nodes.pop(name, None)
+            node = self._snapshot.nodes.get(name)
             if node:
+                self._publish(remove=node)
                 self._ips.discard(node.ip)
 
             return node
 
+    def merge(self, node: ServiceRegister) -> tuple[bool, list[tuple[str, ServiceRegister]]]:
+        """
+        Aplica una entrada replicada desde otro discovery node si su last_heartbeat es más reciente
+        que el de la local (o no hay local). Retorna (aplicada, eventos), con los eventos de
+        membresía a notificar como (evento, nodo):
+            . [(join, nuevo)] si el nodo no estaba.
+            . [(leave, anterior), (join, nuevo)] si cambió su rol: quien vigila el rol anterior
+              debe quitarlo de su lista y quien vigila el nuevo, añadirlo.
+            . [(update, nuevo)] si cambió su IP o dejó de ser sospechoso.
+            . [] si solo avanzó el heartbeat.
+        Lanza ValueError si la IP ya pertenece a otro nodo.
+        """
+        with self._lock:
+            self._validate_node_role(node)
+            existing = self._snapshot.nodes.get(node.name)
+
+            if existing is None:
+                if node.ip in self._ips:
+                    raise ValueError(f"Node IP '{node.ip}' already exists")
+                self._publish(upsert=node)
+                self._ips.add(node.ip)
+                return True, [(JOIN, node)]
+
+            if node.last_heartbeat <= existing.last_heartbeat:
+                return False, []
+
+            if existing.ip == node.ip and existing.node_role == node.node_role and not existing.suspect:
+                existing.heartbeat(node.last_heartbeat, load=node.load)
+                return True, []
+
+            replacement = self._derive(existing, ip=node.ip, node_role=node.node_role)
+            replacement.heartbeat(node.last_heartbeat, load=node.load)
+            self._replace(existing, replacement)
+            if existing.node_role != node.node_role:
+                return True, [(LEAVE, existing), (JOIN, replacement)]
+            return True, [(UPDATE, replacement)] if existing.ip != node.ip or existing.suspect else []
+
+    def digest(self) -> dict[str, float]:
+        """Resumen {name: last_heartbeat} de la tabla para compararla con la de otro discovery node."""
+        return {name: node.last_heartbeat for name, node in self._snapshot.nodes.items()}
+
     def get_node(self, name: str) -> ServiceRegister | None:
         """Devuelve el nodo con el nombre dado, o None si no existe."""
-        with self._lock:
-            return self._nodes.get(name)
+        return self._snapshot.nodes.get(name)
 
-    def get_nodes_by_role(self, node_role: NodeType) -> list[ServiceRegister]:
+    def get_nodes_by_role(self, node_role: NodeType) -> tuple[ServiceRegister, ...]:
         """Devuelve todos los nodos de un tipo específico."""
-        with self._lock:
-            return [node for node in self._nodes.values() if node.node_role == node_role]
+        return self._snapshot.by_role.get(node_role, ())
 
     def get_all_nodes(self) -> list[ServiceRegister]:
         """Devuelve todos los nodos registrados."""
-        with self._lock:
-            return list(self._nodes.values())
+        return list(self._snapshot.nodes.values())
+
+    # ---------------- Métodos internos (con self._lock tomado) ----------------
+    def _derive(self, existing: ServiceRegister, ip: str = None, node_role: NodeType = None, suspect: bool = False) -> ServiceRegister:
+        """Reemplazo de existing con los cambios dados, el mismo last_heartbeat, detector y carga."""
+        return ServiceRegister(existing.name, ip or existing.ip, node_role or existing.node_role, existing.last_heartbeat,
+                               detector=existing.detector, suspect=suspect, load=existing.load)
+
+    def _replace(self, existing: ServiceRegister, node: ServiceRegister):
+        """Publica node en lugar de existing (mismo nombre), actualizando las IPs ocupadas."""
+        if existing.ip != node.ip:
+            if node.ip in self._ips:
+                raise ValueError(f"Node IP '{node.ip}' already exists")
+            self._ips.discard(existing.ip)
+            self._ips.add(node.ip)
+        self._publish(upsert=node, remove=existing)
+
+    def _publish(self, upsert: ServiceRegister = None, remove: ServiceRegister = None):
+        """
+        Publica el snapshot siguiente con upsert añadido y remove quitado. Solo se reconstruyen las
+        tuplas de los roles afectados; las demás se comparten con el snapshot anterior.
+        """
+        current = self._snapshot
+        nodes = dict(current.nodes)
+        by_role = dict(current.by_role)
+
+        if remove is not None:
+            nodes.pop(remove.name, None)
+            by_role[remove.node_role] = tuple(n for n in by_role.get(remove.node_role, ()) if n.name != remove.name)
+
+        if upsert is not None:
+            nodes[upsert.name] = upsert
+            others = tuple(n for n in by_role.get(upsert.node_role, ()) if n.name != upsert.name)
+            by_role[upsert.node_role] = others + (upsert,)
+
+        self._snapshot = TableSnapshot(current.revision + 1, nodes, by_role)
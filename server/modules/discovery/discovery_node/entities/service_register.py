@@ -1,5 +1,6 @@
 import time
 from enum import Enum
+from server.modules.discovery.discovery_node.entities.failure_detector import PhiAccrualDetector
 
 class NodeType(Enum):
     ROUTING = "ROUTING"
@@ -16,21 +17,51 @@ class ServiceRegister:
         . name : identificador único del nodo.
         . ip   : dirección ip del nodo
         . node_role : rol del nodo
-        . last_heartbeat : última señal enviada por el nodo
+        . last_heartbeat : última señal enviada por el nodo; es también la versión de la entrada
+          al replicarla entre discovery nodes (gana la más reciente)
+        . detector : PhiAccrualDetector con el historial de heartbeats del nodo
+        . suspect : si el nivel de sospecha phi del nodo superó PHI_SUSPECT (lo decide el
+          DiscoveryNode; se incluye en las respuestas para que se evite el nodo)
+        . load : últimas señales de carga que trajo un heartbeat del nodo (ver discovery.load). No
+          forma parte del snapshot: cada heartbeat la reemplaza en sitio
 
     """
-    def __init__(self, name: str, ip: str, node_role: NodeType, last_heartbeat = None):
+    def __init__(self, name: str, ip: str, node_role: NodeType, last_heartbeat = None,
+                 detector: PhiAccrualDetector = None, suspect: bool = False, load: dict = None):
         self.name = name
         self.ip = ip
         self.node_role = node_role
         self.last_heartbeat = last_heartbeat or time.time()
+        self.suspect = suspect
+        self.load = load or {}
+        self.detector = detector or PhiAccrualDetector()
+        if detector is None:
+            self.detector.record(self.last_heartbeat)
 
-    def heartbeat(self, ip):
+    def heartbeat(self, timestamp: float = None, load: dict = None):
         """
-        Actualiza el timestamp del último heartbeat recibido.
+        Actualiza el timestamp del último heartbeat recibido (ahora si no se indica) y lo
+        registra en el detector. Nunca retrocede. Si se indica load, reemplaza la carga del nodo.
         """
-        self.ip = ip
-        self.last_heartbeat = time.time()
+        timestamp = timestamp or time.time()
+        self.detector.record(timestamp)
+        if timestamp > self.last_heartbeat:
+            self.last_heartbeat = timestamp
+        if load is not None:
+            self.load = load
+
+    def phi(self, now: float = None) -> float:
+        """Nivel de sospecha phi del nodo según el tiempo transcurrido desde su último heartbeat."""
+        return self.detector.phi((now or time.time()) - self.last_heartbeat)
+
+    def brief(self, role: bool = False) -> dict:
+        """{name, ip} (y role si se pide) para respuestas de consultas y eventos; suspect solo si lo es."""
+        data = {"name": self.name, "ip": self.ip}
+        if role:
+            data["role"] = self.node_role.value
+        if self.suspect:
+            data["suspect"] = True
+        return data
 
     def to_dict(self) -> dict:
         """
@@ -40,12 +71,15 @@ class ServiceRegister:
             "name": self.name,
             "ip": self.ip,
             "role": self.node_role.value,
-            "last_heartbeat": self.last_heartbeat
+            "last_heartbeat": self.last_heartbeat,
+            "suspect": self.suspect,
+            "phi": round(self.phi(), 2),
+            "load": self.load
         }
     
     @classmethod
     def from_dict(cls, data: dict) -> 'ServiceRegister':
-        service_register = cls(name=data["name"], ip=data["ip"], node_role = NodeType(data["role"]), last_heartbeat= data.get("last_heartbeat", time.time()))
+        service_register = cls(name=data["name"], ip=data["ip"], node_role = NodeType(data["role"]), last_heartbeat= data.get("last_heartbeat", time.time()), load=data.get("load"))
         return service_register
 
     def __str__(self):
@@ -0,0 +1,65 @@
+import math
+import os
+import threading
+
+DEFAULT_SLOTS = int(os.getenv("DFTP_DISCOVERY_WHEEL_SLOTS", "512"))
+
+
+class TimerWheel:
+    """
+    Rueda de temporizadores (hashed timing wheel) para vencimientos por clave.
+
+    El tiempo se divide en ticks de tick segundos y cada tick cae en uno de slots casilleros. Al
+    avanzar solo se revisan los casilleros de los ticks transcurridos, así que el coste es el de las
+    claves que vencen (más las que comparten casillero con otra vuelta), no el del total.
+    Reprogramar una clave no la busca en la rueda: la entrada anterior queda y se descarta al
+    llegar a su casillero.
+
+    Métodos públicos:
+        . schedule(key, deadline) -> programa (o reprograma) key para deadline.
+        . cancel(key) -> olvida key.
+        . advance(now) -> claves cuyo deadline es <= now; dejan de estar programadas.
+        . __len__ -> claves programadas.
+    """
+
+    def __init__(self, tick: float, slots: int = DEFAULT_SLOTS, now: float = 0.0):
+        if tick <= 0:
+            raise ValueError("tick must be positive")
+        self.tick = tick
+        self._slots: list[dict] = [{} for _ in range(slots)]
+        self._deadlines: dict = {}
+        self._cursor = int(now // tick)
+        self._lock = threading.Lock()
+
+    def schedule(self, key, deadline: float):
+        with self._lock:
+            self._deadlines[key] = deadline
+            # Primer tick en o después de deadline, y nunca uno ya revisado: vencería una vuelta tarde
+            index = max(math.ceil(deadline / self.tick), self._cursor + 1)
+            self._slots[index % len(self._slots)][key] = deadline
+
+    def cancel(self, key):
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def advance(self, now: float) -> list:
+        due = []
+        with self._lock:
+            target = int(now // self.tick)
+            # Tras una pausa de más de una vuelta basta con revisar cada casillero una vez
+            first = max(self._cursor + 1, target - len(self._slots) + 1)
+            for index in range(first, target + 1):
+                slot = self._slots[index % len(self._slots)]
+                for key, deadline in list(slot.items()):
+                    if self._deadlines.get(key) != deadline:
+                        del slot[key]
+                    elif deadline <= now:
+                        del slot[key]
+                        del self._deadlines[key]
+                        due.append(key)
+            self._cursor = max(self._cursor, target)
+        return due
+
+    def __len__(self):
+        with self._lock:
+            return len(self._deadlines)
@@ -0,0 +1,67 @@
+"""
+Señales de carga de los nodos y orden de los resultados de QUERY_BY_ROLE según ellas.
+
+Cada heartbeat lleva en "load" las señales del nodo (ver LocationNode.get_load):
+    . queue: mensajes en los handlers del nodo (en cola o ejecutándose).
+    . inflight: transferencias de datos en curso.
+    . latency_ms: latencia reciente de los mensajes que atiende (media exponencial).
+    . sessions: sesiones FTP activas (RoutingNode).
+    . disk_free: bytes libres en el almacenamiento (DataNode).
+
+load_score las resume en un número (más alto = más cargado) y rank_nodes ordena una lista de
+nodos ({name, ip, load, suspect?}) con uno de ORDERS:
+    . "table": el orden de la tabla del discovery node.
+    . "least_loaded": de menor a mayor puntuación.
+    . "weighted_random": sorteo ponderado sin reemplazo con peso 1 / (1 + puntuación). Reparte
+      la carga aunque las señales tengan unos segundos de antigüedad, sin que todos los
+      llamadores elijan a la vez el mismo nodo "menos cargado".
+En todos los órdenes los nodos sospechosos (ver DiscoveryNode) van al final.
+
+DFTP_DISCOVERY_BALANCE elige el orden que usan las elecciones de nodo del sistema (PASV y
+reparto de comandos del RoutingNode); por defecto "weighted_random". Un valor que no esté en
+ORDERS falla al importar el módulo, no en cada consulta.
+"""
+import os
+import random
+
+ORDERS = ("table", "least_loaded", "weighted_random")
+
+BALANCE = os.getenv("DFTP_DISCOVERY_BALANCE", "weighted_random").lower()
+if BALANCE not in ORDERS:
+    raise ValueError(f"Invalid DFTP_DISCOVERY_BALANCE '{BALANCE}'. Expected one of {ORDERS}")
+
+# Cuántos ms de latencia reciente equivalen a un mensaje más en cola
+LATENCY_UNIT_MS = float(os.getenv("DFTP_LOAD_LATENCY_UNIT_MS", "50"))
+
+# Por debajo de estos bytes libres el nodo se penaliza como si tuviera DISK_PENALTY mensajes en cola
+DISK_LOW = int(os.getenv("DFTP_LOAD_DISK_LOW", str(1024 ** 3)))
+DISK_PENALTY = 100.0
+
+
+def load_score(load: dict | None) -> float:
+    """Puntuación de carga de unas señales; 0 si no hay (nodo aún sin medir)."""
+    if not load:
+        return 0.0
+    score = float(load.get("queue") or 0) + float(load.get("inflight") or 0) + float(load.get("sessions") or 0)
+    score += float(load.get("latency_ms") or 0) / LATENCY_UNIT_MS
+    disk_free = load.get("disk_free")
+    if disk_free is not None and disk_free < DISK_LOW:
+        score += DISK_PENALTY
+    return score
+
+
+def rank_nodes(nodes: list[dict], order: str, rng: random.Random = None) -> list[dict]:
+    """Retorna nodes ordenados según order (ver ORDERS); no modifica la lista recibida."""
+    if order not in ORDERS:
+        raise ValueError(f"Invalid order '{order}'. Expected one of {ORDERS}")
+
+    if order == "least_loaded":
+        return sorted(nodes, key=lambda n: (bool(n.get("suspect")), load_score(n.get("load"))))
+
+    if order == "weighted_random":
+        rng = rng or random
+        # Efraimidis-Spirakis: clave u^(1/peso), de mayor a menor
+        keyed = [(bool(n.get("suspect")), -rng.random() ** (1.0 + load_score(n.get("load"))), i) for i, n in enumerate(nodes)]
+        return [nodes[i] for _, _, i in sorted(keyed)]
+
+    return sorted(nodes, key=lambda n: bool(n.get("suspect")))
@@ -3,14 +3,22 @@ import threading
 import time
 import ipaddress
 import logging
-import concurrent.futures
 
 from server.modules.comm import CommunicationNode, Message, MessageType
+from server.modules.discovery.bootstrap import DiscoveryBootstrap
+from server.modules.discovery.load import rank_nodes
 from server.modules.discovery.discovery_node.entities import NodeType
+from server.modules.discovery.location_node.membership_cache import MembershipCache, WatchState
 
 logger = logging.getLogger("dftp.location.location_node")
 DISCOVERY_PORT = 9000
 
+# Resultado de una consulta a la que no respondió ningún discovery node
+_UNREACHABLE = object()
+
+# Segundos máximos entre renovaciones de la suscripción DISCOVERY_WATCH
+WATCH_RENEW = 5.0
+
 class LocationNode(CommunicationNode):
     """
     Nodo que permite interactuar con Discovery Nodes para encontrar otros nodos en la red.
@@ -20,24 +28,39 @@ class LocationNode(CommunicationNode):
         . node_role: rol del nodo (NodeType) o None si no aplica.
         . subnet: subred en la que buscar discovery nodes.
         . possible_ips: lista de ips posibles en la subred (excepto la propia ip).
+        . bootstrap: DiscoveryBootstrap que decide a qué IPs se envían heartbeats en cada ciclo
+          (discovery nodes conocidos, semillas DFTP_DISCOVERY_SEEDS y anuncios multicast; la
+          subred completa solo en barridos de respaldo espaciados). Si los discovery nodes
+          replican su tabla, el heartbeat va a uno solo (DFTP_DISCOVERY_HEARTBEAT="one").
+        . membership: MembershipCache, vista local de las respuestas de query_by_role y
+          query_by_name con TTL DFTP_DISCOVERY_CACHE_TTL. Los roles consultados se vigilan con una
+          suscripción DISCOVERY_WATCH a un discovery node, cuyos DISCOVERY_EVENT actualizan la
+          caché según ocurren los cambios. Las listas con carga (query_by_role con order) se
+          guardan aparte y se refrescan por TTL, para que la carga no tenga más de unos segundos.
 
     Parámetros de configuración:
         . discovery_timeout: tiempo que se espera por respuesta de un discovery_node.
         . heartbeat_interval: frecuencia con la que se envían heartbeats a los discovery_nodes.
-        . discovery_workers: número de hilos para enviar señales de descubrimiento en paralelo.
 
     Métodos públicos:
         . get_discovery_node() -> obtiene la dirección ip de un discovery node conocido.
-        . query_by_name(name) -> contacta con un discovery node pidiendo la información de un nodo por su nombre.
-        . query_by_role(node_role) -> contacta con un discovery node pidiendo la lista de nodos del rol especificado.
+        . query_by_name(name) -> información de un nodo por su nombre (caché o discovery node).
+        . query_by_role(node_role, order=None) -> lista de nodos del rol especificado (caché o
+          discovery node), opcionalmente ordenada por carga (ver discovery.load).
+        . watch_role(node_role, callback) -> llama a callback(event, node) con cada cambio del rol.
+        . get_node_stats() -> métricas de CommunicationNode más "discovery" (estado de bootstrap) y
+          "membership" (aciertos e invalidaciones de la caché).
+        . get_load() -> señales de carga que se envían en cada heartbeat.
 
     Hilos internos:
-        . _send_heartbeat_loop: hilo que envía heartbeats periódicos a todas las IPs de la subred.
+        . _send_heartbeat_loop: hilo que envía heartbeats periódicos a los destinos de bootstrap.
           Actualiza discovery_nodes con los Discovery Nodes que respondieron.
+        . _refresh_membership_loop: mantiene la suscripción DISCOVERY_WATCH y refresca en segundo
+          plano las demás entradas de membership usadas recientemente antes de que caduquen.
     """
 
     def __init__(self, node_name: str, ip: str, port: int, node_role: NodeType = None, discovery_timeout: float = 0.8,
-                 heartbeat_interval: int = 2, discovery_workers: int = 32):
+                 heartbeat_interval: int = 2):
         """Constructor para LocationNode"""
 
         super().__init__(node_name, ip, port)
@@ -48,14 +71,23 @@ class LocationNode(CommunicationNode):
 
         self.discovery_timeout = discovery_timeout
         self.heartbeat_interval = heartbeat_interval
-        self.discovery_workers = discovery_workers
 
         self.subnet = os.getenv("DFTP_SUBNET")
         if not self.subnet:
             raise ValueError("DFTP_SUBNET no está configurado en LocationNode")
         
         self.possible_ips = self._get_possible_ips()
+        self.bootstrap = DiscoveryBootstrap(self, DISCOVERY_PORT, self.possible_ips, discovery_timeout)
+        self.membership = MembershipCache()
+        self._refresh_event = threading.Event()
         self._stop = threading.Event()
+
+        # Suscripción DISCOVERY_WATCH a un discovery node y callbacks por rol (ver watch_role)
+        self._watch: WatchState | None = None
+        self._watch_lock = threading.Lock()
+        self._role_callbacks: dict[str, list] = {}
+
+        self.register_handler(MessageType.DISCOVERY_EVENT, self._handle_event)
         
         logger.info("LocationNode '%s' iniciado en %s:%s (subnet=%s)", self.node_name, self.ip, self.port, self.subnet)
         
@@ -63,58 +95,260 @@ class LocationNode(CommunicationNode):
         self.heartbeat_thread = threading.Thread(target=self._send_heartbeat_loop, daemon=True)
         self.heartbeat_thread.start()
 
+        # Iniciar hilo de refresco de la vista de membresía
+        self.refresh_thread = threading.Thread(target=self._refresh_membership_loop, daemon=True)
+        self.refresh_thread.start()
+
     # ----------------- Métodos públicos -------------------
     def query_by_name(self, name: str) -> dict | None:
         """
-        Consulta a todos los discovery nodes conocidos sobre un nodo específico por nombre.
-        Retorna un diccionario con la información del nodo o None si no se encuentra en ningún discovery node.
+        Información de un nodo por nombre o None si no se encuentra en ningún discovery node.
+        Se sirve desde la vista local de membresía (ver membership_cache) y, si la entrada no está
+        o caducó, consulta a los discovery nodes conocidos de más a menos sano (ver rank_peers).
+        """
+        node = self._cached_query(("name", name), lambda: self._fetch_by_name(name))
+        return dict(node) if node else None
+
+    def query_by_role(self, node_role: NodeType, order: str = None) -> list | None:
+        """
+        Lista de nodos con el rol especificado (cada nodo es un dict con 'name' e 'ip', y 'suspect'
+        si el discovery node lo considera sospechoso) o None si no hay resultados. Los sospechosos
+        van al final. Se sirve desde la vista local de membresía (ver membership_cache) y, si la
+        entrada no está o caducó, consulta a los discovery nodes conocidos de más a menos sano.
+
+        Con order ("least_loaded" o "weighted_random", ver discovery.load) cada nodo trae además
+        su 'load' y la lista se ordena según ella en cada llamada, así que llamadas sucesivas con
+        "weighted_random" reparten la carga aunque se sirvan de la misma entrada de la caché.
+        """
+        if order and order != "table":
+            nodes = self._cached_query(("load", node_role.value), lambda: self._fetch_by_load(node_role.value))
+            return rank_nodes([dict(n) for n in nodes], order) if nodes else None
+
+        nodes = self._cached_query(("role", node_role.value), lambda: self._fetch_by_role(node_role.value))
+        return sorted((dict(n) for n in nodes), key=lambda n: bool(n.get("suspect"))) if nodes else None
+
+    def watch_role(self, node_role: NodeType, callback) -> None:
+        """
+        Llama a callback(event, node) con cada cambio de membresía del rol: event es "join",
+        "leave" o "update" y node un dict con name e ip. Los cambios llegan por DISCOVERY_WATCH
+        en cuanto el discovery node los registra. callback corre en el hilo que recibe el evento y
+        debe ser breve.
+        """
+        with self._watch_lock:
+            self._role_callbacks.setdefault(node_role.value, []).append(callback)
+        self._refresh_event.set()
+
+    def get_node_stats(self) -> dict:
+        """Métricas de CommunicationNode más el estado del descubrimiento y de la caché de membresía."""
+        stats = super().get_node_stats()
+        stats["discovery"] = self.bootstrap.get_stats()
+        stats["membership"] = self.membership.get_stats()
+        return stats
+
+    def get_load(self) -> dict:
+        """
+        Señales de carga del nodo para sus heartbeats (ver discovery.load): mensajes en los
+        handlers, transferencias en curso y latencia reciente. Las subclases añaden las suyas.
+        """
+        latency = self.stats.recent_latency()
+        return {"queue": self.handler_pool.pending(), "inflight": self.stream_totals.active(),
+                "latency_ms": round(latency, 3) if latency is not None else 0.0}
+
+    def stop_server(self):
+        self._stop.set()
+        self.bootstrap.close()
+        super().stop_server()
+
+    # ----------------- Métodos internos -------------------
+    def _cached_query(self, key: tuple, fetch):
+        """
+        Resultado de key desde la caché o, si no está fresco, de fetch(), que se guarda. Si ningún
+        discovery node responde se sirve el último valor conocido aunque haya caducado.
+        """
+        if not self.membership.enabled:
+            value = fetch()
+            return None if value is _UNREACHABLE else value
+
+        hit, value = self.membership.get(key)
+        if hit:
+            return value
+
+        value = fetch()
+        if value is _UNREACHABLE:
+            return self.membership.get_stale(key)
+
+        self.membership.put(key, value)
+        if key[0] == "role":
+            # Rol nuevo o sin suscripción: que el hilo de refresco lo vigile cuanto antes
+            self._refresh_event.set()
+        return value
+
+    def _fetch_by_name(self, name: str):
+        """Consulta QUERY_BY_NAME a los discovery nodes; _UNREACHABLE si ninguno respondió."""
+        return self._query_discovery(MessageType.DISCOVERY_QUERY_BY_NAME, {"name": name},
+                                     lambda response: response.payload.get("node"))
+
+    def _fetch_by_role(self, role: str):
+        """Consulta QUERY_BY_ROLE a los discovery nodes; _UNREACHABLE si ninguno respondió."""
+        return self._query_discovery(MessageType.DISCOVERY_QUERY_BY_ROLE, {"role": role},
+                                     lambda response: response.payload.get("nodes") or None)
+
+    def _fetch_by_load(self, role: str):
+        """Consulta QUERY_BY_ROLE con la carga de cada nodo; _UNREACHABLE si ningún discovery node respondió."""
+        return self._query_discovery(MessageType.DISCOVERY_QUERY_BY_ROLE, {"role": role, "order": "least_loaded"},
+                                     lambda response: response.payload.get("nodes") or None)
+
+    def _query_discovery(self, msg_type: str, payload: dict, extract):
+        """
+        Envía la consulta a los discovery nodes conocidos de forma escalonada (ver
+        CommunicationNode.hedged_send): primero al más sano y rápido según rank_peers y, si tarda
+        más de lo habitual en responder o falla, también al siguiente. Retorna extract() de la
+        primera respuesta OK, None si respondieron sin resultado y _UNREACHABLE si ninguno respondió.
         """
         with self.discovery_nodes_lock:
             nodes = list(self.discovery_nodes.values())
 
-        if not nodes:
-            return None
+        answered = []
 
-        for dest_ip in nodes:
-            try:
-                msg = Message(type=MessageType.DISCOVERY_QUERY_BY_NAME, src=self.ip, dst=dest_ip, payload={"name": name})
-                response = self.send_message(dest_ip, DISCOVERY_PORT, msg, await_response=True)
+        def accept(response: Message) -> bool:
+            answered.append(response)
+            return response.metadata.get("status") == "OK"
 
-                if response and response.metadata.get("status") == "OK":
-                    return response.payload.get("node")
-            except Exception as e:
-                logger.debug(f"query_by_name: error consultando {dest_ip}: {str(e)}")
-                continue
+        result = self.hedged_send(self.rank_peers(nodes, DISCOVERY_PORT),
+                                  lambda ip: Message(type=msg_type, src=self.ip, dst=ip, payload=payload),
+                                  port=DISCOVERY_PORT, timeout=self.discovery_timeout, accept=accept)
+        for response in result.responses.values():
+            return extract(response)
+
+        return None if answered else _UNREACHABLE
+
+    def _handle_event(self, message: Message):
+        """
+        Maneja DISCOVERY_EVENT: un cambio de membresía de un rol vigilado. Se aplica si es el
+        siguiente de la suscripción; si faltan eventos intermedios se pide retomar desde la
+        última revisión aplicada (ver _renew_watch).
+        Recibe Message(... payload: { epoch, revision, event, node: {name, ip, role} })
+        """
+        entry = message.payload or {}
+        with self._watch_lock:
+            watch = self._watch
+            if watch is None or watch.ip != message.header.get("src") or watch.epoch != entry.get("epoch"):
+                return None
 
+            revision = entry.get("revision", 0)
+            if revision <= watch.revision:
+                return None
+            if revision > watch.revision + 1:
+                watch.resync = True
+                self._refresh_event.set()
+                return None
+
+            watch.revision = revision
+            self._apply_event(entry.get("event"), entry.get("node") or {})
         return None
 
+    def _apply_event(self, event: str, node: dict) -> None:
+        """Aplica un evento a la caché y lo pasa a los callbacks de su rol (con _watch_lock tomado)."""
+        self.membership.apply_event(event, node)
+        for callback in self._role_callbacks.get(node.get("role"), ()):
+            try:
+                callback(event, {"name": node.get("name"), "ip": node.get("ip")})
+            except Exception:
+                logger.exception("[%s] Error en callback de membresía", self.node_name)
+
+    def _apply_snapshot(self, snapshot: dict) -> None:
+        """Reemplaza las listas de los roles del snapshot y pasa las diferencias a los callbacks."""
+        for role, nodes in snapshot.items():
+            current = {n["name"]: n["ip"] for n in nodes}
+            previous = self.membership.put(("role", role), [{k: v for k, v in n.items() if k != "role"} for n in nodes] or None)
+            previous = {n["name"]: n["ip"] for n in previous or []}
 
-    def query_by_role(self, node_role: NodeType) -> list | None:
+            for name in previous.keys() - current.keys():
+                self._apply_event("leave", {"name": name, "ip": previous[name], "role": role})
+            for name, ip in current.items():
+                if previous.get(name) != ip:
+                    self._apply_event("join" if name not in previous else "update", {"name": name, "ip": ip, "role": role})
+
+    def _renew_watch(self, roles: set[str]) -> bool:
         """
-        Consulta a todos los discovery nodes conocidos sobre los nodos con el rol especificado.
-        Retorna la lista de nodos (cada nodo es un dict con 'name' e 'ip') o None si no hay resultados.
+        Crea o renueva la suscripción DISCOVERY_WATCH a roles, preferentemente con el mismo
+        discovery node retomando desde la última revisión aplicada (la respuesta trae los eventos
+        perdidos). Si cambió el conjunto de roles, o hay que cambiar de discovery node, la
+        respuesta trae un snapshot. Retorna True si la suscripción quedó activa.
         """
+        with self._watch_lock:
+            watch = self._watch
         with self.discovery_nodes_lock:
             nodes = list(self.discovery_nodes.values())
 
-        if not nodes:
-            return None
+        candidates = self.rank_peers(nodes, DISCOVERY_PORT)
+        if watch is not None and watch.ip in candidates:
+            candidates.remove(watch.ip)
+            candidates.insert(0, watch.ip)
+
+        def build(ip: str) -> Message:
+            payload = {"roles": sorted(roles), "port": self.port}
+            if watch is not None and watch.ip == ip and watch.roles == roles:
+                payload.update(epoch=watch.epoch, revision=watch.revision)
+            return Message(type=MessageType.DISCOVERY_WATCH, src=self.ip, dst=ip, payload=payload)
+
+        result = self.hedged_send(candidates, build, port=DISCOVERY_PORT, timeout=self.discovery_timeout,
+                                  accept=lambda r: r.metadata.get("status") == "OK")
+        for dest_ip, response in result.responses.items():
+            resume = watch is not None and watch.ip == dest_ip and watch.roles == roles
+            ack = response.payload
+            with self._watch_lock:
+                current = self._watch if resume and self._watch is watch else None
+                if "snapshot" in ack or current is None:
+                    self._apply_snapshot(ack.get("snapshot") or {})
+                    current = WatchState(dest_ip, ack["epoch"], ack["revision"], roles)
+                else:
+                    for entry in ack.get("events") or []:
+                        if entry["revision"] > current.revision:
+                            self._apply_event(entry["event"], entry["node"])
+                    current.revision = max(current.revision, ack["revision"])
+                    current.resync = False
 
-        for dest_ip in nodes:
+                current.renew_at = time.monotonic() + min(ack.get("lease", WATCH_RENEW * 3) / 3, WATCH_RENEW)
+                self._watch = current
+                # Las entradas vigiladas siguen frescas hasta un ciclo de renovación después del siguiente
+                self.membership.set_watched(roles, current.renew_at + WATCH_RENEW)
+            return True
+
+        with self._watch_lock:
+            self._watch = None
+        self.membership.set_watched((), 0.0)
+        return False
+
+    # ----------------- Hilo de refresco de membresía -------------------
+    def _refresh_membership_loop(self) -> None:
+        """
+        Mantiene la suscripción DISCOVERY_WATCH a los roles consultados o vigilados y refresca
+        por consulta, antes de que caduquen, las demás entradas usadas recientemente.
+        """
+        logger.info("[%s] Iniciando refresh_membership_loop (ttl=%ss)", self.node_name, self.membership.ttl)
+
+        while not self._stop.is_set():
+            self._refresh_event.wait(max(0.1, min(self.membership.ttl or WATCH_RENEW, WATCH_RENEW) / 4))
+            self._refresh_event.clear()
             try:
-                msg = Message(type=MessageType.DISCOVERY_QUERY_BY_ROLE, src=self.ip, dst=dest_ip,
-                            payload={"role": node_role.value})
-                response = self.send_message(dest_ip, DISCOVERY_PORT, msg, await_response=True)
+                with self._watch_lock:
+                    watched = set(self._role_callbacks)
+                    watch = self._watch
+                roles = watched | self.membership.roles()
 
-                if response and response.metadata.get("status") == "OK":
-                    return response.payload.get("nodes") or None
-            except Exception as e:
-                logger.debug(f"query_by_role: error consultando {dest_ip}: {str(e)}")
-                continue
+                if roles and (watch is None or watch.resync or watch.roles != roles or time.monotonic() >= watch.renew_at):
+                    self._renew_watch(roles)
 
-        return None
+                for key in self.membership.due_for_refresh(keep={("role", r) for r in watched}):
+                    kind, value = key
+                    fetch = {"role": self._fetch_by_role, "load": self._fetch_by_load}.get(kind, self._fetch_by_name)
+                    fetched = fetch(value)
+                    if fetched is not _UNREACHABLE:
+                        self.membership.put(key, fetched, refresh=True)
+            except Exception as e:
+                logger.exception(f"Error en refresh_membership_loop: {str(e)}")
 
-    # ----------------- Métodos internos -------------------
     def _get_possible_ips(self) -> list[str]:
         """Obtiene todas las posibles IPs de hosts en la subred, exceptuando la propia."""
         net = ipaddress.ip_network(self.subnet, strict=False)
@@ -122,64 +356,27 @@ class LocationNode(CommunicationNode):
 
     # ----------------- Hilo de Heartbeats -------------------
     def _send_heartbeat_loop(self) -> None:
-        """Envia periódicamente heartbeats a todas las IPs de la subred para descubrir Discovery Nodes."""
+        """Envia periódicamente heartbeats a los Discovery Nodes conocidos (ver DiscoveryBootstrap)."""
         logger.info("[%s] Iniciando send_heartbeat_loop", self.node_name)
         
         while not self._stop.is_set():
             try:
-                found = self._find_discovery_nodes_in_parallel()
+                found = self.bootstrap.heartbeat_round(self._build_heartbeat)
                 self._update_discovery_nodes(found)
                 time.sleep(self.heartbeat_interval)
             except Exception as e:
                 logger.exception(f"Error en send_heartbeat_loop: {str(e)}")
                 time.sleep(self.heartbeat_interval)
-    
-    def _find_discovery_nodes_in_parallel(self) -> dict:
-        """Envía heartbeats en paralelo a todas las IPs de la subred y devuelve dict name->ip de nodos que respondieron."""
-        max_workers = min(self.discovery_workers, max(1, len(self.possible_ips)))
-        results = []
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as ex:
-            futures = [ex.submit(self._probe_heartbeat_ip, ip) for ip in self.possible_ips]
-            for fut in concurrent.futures.as_completed(futures):
-                try:
-                    res = fut.result(timeout=self.discovery_timeout + 0.5)
-                except Exception:
-                    res = (None, None)
-                results.append(res)
-
-        return self._collect_heartbeated_nodes(results)
-
-    def _probe_heartbeat_ip(self, ip_addr: str) -> tuple[str, Message]:
-        """Envía un heartbeat a la IP especificada y devuelve (ip, response) o (ip, None)."""
-        try:
-            payload = {"name": self.node_name}
-            if self.node_role:
-                payload["role"] = self.node_role.value
-            payload["ip"] = self.ip
-
-            msg = Message(type=MessageType.DISCOVERY_HEARTBEAT, src=self.ip, dst=ip_addr, payload=payload)
-            resp = self.send_message(ip_addr, DISCOVERY_PORT, msg, await_response=True, timeout=self.discovery_timeout)
-            return ip_addr, resp
-        except Exception as e:
-            logger.debug(f"Error enviando heartbeat a {ip_addr}: {str(e)}")
-            return ip_addr, None
-
-    def _collect_heartbeated_nodes(self, results) -> dict:
-        """Construye dict name->ip a partir de los resultados de heartbeats."""
-        found = {}
-        for _, response in results:
-            if not response:
-                continue
-            try:
-                if response.metadata.get("status") == "OK":
-                    name = response.payload.get("name")
-                    ip = response.payload.get("ip")
-                    if name and ip:
-                        found[name] = ip
-            except Exception:
-                continue
-        return found
+
+    def _build_heartbeat(self, ip_addr: str) -> Message:
+        """Heartbeat con el nombre, rol, ip y carga (ver get_load) de este nodo para la IP especificada."""
+        payload = {"name": self.node_name}
+        if self.node_role:
+            payload["role"] = self.node_role.value
+        payload["ip"] = self.ip
+        payload["load"] = self.get_load()
+
+        return Message(type=MessageType.DISCOVERY_HEARTBEAT, src=self.ip, dst=ip_addr, payload=payload)
 
     def _update_discovery_nodes(self, found: dict) -> None:
         """Actualiza self.discovery_nodes si hubo cambios."""
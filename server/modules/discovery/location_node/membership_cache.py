@@ -0,0 +1,189 @@
+"""
+Vista local de la membresía del sistema para LocationNode.
+
+query_by_role / query_by_name se sirven desde memoria mientras la entrada tenga menos de
+DFTP_DISCOVERY_CACHE_TTL segundos (5 por defecto; 0 desactiva la caché). Un hilo del LocationNode
+refresca en segundo plano las entradas usadas recientemente antes de que caduquen, de modo que
+en régimen estable ningún comando paga una consulta a un discovery node. Las entradas sin uso
+durante IDLE_TTLS * ttl se descartan.
+
+Las entradas de rol se mantienen además con una suscripción DISCOVERY_WATCH a un discovery node:
+cada DISCOVERY_EVENT (join, leave, update) se aplica sobre la lista cacheada del rol y caduca la
+entrada del nombre del nodo. Mientras la suscripción esté viva (ver set_watched) las entradas de
+rol no caducan por TTL.
+
+Las listas con la carga de cada nodo (("load", rol), ver LocationNode.query_by_role) no se vigilan:
+se refrescan por TTL para que la carga se mantenga reciente. Un leave quita el nodo de la lista y
+un join o update la caduca.
+"""
+import os
+import threading
+import time
+
+TTL = float(os.getenv("DFTP_DISCOVERY_CACHE_TTL", "5"))
+
+# Una entrada sin consultas durante IDLE_TTLS * ttl deja de refrescarse y se descarta
+IDLE_TTLS = 12
+
+
+class CacheEntry:
+    __slots__ = ("value", "fetched_at", "used_at")
+
+    def __init__(self, value, now: float):
+        self.value = value
+        self.fetched_at = now
+        self.used_at = now
+
+
+class WatchState:
+    """Suscripción DISCOVERY_WATCH activa: discovery node, epoch y última revisión aplicada."""
+    __slots__ = ("ip", "epoch", "revision", "roles", "renew_at", "resync")
+
+    def __init__(self, ip: str, epoch: str, revision: int, roles: set[str]):
+        self.ip = ip
+        self.epoch = epoch
+        self.revision = revision
+        self.roles = roles
+        self.renew_at = 0.0
+        self.resync = False
+
+
+class MembershipCache:
+    """
+    Resultados de consultas de discovery por clave (("role", "DATA"), ("name", "data1"), ...).
+
+    Métodos públicos:
+        . get(key) -> (hit, value); hit es False si no hay entrada o caducó.
+        . get_stale(key) -> valor aunque haya caducado (o None), para cuando ningún discovery responde.
+        . put(key, value) -> guarda el resultado de una consulta.
+        . invalidate(role=None, name=None) -> caduca las entradas del rol y del nombre dados.
+        . apply_event(event, node) -> aplica un join/leave/update a la lista del rol de node.
+        . set_watched(roles, until) -> las entradas de esos roles no caducan hasta until (monotonic).
+        . roles() -> roles con entrada en la caché.
+        . due_for_refresh(keep) -> claves usadas recientemente a las que les queda menos de medio ttl.
+        . get_stats() -> aciertos, fallos, invalidaciones, refrescos y entradas.
+    """
+
+    def __init__(self, ttl: float = None):
+        self.ttl = TTL if ttl is None else ttl
+        self._entries: dict[tuple, CacheEntry] = {}
+        self._watched: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0, "refreshes": 0, "events": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: tuple) -> tuple[bool, object]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (now - entry.fetched_at >= self.ttl and now >= self._watched.get(key, 0.0)):
+                self._stats["misses"] += 1
+                if entry is not None:
+                    entry.used_at = now
+                return False, None
+
+            entry.used_at = now
+            self._stats["hits"] += 1
+            return True, entry.value
+
+    def get_stale(self, key: tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._stats["stale"] += 1
+            return entry.value
+
+    def put(self, key: tuple, value, refresh: bool = False):
+        """Guarda value para key y retorna el valor anterior (o None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            previous = None
+            if entry is None:
+                self._entries[key] = CacheEntry(value, now)
+            else:
+                previous = entry.value
+                entry.value = value
+                entry.fetched_at = now
+            if refresh:
+                self._stats["refreshes"] += 1
+            return previous
+
+    def invalidate(self, role: str = None, name: str = None) -> int:
+        """Caduca las entradas del rol y del nombre dados; retorna cuántas se caducaron."""
+        keys = {("role", role), ("load", role), ("name", name)}
+        count = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.fetched_at = float("-inf")
+                    count += 1
+            self._stats["invalidations"] += count
+        return count
+
+    def apply_event(self, event: str, node: dict) -> bool:
+        """
+        Aplica un evento de DISCOVERY_EVENT sobre la lista cacheada del rol de node: join y update
+        la añaden o reemplazan por nombre (con su marca suspect si la trae), leave la quita. La entrada del nombre se caduca.
+        En la lista con carga del rol leave quita el nodo y join / update la caducan.
+        Retorna True si el rol tenía entrada.
+        """
+        name, key = node.get("name"), ("role", node.get("role"))
+        with self._lock:
+            self._stats["events"] += 1
+            name_entry = self._entries.get(("name", name))
+            if name_entry is not None:
+                name_entry.fetched_at = float("-inf")
+
+            load_entry = self._entries.get(("load", node.get("role")))
+            if load_entry is not None:
+                if event == "leave":
+                    load_entry.value = [n for n in load_entry.value or [] if n.get("name") != name] or None
+                else:
+                    load_entry.fetched_at = float("-inf")
+
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+
+            nodes = [n for n in entry.value or [] if n.get("name") != name]
+            if event != "leave":
+                nodes.append({k: v for k, v in node.items() if k != "role"})
+            # Las entradas nunca se modifican en sitio: quien leyó la lista anterior no la ve cambiar
+            entry.value = nodes or None
+            return True
+
+    def set_watched(self, roles, until: float):
+        """Las entradas de roles se consideran frescas hasta until aunque pase el ttl."""
+        with self._lock:
+            self._watched = {("role", role): until for role in roles}
+
+    def roles(self) -> set[str]:
+        with self._lock:
+            return {value for kind, value in self._entries if kind == "role"}
+
+    def due_for_refresh(self, keep=()) -> list[tuple]:
+        """
+        Claves usadas en los últimos IDLE_TTLS * ttl segundos con menos de medio ttl restante. Las
+        demás se descartan, salvo las de keep. Las entradas vigiladas no se refrescan.
+        """
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if now - entry.used_at > self.ttl * IDLE_TTLS and key not in keep:
+                    del self._entries[key]
+                elif now - entry.fetched_at >= self.ttl / 2 and now >= self._watched.get(key, 0.0):
+                    due.append(key)
+        return due
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            watched = sorted(value for (_, value), until in self._watched.items() if now < until)
+            return {"ttl": self.ttl, "entries": len(self._entries), "watched": watched, **self._stats}
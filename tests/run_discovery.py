@@ -14,7 +14,6 @@ def main():
     parser.add_argument("--discovery-interval", type=int, default=5)
     parser.add_argument("--discovery-timeout", type=float, default=0.8)
     parser.add_argument("--heartbeat-timeout", type=int, default=10)
-    parser.add_argument("--clean-interval", type=int, default=10)
     args = parser.parse_args()
 
     if not args.ip:
@@ -25,7 +24,7 @@ def main():
             args.ip = "127.0.0.1"
             print(f"[WARNING] Could not resolve {args.id} via DNS, falling back to {args.ip}")
 
-    node = DiscoveryNode(node_name=args.id, ip=args.ip, port=args.port, discovery_interval=args.discovery_interval, discovery_timeout=args.discovery_timeout, heartbeat_timeout=args.heartbeat_timeout, clean_interval=args.clean_interval)
+    node = DiscoveryNode(node_name=args.id, ip=args.ip, port=args.port, discovery_interval=args.discovery_interval, discovery_timeout=args.discovery_timeout, heartbeat_timeout=args.heartbeat_timeout)
 
     try:
         while True:
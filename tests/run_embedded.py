@@ -0,0 +1,49 @@
+import argparse
+import logging
+import os
+import time
+
+from server.modules.discovery import DiscoveryNode
+from server.modules.app import AuthNode, DataNode, ProcessingNode, RoutingNode
+
+logging.basicConfig(level=logging.INFO)
+
+def main():
+    """
+    Despliegue embebido: un nodo de cada rol en el mismo proceso, cada uno en su propia IP de
+    loopback (127.0.0.<base>, <base>+1, ...). Los mensajes entre ellos no pasan por TCP sino por
+    el registro loopback de CommunicationNode; solo el cliente FTP y las conexiones de datos usan sockets.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base", type=int, default=10, help="Último octeto de la primera IP (127.0.0.x)")
+    parser.add_argument("--port", type=int, default=9000, help="Puerto interno de los nodos")
+    parser.add_argument("--ftp-port", type=int, default=2121, help="Puerto FTP del RoutingNode")
+    parser.add_argument("--data-root", default="/tmp/ftp_root", help="Directorio raíz del filesystem")
+    parser.add_argument("--heartbeat-interval", type=int, default=2)
+    args = parser.parse_args()
+
+    ips = [f"127.0.0.{args.base + i}" for i in range(5)]
+    os.environ.setdefault("DFTP_SUBNET", f"127.0.0.{args.base}/29")
+
+    print(f"[INFO] Iniciando nodos embebidos en {', '.join(ips)} (subnet {os.environ['DFTP_SUBNET']})")
+
+    nodes = [
+        DiscoveryNode(node_name="discovery1", ip=ips[0], port=args.port),
+        AuthNode(node_name="auth1", ip=ips[1], port=args.port, heartbeat_interval=args.heartbeat_interval),
+        DataNode(node_name="data1", ip=ips[2], port=args.port, fs_root=args.data_root, heartbeat_interval=args.heartbeat_interval),
+        ProcessingNode(node_name="processing1", ip=ips[3], internal_port=args.port, heartbeat_interval=args.heartbeat_interval),
+        RoutingNode(node_name="routing1", ip=ips[4], ftp_port=args.ftp_port, internal_port=args.port, heartbeat_interval=args.heartbeat_interval),
+    ]
+
+    print(f"[INFO] FTP disponible en {ips[4]}:{args.ftp_port}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[INFO] Nodos embebidos detenidos")
+        for node in nodes:
+            node.stop_server()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Ids de tipo de BinaryCodec y decodificación de ids inválidos.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import pytest
+
+from server.modules.comm.message import Message, MessageType, CodecError
+from server.modules.comm.message.codec import BINARY_CODEC, BinaryCodec, MESSAGE_TYPES, TYPE_IDS
+
+# Ids publicados: un nodo de otra revisión decodifica con ellos. Solo se añaden tipos al final
+PUBLISHED_TYPES = [
+    "DISCOVERY_HEARTBEAT", "DISCOVERY_QUERY_BY_NAME", "DISCOVERY_QUERY_BY_ROLE",
+    "DISCOVERY_QUERY_ALL", "DISCOVERY_HEARTBEAT_ACK", "DISCOVERY_QUERY_BY_NAME_ACK",
+    "DISCOVERY_QUERY_BY_ROLE_ACK", "DISCOVERY_QUERY_ALL_ACK", "PROCESS_FTP_COMMAND",
+    "PROCESS_FTP_COMMAND_ACK", "AUTH_VALIDATE_USER", "AUTH_VALIDATE_PASSWORD",
+    "AUTH_VALIDATE_USER_ACK", "AUTH_VALIDATE_PASSWORD_ACK", "DATA_LIST", "DATA_STAT", "DATA_MKD",
+    "DATA_REMOVE", "DATA_RENAME", "DATA_CWD", "DATA_OPEN_PASV", "DATA_RETR_FILE",
+    "DATA_STORE_FILE", "DATA_READY", "DATA_LIST_ACK", "DATA_STAT_ACK", "DATA_MKD_ACK",
+    "DATA_REMOVE_ACK", "DATA_RENAME_ACK", "DATA_CWD_ACK", "DATA_OPEN_PASV_ACK",
+    "DATA_RETR_FILE_ACK", "DATA_STORE_FILE_ACK", "DATA_READY_ACK", "DATA_REPLICATE_FILE",
+    "DATA_REPLICATE_FILE_ACK", "DATA_REPLICATE_READY", "DATA_REPLICATE_DIR_CREATE",
+    "DATA_REPLICATE_DIR_DELETE", "DATA_REPLICATE_FILE_DELETE", "DATA_REPLICATE_RENAME",
+    "DATA_META_REQUEST", "DATA_META_ACK", "UPDATE_FROM_NODE", "UPDATE_ACK", "RENAME_FILE",
+    "RENAME_FILE_ACK", "CLUSTER_STATE_REQUEST", "CLUSTER_STATE_ACK", "DATA_PUSH", "DATA_PUSH_ACK",
+    "DATA_SYNC_FILE_REQUEST", "DATA_SYNC_FILE_READY", "GOSSIP_UPDATE", "MERGE_STATE",
+    "MERGE_STATE_ACK", "SEND_STATE", "NODE_BUSY", "NODE_STATS", "NODE_STATS_ACK", "NODE_TRACES",
+    "NODE_TRACES_ACK", "DISCOVERY_WATCH", "DISCOVERY_EVENT", "DISCOVERY_WATCH_ACK",
+    "DISCOVERY_SYNC", "DISCOVERY_SYNC_PUSH", "DISCOVERY_SYNC_ACK",
+]
+
+
+def _message_types() -> set[str]:
+    return {v for k, v in vars(MessageType).items() if not k.startswith("_") and isinstance(v, str)}
+
+
+def test_published_ids_are_append_only():
+    assert list(MESSAGE_TYPES[:len(PUBLISHED_TYPES)]) == PUBLISHED_TYPES
+
+
+def test_every_message_type_has_an_id():
+    assert len(set(MESSAGE_TYPES)) == len(MESSAGE_TYPES)
+    assert _message_types() == set(MESSAGE_TYPES)
+
+
+def test_roundtrip_keeps_type():
+    for msg_type in MESSAGE_TYPES:
+        data = BINARY_CODEC.encode(Message(msg_type, "10.0.0.1", "10.0.0.2", payload={"k": 1}))
+        assert BINARY_CODEC.decode(data).header["type"] == msg_type
+
+
+def _with_type_id(type_id: int) -> bytes:
+    data = bytearray(BINARY_CODEC.encode(Message(MessageType.NODE_STATS, "10.0.0.1", "10.0.0.2")))
+    flags, _, timestamp, raw_id = BinaryCodec._FIXED.unpack_from(data, 0)
+    BinaryCodec._FIXED.pack_into(data, 0, flags, type_id, timestamp, raw_id)
+    return bytes(data)
+
+
+@pytest.mark.parametrize("type_id", [0, len(MESSAGE_TYPES) + 1, 0xFFFF])
+def test_unknown_type_id_raises_codec_error(type_id):
+    assert TYPE_IDS[MessageType.NODE_STATS] != type_id
+    with pytest.raises(CodecError):
+        BINARY_CODEC.decode(_with_type_id(type_id))
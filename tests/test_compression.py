@@ -0,0 +1,132 @@
+"""
+Compresión negociada del cuerpo de las tramas "length" (tcp_protocol.compression / framing).
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import os
+
+import pytest
+
+from server.modules.comm import Message, MessageType
+from server.modules.comm.message.codec import JSON_CODEC
+from server.modules.comm.communication_node.tcp_protocol import compression, framing
+from server.modules.comm.communication_node.tcp_protocol.compression import COMPRESSION_ZLIB
+from server.modules.comm.communication_node.tcp_protocol.framing import (
+    Frame, FrameError, FrameReader, WireFormat, FRAMING_LENGTH, FRAMING_LINE, FLAG_COMPRESSED, FLAG_ACCEPTS_COMPRESSED,
+    decode_header, decode_message, encode_frame, encode_reply)
+
+
+class _Socket:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def recv_into(self, view) -> int:
+        n = min(len(self.data), len(view))
+        view[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+
+def _read(data: bytes) -> Frame:
+    return FrameReader(_Socket(data)).read_frame()
+
+
+def _table(rows: int = 2000) -> dict:
+    """Payload grande y repetitivo, como las tablas de MERGE_STATE."""
+    return {"rows": [{"path": f"/home/user/dir/file_{i}.txt", "size": 1024, "owner": "user"} for i in range(rows)]}
+
+
+def _request(framing_name: str = FRAMING_LENGTH, flags: int = JSON_CODEC.id, **metadata) -> tuple[Message, Frame]:
+    """Petición tal como la recibe el servidor: (Message decodificado, trama)."""
+    msg = Message(MessageType.CLUSTER_STATE_REQUEST, "10.0.0.1", "10.0.0.2", metadata=metadata)
+    frame = _read(encode_frame(JSON_CODEC.encode(msg), framing_name, flags))
+    return decode_message(frame), frame
+
+
+def _reply() -> Message:
+    return Message(MessageType.CLUSTER_STATE_ACK, "10.0.0.2", "10.0.0.1", payload=_table())
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(compression, "ENABLED", True)
+
+
+def test_reply_compressed_only_for_peer_that_accepts():
+    request, frame = _request(flags=JSON_CODEC.id | FLAG_ACCEPTS_COMPRESSED, compression=COMPRESSION_ZLIB)
+    data = encode_reply(_reply(), request, frame)
+
+    flags, length = decode_header(data)
+    assert flags & FLAG_COMPRESSED
+    assert length < len(JSON_CODEC.encode(_reply())) / 2
+    response = decode_message(_read(data))
+    assert response.payload == _table()
+    assert response.metadata["compression"] == COMPRESSION_ZLIB
+
+
+def test_peer_without_compression_gets_uncompressed_reply():
+    # Un nodo antiguo: trama "length" sin FLAG_ACCEPTS_COMPRESSED ni metadata["compression"]
+    request, frame = _request()
+    data = encode_reply(_reply(), request, frame)
+
+    flags, _ = decode_header(data)
+    assert not flags & FLAG_COMPRESSED
+    response = decode_message(_read(data))
+    assert response.payload == _table()
+    assert "compression" not in response.metadata
+
+
+def test_line_request_gets_line_reply():
+    request, frame = _request(FRAMING_LINE, compression=COMPRESSION_ZLIB)
+    data = encode_reply(_reply(), request, frame)
+
+    assert data.endswith(b"\n") and data[0] != framing.MAGIC
+    assert decode_message(_read(data)).payload == _table()
+
+
+def test_small_or_incompressible_bodies_sent_raw():
+    small = encode_frame(b'{"a": 1}', FRAMING_LENGTH, compress=True)
+    random_body = os.urandom(64 * 1024)
+    noisy = encode_frame(random_body, FRAMING_LENGTH, compress=True)
+
+    assert not decode_header(small)[0] & FLAG_COMPRESSED
+    assert not decode_header(noisy)[0] & FLAG_COMPRESSED
+    assert _read(noisy).payload == random_body
+
+
+def test_client_compresses_only_after_confirmation():
+    client = WireFormat(FRAMING_LENGTH, "json", compress=True)
+    client.framing = FRAMING_LENGTH
+
+    first = Message(MessageType.MERGE_STATE, "10.0.0.1", "10.0.0.2", payload=_table())
+    data = client.encode(first)
+    flags, _ = decode_header(data)
+    assert first.metadata["compression"] == COMPRESSION_ZLIB
+    assert flags & FLAG_ACCEPTS_COMPRESSED and not flags & FLAG_COMPRESSED
+
+    client.accept(Message(MessageType.MERGE_STATE_ACK, "10.0.0.2", "10.0.0.1", metadata={"compression": COMPRESSION_ZLIB}))
+    second = Message(MessageType.MERGE_STATE, "10.0.0.1", "10.0.0.2", payload=_table())
+    data = client.encode(second)
+    assert decode_header(data)[0] & FLAG_COMPRESSED
+    assert "compression" not in second.metadata
+    assert decode_message(_read(data)).payload == _table()
+
+
+def test_server_with_compression_off_does_not_confirm(monkeypatch):
+    monkeypatch.setattr(compression, "ENABLED", False)
+    request, frame = _request(compression=COMPRESSION_ZLIB)
+    response = decode_message(_read(encode_reply(_reply(), request, frame)))
+
+    client = WireFormat(FRAMING_LENGTH, "json", compress=True)
+    client.framing = FRAMING_LENGTH
+    client.accept(response)
+    assert not client.compress
+
+
+def test_decompression_bomb_rejected(monkeypatch):
+    monkeypatch.setattr(framing, "MAX_FRAME_SIZE", 4096)
+    body = b'{"header": {}, "payload": {"x": "' + b"a" * 100_000 + b'"}}'
+    frame = Frame(FRAMING_LENGTH, JSON_CODEC.id | FLAG_COMPRESSED, compression.maybe_compress(body))
+
+    with pytest.raises(FrameError):
+        decode_message(frame)
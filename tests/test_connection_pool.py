@@ -0,0 +1,184 @@
+"""
+ConnectionPool y reintentos de TCPClient sobre conexiones reutilizadas (multiplex=False).
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from server.modules.comm import Message, MessageType
+from server.modules.comm.communication_node.tcp_protocol import TCPClient
+from server.modules.comm.communication_node.tcp_protocol.tcp_client import ConnectionPool
+
+
+class _Peer:
+    """
+    Servidor de líneas JSON. Cada conexión responde a su primera petición; las siguientes se
+    registran y la conexión se cierra sin responder (respuesta perdida tras ejecutarlas).
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen()
+        self.port = self.sock.getsockname()[1]
+        self.received: list[str] = []
+        self.connections: list[socket.socket] = []
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        with conn, conn.makefile("rb") as lines:
+            for count, line in enumerate(lines):
+                data = json.loads(line)
+                self.received.append(data["header"]["type"])
+                if count > 0:
+                    return
+                reply = Message(data["header"]["type"] + "_ACK", "peer", data["header"]["src"],
+                                metadata={"reply_to": data["metadata"]["msg_id"]})
+                conn.sendall(reply.to_json().encode())
+
+    def close(self):
+        self.sock.close()
+        for conn in self.connections:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+@pytest.fixture
+def peer():
+    p = _Peer()
+    try:
+        yield p
+    finally:
+        p.close()
+
+
+def _wait_for(predicate, timeout: float = 1.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_pool_reuses_released_connection(peer):
+    pool = ConnectionPool()
+    conn, reused = pool.acquire("127.0.0.1", peer.port, 1.0)
+    assert conn is not None and not reused
+
+    pool.release(conn)
+    again, reused = pool.acquire("127.0.0.1", peer.port, 1.0)
+    assert again is conn and reused
+
+    stats = pool.get_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    pool.release(again)
+    assert pool.get_stats()["idle"] == {f"127.0.0.1:{peer.port}": 1}
+    pool.close_all()
+    assert pool.get_stats()["idle"] == {}
+
+
+def test_pool_evicts_idle_connections(peer):
+    pool = ConnectionPool(idle_timeout=0.05)
+    conn, _ = pool.acquire("127.0.0.1", peer.port, 1.0)
+    pool.release(conn)
+    time.sleep(0.1)
+
+    fresh, reused = pool.acquire("127.0.0.1", peer.port, 1.0)
+    assert fresh is not conn and not reused
+    stats = pool.get_stats()
+    assert (stats["evicted_idle"], stats["hits"], stats["misses"]) == (1, 0, 2)
+    pool.discard(fresh)
+
+
+def test_pool_closes_connections_over_limit(peer):
+    pool = ConnectionPool(max_connections_per_peer=1)
+    first, _ = pool.acquire("127.0.0.1", peer.port, 1.0)
+    second, _ = pool.acquire("127.0.0.1", peer.port, 1.0)
+    pool.release(first)
+    pool.release(second)
+
+    stats = pool.get_stats()
+    assert stats["overflow_closed"] == 1
+    assert stats["idle"] == {f"127.0.0.1:{peer.port}": 1}
+    assert second.sock.fileno() == -1
+    pool.close_all()
+
+
+def test_pool_discards_connection_closed_by_peer(peer):
+    pool = ConnectionPool()
+    conn, _ = pool.acquire("127.0.0.1", peer.port, 1.0)
+    pool.release(conn)
+    assert _wait_for(lambda: len(peer.connections) == 1)
+    # shutdown y no close: el hilo del peer aún tiene el socket abierto en makefile
+    peer.connections[0].shutdown(socket.SHUT_RDWR)
+
+    # acquire comprueba el socket libre antes de entregarlo y abre otro
+    assert _wait_for(lambda: not pool._is_alive(conn))
+    fresh, reused = pool.acquire("127.0.0.1", peer.port, 1.0)
+    assert fresh is not conn and not reused
+    stats = pool.get_stats()
+    assert (stats["broken"], stats["hits"], stats["misses"]) == (1, 0, 2)
+    pool.discard(fresh)
+
+
+def test_pool_connect_failure():
+    pool = ConnectionPool()
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    listener.close()
+
+    assert pool.acquire("127.0.0.1", port, 0.5) == (None, False)
+    assert pool.get_stats()["misses"] == 0
+
+
+def _client() -> TCPClient:
+    return TCPClient(multiplex=False, framing="line", codec="json")
+
+
+def _request(client: TCPClient, port: int, msg_type: str) -> Message | None:
+    return client.send_message("127.0.0.1", port, Message(msg_type, "client", "peer"), timeout=1.0)
+
+
+def test_non_idempotent_request_not_resent_after_lost_reply(peer):
+    client = _client()
+    try:
+        assert _request(client, peer.port, MessageType.DATA_STAT) is not None
+
+        # El peer ejecuta DATA_REMOVE sobre la conexión reutilizada y la cierra sin responder
+        assert _request(client, peer.port, MessageType.DATA_REMOVE) is None
+        time.sleep(0.1)
+        assert peer.received == [MessageType.DATA_STAT, MessageType.DATA_REMOVE]
+        assert len(peer.connections) == 1
+    finally:
+        client.close()
+
+
+def test_idempotent_request_resent_on_new_connection(peer):
+    client = _client()
+    try:
+        assert _request(client, peer.port, MessageType.DATA_STAT) is not None
+
+        response = _request(client, peer.port, MessageType.DATA_LIST)
+        assert response is not None and response.header["type"] == MessageType.DATA_LIST + "_ACK"
+        assert peer.received == [MessageType.DATA_STAT, MessageType.DATA_LIST, MessageType.DATA_LIST]
+        assert len(peer.connections) == 2
+    finally:
+        client.close()
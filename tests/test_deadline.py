@@ -0,0 +1,57 @@
+"""
+Deadlines de send_message: se fijan en la copia enviada y no en el Message del llamador.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("DFTP_SUBNET", "127.0.0.112/28")
+
+from server.modules.comm import CommunicationNode, Message, MessageType
+from server.modules.comm.communication_node import loopback
+from server.modules.comm.communication_node.multicast import message_for
+
+PORT = 9000
+
+
+@pytest.fixture(params=[("loopback", 113), ("tcp", 115)], ids=["loopback", "tcp"])
+def nodes(request, monkeypatch):
+    path, host = request.param
+    monkeypatch.setattr(loopback, "ENABLED", path == "loopback")
+    client = CommunicationNode("client", f"127.0.0.{host}", PORT)
+    server = CommunicationNode("server", f"127.0.0.{host + 1}", PORT)
+    # Responde con el deadline con el que recibió el mensaje
+    server.register_handler(MessageType.DISCOVERY_QUERY_ALL,
+                            lambda m: Message(MessageType.DISCOVERY_QUERY_ALL_ACK, server.ip, m.header.get("src"),
+                                              payload={"deadline": m.metadata.get("deadline")}))
+    try:
+        yield client, server
+    finally:
+        client.stop_server()
+        server.stop_server()
+
+
+def test_reused_message_is_sent_after_previous_deadline(nodes):
+    client, server = nodes
+    msg = Message(MessageType.DISCOVERY_QUERY_ALL, client.ip, server.ip)
+
+    first = client.send_message(server.ip, PORT, msg, timeout=0.2)
+    assert first is not None and first.payload["deadline"] is not None
+    assert "deadline" not in msg.metadata
+
+    # Pasado el deadline del primer envío, el mismo mensaje se envía con el deadline del nuevo timeout
+    time.sleep(0.3)
+    sent_at = time.time()
+    second = client.send_message(server.ip, PORT, msg, timeout=2.0)
+    assert second is not None
+    assert second.payload["deadline"] >= sent_at + 1.0
+
+
+def test_message_for_drops_stale_deadline():
+    msg = Message(MessageType.GOSSIP_UPDATE, "127.0.0.113", None, metadata={"deadline": 1.0, "trace_id": "t"})
+    copy = message_for(msg, "127.0.0.114")
+    assert "deadline" not in copy.metadata
+    assert copy.metadata["trace_id"] == "t"
@@ -0,0 +1,146 @@
+"""
+Vencimientos del DiscoveryNode: TimerWheel y PhiAccrualDetector.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import pytest
+
+from server.modules.discovery.discovery_node.entities.timer_wheel import TimerWheel
+from server.modules.discovery.discovery_node.entities import failure_detector
+from server.modules.discovery.discovery_node.entities.failure_detector import PhiAccrualDetector, PHI_SUSPECT, PHI_EVICT
+
+
+def _wheel() -> TimerWheel:
+    # 8 casilleros de 1 s: una vuelta son 8 s
+    return TimerWheel(1.0, slots=8, now=0.0)
+
+
+def test_wheel_due_keys_only():
+    wheel = _wheel()
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 4.0)
+
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ["a"]
+    assert len(wheel) == 1
+    assert wheel.advance(4.0) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_wheel_reschedule_earlier():
+    wheel = _wheel()
+    wheel.schedule("a", 6.0)
+    wheel.schedule("a", 2.0)
+
+    assert wheel.advance(2.0) == ["a"]
+    # La entrada anterior sigue en su casillero y se descarta al visitarlo
+    assert wheel.advance(7.0) == []
+    assert len(wheel) == 0
+
+
+def test_wheel_reschedule_later():
+    wheel = _wheel()
+    wheel.schedule("a", 2.0)
+    wheel.schedule("a", 6.0)
+
+    assert wheel.advance(5.0) == []
+    assert wheel.advance(6.0) == ["a"]
+
+
+def test_wheel_cancel():
+    wheel = _wheel()
+    wheel.schedule("a", 2.0)
+    wheel.schedule("b", 2.0)
+    wheel.cancel("a")
+    wheel.cancel("missing")
+
+    assert len(wheel) == 1
+    assert wheel.advance(3.0) == ["b"]
+
+
+def test_wheel_deadline_more_than_one_turn_ahead():
+    wheel = _wheel()
+    wheel.schedule("a", 20.0)
+
+    # Se visita su casillero en las vueltas anteriores (ticks 4 y 12) sin vencer
+    assert wheel.advance(4.0) == []
+    assert wheel.advance(12.0) == []
+    assert len(wheel) == 1
+    assert wheel.advance(19.9) == []
+    assert wheel.advance(20.0) == ["a"]
+
+
+def test_wheel_catches_up_after_long_gap():
+    wheel = _wheel()
+    for i in range(1, 8):
+        wheel.schedule(f"k{i}", float(i))
+    wheel.schedule("later", 105.0)
+
+    # Más de una vuelta sin avanzar: cada casillero se revisa una sola vez y vence todo lo atrasado
+    assert sorted(wheel.advance(100.0)) == [f"k{i}" for i in range(1, 8)]
+    assert wheel.advance(104.0) == []
+    assert wheel.advance(105.0) == ["later"]
+
+
+def test_wheel_past_deadline_fires_on_next_tick():
+    wheel = _wheel()
+    wheel.advance(10.0)
+    # El tick del deadline ya se revisó: se programa en el siguiente en lugar de una vuelta después
+    wheel.schedule("late", 3.0)
+
+    assert wheel.advance(11.0) == ["late"]
+
+
+def test_wheel_rejects_non_positive_tick():
+    with pytest.raises(ValueError):
+        TimerWheel(0)
+
+
+def _detector(*timestamps: float) -> PhiAccrualDetector:
+    detector = PhiAccrualDetector()
+    for t in timestamps:
+        detector.record(t)
+    return detector
+
+
+@pytest.mark.parametrize("timestamps", [(), (0.0, 1.0, 2.0, 3.0), (0.0, 1.0, 3.5, 4.0, 7.0)])
+@pytest.mark.parametrize("threshold", [1.0, PHI_SUSPECT, PHI_EVICT])
+def test_phi_reaches_threshold_at_elapsed_for(timestamps, threshold):
+    detector = _detector(*timestamps)
+    elapsed = detector.elapsed_for(threshold)
+
+    assert detector.phi(elapsed) == pytest.approx(threshold, rel=1e-3)
+    assert detector.phi(elapsed - 0.05) < threshold < detector.phi(elapsed + 0.05)
+
+
+def test_phi_grows_with_silence():
+    detector = _detector(0.0, 1.0, 2.0, 3.0)
+    values = [detector.phi(e) for e in (0.0, 1.0, 3.0, 6.0, 60.0)]
+
+    assert values == sorted(values)
+    assert values[-1] == failure_detector._PHI_MAX
+
+
+def test_irregular_heartbeats_are_suspected_later():
+    regular = _detector(*[float(i) for i in range(10)])
+    irregular = _detector(0.0, 0.2, 2.0, 2.3, 5.0, 5.1, 8.0, 8.4, 9.0, 9.1)
+
+    assert irregular.elapsed_for(PHI_SUSPECT) > regular.elapsed_for(PHI_SUSPECT)
+
+
+def test_duplicate_and_replicated_timestamps_are_ignored():
+    detector = _detector(0.0, 1.0, 2.0)
+    stats = detector.get_stats()
+
+    # El mismo heartbeat recibido directamente y replicado, uno casi a la vez y uno atrasado
+    detector.record(2.0)
+    detector.record(2.0 + failure_detector._MIN_INTERVAL / 2)
+    detector.record(1.5)
+
+    assert detector.get_stats() == stats
+    assert stats["samples"] == 2 and stats["mean"] == pytest.approx(1.0)
+
+    # El siguiente intervalo se mide desde el heartbeat más reciente
+    detector.record(3.0)
+    assert detector.get_stats()["samples"] == 3
+    assert detector.get_stats()["mean"] == pytest.approx(1.0, abs=0.01)
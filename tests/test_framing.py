@@ -0,0 +1,180 @@
+"""
+Tramas sobre TCP (tcp_protocol.framing): FrameReader, MAX_FRAME_SIZE y negociación de WireFormat.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import socket
+
+import pytest
+
+from server.modules.comm import Message, MessageType
+from server.modules.comm.message.codec import JSON_CODEC, get_codec
+from server.modules.comm.communication_node.tcp_protocol import framing
+from server.modules.comm.communication_node.tcp_protocol.framing import (
+    FrameReader, FrameError, WireFormat, FRAMING_LINE, FRAMING_LENGTH, MAGIC, HEADER_SIZE, encode_frame,
+    encode_reply, decode_message, decode_header)
+
+
+class _Socket:
+    """Socket falso: cada recv_into entrega el siguiente trozo (o lanza la excepción indicada)."""
+
+    def __init__(self, *chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, view) -> int:
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        if isinstance(chunk, Exception):
+            raise chunk
+        n = min(len(chunk), len(view))
+        view[:n] = chunk[:n]
+        if n < len(chunk):
+            self.chunks.insert(0, chunk[n:])
+        return n
+
+
+def _message(i: int = 0, **payload) -> Message:
+    return Message(MessageType.DATA_STAT, "10.0.0.1", "10.0.0.2", payload={"i": i, **payload})
+
+
+def _length_frame(message: Message, codec: str = "json") -> bytes:
+    c = get_codec(codec)
+    return encode_frame(c.encode(message), FRAMING_LENGTH, c.id)
+
+
+def _line_frame(message: Message) -> bytes:
+    return encode_frame(JSON_CODEC.encode(message), FRAMING_LINE)
+
+
+def _read_all(reader: FrameReader) -> list:
+    frames = []
+    while (frame := reader.read_frame()) is not None:
+        frames.append(frame)
+    return frames
+
+
+def _split(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_length_frame_split_across_recvs():
+    msg = _message(payload="x" * 5000)
+    data = _length_frame(msg, "binary")
+
+    frames = _read_all(FrameReader(_Socket(*_split(data, 3)), initial_size=16))
+
+    assert len(frames) == 1 and frames[0].framing == FRAMING_LENGTH
+    decoded = decode_message(frames[0])
+    assert decoded.payload == msg.payload and decoded.header == msg.header
+
+
+def test_several_frames_in_one_recv():
+    messages = [_message(i) for i in range(5)]
+    data = b"".join(_length_frame(m) for m in messages)
+
+    frames = _read_all(FrameReader(_Socket(data)))
+
+    assert [decode_message(f).payload["i"] for f in frames] == list(range(5))
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1 << 20])
+def test_line_and_length_frames_mixed(chunk):
+    messages = [_message(i) for i in range(6)]
+    data = b"".join(_line_frame(m) if i % 2 else _length_frame(m, "binary") for i, m in enumerate(messages))
+
+    frames = _read_all(FrameReader(_Socket(*_split(data, chunk)), initial_size=32))
+
+    assert [f.framing for f in frames] == [FRAMING_LENGTH, FRAMING_LINE] * 3
+    assert [decode_message(f).payload["i"] for f in frames] == list(range(6))
+
+
+def test_read_resumes_after_timeout():
+    first, second = _length_frame(_message(1)), _line_frame(_message(2))
+    cut = len(second) // 2
+    reader = FrameReader(_Socket(first + second[:cut], socket.timeout(), second[cut:]))
+
+    assert decode_message(reader.read_frame()).payload["i"] == 1
+    with pytest.raises(socket.timeout):
+        reader.read_frame()
+    assert reader.has_buffered()
+    assert decode_message(reader.read_frame()).payload["i"] == 2
+    assert reader.read_frame() is None
+
+
+def test_closed_mid_frame_leaves_bytes_buffered():
+    data = _length_frame(_message())
+    reader = FrameReader(_Socket(data[:-1]))
+
+    assert reader.read_frame() is None
+    assert reader.has_buffered()
+
+
+def test_oversized_length_frame_rejected():
+    header = bytes([MAGIC, 0]) + (framing.MAX_FRAME_SIZE + 1).to_bytes(4, "big")
+
+    with pytest.raises(FrameError):
+        decode_header(header)
+    # Se rechaza con la cabecera, sin esperar (ni reservar) el cuerpo anunciado
+    with pytest.raises(FrameError):
+        FrameReader(_Socket(header)).read_frame()
+
+
+def test_oversized_line_rejected(monkeypatch):
+    monkeypatch.setattr(framing, "MAX_FRAME_SIZE", 1024)
+    reader = FrameReader(_Socket(b"{" + b"x" * 2048))
+
+    with pytest.raises(FrameError):
+        reader.read_frame()
+
+
+def test_frame_at_max_size_accepted(monkeypatch):
+    monkeypatch.setattr(framing, "MAX_FRAME_SIZE", 1024)
+    body = b"y" * 1024
+    frames = _read_all(FrameReader(_Socket(encode_frame(body, FRAMING_LENGTH)), initial_size=16))
+
+    assert [f.payload for f in frames] == [body]
+
+
+def _negotiate(client: WireFormat, message: Message) -> bytes:
+    """Envía message con client a un servidor en memoria y aplica la respuesta; retorna la petición enviada."""
+    data = client.encode(message)
+    frame = FrameReader(_Socket(data)).read_frame()
+    request = decode_message(frame)
+    reply = Message(MessageType.DATA_STAT_ACK, "10.0.0.2", "10.0.0.1", payload={"ok": True})
+    client.accept(decode_message(FrameReader(_Socket(encode_reply(reply, request, frame))).read_frame()))
+    return data
+
+
+def test_wire_format_negotiates_length_and_binary():
+    client = WireFormat(FRAMING_LENGTH, "binary", compress=False)
+
+    first = _negotiate(client, _message(1))
+    assert first[0] != MAGIC and first.endswith(b"\n")
+    assert (client.framing, client.codec.name) == (FRAMING_LENGTH, "binary")
+
+    second = client.encode(_message(2))
+    assert second[0] == MAGIC
+    flags, length = decode_header(second)
+    assert flags & framing.FLAG_CODEC_MASK == get_codec("binary").id
+    assert length == len(second) - HEADER_SIZE
+
+
+def test_wire_format_stays_on_lines_with_old_server():
+    client = WireFormat(FRAMING_LENGTH, "binary", compress=False)
+    client.encode(_message())
+
+    # Un servidor antiguo no confirma nada en su respuesta
+    client.accept(Message(MessageType.DATA_STAT_ACK, "10.0.0.2", "10.0.0.1"))
+
+    assert (client.framing, client.codec.name) == (FRAMING_LINE, "json")
+    assert client.encode(_message()).endswith(b"\n")
+
+
+def test_line_client_never_offers_length():
+    client = WireFormat(FRAMING_LINE, "binary")
+    msg = _message()
+    client.encode(msg)
+
+    assert "framing" not in msg.metadata and "compression" not in msg.metadata
+    assert client.preferred_codec == "json"
@@ -0,0 +1,79 @@
+"""
+Puntuación de carga y orden de los resultados de QUERY_BY_ROLE (discovery.load).
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from server.modules.discovery import load
+from server.modules.discovery.load import ORDERS, load_score, rank_nodes
+
+
+def test_load_score():
+    assert load_score(None) == 0.0
+    assert load_score({}) == 0.0
+    assert load_score({"queue": 2, "inflight": 1, "sessions": 3}) == 6.0
+    assert load_score({"latency_ms": load.LATENCY_UNIT_MS * 2}) == pytest.approx(2.0)
+    assert load_score({"queue": 1, "disk_free": load.DISK_LOW - 1}) == 1.0 + load.DISK_PENALTY
+    assert load_score({"queue": 1, "disk_free": load.DISK_LOW}) == 1.0
+
+
+def _nodes() -> list[dict]:
+    return [
+        {"name": "busy", "load": {"queue": 8}},
+        {"name": "flaky", "load": {}, "suspect": True},
+        {"name": "idle", "load": {"queue": 0}},
+        {"name": "mid", "load": {"queue": 3}},
+    ]
+
+
+@pytest.mark.parametrize("order", ORDERS)
+def test_suspects_last_in_every_order(order):
+    nodes = _nodes()
+    ranked = rank_nodes(nodes, order, random.Random(1))
+
+    assert ranked[-1]["name"] == "flaky"
+    assert sorted(n["name"] for n in ranked) == sorted(n["name"] for n in nodes)
+    assert [n["name"] for n in nodes] == ["busy", "flaky", "idle", "mid"]
+
+
+def test_table_keeps_order():
+    assert [n["name"] for n in rank_nodes(_nodes(), "table")] == ["busy", "idle", "mid", "flaky"]
+
+
+def test_least_loaded_sorts_by_score():
+    assert [n["name"] for n in rank_nodes(_nodes(), "least_loaded")] == ["idle", "mid", "busy", "flaky"]
+
+
+def test_weighted_random_favours_less_loaded():
+    rng = random.Random(42)
+    nodes = [{"name": "busy", "load": {"queue": 9}}, {"name": "idle", "load": {}}]
+    first = [rank_nodes(nodes, "weighted_random", rng)[0]["name"] for _ in range(2000)]
+
+    # Pesos 1/10 y 1/1: el libre sale primero ~10 de cada 11 veces, pero el cargado no queda excluido
+    assert 0.85 < first.count("idle") / len(first) < 0.95
+    assert "busy" in first
+
+
+def test_weighted_random_is_reproducible_with_seed():
+    ranked = [[n["name"] for n in rank_nodes(_nodes(), "weighted_random", random.Random(7))] for _ in range(2)]
+    assert ranked[0] == ranked[1]
+
+
+def test_invalid_order_raises():
+    with pytest.raises(ValueError):
+        rank_nodes(_nodes(), "fastest")
+
+
+def test_invalid_balance_fails_at_import():
+    env = dict(os.environ, DFTP_DISCOVERY_BALANCE="fastest")
+    result = subprocess.run([sys.executable, "-c", "import server.modules.discovery.load"], env=env,
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+    assert result.returncode != 0
+    assert "DFTP_DISCOVERY_BALANCE" in result.stderr
@@ -0,0 +1,40 @@
+"""
+Entrega loopback entre nodos del mismo proceso: el receptor no comparte el payload del emisor.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import os
+
+os.environ.setdefault("DFTP_SUBNET", "127.0.0.128/28")
+
+from server.modules.comm import CommunicationNode, Message, MessageType
+from server.modules.comm.communication_node import loopback
+
+PORT = 9000
+
+
+def test_receiver_changes_to_nested_payload_do_not_reach_sender():
+    sender = CommunicationNode("sender", "127.0.0.129", PORT)
+    receiver = CommunicationNode("receiver", "127.0.0.130", PORT)
+    sent = {"nodes": [{"name": "a", "load": {"queue": 1}}]}
+    answer = {"nodes": [{"name": "b"}]}
+
+    def handle(message: Message) -> Message:
+        # El receptor modifica valores anidados del mensaje recibido
+        message.payload["nodes"][0]["load"]["queue"] = 99
+        message.payload["nodes"].append({"name": "x"})
+        return Message(MessageType.DISCOVERY_QUERY_ALL_ACK, receiver.ip, sender.ip, payload=answer)
+
+    receiver.register_handler(MessageType.DISCOVERY_QUERY_ALL, handle)
+    try:
+        assert loopback.lookup(receiver.ip, PORT) is receiver
+        response = sender.send_message(receiver.ip, PORT, Message(MessageType.DISCOVERY_QUERY_ALL, sender.ip,
+                                                                  receiver.ip, payload=sent))
+        assert sent == {"nodes": [{"name": "a", "load": {"queue": 1}}]}
+
+        # Y al revés: la respuesta tampoco comparte sus valores con el handler
+        response.payload["nodes"][0]["name"] = "changed"
+        assert answer == {"nodes": [{"name": "b"}]}
+    finally:
+        sender.stop_server()
+        receiver.stop_server()
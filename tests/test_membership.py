@@ -0,0 +1,181 @@
+"""
+Protocolo DISCOVERY_WATCH: MembershipLog del discovery node, MembershipCache y
+LocationNode._handle_event.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import threading
+import time
+
+from server.modules.comm import Message, MessageType
+from server.modules.discovery.discovery_node.entities.membership_log import MembershipLog, JOIN, LEAVE, UPDATE
+from server.modules.discovery.location_node.location_node import LocationNode
+from server.modules.discovery.location_node.membership_cache import MembershipCache, WatchState, IDLE_TTLS
+
+
+def _node(name: str, ip: str, role: str = "DATA", **extra) -> dict:
+    return {"name": name, "ip": ip, "role": role, **extra}
+
+
+# ---------------- MembershipLog ----------------
+def test_since_returns_later_events_of_roles():
+    log = MembershipLog()
+    log.append(JOIN, _node("d1", "10.0.0.1"))
+    log.append(JOIN, _node("a1", "10.0.0.2", "AUTH"))
+    log.append(LEAVE, _node("d1", "10.0.0.1"))
+
+    assert [(e["revision"], e["event"]) for e in log.since(log.epoch, 1, {"DATA"})] == [(3, LEAVE)]
+    assert [e["revision"] for e in log.since(log.epoch, 0, {"DATA", "AUTH"})] == [1, 2, 3]
+    assert log.since(log.epoch, 3, {"DATA"}) == []
+
+
+def test_since_needs_snapshot_for_other_epoch_or_future_revision():
+    log = MembershipLog()
+    log.append(JOIN, _node("d1", "10.0.0.1"))
+
+    assert log.since("other-epoch", 0, {"DATA"}) is None
+    assert log.since(log.epoch, 2, {"DATA"}) is None
+    assert log.since(log.epoch, 0, {"DATA"}) is not None
+
+
+def test_since_needs_snapshot_for_dropped_events():
+    log = MembershipLog(capacity=2)
+    for i in range(4):
+        log.append(JOIN, _node(f"d{i}", f"10.0.0.{i}"))
+
+    # Solo quedan las revisiones 3 y 4: desde la 1 falta la 2
+    assert log.since(log.epoch, 1, {"DATA"}) is None
+    assert [e["revision"] for e in log.since(log.epoch, 2, {"DATA"})] == [3, 4]
+
+
+# ---------------- MembershipCache ----------------
+def _cache() -> MembershipCache:
+    cache = MembershipCache(ttl=60)
+    cache.put(("role", "DATA"), [{"name": "d1", "ip": "10.0.0.1"}])
+    cache.put(("load", "DATA"), [{"name": "d1", "ip": "10.0.0.1", "load": {"queue": 1}}])
+    cache.put(("name", "d1"), {"name": "d1", "ip": "10.0.0.1"})
+    return cache
+
+
+def test_join_adds_to_role_and_expires_load():
+    cache = _cache()
+    before = cache.get(("role", "DATA"))[1]
+
+    assert cache.apply_event(JOIN, _node("d2", "10.0.0.2"))
+    assert cache.get(("role", "DATA")) == (True, [{"name": "d1", "ip": "10.0.0.1"}, {"name": "d2", "ip": "10.0.0.2"}])
+    assert cache.get(("load", "DATA")) == (False, None)
+    # La lista anterior no cambia en sitio
+    assert before == [{"name": "d1", "ip": "10.0.0.1"}]
+
+
+def test_update_replaces_by_name():
+    cache = _cache()
+
+    assert cache.apply_event(UPDATE, _node("d1", "10.0.0.9", suspect=True))
+    assert cache.get(("role", "DATA")) == (True, [{"name": "d1", "ip": "10.0.0.9", "suspect": True}])
+    assert cache.get(("load", "DATA")) == (False, None)
+    assert cache.get(("name", "d1")) == (False, None)
+
+
+def test_leave_removes_from_role_and_load():
+    cache = _cache()
+    cache.apply_event(JOIN, _node("d2", "10.0.0.2"))
+    cache.put(("load", "DATA"), [{"name": "d1", "ip": "10.0.0.1"}, {"name": "d2", "ip": "10.0.0.2"}])
+
+    assert cache.apply_event(LEAVE, _node("d1", "10.0.0.1"))
+    assert cache.get(("role", "DATA")) == (True, [{"name": "d2", "ip": "10.0.0.2"}])
+    assert cache.get(("load", "DATA")) == (True, [{"name": "d2", "ip": "10.0.0.2"}])
+    assert cache.get(("name", "d1")) == (False, None)
+
+    # Sin nodos la entrada queda vacía (None), como una consulta sin resultados
+    cache.apply_event(LEAVE, _node("d2", "10.0.0.2"))
+    assert cache.get(("role", "DATA")) == (True, None)
+    assert cache.get(("load", "DATA")) == (True, None)
+
+
+def test_event_for_role_without_entry():
+    cache = _cache()
+    assert not cache.apply_event(JOIN, _node("a1", "10.0.0.5", "AUTH"))
+    assert cache.get_stale(("role", "AUTH")) is None
+
+
+def test_watched_entries_do_not_expire():
+    cache = MembershipCache(ttl=0.05)
+    cache.put(("role", "DATA"), [{"name": "d1", "ip": "10.0.0.1"}])
+    cache.put(("role", "AUTH"), [{"name": "a1", "ip": "10.0.0.2"}])
+    cache.put(("load", "DATA"), [{"name": "d1", "ip": "10.0.0.1"}])
+    cache.set_watched({"DATA"}, time.monotonic() + 10)
+    time.sleep(0.06)
+
+    assert cache.get(("role", "DATA"))[0]
+    assert not cache.get(("role", "AUTH"))[0]
+    # Las listas con carga no se vigilan: se refrescan por TTL
+    assert not cache.get(("load", "DATA"))[0]
+    assert set(cache.due_for_refresh()) == {("role", "AUTH"), ("load", "DATA")}
+
+    # Vencida la suscripción, la entrada vuelve a caducar por TTL
+    cache.set_watched({"DATA"}, time.monotonic())
+    assert not cache.get(("role", "DATA"))[0]
+
+
+def test_idle_entries_are_dropped_unless_kept():
+    cache = MembershipCache(ttl=0.01)
+    cache.put(("role", "DATA"), [])
+    cache.put(("role", "AUTH"), [])
+    time.sleep(0.01 * IDLE_TTLS + 0.02)
+
+    assert cache.due_for_refresh(keep={("role", "AUTH")}) == [("role", "AUTH")]
+    assert cache.roles() == {"AUTH"}
+
+
+# ---------------- LocationNode._handle_event ----------------
+def _location(revision: int = 3) -> LocationNode:
+    """LocationNode sin red ni hilos: solo el estado que usa _handle_event."""
+    node = LocationNode.__new__(LocationNode)
+    node.node_name = "loc"
+    node.membership = _cache()
+    node._watch = WatchState("10.0.0.100", "epoch-1", revision, {"DATA"})
+    node._watch_lock = threading.Lock()
+    node._refresh_event = threading.Event()
+    node._role_callbacks = {}
+    return node
+
+
+def _event(revision: int, event: str, node: dict, src: str = "10.0.0.100", epoch: str = "epoch-1") -> Message:
+    return Message(MessageType.DISCOVERY_EVENT, src, "10.0.0.50",
+                   payload={"epoch": epoch, "revision": revision, "event": event, "node": node})
+
+
+def test_handle_event_applies_next_revision():
+    node = _location()
+    seen = []
+    node._role_callbacks["DATA"] = [lambda event, n: seen.append((event, n["name"]))]
+
+    node._handle_event(_event(4, JOIN, _node("d2", "10.0.0.2")))
+
+    assert node._watch.revision == 4
+    assert [n["name"] for n in node.membership.get(("role", "DATA"))[1]] == ["d1", "d2"]
+    assert seen == [(JOIN, "d2")]
+
+
+def test_handle_event_ignores_old_foreign_or_other_epoch():
+    node = _location()
+
+    node._handle_event(_event(3, JOIN, _node("d2", "10.0.0.2")))
+    node._handle_event(_event(4, JOIN, _node("d3", "10.0.0.3"), src="10.0.0.101"))
+    node._handle_event(_event(4, JOIN, _node("d4", "10.0.0.4"), epoch="epoch-2"))
+
+    assert node._watch.revision == 3
+    assert [n["name"] for n in node.membership.get(("role", "DATA"))[1]] == ["d1"]
+    assert not node._watch.resync
+
+
+def test_handle_event_gap_requests_resync():
+    node = _location()
+
+    node._handle_event(_event(5, LEAVE, _node("d1", "10.0.0.1")))
+
+    assert node._watch.resync
+    assert node._refresh_event.is_set()
+    assert node._watch.revision == 3
+    assert [n["name"] for n in node.membership.get(("role", "DATA"))[1]] == ["d1"]
@@ -0,0 +1,76 @@
+"""
+Envíos en paralelo de CommunicationNode: entrega completa en modo quorum y separación por carril.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import os
+import threading
+import time
+
+os.environ.setdefault("DFTP_SUBNET", "127.0.0.96/28")
+
+from server.modules.comm import CommunicationNode, Message, MessageType
+from server.modules.consistency import GossipNode
+
+PORT = 9000
+
+
+class _Receiver(CommunicationNode):
+    """Nodo que registra los GOSSIP_UPDATE recibidos; los de slow tardan delay segundos en responder."""
+
+    def __init__(self, name: str, ip: str, delay: float = 0.0):
+        super().__init__(name, ip, PORT)
+        self.delay = delay
+        self.received = threading.Event()
+        self.register_handler(MessageType.GOSSIP_UPDATE, self._handle)
+
+    def _handle(self, message: Message) -> Message:
+        time.sleep(self.delay)
+        self.received.set()
+        return Message(MessageType.GOSSIP_UPDATE, self.ip, message.header.get("src"), payload={"success": True})
+
+
+class _Gossip(GossipNode):
+    def _update_peers(self):
+        pass
+
+
+def test_quorum_update_reaches_every_peer(monkeypatch):
+    # Un solo hilo de envíos de control: al cumplirse el quorum los demás envíos aún están en cola
+    monkeypatch.setenv("DFTP_CONTROL_MULTICAST_WORKERS", "1")
+    monkeypatch.setenv("DFTP_MULTICAST_WORKERS", "1")
+    sender = _Gossip("gossip", "127.0.0.97", PORT, heartbeat_interval=0)
+    peers = [_Receiver(f"peer{i}", f"127.0.0.{98 + i}", delay=0.0 if i == 0 else 0.1) for i in range(4)]
+    try:
+        sender.peers = {p.node_name: p.ip for p in peers}
+        assert sender.notify_local_change({"op": "noop"}, sync=True, required_acks=1)
+        for peer in peers:
+            assert peer.received.wait(3), f"{peer.node_name} no recibió el cambio"
+    finally:
+        for node in [sender] + peers:
+            node.stop_server()
+
+
+def test_control_fanout_not_queued_behind_data_fanout(monkeypatch):
+    monkeypatch.setenv("DFTP_MULTICAST_WORKERS", "2")
+    client = CommunicationNode("client", "127.0.0.105", PORT)
+    slow = CommunicationNode("slow", "127.0.0.106", PORT)
+    idle = CommunicationNode("idle", "127.0.0.107", PORT)
+    release = threading.Event()
+    slow.register_handler(MessageType.DATA_META_REQUEST, lambda m: release.wait(5) and None)
+    idle.register_handler(MessageType.DISCOVERY_QUERY_ALL,
+                          lambda m: Message(MessageType.DISCOVERY_QUERY_ALL_ACK, idle.ip, m.header.get("src"), payload={}))
+    try:
+        # Ocupa todos los hilos de envío del carril "default" con esperas largas
+        for _ in range(4):
+            threading.Thread(target=client.multicast, args=([slow.ip], Message(MessageType.DATA_META_REQUEST, client.ip, None)),
+                             kwargs={"timeout": 5.0}, daemon=True).start()
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        result = client.hedged_send([idle.ip], Message(MessageType.DISCOVERY_QUERY_ALL, client.ip, None), timeout=1.0)
+        assert result and time.monotonic() - started < 0.5
+    finally:
+        release.set()
+        for node in (client, slow, idle):
+            node.stop_server()
@@ -0,0 +1,145 @@
+"""
+Circuit breaker por peer (PeerHealthTable) y orden de peers de CommunicationNode.rank_peers.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import pytest
+
+from server.modules.comm import CommunicationNode
+from server.modules.comm.communication_node.tcp_protocol import peer_health
+from server.modules.comm.communication_node.tcp_protocol.peer_health import (
+    PeerHealthTable, FAILURE_THRESHOLD, COOLDOWN, MAX_COOLDOWN, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN)
+
+A = ("10.0.0.1", 9000)
+B = ("10.0.0.2", 9000)
+C = ("10.0.0.3", 9000)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(peer_health, "time", clock)
+    return clock
+
+
+def _state(table: PeerHealthTable, peer: tuple[str, int]) -> dict:
+    return table.get_stats()[f"{peer[0]}:{peer[1]}"]
+
+
+def _open(table: PeerHealthTable, peer: tuple[str, int]):
+    for _ in range(FAILURE_THRESHOLD):
+        assert table.allow(peer)
+        table.record_failure(peer)
+
+
+def test_opens_after_threshold_failures(clock):
+    table = PeerHealthTable()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        table.record_failure(A)
+    assert _state(table, A)["state"] == STATE_CLOSED
+    assert table.allow(A)
+
+    table.record_failure(A)
+    assert _state(table, A)["state"] == STATE_OPEN
+    assert not table.allow(A)
+    assert _state(table, A)["rejected"] == 1
+
+
+def test_half_open_allows_single_probe(clock):
+    table = PeerHealthTable()
+    _open(table, A)
+
+    clock.now += COOLDOWN - 0.01
+    assert not table.allow(A)
+
+    clock.now += 0.01
+    assert table.allow(A)
+    assert _state(table, A)["state"] == STATE_HALF_OPEN
+    # Mientras la prueba está en vuelo, el resto se rechaza
+    assert not table.allow(A)
+    assert not table.allow(A)
+
+
+def test_failed_probe_doubles_cooldown_up_to_max(clock):
+    table = PeerHealthTable()
+    _open(table, A)
+
+    cooldown = COOLDOWN
+    while cooldown < MAX_COOLDOWN:
+        clock.now += cooldown
+        assert table.allow(A)
+        table.record_failure(A)
+        cooldown = min(cooldown * 2, MAX_COOLDOWN)
+        assert _state(table, A)["state"] == STATE_OPEN
+        assert _state(table, A)["open_for"] == pytest.approx(cooldown)
+
+    clock.now += cooldown
+    assert table.allow(A)
+    table.record_failure(A)
+    assert _state(table, A)["open_for"] == pytest.approx(MAX_COOLDOWN)
+
+
+def test_success_resets(clock):
+    table = PeerHealthTable()
+    _open(table, A)
+    clock.now += COOLDOWN
+    assert table.allow(A)
+    table.record_failure(A)
+
+    clock.now += COOLDOWN * 2
+    assert table.allow(A)
+    table.record_success(A, 0.01)
+    state = _state(table, A)
+    assert (state["state"], state["consecutive_failures"]) == (STATE_CLOSED, 0)
+    assert table.allow(A) and table.allow(A)
+
+    # La espera vuelve a la inicial y hacen falta otra vez FAILURE_THRESHOLD fallos
+    _open(table, A)
+    assert _state(table, A)["open_for"] == pytest.approx(COOLDOWN)
+
+
+def test_success_between_failures_keeps_circuit_closed(clock):
+    table = PeerHealthTable()
+    for _ in range(3):
+        for _ in range(FAILURE_THRESHOLD - 1):
+            table.record_failure(A)
+        table.record_success(A)
+    assert _state(table, A)["state"] == STATE_CLOSED
+
+
+def test_rank_puts_open_circuits_last(clock):
+    table = PeerHealthTable()
+    _open(table, A)
+    table.record_success(B, 0.2)
+    table.record_success(C, 0.05)
+
+    assert table.rank([A, B, C]) == [C, B, A]
+    # Sin latencia se conserva el orden recibido salvo por el circuito
+    assert table.rank([A, B, C], by_latency=False) == [B, C, A]
+    # Los peers sin muestras van primero, para medirlos
+    assert table.rank([B, ("10.0.0.9", 9000)]) == [("10.0.0.9", 9000), B]
+
+    # Con la espera vencida admite una prueba: por delante de los abiertos, detrás de los sanos
+    clock.now += COOLDOWN
+    _open(table, B)
+    assert table.rank([B, A, C]) == [C, A, B]
+
+
+def test_rank_peers_accepts_ips_and_node_dicts(clock):
+    node = CommunicationNode("ranker", "127.0.0.161", 9000)
+    try:
+        _open(node.client.health, ("127.0.0.162", 9000))
+        nodes = [{"name": "d1", "ip": "127.0.0.162"}, {"name": "d2", "ip": "127.0.0.163"}]
+
+        assert [n["name"] for n in node.rank_peers(nodes, 9000)] == ["d2", "d1"]
+        assert node.rank_peers(["127.0.0.162", "127.0.0.163"], 9000) == ["127.0.0.163", "127.0.0.162"]
+    finally:
+        node.stop_server()
@@ -0,0 +1,137 @@
+"""
+Replicación de la tabla de registros entre discovery nodes: RegisterTable.digest / merge y
+DiscoveryNode._merge_entries.
+
+Ejecutar desde la raíz del repositorio: python -m pytest -q tests
+"""
+import itertools
+import os
+import time
+
+import pytest
+
+os.environ.setdefault("DFTP_SUBNET", "127.0.0.144/28")
+
+from server.modules.discovery import DiscoveryNode
+from server.modules.discovery.discovery_node.entities.membership_log import JOIN, LEAVE, UPDATE
+from server.modules.discovery.discovery_node.entities.register_table import RegisterTable
+from server.modules.discovery.discovery_node.entities.service_register import ServiceRegister, NodeType
+
+PORT = 9000
+
+# Cada test usa una IP propia: la dirección de un nodo detenido no se libera al instante
+_hosts = itertools.count(145)
+
+
+def _table(*nodes: ServiceRegister) -> RegisterTable:
+    table = RegisterTable()
+    for node in nodes:
+        table.add_node(node)
+    return table
+
+
+def test_digest_maps_names_to_last_heartbeat():
+    table = _table(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 100.0),
+                   ServiceRegister("a1", "10.0.0.2", NodeType.AUTH, 200.0))
+    assert table.digest() == {"d1": 100.0, "a1": 200.0}
+
+
+def test_merge_unknown_node_joins():
+    table = RegisterTable()
+    node = ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 100.0)
+    assert table.merge(node) == (True, [(JOIN, node)])
+    assert table.get_nodes_by_role(NodeType.DATA) == (node,)
+
+
+def test_newer_entry_wins_and_older_is_ignored():
+    table = _table(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 100.0))
+
+    assert table.merge(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 90.0)) == (False, [])
+    assert table.merge(ServiceRegister("d1", "10.0.0.9", NodeType.DATA, 100.0)) == (False, [])
+    assert table.get_node("d1").ip == "10.0.0.1"
+
+    # Mismo nodo, solo avanza el heartbeat: sin evento y sin snapshot nuevo
+    revision = table.revision
+    assert table.merge(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 110.0, load={"queue": 3})) == (True, [])
+    assert table.revision == revision
+    assert table.digest() == {"d1": 110.0}
+    assert table.get_node("d1").load == {"queue": 3}
+
+    applied, events = table.merge(ServiceRegister("d1", "10.0.0.5", NodeType.DATA, 120.0))
+    assert applied and [(e, n.ip) for e, n in events] == [(UPDATE, "10.0.0.5")]
+    assert table.get_node("d1").ip == "10.0.0.5"
+    assert table.digest() == {"d1": 120.0}
+
+
+def test_role_change_leaves_old_role_and_joins_new():
+    table = _table(ServiceRegister("d2", "10.0.0.2", NodeType.DATA, 100.0))
+
+    applied, events = table.merge(ServiceRegister("d2", "10.0.0.2", NodeType.AUTH, 110.0))
+
+    assert applied
+    assert [(e, n.node_role) for e, n in events] == [(LEAVE, NodeType.DATA), (JOIN, NodeType.AUTH)]
+    assert table.get_nodes_by_role(NodeType.DATA) == ()
+    assert [n.name for n in table.get_nodes_by_role(NodeType.AUTH)] == ["d2"]
+
+
+def test_merge_ip_conflict_raises():
+    table = _table(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, 100.0),
+                   ServiceRegister("d2", "10.0.0.2", NodeType.DATA, 100.0))
+
+    with pytest.raises(ValueError):
+        table.merge(ServiceRegister("d3", "10.0.0.1", NodeType.DATA, 200.0))
+    with pytest.raises(ValueError):
+        table.merge(ServiceRegister("d2", "10.0.0.1", NodeType.DATA, 200.0))
+    assert {n.name: n.ip for n in table.get_all_nodes()} == {"d1": "10.0.0.1", "d2": "10.0.0.2"}
+
+
+@pytest.fixture
+def discovery():
+    node = DiscoveryNode("disc", f"127.0.0.{next(_hosts)}", PORT, heartbeat_timeout=6, sync_interval=0)
+    try:
+        yield node
+    finally:
+        node.stop_server()
+
+
+def _events(node: DiscoveryNode) -> list[tuple[str, str, str]]:
+    log = node.membership_log
+    return [(e["event"], e["node"]["name"], e["node"]["role"])
+            for e in log.since(log.epoch, 0, {r.value for r in NodeType})]
+
+
+def test_merge_entries_applies_and_notifies(discovery):
+    now = time.time()
+    entries = [ServiceRegister("d1", "10.0.0.1", NodeType.DATA, now).to_dict(),
+               ServiceRegister("peer", "10.0.0.3", NodeType.DISCOVERY, now).to_dict()]
+
+    assert discovery._merge_entries(entries) == 1
+    assert discovery.register_table.get_node("peer") is None
+    assert _events(discovery) == [(JOIN, "d1", "DATA")]
+
+    # El mismo nodo con otro rol: quien vigila DATA lo pierde y quien vigila AUTH lo recibe
+    assert discovery._merge_entries([ServiceRegister("d1", "10.0.0.1", NodeType.AUTH, now + 1).to_dict()]) == 1
+    assert _events(discovery)[1:] == [(LEAVE, "d1", "DATA"), (JOIN, "d1", "AUTH")]
+
+
+def test_merge_entries_does_not_revive_evicted_node(discovery):
+    stale = time.time() - discovery.heartbeat_timeout - 1
+    assert discovery._merge_entries([ServiceRegister("gone", "10.0.0.4", NodeType.DATA, stale).to_dict()]) == 0
+    assert discovery.register_table.get_node("gone") is None
+    assert _events(discovery) == []
+
+    # Si el nodo sigue en la tabla, la entrada antigua pero más reciente que la local sí se aplica
+    discovery.register_table.add_node(ServiceRegister("kept", "10.0.0.5", NodeType.DATA, stale - 5))
+    assert discovery._merge_entries([ServiceRegister("kept", "10.0.0.5", NodeType.DATA, stale).to_dict()]) == 1
+    assert discovery.register_table.digest()["kept"] == stale
+
+
+def test_merge_entries_skips_ip_conflict(discovery):
+    now = time.time()
+    discovery.register_table.add_node(ServiceRegister("d1", "10.0.0.1", NodeType.DATA, now))
+    entries = [ServiceRegister("d2", "10.0.0.1", NodeType.DATA, now).to_dict(),
+               ServiceRegister("d3", "10.0.0.3", NodeType.DATA, now).to_dict()]
+
+    assert discovery._merge_entries(entries) == 1
+    assert discovery.register_table.get_node("d2") is None
+    assert discovery.register_table.get_node("d3").ip == "10.0.0.3"
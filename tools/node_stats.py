@@ -0,0 +1,98 @@
+"""
+Muestra las RPCs más costosas de un conjunto de nodos a partir de sus métricas NODE_STATS.
+
+Uso, desde la raíz del repositorio:
+    python3 -m tools.node_stats 10.0.0.2 10.0.0.3:9001 --sort p99 --top 10
+    python3 tools/node_stats.py 10.0.0.2 --side client --json
+
+Ver --help para todas las opciones.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Con "python3 tools/<script>.py" el directorio del script queda en sys.path en lugar de la raíz
+# del repositorio; se añade la raíz para que "import server" resuelva
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from server.modules.comm.message import Message, MessageType
+from server.modules.comm.communication_node.tcp_protocol import TCPClient
+
+SORT_KEYS = {
+    "total": lambda m: m["latency"]["avg_ms"] * m["requests"],
+    "p99": lambda m: m["latency"]["p99_ms"],
+    "requests": lambda m: m["requests"],
+    "errors": lambda m: m["errors"],
+    "bytes": lambda m: m["bytes_in"] + m["bytes_out"],
+}
+
+
+def parse_target(target: str, default_port: int) -> tuple[str, int]:
+    ip, _, port = target.partition(":")
+    return ip, int(port) if port else default_port
+
+
+def fetch(client: TCPClient, ip: str, port: int, timeout: float, reset: bool) -> dict | None:
+    """Pide NODE_STATS a ip:port y retorna el payload de la respuesta (None si no responde)."""
+    msg = Message(MessageType.NODE_STATS, None, ip, payload={"reset": reset})
+    response = client.send_message(ip, port, msg, await_response=True, timeout=timeout)
+    if response is None or response.header.get("type") != MessageType.NODE_STATS_ACK:
+        return None
+    return response.payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Muestra las RPCs más costosas de un conjunto de nodos (NODE_STATS)")
+    parser.add_argument("targets", nargs="+", help="Nodos como ip o ip:puerto")
+    parser.add_argument("--port", type=int, default=9000, help="Puerto por defecto de los nodos")
+    parser.add_argument("--side", choices=("client", "server"), default="server", help="Lado de las métricas a mostrar")
+    parser.add_argument("--sort", choices=tuple(SORT_KEYS), default="total", help="Orden de la tabla")
+    parser.add_argument("--top", type=int, default=20, help="Filas a mostrar")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--reset", action="store_true", help="Reinicia los contadores tras leerlos")
+    parser.add_argument("--json", action="store_true", help="Imprime las respuestas completas en JSON")
+    args = parser.parse_args()
+
+    client = TCPClient(multiplex=False)
+    rows, dumps = [], {}
+    try:
+        for target in args.targets:
+            ip, port = parse_target(target, args.port)
+            stats = fetch(client, ip, port, args.timeout, args.reset)
+            if stats is None:
+                print(f"# {ip}:{port} no respondió")
+                continue
+
+            dumps[f"{ip}:{port}"] = stats
+            for msg_type, m in stats["messages"][args.side].items():
+                rows.append((stats["node"], msg_type, m))
+
+    finally:
+        client.close()
+
+    if args.json:
+        print(json.dumps(dumps, indent=2))
+        return
+
+    rows.sort(key=lambda r: SORT_KEYS[args.sort](r[2]), reverse=True)
+    print(f"{'nodo':<16} {'tipo':<32} {'reqs':>8} {'errs':>6} {'avg ms':>9} {'p50':>9} {'p99':>9} {'max':>9} {'KiB in':>10} {'KiB out':>10}")
+    for node, msg_type, m in rows[:args.top]:
+        lat = m["latency"]
+        print(f"{node:<16} {msg_type:<32} {m['requests']:>8} {m['errors']:>6} {lat['avg_ms']:>9.2f} {lat['p50_ms']:>9.2f} "
+              f"{lat['p99_ms']:>9.2f} {lat['max_ms']:>9.2f} {m['bytes_in'] / 1024:>10.1f} {m['bytes_out'] / 1024:>10.1f}")
+
+    print()
+    for stats in dumps.values():
+        comp = stats.get("compression")
+        if not comp:
+            continue
+        c, d = comp["compress"], comp["decompress"]
+        print(f"{stats['node']:<16} compresión: {c['frames']} tramas ratio {c['ratio']:.2f} ({c['skipped']} sin ganancia) "
+              f"cpu {c['seconds'] * 1000:.1f} ms | descompresión: {d['frames']} tramas cpu {d['seconds'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
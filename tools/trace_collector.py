@@ -0,0 +1,144 @@
+"""
+Junta los spans (NODE_TRACES) de un conjunto de nodos y muestra el camino crítico de los últimos
+comandos FTP.
+
+Uso, desde la raíz del repositorio:
+    python3 -m tools.trace_collector 10.0.0.2 10.0.0.3:9001
+    python3 tools/trace_collector.py 10.0.0.2 --trace <trace_id> --tree
+
+Ver --help para todas las opciones.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Con "python3 tools/<script>.py" el directorio del script queda en sys.path en lugar de la raíz
+# del repositorio; se añade la raíz para que "import server" resuelva
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from server.modules.comm.message import Message, MessageType
+from server.modules.comm.communication_node.tcp_protocol import TCPClient
+
+
+def parse_target(target: str, default_port: int) -> tuple[str, int]:
+    ip, _, port = target.partition(":")
+    return ip, int(port) if port else default_port
+
+
+def collect(targets: list[str], port: int, timeout: float, trace_id: str = None, since: float = None) -> list[dict]:
+    """Pide NODE_TRACES a cada nodo y retorna todos los spans juntos."""
+    client = TCPClient(multiplex=False)
+    spans = []
+    try:
+        for target in targets:
+            ip, p = parse_target(target, port)
+            msg = Message(MessageType.NODE_TRACES, None, ip, payload={"trace_id": trace_id, "since": since})
+            response = client.send_message(ip, p, msg, await_response=True, timeout=timeout)
+            if response is None or response.header.get("type") != MessageType.NODE_TRACES_ACK:
+                print(f"# {ip}:{p} no respondió")
+                continue
+            spans.extend(response.payload.get("spans", []))
+
+    finally:
+        client.close()
+
+    return spans
+
+
+def build_traces(spans: list[dict]) -> dict:
+    """Agrupa los spans por traza y enlaza cada uno con sus hijos (campo "children")."""
+    traces = {}
+    by_id = {}
+    for span in spans:
+        span = dict(span, children=[])
+        by_id[span["span_id"]] = span
+        traces.setdefault(span["trace_id"], []).append(span)
+
+    for span in by_id.values():
+        parent = by_id.get(span["parent_id"])
+        if parent is not None:
+            parent["children"].append(span)
+
+    return traces
+
+
+def critical_path(span: dict, out: list):
+    """
+    Agrega a out (span, tiempo propio) a lo largo del camino crítico de span: desde su fin se
+    toma hacia atrás el hijo que terminó último antes del instante actual, y el tiempo no cubierto
+    por hijos cuenta como tiempo propio de span. Los hijos que terminan después que el padre
+    (mensajes sin respuesta esperada) se recortan a su fin.
+    """
+    end = span["start"] + span["duration"]
+    cursor = end
+    own = 0.0
+    children = sorted(span["children"], key=lambda c: c["start"] + c["duration"], reverse=True)
+
+    for child in children:
+        child_end = min(child["start"] + child["duration"], end)
+        if child_end > cursor or child["start"] >= cursor:
+            continue
+        own += max(0.0, cursor - child_end)
+        critical_path(child, out)
+        cursor = max(child["start"], span["start"])
+
+    own += max(0.0, cursor - span["start"])
+    out.append((span, own))
+
+
+def print_trace(root: dict, show_tree: bool):
+    total = root["duration"]
+    print(f"\n{root['name']}  {total * 1000:.1f} ms  trace={root['trace_id']}  node={root['node']}"
+          f"{'  ERROR' if root['error'] else ''}")
+
+    path = []
+    critical_path(root, path)
+    print("  camino crítico (tiempo propio):")
+    for span, own in sorted(path, key=lambda p: p[1], reverse=True):
+        if own <= 0:
+            continue
+        share = own / total * 100 if total > 0 else 0.0
+        print(f"    {share:5.1f}%  {own * 1000:9.2f} ms  {span['node']:<16} {span['name']}")
+
+    if show_tree:
+        print("  spans:")
+        _print_tree(root, root["start"], 2)
+
+
+def _print_tree(span: dict, origin: float, depth: int):
+    offset = (span["start"] - origin) * 1000
+    tags = " ".join(f"{k}={v}" for k, v in span["tags"].items())
+    print(f"{'  ' * depth}+{offset:8.2f} ms {span['duration'] * 1000:9.2f} ms  {span['node']:<16} {span['name']} {tags}")
+    for child in sorted(span["children"], key=lambda c: c["start"]):
+        _print_tree(child, origin, depth + 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Junta los spans de varios nodos (NODE_TRACES) y muestra el camino crítico por comando FTP")
+    parser.add_argument("targets", nargs="+", help="Nodos como ip o ip:puerto (routing, processing y data)")
+    parser.add_argument("--port", type=int, default=9000, help="Puerto por defecto de los nodos")
+    parser.add_argument("--trace", help="Mostrar solo esta traza")
+    parser.add_argument("--since", type=float, help="Solo spans iniciados después de este timestamp UNIX")
+    parser.add_argument("--last", type=int, default=10, help="Comandos más recientes a mostrar")
+    parser.add_argument("--slowest", action="store_true", help="Ordenar por duración en vez de por fecha")
+    parser.add_argument("--tree", action="store_true", help="Mostrar además el árbol completo de spans")
+    parser.add_argument("--timeout", type=float, default=2.0)
+    parser.add_argument("--json", action="store_true", help="Imprime los spans recolectados en JSON")
+    args = parser.parse_args()
+
+    spans = collect(args.targets, args.port, args.timeout, args.trace, args.since)
+    if args.json:
+        print(json.dumps(spans, indent=2))
+        return
+
+    roots = [s for trace in build_traces(spans).values() for s in trace if s["parent_id"] is None]
+    roots.sort(key=lambda r: r["duration"] if args.slowest else r["start"], reverse=True)
+    for root in roots[:args.last]:
+        print_trace(root, args.tree)
+
+
+if __name__ == "__main__":
+    main()